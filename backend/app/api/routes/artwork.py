@@ -3,10 +3,11 @@
 import logging
 from typing import Any
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
 from pydantic import BaseModel
 
-from app.services.artwork import compute_album_hash, get_artwork_path
+from app.services.artwork import ALL_ARTWORK_SIZES, compute_album_hash, get_artwork_path
+from app.services.artwork_cache import artwork_response, get_artwork_cache
 from app.services.background import get_background_manager
 
 logger = logging.getLogger(__name__)
@@ -143,27 +144,23 @@ async def get_artwork_status(album_hash: str) -> ArtworkStatusResponse:
 
 
 @router.get("/{album_hash}/{size}")
-async def get_artwork_by_hash(album_hash: str, size: str) -> Any:
+async def get_artwork_by_hash(album_hash: str, size: str, request: Request) -> Response:
     """Get artwork by album hash.
 
     This is the preferred endpoint for fetching artwork as it uses
     the stable album hash directly rather than requiring a track ID.
+    Sizes: full, thumb, 64, 128, 256, 512; WebP is served when accepted.
     """
-    from starlette.responses import FileResponse
-
-    if size not in ("full", "thumb"):
-        raise HTTPException(status_code=400, detail="Size must be 'full' or 'thumb'")
-
-    artwork_path = get_artwork_path(album_hash, size)
+    if size not in ALL_ARTWORK_SIZES:
+        raise HTTPException(
+            status_code=400, detail=f"Size must be one of: {', '.join(ALL_ARTWORK_SIZES)}"
+        )
 
-    if not artwork_path.exists():
+    image = await get_artwork_cache().get_negotiated(album_hash, size, request.headers.get("accept"))
+    if image is None:
         raise HTTPException(status_code=404, detail="Artwork not found")
 
-    return FileResponse(
-        artwork_path,
-        media_type="image/jpeg",
-        headers={"Cache-Control": "public, max-age=31536000"},
-    )
+    return artwork_response(request, image)
 
 
 class ArtworkStatusBatchRequest(BaseModel):
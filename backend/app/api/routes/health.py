@@ -362,7 +362,10 @@ async def get_worker_status(db: DbSession) -> WorkerStatus:
 
     # Get pending analysis count
     try:
-        queues.append(QueueStats(name="analysis", pending=len(bg._analysis_tasks) if bg else 0))
+        from app.services.analysis_queue import get_queue_counts
+
+        queue_counts = await get_queue_counts(db)
+        queues.append(QueueStats(name="analysis", pending=queue_counts["pending"]))
     except Exception as e:
         logger.warning(f"Could not get queue stats: {e}")
 
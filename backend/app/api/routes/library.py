@@ -1,5 +1,6 @@
 """Library management endpoints."""
 
+from functools import partial
 from pathlib import Path
 from typing import Literal
 
@@ -11,7 +12,8 @@ from sqlalchemy import func, select
 from app.api.deps import DbSession
 from app.api.ratelimit import SCAN_RATE_LIMIT, limiter
 from app.config import settings
-from app.db.models import AlbumType, Track, TrackAnalysis, TrackStatus
+from app.db.models import Track, TrackAnalysis, TrackStatus
+from app.services import library_stats
 from app.services.import_service import ImportService, MusicImportError, save_upload_to_temp
 from app.services.scanner import LibraryScanner
 from app.services.tasks import get_sync_progress
@@ -597,7 +599,8 @@ async def get_artist_image(
     from urllib.parse import unquote
 
     from app.db.models import ArtistInfo
-    from app.services.artwork import compute_album_hash, extract_and_save_artwork, get_artwork_path
+    from app.services.artwork import compute_album_hash, extract_and_save_artwork
+    from app.services.artwork_cache import artwork_response, get_artwork_cache
     from app.services.lastfm import get_lastfm_service
 
     # Validate size
@@ -721,34 +724,16 @@ async def get_artist_image(
 
     if track:
         album_hash = compute_album_hash(track.artist, track.album)
-        artwork_size = "thumb" if size in ("small", "medium") else "full"
-        artwork_path = get_artwork_path(album_hash, artwork_size)
-
-        if artwork_path.exists():
-            def stream_artwork():
-                with open(artwork_path, "rb") as f:
-                    yield f.read()
-
-            return StreamingResponse(
-                stream_artwork(),
-                media_type="image/jpeg",
-                headers={"Cache-Control": "public, max-age=31536000"},
-            )
-
-        # Try extracting from audio file
-        file_path = Path(track.file_path)
-        if file_path.exists():
-            extract_and_save_artwork(file_path, track.artist, track.album)
-            if artwork_path.exists():
-                def stream_artwork():
-                    with open(artwork_path, "rb") as f:
-                        yield f.read()
-
-                return StreamingResponse(
-                    stream_artwork(),
-                    media_type="image/jpeg",
-                    headers={"Cache-Control": "public, max-age=31536000"},
-                )
+        artwork_size = {"small": "128", "medium": "256"}.get(size, "full")
+        # Served from memory or disk; extracted from the audio file on a miss
+        image = await get_artwork_cache().get_negotiated(
+            album_hash,
+            artwork_size,
+            request.headers.get("accept"),
+            extract=partial(extract_and_save_artwork, Path(track.file_path), track.artist, track.album),
+        )
+        if image is not None:
+            return artwork_response(request, image)
 
     # No image available
     raise HTTPException(status_code=404, detail="No artist image available")
@@ -1310,78 +1295,15 @@ class MoodDistributionResponse(BaseModel):
 @router.get("/mood-distribution", response_model=MoodDistributionResponse)
 async def get_mood_distribution(
     db: DbSession,
-    grid_size: int = 10,
+    grid_size: int = Query(library_stats.DEFAULT_MOOD_GRID_SIZE, ge=1, le=library_stats.MAX_MOOD_GRID_SIZE),
 ) -> MoodDistributionResponse:
     """Get mood (energy × valence) distribution for heatmap visualization.
 
     Divides the 0-1 × 0-1 space into a grid and counts tracks per cell.
-    Returns sample track IDs per cell for preview/playback.
+    Returns sample track IDs per cell for preview/playback. Served from a
+    snapshot that is refreshed after scans and analysis.
     """
-    from sqlalchemy.orm import selectinload
-
-    # Fetch all tracks with analysis
-    tracks_query = (
-        select(Track)
-        .options(selectinload(Track.analyses))
-        .where(Track.status == TrackStatus.ACTIVE)
-    )
-    result = await db.execute(tracks_query)
-    tracks = result.scalars().all()
-
-    # Build grid
-    cell_size = 1.0 / grid_size
-    cells: dict[tuple[int, int], list[str]] = {}
-
-    total_with_mood = 0
-    total_without_mood = 0
-
-    for track in tracks:
-        # Get latest analysis
-        if not track.analyses:
-            total_without_mood += 1
-            continue
-
-        latest = max(track.analyses, key=lambda a: a.version)
-        features = latest.features or {}
-
-        energy = features.get("energy")
-        valence = features.get("valence")
-
-        if energy is None or valence is None:
-            total_without_mood += 1
-            continue
-
-        total_with_mood += 1
-
-        # Determine cell
-        energy_cell = min(int(energy * grid_size), grid_size - 1)
-        valence_cell = min(int(valence * grid_size), grid_size - 1)
-        key = (energy_cell, valence_cell)
-
-        if key not in cells:
-            cells[key] = []
-        cells[key].append(str(track.id))
-
-    # Build response
-    mood_cells = []
-    for (e_cell, v_cell), track_ids in cells.items():
-        mood_cells.append(
-            MoodCell(
-                energy_min=e_cell * cell_size,
-                energy_max=(e_cell + 1) * cell_size,
-                valence_min=v_cell * cell_size,
-                valence_max=(v_cell + 1) * cell_size,
-                track_count=len(track_ids),
-                sample_track_ids=track_ids[:5],  # Keep up to 5 samples
-            )
-        )
-
-    return MoodDistributionResponse(
-        cells=mood_cells,
-        grid_size=grid_size,
-        total_with_mood=total_with_mood,
-        total_without_mood=total_without_mood,
-    )
+    return MoodDistributionResponse(**await library_stats.get_mood_distribution(db, grid_size))
 
 
 # ============================================================================
@@ -1771,44 +1693,8 @@ async def get_ego_centric_map(
 
 @router.get("/stats", response_model=LibraryStats)
 async def get_library_stats(db: DbSession) -> LibraryStats:
-    """Get library statistics."""
-    # Total tracks
-    total_tracks = await db.scalar(select(func.count(Track.id))) or 0
-
-    # Unique albums
-    total_albums = await db.scalar(select(func.count(func.distinct(Track.album)))) or 0
-
-    # Unique artists
-    total_artists = await db.scalar(select(func.count(func.distinct(Track.artist)))) or 0
-
-    # By album type
-    albums = await db.scalar(
-        select(func.count(Track.id)).where(Track.album_type == AlbumType.ALBUM)
-    ) or 0
-    compilations = await db.scalar(
-        select(func.count(Track.id)).where(Track.album_type == AlbumType.COMPILATION)
-    ) or 0
-    soundtracks = await db.scalar(
-        select(func.count(Track.id)).where(Track.album_type == AlbumType.SOUNDTRACK)
-    ) or 0
-
-    # Analysis status - count only tracks at current analysis version
-    from app.config import ANALYSIS_VERSION
-
-    analyzed_tracks = await db.scalar(
-        select(func.count(Track.id)).where(Track.analysis_version >= ANALYSIS_VERSION)
-    ) or 0
-
-    return LibraryStats(
-        total_tracks=total_tracks,
-        total_albums=total_albums,
-        total_artists=total_artists,
-        albums=albums,
-        compilations=compilations,
-        soundtracks=soundtracks,
-        analyzed_tracks=analyzed_tracks,
-        pending_analysis=total_tracks - analyzed_tracks,
-    )
+    """Get library statistics (from a snapshot refreshed after scans and analysis)."""
+    return LibraryStats(**await library_stats.get_library_stats(db))
 
 
 class CancelResponse(BaseModel):
@@ -1819,18 +1705,22 @@ class CancelResponse(BaseModel):
 
 
 @router.post("/analysis/cancel", response_model=CancelResponse)
-async def cancel_analysis() -> CancelResponse:
+async def cancel_analysis(db: DbSession) -> CancelResponse:
     """Cancel running analysis tasks.
 
-    Clears analysis task tracking. Note that in-progress subprocess tasks
-    may continue to completion, but no new tasks will be started.
+    Clears the analysis queue and analysis task tracking. Note that in-progress
+    subprocess tasks may continue to completion, but no new tasks will be started.
     """
+    from app.services.analysis_queue import clear_queue
     from app.services.background import get_background_manager
 
     bg = get_background_manager()
 
+    # Drop queued jobs first so the consumer can't start them
+    cancelled = await clear_queue(db)
+    await db.commit()
+
     # Cancel all running analysis tasks
-    cancelled = 0
     for task_id, task in list(bg._analysis_tasks.items()):
         if not task.done():
             task.cancel()
@@ -2406,6 +2296,9 @@ class AnalysisStatus(BaseModel):
     without_embeddings: int = 0
     embeddings_enabled: bool = True
     embeddings_disabled_reason: str | None = None
+    # Throughput in tracks per minute (last 5 minutes)
+    features_per_minute: float = 0.0
+    embeddings_per_minute: float = 0.0
 
 
 @router.get("/analysis/status", response_model=AnalysisStatus)
@@ -2454,6 +2347,11 @@ async def get_analysis_status(db: DbSession) -> AnalysisStatus:
 
     percent = (analyzed / total * 100) if total > 0 else 100.0
 
+    from app.services.background import get_background_manager
+
+    bg = get_background_manager()
+    throughput = bg.get_analysis_throughput()
+
     # Common fields for all responses
     common = {
         "total": total,
@@ -2465,13 +2363,14 @@ async def get_analysis_status(db: DbSession) -> AnalysisStatus:
         "without_embeddings": without_embeddings,
         "embeddings_enabled": caps["embeddings_enabled"],
         "embeddings_disabled_reason": caps["embeddings_disabled_reason"],
+        "features_per_minute": throughput["features"],
+        "embeddings_per_minute": throughput["embedding"],
     }
 
-    # Check if background analysis tasks are running
-    from app.services.background import get_background_manager
+    # Check if analysis jobs are running (in whichever worker consumes the queue)
+    from app.services.analysis_queue import get_queue_counts
 
-    bg = get_background_manager()
-    active_tasks = bg.get_analysis_task_count()
+    active_tasks = (await get_queue_counts(db))["running"] or bg.get_analysis_task_count()
 
     if active_tasks > 0:
         return AnalysisStatus(
@@ -2505,6 +2404,9 @@ class ExecutorStatus(BaseModel):
     max_failures: int
     crashed_track_ids: list[str]
     last_reset_ago: float | None
+    budget_mb: int = 0  # Memory budget shared by the analysis pools
+    reserved_mb: int = 0  # Projected RSS of running analysis jobs
+    pools: dict[str, dict[str, int]] = {}  # Per pool: workers, running, waiting, job_estimate_mb
 
 
 class ExecutorResetResponse(BaseModel):
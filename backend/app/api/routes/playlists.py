@@ -4,7 +4,9 @@ from uuid import UUID
 
 from fastapi import APIRouter, HTTPException, Query, status
 from pydantic import BaseModel, Field
-from sqlalchemy import delete, func, select, update
+from sqlalchemy import Integer, Uuid, column, delete, func, select, tuple_, update, values
+from sqlalchemy.orm import load_only
+from sqlalchemy.sql.expression import Values
 
 from app.api.deps import DbSession, RequiredProfile
 from app.db.models import ExternalTrack, ExternalTrackSource, Playlist, PlaylistTrack, Track
@@ -80,6 +82,7 @@ class PlaylistDetailResponse(BaseModel):
     is_wishlist: bool = False
     generation_prompt: str | None
     tracks: list[TrackInPlaylist]
+    next_cursor: str | None = None  # Set when a paged request has more items
     created_at: str
     updated_at: str
 
@@ -206,77 +209,88 @@ async def create_playlist(
     )
 
 
-@router.get("/{playlist_id}", response_model=PlaylistDetailResponse)
-async def get_playlist(
-    playlist_id: UUID,
-    db: DbSession,
-    profile: RequiredProfile,
-) -> PlaylistDetailResponse:
-    """Get a playlist by ID with its tracks.
+def _parse_cursor(cursor: str) -> tuple[int, UUID]:
+    """Split an item cursor ("<position>:<playlist_track_id>")."""
+    try:
+        position, _, pt_id = cursor.partition(":")
+        return int(position), UUID(pt_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        ) from None
 
-    Returns both local and external tracks mixed together by position.
-    """
-    playlist = await db.get(Playlist, playlist_id)
 
-    if not playlist or playlist.profile_id != profile.id:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Playlist not found",
+async def _playlist_detail(
+    db: DbSession,
+    playlist: Playlist,
+    limit: int | None = None,
+    after: str | None = None,
+) -> PlaylistDetailResponse:
+    """Build a playlist response, loading its items with one joined query."""
+    query = (
+        select(PlaylistTrack, Track, ExternalTrack)
+        .outerjoin(Track, Track.id == PlaylistTrack.track_id)
+        .outerjoin(ExternalTrack, ExternalTrack.id == PlaylistTrack.external_track_id)
+        .options(load_only(Track.id, Track.title, Track.artist, Track.album, Track.duration_seconds))
+        .where(PlaylistTrack.playlist_id == playlist.id)
+        .order_by(PlaylistTrack.position, PlaylistTrack.id)
+    )
+    if after:
+        query = query.where(
+            tuple_(PlaylistTrack.position, PlaylistTrack.id) > tuple_(*_parse_cursor(after))
         )
+    if limit:
+        query = query.limit(limit + 1)  # One extra row tells us whether there's a next page
+    rows = (await db.execute(query)).all()
 
-    # Get all playlist tracks ordered by position
-    result = await db.execute(
-        select(PlaylistTrack)
-        .where(PlaylistTrack.playlist_id == playlist_id)
-        .order_by(PlaylistTrack.position)
-    )
-    playlist_tracks = result.scalars().all()
+    next_cursor = None
+    if limit and len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1][0]
+        next_cursor = f"{last.position}:{last.id}"
 
     tracks = []
-    for pt in playlist_tracks:
-        if pt.track_id:
+    for pt, track, ext in rows:
+        if track is not None:
             # Local track
-            track = await db.get(Track, pt.track_id)
-            if track:
-                tracks.append(TrackInPlaylist(
-                    id=str(track.id),
-                    playlist_track_id=str(pt.id),
-                    type="local",
-                    title=track.title,
-                    artist=track.artist,
-                    album=track.album,
-                    duration_seconds=track.duration_seconds,
-                    position=pt.position,
-                    is_matched=False,
-                    matched_track_id=None,
-                    match_confidence=None,
-                    preview_url=None,
-                    external_links={},
-                ))
-        elif pt.external_track_id:
+            tracks.append(TrackInPlaylist(
+                id=str(track.id),
+                playlist_track_id=str(pt.id),
+                type="local",
+                title=track.title,
+                artist=track.artist,
+                album=track.album,
+                duration_seconds=track.duration_seconds,
+                position=pt.position,
+                is_matched=False,
+                matched_track_id=None,
+                match_confidence=None,
+                preview_url=None,
+                external_links={},
+            ))
+        elif ext is not None:
             # External track
-            ext = await db.get(ExternalTrack, pt.external_track_id)
-            if ext:
-                external_links = {}
-                if ext.external_data:
-                    if ext.external_data.get("spotify_url"):
-                        external_links["spotify"] = ext.external_data["spotify_url"]
-
-                tracks.append(TrackInPlaylist(
-                    id=str(ext.id),
-                    playlist_track_id=str(pt.id),
-                    type="external",
-                    title=ext.title,
-                    artist=ext.artist,
-                    album=ext.album,
-                    duration_seconds=ext.duration_seconds,
-                    position=pt.position,
-                    is_matched=ext.matched_track_id is not None,
-                    matched_track_id=str(ext.matched_track_id) if ext.matched_track_id else None,
-                    match_confidence=ext.match_confidence,
-                    preview_url=ext.preview_url,
-                    external_links=external_links,
-                ))
+            external_links = {}
+            if ext.external_data:
+                if ext.external_data.get("spotify_url"):
+                    external_links["spotify"] = ext.external_data["spotify_url"]
+
+            tracks.append(TrackInPlaylist(
+                id=str(ext.id),
+                playlist_track_id=str(pt.id),
+                type="external",
+                title=ext.title,
+                artist=ext.artist,
+                album=ext.album,
+                duration_seconds=ext.duration_seconds,
+                position=pt.position,
+                is_matched=ext.matched_track_id is not None,
+                matched_track_id=str(ext.matched_track_id) if ext.matched_track_id else None,
+                match_confidence=ext.match_confidence,
+                preview_url=ext.preview_url,
+                external_links=external_links,
+            ))
 
     return PlaylistDetailResponse(
         id=str(playlist.id),
@@ -286,11 +300,37 @@ async def get_playlist(
         is_wishlist=playlist.is_wishlist,
         generation_prompt=playlist.generation_prompt,
         tracks=tracks,
+        next_cursor=next_cursor,
         created_at=playlist.created_at.isoformat(),
         updated_at=playlist.updated_at.isoformat(),
     )
 
 
+@router.get("/{playlist_id}", response_model=PlaylistDetailResponse)
+async def get_playlist(
+    playlist_id: UUID,
+    db: DbSession,
+    profile: RequiredProfile,
+    limit: int | None = Query(None, ge=1, le=1000, description="Items per page (all items if omitted)"),
+    after: str | None = Query(None, description="next_cursor from the previous page"),
+) -> PlaylistDetailResponse:
+    """Get a playlist by ID with its tracks.
+
+    Returns both local and external tracks mixed together by position.
+    With `limit`, items are paged: pass the returned next_cursor as `after`
+    to get the following page.
+    """
+    playlist = await db.get(Playlist, playlist_id)
+
+    if not playlist or playlist.profile_id != profile.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Playlist not found",
+        )
+
+    return await _playlist_detail(db, playlist, limit=limit, after=after)
+
+
 @router.put("/{playlist_id}", response_model=PlaylistResponse)
 async def update_playlist(
     playlist_id: UUID,
@@ -433,7 +473,24 @@ async def add_tracks_to_playlist(
     await db.commit()
 
     # Return updated playlist
-    return await get_playlist(playlist_id, db, profile)
+    return await _playlist_detail(db, playlist)
+
+
+def _new_positions(ids: list[str]) -> Values | None:
+    """VALUES (key, position) rows for ids in their new order (last occurrence wins)."""
+    positions: dict[UUID, int] = {}
+    for position, id_str in enumerate(ids):
+        try:
+            positions[UUID(id_str)] = position
+        except ValueError:
+            continue
+    if not positions:
+        return None
+    return values(
+        column("key", Uuid),
+        column("position", Integer),
+        name="new_positions",
+    ).data(list(positions.items()))
 
 
 class ReorderTracksRequest(BaseModel):
@@ -463,59 +520,31 @@ async def reorder_playlist_tracks(
             detail="Playlist not found",
         )
 
-    # Prefer playlist_track_ids if provided
+    # Prefer playlist_track_ids if provided. Either way, all positions are set
+    # with one UPDATE ... FROM (VALUES ...); ids not in the playlist match no rows.
     if request.playlist_track_ids:
-        # Get current playlist track IDs
-        result = await db.execute(
-            select(PlaylistTrack.id).where(PlaylistTrack.playlist_id == playlist_id)
-        )
-        current_pt_ids = {str(row[0]) for row in result.all()}
-
-        # Update positions for each playlist track
-        for position, pt_id_str in enumerate(request.playlist_track_ids):
-            if pt_id_str not in current_pt_ids:
-                continue
-            try:
-                pt_id = UUID(pt_id_str)
-            except ValueError:
-                continue
-
-            await db.execute(
-                update(PlaylistTrack)
-                .where(PlaylistTrack.id == pt_id)
-                .values(position=position)
-            )
-    elif request.track_ids:
+        new_positions = _new_positions(request.playlist_track_ids)
+        key_column = PlaylistTrack.id
+    else:
         # Backwards compatibility: use track_ids (local tracks only)
-        result = await db.execute(
-            select(PlaylistTrack.track_id).where(
+        new_positions = _new_positions(request.track_ids)
+        key_column = PlaylistTrack.track_id
+
+    if new_positions is not None:
+        await db.execute(
+            update(PlaylistTrack)
+            .where(
                 PlaylistTrack.playlist_id == playlist_id,
-                PlaylistTrack.track_id.isnot(None),
+                key_column == new_positions.c.key,
             )
+            .values(position=new_positions.c.position)
+            .execution_options(synchronize_session=False)
         )
-        current_track_ids = {str(row[0]) for row in result.all() if row[0]}
-
-        for position, track_id_str in enumerate(request.track_ids):
-            if track_id_str not in current_track_ids:
-                continue
-            try:
-                track_id = UUID(track_id_str)
-            except ValueError:
-                continue
-
-            await db.execute(
-                update(PlaylistTrack)
-                .where(
-                    PlaylistTrack.playlist_id == playlist_id,
-                    PlaylistTrack.track_id == track_id,
-                )
-                .values(position=position)
-            )
 
     await db.commit()
 
     # Return updated playlist
-    return await get_playlist(playlist_id, db, profile)
+    return await _playlist_detail(db, playlist)
 
 
 @router.delete("/{playlist_id}/tracks/{track_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -621,7 +650,7 @@ async def get_wishlist(
         await db.commit()
         await db.refresh(wishlist)
 
-    return await get_playlist(wishlist.id, db, profile)
+    return await _playlist_detail(db, wishlist)
 
 
 @router.post("/wishlist/add", response_model=PlaylistDetailResponse)
@@ -685,7 +714,7 @@ async def add_to_wishlist(
 
     await db.commit()
 
-    return await get_playlist(wishlist.id, db, profile)
+    return await _playlist_detail(db, wishlist)
 
 
 class RecommendedArtistResponse(BaseModel):
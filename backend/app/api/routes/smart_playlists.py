@@ -259,7 +259,7 @@ async def refresh_smart_playlist(
     db: DbSession,
     profile: RequiredProfile,
 ) -> SmartPlaylistResponse:
-    """Refresh a smart playlist's cached track count."""
+    """Rebuild a smart playlist's membership and cached track count."""
     service = SmartPlaylistService(db)
     playlist = await service.get_by_id(playlist_id, profile.id)
 
@@ -1,19 +1,24 @@
 """Track endpoints."""
 
-from collections.abc import AsyncIterator, Iterator
+import logging
+from functools import partial
 from pathlib import Path
 from typing import Any
 from uuid import UUID
 
 from fastapi import APIRouter, BackgroundTasks, HTTPException, Query, Request, UploadFile
-from fastapi.responses import StreamingResponse
-from pydantic import BaseModel, ConfigDict
+from fastapi.responses import Response
+from pydantic import BaseModel, ConfigDict, Field
 from sqlalchemy import func, select
 from sqlalchemy.orm import selectinload
 
 from app.api.deps import DbSession, RequiredProfile
-from app.db.models import ProfilePlayHistory, Track, TrackAnalysis
-from app.services.artwork import compute_album_hash, get_artwork_path
+from app.db.models import ProfilePlayHistory, Track, TrackFeatures
+from app.services.artwork import compute_album_hash
+from app.services.audio_stream import stream_file
+from app.services.transcoding import TRANSCODE_FORMATS, get_transcode_cache, transcode_response
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/tracks", tags=["tracks"])
 
@@ -123,42 +128,16 @@ async def list_track_ids(
     # Audio feature filters
     has_feature_filter = any(x is not None for x in [energy_min, energy_max, valence_min, valence_max])
     if has_feature_filter:
-        from sqlalchemy import Float, cast
-
-        analysis_subq = (
-            select(
-                TrackAnalysis.track_id,
-                func.max(TrackAnalysis.version).label("max_version")
-            )
-            .where(TrackAnalysis.features.isnot(None))
-            .group_by(TrackAnalysis.track_id)
-            .subquery()
-        )
-        query = query.join(
-            analysis_subq,
-            Track.id == analysis_subq.c.track_id
-        ).join(
-            TrackAnalysis,
-            (TrackAnalysis.track_id == analysis_subq.c.track_id) &
-            (TrackAnalysis.version == analysis_subq.c.max_version)
-        )
+        query = query.join(TrackFeatures, TrackFeatures.track_id == Track.id)
 
         if energy_min is not None:
-            query = query.where(
-                cast(TrackAnalysis.features["energy"].astext, Float) >= energy_min
-            )
+            query = query.where(TrackFeatures.energy >= energy_min)
         if energy_max is not None:
-            query = query.where(
-                cast(TrackAnalysis.features["energy"].astext, Float) <= energy_max
-            )
+            query = query.where(TrackFeatures.energy <= energy_max)
         if valence_min is not None:
-            query = query.where(
-                cast(TrackAnalysis.features["valence"].astext, Float) >= valence_min
-            )
+            query = query.where(TrackFeatures.valence >= valence_min)
         if valence_max is not None:
-            query = query.where(
-                cast(TrackAnalysis.features["valence"].astext, Float) <= valence_max
-            )
+            query = query.where(TrackFeatures.valence <= valence_max)
 
     # Get total count
     count_query = select(func.count()).select_from(query.subquery())
@@ -273,46 +252,20 @@ async def list_tracks(
     # Note: must check `is not None` since 0.0 is a valid filter value but falsy
     has_feature_filter = any(x is not None for x in [energy_min, energy_max, valence_min, valence_max])
     if has_feature_filter:
-        from sqlalchemy import Float, cast
-
-        # Join with latest analysis that has features
-        analysis_subq = (
-            select(
-                TrackAnalysis.track_id,
-                func.max(TrackAnalysis.version).label("max_version")
-            )
-            .where(TrackAnalysis.features.isnot(None))
-            .group_by(TrackAnalysis.track_id)
-            .subquery()
-        )
-        query = query.join(
-            analysis_subq,
-            Track.id == analysis_subq.c.track_id
-        ).join(
-            TrackAnalysis,
-            (TrackAnalysis.track_id == analysis_subq.c.track_id) &
-            (TrackAnalysis.version == analysis_subq.c.max_version)
-        )
+        # Typed copy of the latest analysis features (one row per track)
+        query = query.join(TrackFeatures, TrackFeatures.track_id == Track.id)
 
         # Filter by energy range
         if energy_min is not None:
-            query = query.where(
-                cast(TrackAnalysis.features["energy"].astext, Float) >= energy_min
-            )
+            query = query.where(TrackFeatures.energy >= energy_min)
         if energy_max is not None:
-            query = query.where(
-                cast(TrackAnalysis.features["energy"].astext, Float) <= energy_max
-            )
+            query = query.where(TrackFeatures.energy <= energy_max)
 
         # Filter by valence range
         if valence_min is not None:
-            query = query.where(
-                cast(TrackAnalysis.features["valence"].astext, Float) >= valence_min
-            )
+            query = query.where(TrackFeatures.valence >= valence_min)
         if valence_max is not None:
-            query = query.where(
-                cast(TrackAnalysis.features["valence"].astext, Float) <= valence_max
-            )
+            query = query.where(TrackFeatures.valence <= valence_max)
 
     # Get total count
     count_query = select(func.count()).select_from(query.subquery())
@@ -393,34 +346,13 @@ async def get_similar_tracks(
     track_id: UUID,
     limit: int = Query(10, ge=1, le=50),
 ) -> list[TrackResponse]:
-    """Find similar tracks using embedding similarity (pgvector)."""
-    # Get the track's embedding
-    query = (
-        select(TrackAnalysis.embedding)
-        .where(TrackAnalysis.track_id == track_id)
-        .order_by(TrackAnalysis.version.desc())
-        .limit(1)
-    )
-    result = await db.execute(query)
-    embedding = result.scalar_one_or_none()
+    """Find similar tracks using embedding similarity (pgvector HNSW index)."""
+    from app.services.similarity import get_similar_tracks as find_similar_tracks
 
-    if embedding is None:
+    tracks = await find_similar_tracks(db, track_id, limit)
+    if tracks is None:
         raise HTTPException(status_code=404, detail="Track not analyzed yet")
 
-    # Find similar tracks using cosine distance
-    # Note: pgvector uses <=> for cosine distance, <-> for L2 distance
-    similar_query = (
-        select(Track)
-        .join(TrackAnalysis, Track.id == TrackAnalysis.track_id)
-        .where(Track.id != track_id)
-        .where(TrackAnalysis.embedding.isnot(None))
-        .order_by(TrackAnalysis.embedding.cosine_distance(embedding))
-        .limit(limit)
-    )
-
-    result = await db.execute(similar_query)
-    tracks = result.scalars().all()
-
     return [TrackResponse.model_validate(t) for t in tracks]
 
 
@@ -473,6 +405,7 @@ async def get_track_discover(
     from app.db.models import ArtistInfo, TrackStatus
     from app.services.lastfm import get_lastfm_service
     from app.services.search_links import generate_artist_search_url, generate_search_url
+    from app.services.similarity import get_similar_tracks as find_similar_tracks
 
     # Get the source track
     query = select(Track).where(Track.id == track_id)
@@ -482,28 +415,9 @@ async def get_track_discover(
     if not track:
         raise HTTPException(status_code=404, detail="Track not found")
 
-    # Get similar tracks (reuse the embedding similarity logic)
-    similar_tracks: list[TrackResponse] = []
-    embedding_query = (
-        select(TrackAnalysis.embedding)
-        .where(TrackAnalysis.track_id == track_id)
-        .order_by(TrackAnalysis.version.desc())
-        .limit(1)
-    )
-    embedding_result = await db.execute(embedding_query)
-    embedding = embedding_result.scalar_one_or_none()
-
-    if embedding is not None:
-        similar_query = (
-            select(Track)
-            .join(TrackAnalysis, Track.id == TrackAnalysis.track_id)
-            .where(Track.id != track_id)
-            .where(TrackAnalysis.embedding.isnot(None))
-            .order_by(TrackAnalysis.embedding.cosine_distance(embedding))
-            .limit(track_limit)
-        )
-        sim_result = await db.execute(similar_query)
-        similar_tracks = [TrackResponse.model_validate(t) for t in sim_result.scalars().all()]
+    # Get similar tracks (same index/cache as /similar)
+    tracks = await find_similar_tracks(db, track_id, track_limit)
+    similar_tracks = [TrackResponse.model_validate(t) for t in tracks or []]
 
     # Get similar artists from Last.fm (if artist is known)
     similar_artists: list[SimilarArtistInfo] = []
@@ -627,13 +541,26 @@ def get_audio_mime_type(file_path: Path) -> str:
     return AUDIO_MIME_TYPES.get(suffix, "application/octet-stream")
 
 
+TRANSCODE_FORMAT_PATTERN = "^(opus|aac|mp3)$"
+
+
 @router.get("/{track_id}/stream")
 async def stream_track(
     db: DbSession,
     track_id: UUID,
     request: Request,
-) -> StreamingResponse:
-    """Stream audio file with range request support for seeking."""
+    format: str | None = Query(None, pattern=TRANSCODE_FORMAT_PATTERN, description="Transcode to this format"),
+    bitrate: int | None = Query(None, ge=32, le=320, description="Transcode bitrate in kbps"),
+    start: float = Query(0, ge=0, description="Transcode from this position in seconds"),
+) -> Response:
+    """Stream audio file with range request support for seeking.
+
+    Supports single and multiple byte ranges, and ETag/Last-Modified
+    conditional requests (including If-Range).
+
+    With `format`, the file is transcoded on the fly (and cached once a full
+    transcode completes); seek with `start` instead of byte ranges.
+    """
     # Get track from database
     query = select(Track).where(Track.id == track_id)
     result = await db.execute(query)
@@ -643,78 +570,63 @@ async def stream_track(
         raise HTTPException(status_code=404, detail="Track not found")
 
     file_path = Path(track.file_path)
-    if not file_path.exists():
+    try:
+        if format:
+            return await transcode_response(request, track.id, file_path, format, bitrate, start)
+        return await stream_file(request, file_path, get_audio_mime_type(file_path))
+    except OSError:
         raise HTTPException(status_code=404, detail="Audio file not found")
 
-    file_size = file_path.stat().st_size
-    mime_type = get_audio_mime_type(file_path)
-
-    # Parse range header for seeking support
-    range_header = request.headers.get("range")
-
-    if range_header:
-        # Parse "bytes=start-end" format
-        range_spec = range_header.replace("bytes=", "")
-        range_parts = range_spec.split("-")
-        start = int(range_parts[0]) if range_parts[0] else 0
-        end = int(range_parts[1]) if range_parts[1] else file_size - 1
-
-        # Clamp to file size
-        start = max(0, min(start, file_size - 1))
-        end = max(start, min(end, file_size - 1))
-        content_length = end - start + 1
-
-        async def stream_range() -> AsyncIterator[bytes]:
-            with open(file_path, "rb") as f:
-                f.seek(start)
-                remaining = content_length
-                chunk_size = 64 * 1024  # 64KB chunks
-                while remaining > 0:
-                    read_size = min(chunk_size, remaining)
-                    data = f.read(read_size)
-                    if not data:
-                        break
-                    remaining -= len(data)
-                    yield data
-
-        return StreamingResponse(
-            stream_range(),  # type: ignore[no-untyped-call]
-            status_code=206,  # Partial Content
-            media_type=mime_type,
-            headers={
-                "Content-Range": f"bytes {start}-{end}/{file_size}",
-                "Accept-Ranges": "bytes",
-                "Content-Length": str(content_length),
-            },
-        )
-    else:
-        # Full file request
-        async def stream_full() -> AsyncIterator[bytes]:
-            with open(file_path, "rb") as f:
-                chunk_size = 64 * 1024  # 64KB chunks
-                while chunk := f.read(chunk_size):
-                    yield chunk
-
-        return StreamingResponse(
-            stream_full(),  # type: ignore[no-untyped-call]
-            media_type=mime_type,
-            headers={
-                "Accept-Ranges": "bytes",
-                "Content-Length": str(file_size),
-            },
-        )
+
+class PretranscodeRequest(BaseModel):
+    """Tracks to transcode ahead of playback (e.g. the next few in the queue)."""
+
+    track_ids: list[UUID] = Field(max_length=10)
+    format: str = Field(pattern=TRANSCODE_FORMAT_PATTERN)
+    bitrate: int | None = Field(None, ge=32, le=320)
+
+
+@router.post("/transcode/prefetch", status_code=202)
+async def pretranscode_tracks(
+    db: DbSession,
+    request: PretranscodeRequest,
+    background_tasks: BackgroundTasks,
+) -> dict[str, int]:
+    """Transcode upcoming tracks into the transcode cache in the background."""
+    result = await db.execute(
+        select(Track.id, Track.file_path).where(Track.id.in_(request.track_ids))
+    )
+    paths = dict(result.all())
+
+    async def run() -> None:
+        cache = get_transcode_cache()
+        bitrate = request.bitrate or TRANSCODE_FORMATS[request.format].default_bitrate
+        for track_id in request.track_ids:  # In queue order
+            if track_id not in paths:
+                continue
+            try:
+                await cache.pretranscode(track_id, Path(paths[track_id]), request.format, bitrate)
+            except OSError as e:
+                logger.warning(f"Pre-transcoding track {track_id} failed: {e}")
+
+    background_tasks.add_task(run)
+    return {"queued": len(paths)}
 
 
 @router.get("/{track_id}/artwork")
 async def get_track_artwork(
     db: DbSession,
     track_id: UUID,
-    size: str = Query("full", pattern="^(full|thumb)$"),
-) -> StreamingResponse:
+    request: Request,
+    size: str = Query("full", pattern="^(full|thumb|64|128|256|512)$"),
+) -> Response:
     """Get album artwork for a track.
 
     Artwork is extracted from the audio file on first request and cached.
     """
+    from app.services.artwork import extract_and_save_artwork
+    from app.services.artwork_cache import artwork_response, get_artwork_cache
+
     # Get track from database
     query = select(Track).where(Track.id == track_id)
     result = await db.execute(query)
@@ -723,34 +635,18 @@ async def get_track_artwork(
     if not track:
         raise HTTPException(status_code=404, detail="Track not found")
 
-    # Compute album hash
+    # Served from memory or disk; extracted from the audio file on a miss
     album_hash = compute_album_hash(track.artist, track.album)
-    artwork_path = get_artwork_path(album_hash, size)
-
-    # Check if artwork exists on disk
-    if not artwork_path.exists():
-        # Try to extract from audio file
-        file_path = Path(track.file_path)
-        if file_path.exists():
-            from app.services.artwork import extract_and_save_artwork
-            extract_and_save_artwork(file_path, track.artist, track.album)
-
-        # Check again
-        if not artwork_path.exists():
-            raise HTTPException(status_code=404, detail="No artwork available")
-
-    # Stream the artwork file
-    def stream_artwork() -> Iterator[bytes]:
-        with open(artwork_path, "rb") as f:
-            yield f.read()
-
-    return StreamingResponse(
-        stream_artwork(),  # type: ignore[no-untyped-call]
-        media_type="image/jpeg",
-        headers={
-            "Cache-Control": "public, max-age=31536000",  # Cache for 1 year
-        },
+    image = await get_artwork_cache().get_negotiated(
+        album_hash,
+        size,
+        request.headers.get("accept"),
+        extract=partial(extract_and_save_artwork, Path(track.file_path), track.artist, track.album),
     )
+    if image is None:
+        raise HTTPException(status_code=404, detail="No artwork available")
+
+    return artwork_response(request, image)
 
 
 class ArtworkUploadResponse(BaseModel):
@@ -849,7 +745,13 @@ async def delete_track_artwork(
     Removes artwork from the cache. Optionally removes embedded artwork from the audio file.
     Note: This affects all tracks from the same album.
     """
-    from app.services.artwork import compute_album_hash, get_artwork_path
+    from app.services.artwork import (
+        ALL_ARTWORK_SIZES,
+        ARTWORK_FORMATS,
+        compute_album_hash,
+        get_artwork_path,
+    )
+    from app.services.artwork_cache import get_artwork_cache
 
     # Get track
     query = select(Track).where(Track.id == track_id)
@@ -863,11 +765,13 @@ async def delete_track_artwork(
     album_hash = compute_album_hash(track.artist, track.album)
     removed_cache = False
 
-    for size in ["full", "thumb"]:
-        artwork_path = get_artwork_path(album_hash, size)
-        if artwork_path.exists():
-            artwork_path.unlink()
-            removed_cache = True
+    for size in ALL_ARTWORK_SIZES:
+        for fmt in ARTWORK_FORMATS:
+            artwork_path = get_artwork_path(album_hash, size, fmt)
+            if artwork_path.exists():
+                artwork_path.unlink()
+                removed_cache = True
+    get_artwork_cache().invalidate(album_hash)
 
     # Remove from file if requested (this is destructive and format-specific)
     removed_from_file = False
@@ -975,10 +879,19 @@ async def record_play(
     """Record that a track was played.
 
     Increments play count and updates last_played_at for the profile.
-    Optionally records how long the track was played.
+    Optionally records how long the track was played. A played track that
+    still needs analysis moves to the front of the analysis queue.
     """
     from datetime import datetime
 
+    from app.config import ANALYSIS_VERSION
+    from app.services.analysis_queue import (
+        PRIORITY_PLAYED,
+        enqueue_analysis,
+        prioritize_analysis,
+    )
+    from app.services.background import get_background_manager
+
     # Verify track exists
     track = await db.get(Track, track_id)
     if not track:
@@ -1010,8 +923,16 @@ async def record_play(
         )
         db.add(play_history)
 
+    pending_jobs = await prioritize_analysis(db, track_id, PRIORITY_PLAYED)
+    if not pending_jobs and track.analysis_version < ANALYSIS_VERSION:
+        pending_jobs = await enqueue_analysis(
+            db, [track_id], phase="full", priority=PRIORITY_PLAYED
+        )
+
     await db.commit()
     await db.refresh(play_history)
+    if pending_jobs:
+        get_background_manager().wake_analysis_queue()
 
     return PlayRecordResponse(
         track_id=track_id,
@@ -40,10 +40,46 @@ class Settings(BaseSettings):
     art_path: Path = Path("data/art")
     videos_path: Path = Path("data/videos")
     profiles_path: Path = Path("data/profiles")
+    embedding_store_path: Path = Path("data/embeddings")  # Memory-mapped embedding snapshots
+    map_layout_path: Path = Path("data/maps")  # Fitted UMAP models for the music maps
 
     # Analysis
     analysis_version: int = 1
 
+    # Library scanning (0 = auto-detect from the library's filesystem type)
+    scan_io_workers: int = 0  # Concurrent hash/stat jobs
+    scan_metadata_workers: int = 0  # Concurrent mutagen metadata jobs
+    scan_batch_size: int = 500  # Files applied per DB commit (new tracks bulk-inserted per batch)
+
+    # Filesystem watcher: sync changed paths as they change (network mounts rely on periodic sync)
+    library_watch_enabled: bool = True
+    library_watch_debounce_ms: int = 2000  # Max time to group filesystem events into one batch
+
+    # Analysis pools (0 = auto). Jobs are admitted only while projected worker RSS fits the budget
+    analysis_features_workers: int = 0  # Feature extraction processes (auto: cores - 1, max 8)
+    analysis_embedding_workers: int = 1  # CLAP embedding processes
+    analysis_memory_budget_mb: int = 0  # Total for all analysis workers (auto: half of RAM)
+    analysis_features_job_mb: int = 1500  # Assumed peak per features job until measured
+    analysis_embedding_job_mb: int = 3000  # Assumed peak per embedding job until measured
+
+    # CLAP embedding batches (the embedding pool keeps the model loaded between batches)
+    clap_batch_size: int = 16  # Clips per forward pass (and tracks per batch job)
+    clap_decode_threads: int = 4  # Threads decoding audio while inference runs
+    clap_batch_wait_ms: int = 500  # How long a partial batch waits for more tracks
+
+    # Similar tracks come from an HNSW index the app builds in the background.
+    # Optionally materialize each track's top-K neighbors (0 = always query the index)
+    similar_tracks_cache_size: int = 0
+
+    # Audio streaming: open file descriptors kept for recently streamed tracks
+    stream_handle_cache_size: int = 64
+    # Transcoded streams (?format=opus|aac|mp3): finished transcodes kept on disk, LRU-trimmed
+    transcode_cache_path: Path = Path("data/transcodes")
+    transcode_cache_max_mb: int = 2048
+
+    # Artwork bytes kept in memory for serving album grids
+    artwork_memory_cache_mb: int = 64
+
     # API Keys (Phase 3+)
     anthropic_api_key: str | None = None
     spotify_client_id: str | None = None
@@ -74,7 +110,9 @@ class Settings(BaseSettings):
 # v3: Fixed energy normalization (dB scale) and valence (key-aware chroma)
 # v4: Improved valence with multi-feature approach (mode, brightness, tempo, contrast, dynamics)
 # v5: Re-extract CLAP embeddings (psutil fix enabled proper RAM detection)
-ANALYSIS_VERSION = 5
+# v6: Energy and dynamics from the shared STFT instead of waveform frames;
+#     audio decoded and resampled by ffmpeg instead of librosa
+ANALYSIS_VERSION = 6
 
 # Supported audio formats
 AUDIO_EXTENSIONS = {".mp3", ".flac", ".m4a", ".aac", ".ogg", ".wav", ".aiff", ".aif"}
@@ -261,10 +261,15 @@ class Track(Base):
     # Timestamps
     file_modified_at: Mapped[datetime | None] = mapped_column(DateTime)
     created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+    # Indexed: the match index and smart playlists re-read tracks changed since a watermark
     updated_at: Mapped[datetime] = mapped_column(
-        DateTime, server_default=func.now(), onupdate=func.now()
+        DateTime, server_default=func.now(), onupdate=func.now(), index=True
     )
 
+    # Stat signature from the last scan (with file_modified_at): unchanged files skip hashing
+    file_size: Mapped[int | None] = mapped_column(BigInteger)
+    file_inode: Mapped[int | None] = mapped_column(BigInteger)
+
     # File availability status (prevents catastrophic deletion)
     status: Mapped[TrackStatus] = mapped_column(
         Enum(TrackStatus, values_callable=lambda obj: [e.value for e in obj]),
@@ -389,6 +394,142 @@ class TrackAnalysis(Base):
     track: Mapped["Track"] = relationship(back_populates="analyses")
 
 
+class TrackFeatures(Base):
+    """Typed copy of the filterable features of a track's latest analysis.
+
+    One row per analyzed track, kept current by a trigger on track_analysis
+    (see migration 20261016_000006_track_features), so feature filters and
+    sorts are index range scans instead of JSONB casts over a latest-version
+    subquery. Features that are missing or not numbers are NULL.
+    """
+
+    __tablename__ = "track_features"
+
+    track_id: Mapped[UUID] = mapped_column(
+        ForeignKey("tracks.id", ondelete="CASCADE"), primary_key=True
+    )
+    version: Mapped[int] = mapped_column(Integer, nullable=False)  # Analysis version the values came from
+
+    bpm: Mapped[float | None] = mapped_column(Float, index=True)
+    key: Mapped[str | None] = mapped_column(String(20), index=True)
+    energy: Mapped[float | None] = mapped_column(Float, index=True)
+    valence: Mapped[float | None] = mapped_column(Float, index=True)
+    danceability: Mapped[float | None] = mapped_column(Float, index=True)
+    acousticness: Mapped[float | None] = mapped_column(Float, index=True)
+    instrumentalness: Mapped[float | None] = mapped_column(Float, index=True)
+    speechiness: Mapped[float | None] = mapped_column(Float, index=True)
+    loudness_db: Mapped[float | None] = mapped_column(Float, index=True)
+    dynamic_range_db: Mapped[float | None] = mapped_column(Float, index=True)
+
+    # Set by the trigger on every rewrite (smart playlists re-check these tracks)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.now(), index=True)
+
+
+class AnalysisJob(Base):
+    """Durable analysis queue: one row per track and phase waiting to be analyzed.
+
+    The analysis consumer claims rows with FOR UPDATE SKIP LOCKED and deletes
+    them when the job finishes, so pending work survives restarts.
+    """
+
+    __tablename__ = "analysis_jobs"
+
+    track_id: Mapped[UUID] = mapped_column(
+        ForeignKey("tracks.id", ondelete="CASCADE"), primary_key=True
+    )
+    phase: Mapped[str] = mapped_column(String(20), primary_key=True)  # features, embedding, full
+    priority: Mapped[int] = mapped_column(Integer, nullable=False, default=0)  # Higher runs first
+
+    # Retry state: failed jobs back off until not_before
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    not_before: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.now())
+    last_error: Mapped[str | None] = mapped_column(String(500))
+
+    # Lease: the consumer refreshes claimed_at while the job runs; stale claims
+    # (from a crashed worker) are claimed again
+    claimed_by: Mapped[str | None] = mapped_column(String(100))
+    claimed_at: Mapped[datetime | None] = mapped_column(DateTime)
+    # Set when the job is enqueued again; a claim clears it, so a job that is
+    # re-requested while running is kept and runs once more
+    requeued_at: Mapped[datetime | None] = mapped_column(DateTime)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.now())
+
+
+class TrackNeighbor(Base):
+    """Materialized nearest neighbors of a track by CLAP embedding distance.
+
+    Optional cache for /tracks/{id}/similar (settings.similar_tracks_cache_size).
+    Each track's list is rewritten when its embedding changes, and new
+    embeddings are merged into the lists of the tracks they are close to.
+    """
+
+    __tablename__ = "track_neighbors"
+    __table_args__ = (
+        Index("ix_track_neighbors_track_distance", "track_id", "distance"),
+    )
+
+    track_id: Mapped[UUID] = mapped_column(
+        ForeignKey("tracks.id", ondelete="CASCADE"), primary_key=True
+    )
+    neighbor_id: Mapped[UUID] = mapped_column(
+        ForeignKey("tracks.id", ondelete="CASCADE"), primary_key=True, index=True
+    )
+    distance: Mapped[float] = mapped_column(Float, nullable=False)  # Cosine distance
+
+
+class ArtistCentroid(Base):
+    """Running sum of the CLAP embeddings of an artist's active tracks.
+
+    Kept current by database triggers on tracks and track_analysis (see
+    migration 20261016_000004_centroids): a new or replaced embedding, or an
+    artist/album/status change, adds and subtracts just that track's vector.
+    The music maps read mean = embedding_sum / track_count from here.
+    """
+
+    __tablename__ = "artist_centroids"
+
+    artist: Mapped[str] = mapped_column(String(500), primary_key=True)  # Trimmed Track.artist
+    embedding_sum: Mapped[Any] = mapped_column(Vector(512), nullable=False)
+    track_count: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    # Cleared by the triggers when the group changes, refilled by the map services
+    first_track_id: Mapped[UUID | None] = mapped_column()
+    representative_track_id: Mapped[UUID | None] = mapped_column()  # Track closest to the mean
+
+
+class AlbumCentroid(Base):
+    """Running sum of the CLAP embeddings of an album's active tracks.
+
+    Same maintenance as ArtistCentroid; albums are keyed by (artist, album),
+    with "Unknown Artist" for tracks without an artist.
+    """
+
+    __tablename__ = "album_centroids"
+
+    artist: Mapped[str] = mapped_column(String(500), primary_key=True)
+    album: Mapped[str] = mapped_column(String(500), primary_key=True)
+    embedding_sum: Mapped[Any] = mapped_column(Vector(512), nullable=False)
+    track_count: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    first_track_id: Mapped[UUID | None] = mapped_column()
+    representative_track_id: Mapped[UUID | None] = mapped_column()
+
+
+class LibraryStatsSnapshot(Base):
+    """Precomputed result of a library dashboard query (see app.services.library_stats).
+
+    Refreshed after scans and analysis batches, so the stats endpoints read
+    one row instead of aggregating the library per request.
+    """
+
+    __tablename__ = "library_stats_snapshots"
+
+    name: Mapped[str] = mapped_column(String(100), primary_key=True)  # e.g. "library", "mood:10"
+    data: Mapped[dict[str, Any]] = mapped_column(JSONB, nullable=False)
+    computed_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, server_default=func.now())
+
+
 class Playlist(Base):
     """User-created or AI-generated playlists."""
 
@@ -522,6 +663,9 @@ class SmartPlaylist(Base):
     # Cache
     cached_track_count: Mapped[int] = mapped_column(Integer, default=0)
     last_refreshed_at: Mapped[datetime | None] = mapped_column(DateTime)
+    # Database time of the last membership refresh (smart_playlist_tracks);
+    # None until the membership is built, or after the rules change
+    members_synced_at: Mapped[datetime | None] = mapped_column(DateTime)
 
     created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
     updated_at: Mapped[datetime] = mapped_column(
@@ -532,6 +676,24 @@ class SmartPlaylist(Base):
     profile: Mapped["Profile"] = relationship(back_populates="smart_playlists")
 
 
+class SmartPlaylistTrack(Base):
+    """Materialized membership of a smart playlist.
+
+    Rebuilt when the rules change and otherwise re-evaluated only for tracks
+    whose row or features changed since SmartPlaylist.members_synced_at
+    (see app.services.smart_playlists). Reads page from here.
+    """
+
+    __tablename__ = "smart_playlist_tracks"
+
+    smart_playlist_id: Mapped[UUID] = mapped_column(
+        ForeignKey("smart_playlists.id", ondelete="CASCADE"), primary_key=True
+    )
+    track_id: Mapped[UUID] = mapped_column(
+        ForeignKey("tracks.id", ondelete="CASCADE"), primary_key=True, index=True
+    )
+
+
 class ArtistCheckCache(Base):
     """Cache for tracking when artists were last checked for new releases."""
 
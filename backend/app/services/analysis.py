@@ -2,6 +2,7 @@
 
 import logging
 import os
+import subprocess
 from functools import lru_cache
 from pathlib import Path
 from typing import TYPE_CHECKING
@@ -10,6 +11,8 @@ import acoustid
 import librosa
 import numpy as np
 
+from app.config import ANALYSIS_VERSION
+
 # Conditionally import torch - try to import, but handle gracefully if unavailable
 # The actual decision to use CLAP is made at runtime via AppSettingsService
 _torch_available = False
@@ -142,6 +145,71 @@ def check_analysis_capabilities() -> None:
         logger.info("Analysis capabilities: features=enabled, embeddings=enabled")
 
 
+# Sample rate of the shared decode that features and fingerprinting both read.
+# Chromaprint resamples to 11025 Hz internally, so nothing is lost for it.
+DECODE_SAMPLE_RATE = 22050
+FINGERPRINT_MAX_SECONDS = 120  # Same length fpcalc fingerprints by default
+EMBEDDING_CLIP_SECONDS = 10  # CLAP works best with short clips
+
+# ffmpeg resamples differently from librosa (soxr), which moves feature values
+# and embeddings, so analyses before this version keep decoding with librosa
+FFMPEG_DECODE_VERSION = 6
+
+
+def _librosa_decode(
+    file_path: Path, sample_rate: int, offset: float, duration: float | None
+) -> np.ndarray:
+    try:
+        audio, _ = librosa.load(
+            file_path, sr=sample_rate, mono=True, offset=offset, duration=duration
+        )
+    except Exception as e:
+        raise AnalysisError(f"Could not decode {file_path}: {e}") from e
+    return audio
+
+
+def decode_audio(
+    file_path: Path,
+    sample_rate: int = DECODE_SAMPLE_RATE,
+    offset: float = 0.0,
+    duration: float | None = None,
+    version: int = ANALYSIS_VERSION,
+) -> np.ndarray:
+    """Decode an audio file to mono float32 PCM at sample_rate.
+
+    One ffmpeg pass decodes, downmixes and resamples, so callers decode a
+    file once and share the buffer. offset/duration seek in the input, so a
+    short clip only decodes that clip. Versions before FFMPEG_DECODE_VERSION
+    decode with librosa, as does any version if ffmpeg isn't installed.
+
+    Raises:
+        AnalysisError: If the file can't be decoded
+    """
+    if version < FFMPEG_DECODE_VERSION:
+        return _librosa_decode(file_path, sample_rate, offset, duration)
+
+    cmd = ["ffmpeg", "-nostdin", "-v", "error"]
+    if offset > 0:
+        cmd += ["-ss", f"{offset:.3f}"]
+    cmd += ["-i", str(file_path)]
+    if duration is not None:
+        cmd += ["-t", f"{duration:.3f}"]
+    cmd += ["-vn", "-ac", "1", "-ar", str(sample_rate), "-f", "f32le", "-"]
+
+    try:
+        result = subprocess.run(cmd, capture_output=True, timeout=300)
+    except FileNotFoundError:
+        return _librosa_decode(file_path, sample_rate, offset, duration)
+    except subprocess.TimeoutExpired as e:
+        raise AnalysisError(f"Decoding timed out: {file_path}") from e
+
+    if result.returncode != 0 or not result.stdout:
+        stderr = result.stderr.decode(errors="replace").strip().splitlines()
+        reason = stderr[-1] if stderr else "no audio stream"
+        raise AnalysisError(f"Could not decode {file_path}: {reason}")
+    return np.frombuffer(result.stdout, dtype=np.float32)
+
+
 def extract_embedding(file_path: Path, target_sr: int = 48000) -> list[float] | None:
     """Extract CLAP audio embedding from file.
 
@@ -152,6 +220,75 @@ def extract_embedding(file_path: Path, target_sr: int = 48000) -> list[float] |
     Returns:
         512-dimensional embedding as list of floats, or None on error
     """
+    results = extract_embeddings([file_path], batch_size=1, decode_threads=1, target_sr=target_sr)
+    if results is None:
+        return None
+    if isinstance(results[0], AnalysisError):
+        raise results[0]
+    return results[0]
+
+
+def load_embedding_clip(
+    file_path: Path,
+    target_sr: int = 48000,
+    duration: float | None = None,
+) -> np.ndarray:
+    """Decode the clip CLAP embeds: the middle 10 seconds, mono, at target_sr.
+
+    With the track duration known, only the clip itself is decoded.
+    """
+    if duration is not None and duration > EMBEDDING_CLIP_SECONDS:
+        offset = (duration - EMBEDDING_CLIP_SECONDS) / 2
+        audio = decode_audio(file_path, target_sr, offset=offset, duration=EMBEDDING_CLIP_SECONDS)
+        if len(audio):
+            return audio
+
+    audio = decode_audio(file_path, target_sr)
+
+    max_samples = target_sr * EMBEDDING_CLIP_SECONDS
+    if len(audio) > max_samples:
+        # Take middle section
+        start = (len(audio) - max_samples) // 2
+        audio = audio[start:start + max_samples]
+    return audio
+
+
+def _embed_clips(clips: list[np.ndarray], target_sr: int) -> list[list[float]]:
+    """Run one CLAP forward pass over a mini-batch of clips."""
+    model, processor = load_clap_model()
+    device = get_device()
+
+    inputs = processor(
+        audio=clips,
+        sampling_rate=target_sr,
+        return_tensors="pt",
+    )
+    inputs = {k: v.to(device) for k, v in inputs.items()}
+
+    with torch.no_grad():
+        audio_embeds = model.get_audio_features(**inputs)
+
+    return audio_embeds.cpu().numpy().tolist()
+
+
+def extract_embeddings(
+    file_paths: list[Path],
+    batch_size: int = 16,
+    decode_threads: int = 4,
+    target_sr: int = 48000,
+    durations: list[float | None] | None = None,
+) -> list[list[float] | AnalysisError] | None:
+    """Extract CLAP audio embeddings for many files with batched inference.
+
+    Clips are decoded on decode_threads threads while the model (loaded once
+    per process) embeds batch_size clips per forward pass. If a mini-batch
+    fails, its clips are retried one by one so one bad file can't fail the rest.
+    Known track durations (in file order) let each file decode only its clip.
+
+    Returns:
+        None if CLAP is unavailable or disabled; otherwise one entry per file,
+        in order: the 512-dimensional embedding or the file's AnalysisError
+    """
     # Skip CLAP if torch isn't available
     if not _torch_available:
         logger.debug("CLAP embeddings disabled (torch not available)")
@@ -164,41 +301,54 @@ def extract_embedding(file_path: Path, target_sr: int = 48000) -> list[float] |
         logger.debug(f"CLAP embeddings disabled: {reason}")
         return None
 
-    try:
-        # Load audio file
-        audio, sr = librosa.load(file_path, sr=target_sr, mono=True)
-
-        # Limit to 10 seconds for embedding (CLAP works best with short clips)
-        max_samples = target_sr * 10
-        if len(audio) > max_samples:
-            # Take middle section
-            start = (len(audio) - max_samples) // 2
-            audio = audio[start:start + max_samples]
-
-        # Load model
-        model, processor = load_clap_model()
-        device = get_device()
-
-        # Process audio
-        inputs = processor(
-            audio=audio,
-            sampling_rate=target_sr,
-            return_tensors="pt",
-        )
-        inputs = {k: v.to(device) for k, v in inputs.items()}
-
-        # Get embedding
-        with torch.no_grad():
-            audio_embed = model.get_audio_features(**inputs)
-
-        # Convert to list
-        embedding = audio_embed.cpu().numpy().flatten().tolist()
-
-        return embedding
+    from concurrent.futures import ThreadPoolExecutor
+
+    results: list[list[float] | AnalysisError] = [
+        AnalysisError("Embedding extraction did not run") for _ in file_paths
+    ]
+
+    def decode(index: int) -> tuple[int, np.ndarray | None]:
+        try:
+            duration = durations[index] if durations else None
+            return index, load_embedding_clip(file_paths[index], target_sr, duration)
+        except Exception as e:
+            logger.error(f"Error decoding {file_paths[index]} for embedding: {e}")
+            results[index] = AnalysisError(f"Embedding extraction failed: {e}")
+            return index, None
+
+    def embed(batch: list[tuple[int, np.ndarray]]) -> None:
+        try:
+            embeddings = _embed_clips([clip for _, clip in batch], target_sr)
+            for (index, _), embedding in zip(batch, embeddings, strict=True):
+                results[index] = embedding
+            return
+        except Exception as e:
+            if len(batch) == 1:
+                index = batch[0][0]
+                logger.error(f"Error extracting embedding from {file_paths[index]}: {e}")
+                results[index] = AnalysisError(f"Embedding extraction failed: {e}")
+                return
+            logger.warning(f"Batched embedding failed ({e}), retrying clips individually")
+        for item in batch:
+            embed([item])
+
+    # executor.map yields clips in order as they finish decoding, so inference
+    # on the first mini-batch overlaps with decoding the next ones
+    with ThreadPoolExecutor(
+        max_workers=max(1, decode_threads), thread_name_prefix="clap-decode"
+    ) as executor:
+        batch: list[tuple[int, np.ndarray]] = []
+        for index, clip in executor.map(decode, range(len(file_paths))):
+            if clip is None:
+                continue
+            batch.append((index, clip))
+            if len(batch) >= batch_size:
+                embed(batch)
+                batch = []
+        if batch:
+            embed(batch)
 
-    except Exception as e:
-        logger.error(f"Error extracting embedding from {file_path}: {e}")
-        raise AnalysisError(f"Embedding extraction failed: {e}") from e
+    return results
 
 
 def extract_text_embedding(text: str) -> list[float] | None:
@@ -248,17 +398,28 @@ def extract_text_embedding(text: str) -> list[float] | None:
         return None
 
 
-def _extract_features_impl(file_path_str: str) -> dict[str, float | str | None]:
-    """Internal implementation of feature extraction.
+# Feature values must stay comparable across a library, so an engine change
+# that moves them only applies from the ANALYSIS_VERSION that introduces it;
+# analyses at older versions keep the computation they were stored with.
+SPECTRAL_RMS_VERSION = 6  # Energy/dynamics from the shared STFT instead of waveform frames
+
+
+def _extract_features_impl(
+    y: np.ndarray,
+    sr: int = DECODE_SAMPLE_RATE,
+    version: int = ANALYSIS_VERSION,
+) -> dict[str, float | str | None]:
+    """Internal implementation of feature extraction from decoded mono audio.
+
+    Every spectral feature is derived from one shared STFT magnitude and the
+    onset envelope computed from it. The STFT uses librosa's defaults
+    (n_fft=2048, hop=512), so sharing it doesn't change any values.
 
     This runs in a subprocess to isolate crashes (SIGSEGV) from the main worker.
     """
     # Re-import in subprocess to ensure fresh state
-    from pathlib import Path
-
     import librosa
 
-    file_path = Path(file_path_str)
     features: dict[str, float | str | None] = {
         "bpm": None,
         "key": None,
@@ -270,21 +431,19 @@ def _extract_features_impl(file_path_str: str) -> dict[str, float | str | None]:
         "speechiness": None,
     }
 
-    # Load audio
-    y, sr = librosa.load(file_path, sr=22050, mono=True)
-
-    # BPM detection using tempo estimation (beat_track crashes on macOS Accelerate)
-    # First compute onset envelope, then estimate tempo
-    onset_env = librosa.onset.onset_strength(y=y, sr=sr)
-    tempo = librosa.feature.tempo(onset_envelope=onset_env, sr=sr)
-    features["bpm"] = float(tempo) if not isinstance(tempo, np.ndarray) else float(tempo[0])
-
-    # Compute STFT once for reuse (avoids crashes in chroma_cqt/chroma_stft)
+    # Shared spectral representation, computed once
     # Note: librosa.feature.chroma_cqt and chroma_stft crash with SIGSEGV on some
     # systems due to OpenBLAS issues. Manual computation from STFT avoids this.
     n_fft = 2048
     spec = np.abs(librosa.stft(y, n_fft=n_fft))
     power_spec = spec ** 2
+    mel_db = librosa.power_to_db(librosa.feature.melspectrogram(S=power_spec, sr=sr))
+    onset_env = librosa.onset.onset_strength(S=mel_db, sr=sr)
+    del mel_db
+
+    # BPM detection using tempo estimation (beat_track crashes on macOS Accelerate)
+    tempo = librosa.feature.tempo(onset_envelope=onset_env, sr=sr)
+    features["bpm"] = float(tempo) if not isinstance(tempo, np.ndarray) else float(tempo[0])
 
     # Key detection using manually computed chroma features
     # This avoids the SIGSEGV in librosa.feature.chroma_cqt/chroma_stft
@@ -296,31 +455,22 @@ def _extract_features_impl(file_path_str: str) -> dict[str, float | str | None]:
     features["key"] = key_names[key_idx]
 
     # Energy (RMS energy normalized to 0-1 using dB scale)
-    rms = librosa.feature.rms(y=y)[0]
+    if version >= SPECTRAL_RMS_VERSION:
+        rms = librosa.feature.rms(S=spec, frame_length=n_fft)[0]
+    else:
+        rms = librosa.feature.rms(y=y)[0]
     rms_mean = float(np.mean(rms))
     # Convert to dB, normalize: -60dB (very quiet) -> 0, -6dB (loud) -> 1
     rms_db = 20 * np.log10(rms_mean + 1e-10)
     features["energy"] = float(np.clip((rms_db + 60) / 54, 0, 1))
 
-    # Spectral features for danceability approximation
-    spectral_centroid = librosa.feature.spectral_centroid(y=y, sr=sr)[0]  # noqa: F841
-
     # Danceability: combination of tempo regularity and beat strength
-    # Reuse onset_env computed earlier for BPM detection
     pulse = librosa.beat.plp(onset_envelope=onset_env, sr=sr)
     features["danceability"] = float(np.mean(pulse))
 
-    # Zero crossing rate (indicator of percussiveness/noisiness)
-    zcr = librosa.feature.zero_crossing_rate(y)[0]
-
-    # MFCC for timbral features (computed for future embedding use)
-    _mfcc = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=13)
-
-    # Spectral contrast (computed for future use)
-    _contrast = librosa.feature.spectral_contrast(y=y, sr=sr)
-
     # Acousticness: based on spectral features
     # Higher spectral centroid and rolloff usually indicate electric/produced sound
+    spectral_centroid = librosa.feature.spectral_centroid(S=spec, sr=sr)[0]
     centroid_norm = np.mean(spectral_centroid) / (sr / 2)
     features["acousticness"] = float(max(0, 1 - centroid_norm * 2))
 
@@ -347,7 +497,6 @@ def _extract_features_impl(file_path_str: str) -> dict[str, float | str | None]:
     mode_score = (mode_indicator + 1) / 2
 
     # 2. Brightness via spectral centroid (brighter = generally happier)
-    centroid_norm = np.mean(spectral_centroid) / (sr / 2)
     brightness_score = np.clip(centroid_norm * 2, 0, 1)  # Typical range 0.1-0.4, scale up
 
     # 3. Tempo factor (faster tempos tend toward positive affect)
@@ -379,16 +528,17 @@ def _extract_features_impl(file_path_str: str) -> dict[str, float | str | None]:
     spread = np.sign(centered) * (np.abs(centered) ** 0.6) * 1.8
     features["valence"] = float(np.clip(spread + 0.5, 0, 1))
 
-    # Speechiness: based on zero crossing rate and spectral flatness
-    _flatness = librosa.feature.spectral_flatness(y=y)[0]
-    zcr_mean = np.mean(zcr)
+    # Speechiness: based on zero crossing rate (time-domain, no STFT needed)
     # Speech typically has high ZCR and moderate spectral flatness
-    features["speechiness"] = float(min(1, zcr_mean * 2))
+    zcr = librosa.feature.zero_crossing_rate(y)[0]
+    features["speechiness"] = float(min(1, np.mean(zcr) * 2))
 
     return features
 
 
-def extract_features(file_path: Path) -> dict[str, float | str | None]:
+def extract_features(
+    file_path: Path, audio: np.ndarray | None = None
+) -> dict[str, float | str | None]:
     """Extract audio features using librosa.
 
     Analysis runs in a spawned subprocess via ProcessPoolExecutor to isolate
@@ -396,12 +546,15 @@ def extract_features(file_path: Path) -> dict[str, float | str | None]:
 
     Args:
         file_path: Path to audio file
+        audio: The file already decoded by decode_audio(), to skip decoding
 
     Returns:
         Dict with extracted features
     """
     try:
-        return _extract_features_impl(str(file_path))
+        if audio is None:
+            audio = decode_audio(file_path)
+        return _extract_features_impl(audio, DECODE_SAMPLE_RATE)
     except Exception as e:
         logger.error(f"Error extracting features from {file_path}: {e}")
         raise AnalysisError(f"Feature extraction failed: {e}") from e
@@ -413,6 +566,10 @@ def generate_fingerprint(file_path: Path) -> tuple[int, str] | None:
     Requires chromaprint/fpcalc to be installed on the system.
     Install via: brew install chromaprint (macOS) or apt install libchromaprint-tools (Linux)
 
+    The file is decoded at its native rate by fpcalc (or chromaprint), not
+    taken from decode_audio()'s resampled buffer: the community cache is keyed
+    on the exact fingerprint string, which must match other installs.
+
     Args:
         file_path: Path to audio file
 
@@ -421,6 +578,8 @@ def generate_fingerprint(file_path: Path) -> tuple[int, str] | None:
     """
     try:
         duration, fingerprint = acoustid.fingerprint_file(str(file_path))
+        if isinstance(fingerprint, bytes):
+            fingerprint = fingerprint.decode("ascii")
         return (duration, fingerprint)
     except acoustid.FingerprintGenerationError as e:
         logger.error(f"Error generating fingerprint for {file_path}: {e}")
@@ -430,7 +589,9 @@ def generate_fingerprint(file_path: Path) -> tuple[int, str] | None:
         return None
 
 
-def lookup_acoustid(file_path: Path) -> dict | None:
+def lookup_acoustid(
+    file_path: Path, fingerprint: tuple[int, str] | None = None
+) -> dict | None:
     """Look up track metadata from AcoustID database.
 
     Requires ACOUSTID_API_KEY environment variable or app setting to be set.
@@ -438,6 +599,8 @@ def lookup_acoustid(file_path: Path) -> dict | None:
 
     Args:
         file_path: Path to audio file
+        fingerprint: (duration, fingerprint) from generate_fingerprint(), to
+            skip fingerprinting the file again
 
     Returns:
         Dict with metadata (title, artist, album, musicbrainz_id) or None
@@ -448,11 +611,17 @@ def lookup_acoustid(file_path: Path) -> dict | None:
         return None
 
     try:
-        results = acoustid.match(
-            api_key,
-            str(file_path),
-            meta="recordings releases",
-        )
+        if fingerprint:
+            duration, fp = fingerprint
+            results = acoustid.parse_lookup_result(
+                acoustid.lookup(api_key, fp, duration, meta="recordings releases")
+            )
+        else:
+            results = acoustid.match(
+                api_key,
+                str(file_path),
+                meta="recordings releases",
+            )
 
         for score, recording_id, title, artist in results:
             if score > 0.8:  # High confidence match
@@ -570,13 +739,16 @@ def lookup_acoustid_candidates(
         )
 
 
-def identify_track(file_path: Path) -> dict:
+def identify_track(
+    file_path: Path, fingerprint: tuple[int, str] | None = None
+) -> dict:
     """Full track identification using AcoustID.
 
-    Generates fingerprint and looks up metadata.
+    Generates fingerprint (unless one is passed in) and looks up metadata.
 
     Args:
         file_path: Path to audio file
+        fingerprint: (duration, fingerprint) from generate_fingerprint()
 
     Returns:
         Dict with fingerprint and any matched metadata
@@ -588,13 +760,13 @@ def identify_track(file_path: Path) -> dict:
     }
 
     # Generate fingerprint
-    fp_result = generate_fingerprint(file_path)
+    fp_result = fingerprint or generate_fingerprint(file_path)
     if fp_result:
         result["duration"], result["fingerprint"] = fp_result
 
     # Look up metadata if we have an API key
     if get_acoustid_api_key():
-        metadata = lookup_acoustid(file_path)
+        metadata = lookup_acoustid(file_path, fp_result)
         if metadata:
             result["metadata"] = metadata
 
@@ -0,0 +1,368 @@
+"""Durable analysis queue backed by the analysis_jobs table.
+
+Producers (the sync loop, the library watcher, API routes) enqueue track ids
+with a priority. Rows survive restarts, and repeated requests collapse into
+one row per track and phase.
+
+One worker process runs the consumer; it's chosen with a Redis lease. The
+consumer claims the highest-priority ready jobs with
+SELECT ... FOR UPDATE SKIP LOCKED and keeps a bounded number in flight, so
+the API process holds a few tasks instead of one per pending track. Failures
+are retried with exponential backoff. A consumer that dies stops refreshing
+its claims, and its jobs are picked up again once the lease runs out.
+"""
+
+import asyncio
+import logging
+import time
+from collections.abc import Iterable
+from contextlib import suppress
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Any
+from uuid import UUID
+
+from sqlalchemy import (
+    ColumnElement,
+    ColumnExpressionArgument,
+    delete,
+    exists,
+    func,
+    or_,
+    select,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import AnalysisJob
+from app.services.leader_lease import LeaderLease
+
+if TYPE_CHECKING:
+    from app.services.background import BackgroundManager
+
+logger = logging.getLogger(__name__)
+
+# Job priorities (higher runs first)
+PRIORITY_BACKGROUND = 0  # Periodic catch-up of unanalyzed tracks
+PRIORITY_NEW = 10  # Tracks that just appeared in the library
+PRIORITY_PLAYED = 50  # Tracks a user played before they were analyzed
+PRIORITY_USER = 100  # Explicit user request
+
+# Analysis pool that runs (the first step of) each phase
+PHASE_POOLS = {"features": "features", "full": "features", "embedding": "embedding"}
+
+CONSUMER_LEADER_KEY = "familiar:analysis:consumer"
+LEADER_TTL = 60  # Seconds before a dead consumer's lease key expires
+LEADER_REFRESH_INTERVAL = 20  # Seconds between lease and claim refreshes
+CONSUMER_RETRY_INTERVAL = 30  # Seconds between leadership attempts by non-leaders
+POLL_INTERVAL = 2  # Seconds between polls for new jobs when idle
+CLAIM_LEASE = timedelta(minutes=5)  # Claims not refreshed for this long are stale
+MAX_ATTEMPTS = 4  # Transient failures before a job is dropped
+BACKOFF_BASE_SECONDS = 60  # 1 min, 4 min, 16 min, ...
+BACKOFF_MAX_SECONDS = 6 * 60 * 60
+ENQUEUE_CHUNK_SIZE = 1000  # Rows per INSERT (stays under asyncpg's parameter limit)
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Backoff before retrying a job that has failed attempts times."""
+    seconds = BACKOFF_BASE_SECONDS * 4 ** max(attempts - 1, 0)
+    return timedelta(seconds=min(seconds, BACKOFF_MAX_SECONDS))
+
+
+def not_queued(track_id: ColumnExpressionArgument[Any], phases: Iterable[str]) -> ColumnElement[bool]:
+    """Filter for track queries: no pending job for the track in any of phases."""
+    return ~exists().where(
+        AnalysisJob.track_id == track_id,
+        AnalysisJob.phase.in_(list(phases)),
+    )
+
+
+async def enqueue_analysis(
+    db: AsyncSession,
+    track_ids: Iterable[str | UUID],
+    phase: str = "full",
+    priority: int = PRIORITY_BACKGROUND,
+) -> int:
+    """Queue analysis jobs, or re-request ones already pending.
+
+    A re-requested job keeps the higher of the two priorities, drops any
+    retry backoff, and is marked requeued so that a run already in progress
+    doesn't consume the request. The caller commits. Returns the number of
+    tracks queued.
+    """
+    rows = [
+        {"track_id": UUID(str(track_id)), "phase": phase, "priority": priority, "attempts": 0}
+        for track_id in dict.fromkeys(str(t) for t in track_ids)
+    ]
+    for i in range(0, len(rows), ENQUEUE_CHUNK_SIZE):
+        stmt = pg_insert(AnalysisJob).values(rows[i:i + ENQUEUE_CHUNK_SIZE])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[AnalysisJob.track_id, AnalysisJob.phase],
+            set_={
+                "priority": func.greatest(AnalysisJob.priority, stmt.excluded.priority),
+                "attempts": 0,
+                "not_before": func.now(),
+                "requeued_at": func.now(),
+            },
+        )
+        await db.execute(stmt)
+    return len(rows)
+
+
+async def prioritize_analysis(db: AsyncSession, track_id: str | UUID, priority: int) -> int:
+    """Raise the priority of a track's pending jobs. Returns the number of jobs found."""
+    result = await db.execute(
+        update(AnalysisJob)
+        .where(AnalysisJob.track_id == UUID(str(track_id)), AnalysisJob.priority < priority)
+        .values(priority=priority)
+    )
+    if result.rowcount:  # type: ignore[attr-defined]
+        return result.rowcount  # type: ignore[attr-defined]
+    pending = await db.scalar(
+        select(func.count()).where(AnalysisJob.track_id == UUID(str(track_id)))
+    )
+    return pending or 0
+
+
+async def get_queue_counts(db: AsyncSession) -> dict[str, int]:
+    """Pending and running (freshly claimed) job counts."""
+    stale_before = datetime.utcnow() - CLAIM_LEASE
+    result = await db.execute(
+        select(
+            func.count(),
+            func.count().filter(AnalysisJob.claimed_at >= stale_before),
+        ).select_from(AnalysisJob)
+    )
+    total, running = result.one()
+    return {"pending": total - running, "running": running}
+
+
+async def clear_queue(db: AsyncSession) -> int:
+    """Drop every pending job (running jobs finish). The caller commits."""
+    result = await db.execute(delete(AnalysisJob).where(AnalysisJob.claimed_at.is_(None)))
+    # Running jobs that were re-requested are deleted when they finish
+    await db.execute(
+        update(AnalysisJob).where(AnalysisJob.requeued_at.is_not(None)).values(requeued_at=None)
+    )
+    return result.rowcount or 0  # type: ignore[attr-defined]
+
+
+class AnalysisQueueConsumer:
+    """Claims queued jobs and runs them on the BackgroundManager's analysis pools."""
+
+    def __init__(self, manager: "BackgroundManager", limits: dict[str, int]):
+        self._manager = manager
+        self._lease = LeaderLease(manager, CONSUMER_LEADER_KEY, LEADER_TTL)
+        self._limits = limits  # Max in-flight jobs per analysis pool
+        self._task: asyncio.Task | None = None
+        self._in_flight: dict[tuple[str, str], asyncio.Task] = {}
+        self._wakeup = asyncio.Event()
+
+    async def start(self) -> None:
+        """Start competing for the consumer lease."""
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop consuming and hand claimed jobs back to the queue."""
+        if self._task and not self._task.done():
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+        self._task = None
+
+        jobs = list(self._in_flight)
+        for task in self._in_flight.values():
+            task.cancel()
+        self._in_flight.clear()
+        if jobs:
+            await self._release_claims(jobs)
+        self._lease.release()
+
+    def wake(self) -> None:
+        """Check for ready jobs now instead of at the next poll."""
+        self._wakeup.set()
+
+    def in_flight(self) -> dict[str, int]:
+        """Jobs this process is running, per analysis pool."""
+        counts = dict.fromkeys(self._limits, 0)
+        for _, phase in self._in_flight:
+            counts[PHASE_POOLS[phase]] += 1
+        return counts
+
+    async def _run(self) -> None:
+        """Compete for the lease; consume while holding it, retry otherwise."""
+        while True:
+            if self._lease.acquire():
+                try:
+                    await self._consume()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error(f"Analysis queue consumer failed: {e}", exc_info=True)
+                finally:
+                    self._lease.release()
+            await asyncio.sleep(CONSUMER_RETRY_INTERVAL)
+
+    async def _consume(self) -> None:
+        """Keep the pools fed with claimed jobs until the lease is lost."""
+        logger.info(f"Analysis queue consumer started (in-flight limits: {self._limits})")
+        last_refresh = time.monotonic()
+        while True:
+            if time.monotonic() - last_refresh >= LEADER_REFRESH_INTERVAL:
+                if not self._lease.refresh():
+                    logger.info("Analysis queue consumer lost its lease")
+                    return
+                await self._refresh_claims()
+                last_refresh = time.monotonic()
+
+            # While the circuit breaker is open every job would fail - leave them queued
+            if not self._manager._executor_disabled:
+                await self._claim_ready()
+
+            self._wakeup.clear()
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), timeout=POLL_INTERVAL)
+
+    async def _claim_ready(self) -> None:
+        """Claim as many ready jobs as there are free in-flight slots."""
+        from app.db.session import async_session_maker
+
+        running = self.in_flight()
+        for pool, limit in self._limits.items():
+            free = limit - running[pool]
+            if free <= 0:
+                continue
+            phases = [phase for phase, p in PHASE_POOLS.items() if p == pool]
+            now = datetime.utcnow()
+            async with async_session_maker() as db:
+                result = await db.execute(
+                    select(AnalysisJob)
+                    .where(
+                        AnalysisJob.phase.in_(phases),
+                        AnalysisJob.not_before <= now,
+                        or_(
+                            AnalysisJob.claimed_at.is_(None),
+                            AnalysisJob.claimed_at < now - CLAIM_LEASE,
+                        ),
+                    )
+                    .order_by(AnalysisJob.priority.desc(), AnalysisJob.created_at)
+                    .limit(free)
+                    .with_for_update(skip_locked=True)
+                )
+                jobs = list(result.scalars())
+                for job in jobs:
+                    job.claimed_by = self._lease.token
+                    job.claimed_at = now
+                    job.requeued_at = None
+                claimed = [(str(job.track_id), job.phase, job.attempts) for job in jobs]
+                await db.commit()
+
+            for track_id, phase, attempts in claimed:
+                key = (track_id, phase)
+                self._in_flight[key] = asyncio.create_task(self._process(key, attempts))
+
+    async def _process(self, key: tuple[str, str], attempts: int) -> None:
+        """Run one claimed job, then delete it or schedule its retry."""
+        track_id, phase = key
+        try:
+            task = self._manager.start_analysis_task(track_id, phase)
+            try:
+                result: dict[str, Any] = await task
+            except asyncio.CancelledError:
+                current = asyncio.current_task()
+                if current and current.cancelling():
+                    raise
+                # Cancelled through the API - the queue was cleared too
+                result = {"status": "cancelled"}
+            except Exception as e:
+                result = {"status": "error", "error": str(e)}
+            await self._finish(key, attempts, result)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Could not finish analysis job {track_id}:{phase}: {e}")
+        finally:
+            self._in_flight.pop(key, None)
+            self.wake()
+
+    async def _finish(self, key: tuple[str, str], attempts: int, result: dict[str, Any]) -> None:
+        """Delete a finished job, or back off and retry a transient failure.
+
+        Task-level failures are permanent: they are recorded on the track and
+        retried by the periodic sync after its 24h window, not by the queue.
+        A job re-requested while it ran is handed back to the queue instead,
+        since the run may have analyzed the file before it changed.
+        """
+        from app.db.session import async_session_maker
+
+        track_id, phase = key
+        claimed = (
+            AnalysisJob.track_id == UUID(track_id),
+            AnalysisJob.phase == phase,
+            AnalysisJob.claimed_by == self._lease.token,
+        )
+        job_filter = (*claimed, AnalysisJob.requeued_at.is_(None))
+        error = result.get("error")
+        async with async_session_maker() as db:
+            if not error or result.get("permanent") or attempts + 1 >= MAX_ATTEMPTS:
+                if error and not result.get("permanent"):
+                    logger.warning(
+                        f"Dropping analysis job {track_id}:{phase} after {attempts + 1} attempts: {error}"
+                    )
+                await db.execute(delete(AnalysisJob).where(*job_filter))
+            else:
+                delay = retry_delay(attempts + 1)
+                logger.info(
+                    f"Analysis job {track_id}:{phase} failed ({error}), "
+                    f"retrying in {int(delay.total_seconds())}s"
+                )
+                await db.execute(
+                    update(AnalysisJob)
+                    .where(*job_filter)
+                    .values(
+                        attempts=attempts + 1,
+                        not_before=datetime.utcnow() + delay,
+                        last_error=str(error)[:500],
+                        claimed_by=None,
+                        claimed_at=None,
+                    )
+                )
+            await db.execute(
+                update(AnalysisJob)
+                .where(*claimed, AnalysisJob.requeued_at.is_not(None))
+                .values(claimed_by=None, claimed_at=None)
+            )
+            await db.commit()
+
+    async def _refresh_claims(self) -> None:
+        """Extend the claims on in-flight jobs so they aren't treated as stale."""
+        from app.db.session import async_session_maker
+
+        if not self._in_flight:
+            return
+        try:
+            async with async_session_maker() as db:
+                await db.execute(
+                    update(AnalysisJob)
+                    .where(AnalysisJob.claimed_by == self._lease.token)
+                    .values(claimed_at=datetime.utcnow())
+                )
+                await db.commit()
+        except Exception as e:
+            logger.warning(f"Could not refresh analysis job claims: {e}")
+
+    async def _release_claims(self, jobs: list[tuple[str, str]]) -> None:
+        """Hand unfinished jobs back so the next consumer starts them right away."""
+        from app.db.session import async_session_maker
+
+        try:
+            async with async_session_maker() as db:
+                await db.execute(
+                    update(AnalysisJob)
+                    .where(AnalysisJob.claimed_by == self._lease.token)
+                    .values(claimed_by=None, claimed_at=None)
+                )
+                await db.commit()
+            logger.info(f"Returned {len(jobs)} unfinished analysis jobs to the queue")
+        except Exception as e:
+            logger.warning(f"Could not release analysis job claims: {e}")
@@ -1,8 +1,11 @@
 """Album artwork extraction and management service."""
 
 import hashlib
+import logging
+import os
 import subprocess
 import tempfile
+import threading
 from io import BytesIO
 from pathlib import Path
 
@@ -14,25 +17,44 @@ from PIL import Image
 
 from app.config import settings
 
+logger = logging.getLogger(__name__)
+
 # Standard sizes for artwork
 ARTWORK_SIZES = {
     "full": 500,      # Full size for player view
     "thumb": 200,     # Thumbnail for lists
 }
 
+# Extra sizes so tiles can fetch the nearest size instead of the full image
+ARTWORK_VARIANT_SIZES = {
+    "64": 64,
+    "128": 128,
+    "256": 256,
+    "512": 512,
+}
+
+ALL_ARTWORK_SIZES = {**ARTWORK_SIZES, **ARTWORK_VARIANT_SIZES}
+
+# Every size is saved in each format; JPEG is the fallback for clients without WebP
+ARTWORK_FORMATS = {
+    "jpeg": ".jpg",
+    "webp": ".webp",
+}
 
-def get_artwork_path(album_hash: str, size: str = "full") -> Path:
+
+def get_artwork_path(album_hash: str, size: str = "full", fmt: str = "jpeg") -> Path:
     """Get the file path for artwork.
 
     Args:
         album_hash: Hash identifying the album
-        size: Size variant ('full' or 'thumb')
+        size: Size variant (a key of ALL_ARTWORK_SIZES)
+        fmt: Image format ('jpeg' or 'webp')
 
     Returns:
         Path to artwork file
     """
     suffix = f"_{size}" if size != "full" else ""
-    return settings.art_path / f"{album_hash}{suffix}.jpg"
+    return settings.art_path / f"{album_hash}{suffix}{ARTWORK_FORMATS[fmt]}"
 
 
 def compute_album_hash(artist: str | None, album: str | None) -> str:
@@ -172,18 +194,18 @@ def save_artwork(
     album_hash: str,
     sizes: dict[str, int] | None = None,
 ) -> dict[str, Path]:
-    """Save artwork to disk in multiple sizes.
+    """Save artwork to disk in multiple sizes and formats.
 
     Args:
         image_data: Raw image bytes
         album_hash: Hash identifying the album
-        sizes: Dict of size names to max dimensions. Defaults to ARTWORK_SIZES.
+        sizes: Dict of size names to max dimensions. Defaults to ALL_ARTWORK_SIZES.
 
     Returns:
-        Dict mapping size names to saved file paths.
+        Dict mapping size names to saved JPEG file paths.
     """
     if sizes is None:
-        sizes = ARTWORK_SIZES
+        sizes = ALL_ARTWORK_SIZES
 
     # Ensure art directory exists
     settings.art_path.mkdir(parents=True, exist_ok=True)
@@ -193,29 +215,125 @@ def save_artwork(
     try:
         # Open image with Pillow
         img = Image.open(BytesIO(image_data))
+        saved_paths = _save_variants(img, album_hash, sizes)
+    except Exception as e:
+        print(f"Error saving artwork: {e}")
 
-        # Convert to RGB if necessary (for JPEG output)
-        if img.mode in ("RGBA", "P"):
-            rgb_img = img.convert("RGB")
-            img = rgb_img
+    if saved_paths:
+        from app.services.artwork_cache import get_artwork_cache
 
-        for size_name, max_dim in sizes.items():
-            output_path = get_artwork_path(album_hash, size_name)
+        get_artwork_cache().invalidate(album_hash)
 
-            # Resize maintaining aspect ratio
-            img_copy = img.copy()
-            img_copy.thumbnail((max_dim, max_dim), Image.Resampling.LANCZOS)
+    return saved_paths
 
-            # Save as JPEG
-            img_copy.save(output_path, "JPEG", quality=85, optimize=True)
-            saved_paths[size_name] = output_path
 
-    except Exception as e:
-        print(f"Error saving artwork: {e}")
+def _save_variants(
+    img: Image.Image,
+    album_hash: str,
+    sizes: dict[str, int],
+    skip_existing: bool = False,
+) -> dict[str, Path]:
+    """Write every size in every format, largest first, "full" JPEG last.
 
+    Each file is written to a temporary name and renamed into place, and the
+    full JPEG (what existence checks look at) is only replaced at the end.
+    With skip_existing, files already on disk are left as they are.
+    """
+    # Convert to RGB if necessary (for JPEG output)
+    if img.mode not in ("RGB", "L"):
+        img = img.convert("RGB")
+
+    saved_paths: dict[str, Path] = {}
+    pending_full: tuple[Image.Image, Path] | None = None
+    source = img
+    for size_name, max_dim in sorted(sizes.items(), key=lambda item: -item[1]):
+        # Resize maintaining aspect ratio, each size from the next larger one
+        resized = source.copy()
+        resized.thumbnail((max_dim, max_dim), Image.Resampling.LANCZOS)
+        source = resized
+
+        for fmt in ARTWORK_FORMATS:
+            output_path = get_artwork_path(album_hash, size_name, fmt)
+            if skip_existing and output_path.exists():
+                continue
+            if size_name == "full" and fmt == "jpeg":
+                pending_full = (resized, output_path)
+                continue
+            _write_image(resized, output_path, fmt)
+        saved_paths[size_name] = get_artwork_path(album_hash, size_name)
+
+    if pending_full is not None:
+        _write_image(*pending_full, "jpeg")
     return saved_paths
 
 
+def _write_image(img: Image.Image, path: Path, fmt: str) -> None:
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}")
+    if fmt == "webp":
+        img.save(tmp, "WEBP", quality=80, method=4)
+    else:
+        img.save(tmp, "JPEG", quality=85, optimize=True)
+    tmp.replace(path)
+
+
+def generate_artwork_variants(album_hash: str) -> bool:
+    """Create any missing sizes/formats from an album's existing full JPEG.
+
+    Existing variants are kept. Returns True if the album's variants are
+    complete afterwards.
+    """
+    missing = [
+        path
+        for size in ALL_ARTWORK_SIZES
+        for fmt in ARTWORK_FORMATS
+        if not (path := get_artwork_path(album_hash, size, fmt)).exists()
+    ]
+    if not missing:
+        return True
+
+    full_path = get_artwork_path(album_hash, "full")
+    try:
+        img = Image.open(full_path)
+        img.load()
+        # Sizes larger than the stored full image come out at its size
+        _save_variants(img, album_hash, ALL_ARTWORK_SIZES, skip_existing=True)
+    except Exception as e:
+        logger.warning(f"Error generating artwork variants for {album_hash}: {e}")
+        return False
+
+    from app.services.artwork_cache import get_artwork_cache
+
+    get_artwork_cache().invalidate(album_hash)
+    return True
+
+
+def backfill_artwork_variants() -> int:
+    """Generate missing variants for every album with a full JPEG.
+
+    Returns the number of albums that were updated.
+    """
+    try:
+        names = {path.name for path in settings.art_path.iterdir()}
+    except OSError:
+        return 0
+
+    expected = [
+        get_artwork_path("", size, fmt).name
+        for size in ALL_ARTWORK_SIZES
+        for fmt in ARTWORK_FORMATS
+    ]
+    updated = 0
+    for name in sorted(names):
+        album_hash, _, extension = name.partition(".")
+        if extension != "jpg" or "_" in album_hash or not album_hash:
+            continue
+        if all(f"{album_hash}{suffix}" in names for suffix in expected):
+            continue
+        if generate_artwork_variants(album_hash):
+            updated += 1
+    return updated
+
+
 def extract_and_save_artwork(
     file_path: Path,
     artist: str | None,
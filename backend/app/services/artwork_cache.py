@@ -0,0 +1,219 @@
+"""In-memory cache and non-blocking loading for served artwork.
+
+Album grids request dozens of covers at once. Hits are served from an LRU of
+image bytes bounded by total size; misses read the file (or extract artwork
+from the audio file) in a worker thread. Concurrent requests for the same
+cover share one load, and concurrent extractions for the same album share one
+extraction. Responses carry a content ETag so browsers revalidate with 304s,
+and WebP is served to clients that accept it.
+
+save_artwork and artwork deletion invalidate entries in this process; other
+processes only ever add artwork files, which show up as misses.
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.config import settings
+from app.services.artwork import ARTWORK_VARIANT_SIZES, generate_artwork_variants, get_artwork_path
+
+logger = logging.getLogger(__name__)
+
+ARTWORK_CACHE_CONTROL = "public, max-age=31536000"
+ARTWORK_MEDIA_TYPES = {"jpeg": "image/jpeg", "webp": "image/webp"}
+# Remember missing artwork this long before trying to extract it again (seconds)
+MISSING_TTL = 60.0
+
+
+@dataclass(frozen=True)
+class ArtworkImage:
+    """Image bytes with their validator."""
+
+    data: bytes
+    etag: str
+    media_type: str = "image/jpeg"
+
+
+def _read(path: Path, fmt: str) -> ArtworkImage | None:
+    try:
+        data = path.read_bytes()
+    except OSError:
+        return None
+    return ArtworkImage(
+        data=data,
+        etag=f'"{hashlib.blake2b(data, digest_size=8).hexdigest()}"',
+        media_type=ARTWORK_MEDIA_TYPES[fmt],
+    )
+
+
+def accepts_webp(accept: str | None) -> bool:
+    """Whether an Accept header lists image/webp (without q=0)."""
+    for part in (accept or "").split(","):
+        media_range, *params = [item.strip() for item in part.split(";")]
+        if media_range == "image/webp":
+            return not any(param.replace(" ", "") in ("q=0", "q=0.0") for param in params)
+    return False
+
+
+class ArtworkCache:
+    """LRU of artwork bytes keyed by (album_hash, size, format), bounded by total bytes."""
+
+    def __init__(self, max_bytes: int | None = None):
+        self.max_bytes = settings.artwork_memory_cache_mb * 1024 * 1024 if max_bytes is None else max_bytes
+        self._images: OrderedDict[tuple[str, str, str], ArtworkImage] = OrderedDict()
+        self._bytes = 0
+        self._missing: dict[tuple[str, str, str], float] = {}  # Key -> monotonic time of the miss
+        self._loads: dict[tuple[str, str, str], asyncio.Future[ArtworkImage | None]] = {}
+        self._extractions: dict[str, asyncio.Future] = {}  # Album hash (or job key) -> job
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    async def get(
+        self,
+        album_hash: str,
+        size: str,
+        extract: Callable[[], object] | None = None,
+        fmt: str = "jpeg",
+    ) -> ArtworkImage | None:
+        """Artwork for an album, or None.
+
+        `extract` (blocking, e.g. extract_and_save_artwork for one of the
+        album's tracks) is run in a thread if the file doesn't exist yet.
+        """
+        self._loop = asyncio.get_running_loop()
+        key = (album_hash, size, fmt)
+        image = self._images.get(key)
+        if image is not None:
+            self._images.move_to_end(key)
+            return image
+        missed_at = self._missing.get(key)
+        if missed_at is not None and time.monotonic() - missed_at < MISSING_TTL:
+            return None
+
+        load = self._loads.get(key)
+        if load is None:
+            load = asyncio.ensure_future(self._load(album_hash, size, fmt, extract))
+            self._loads[key] = load
+            load.add_done_callback(lambda _: self._loads.pop(key, None))
+        # Shielded: one client going away doesn't cancel the load for the others
+        return await asyncio.shield(load)
+
+    async def get_negotiated(
+        self,
+        album_hash: str,
+        size: str,
+        accept: str | None,
+        extract: Callable[[], object] | None = None,
+    ) -> ArtworkImage | None:
+        """The best available format of an album's artwork for this Accept header.
+
+        Albums saved before a size existed get the full image while their
+        variants are generated in the background.
+        """
+        if accepts_webp(accept):
+            image = await self.get(album_hash, size, fmt="webp")
+            if image is not None:
+                return image
+        image = await self.get(album_hash, size, extract)
+        if image is None and size in ARTWORK_VARIANT_SIZES:
+            image = await self.get(album_hash, "full", extract)
+            if image is not None:
+                self._start(f"variants:{album_hash}", partial(generate_artwork_variants, album_hash))
+        return image
+
+    async def _load(
+        self, album_hash: str, size: str, fmt: str, extract: Callable[[], object] | None
+    ) -> ArtworkImage | None:
+        key = (album_hash, size, fmt)
+        path = get_artwork_path(album_hash, size, fmt)
+        image = await asyncio.to_thread(_read, path, fmt)
+        if image is None and extract is not None:
+            await self._extract(album_hash, extract)
+            image = await asyncio.to_thread(_read, path, fmt)
+
+        if image is None:
+            self._missing[key] = time.monotonic()
+            return None
+        self._missing.pop(key, None)
+        self._put(key, image)
+        return image
+
+    async def _extract(self, album_hash: str, extract: Callable[[], object]) -> None:
+        """Run one extraction per album, however many sizes are waiting on it."""
+        try:
+            await asyncio.shield(self._start(album_hash, extract))
+        except Exception as e:
+            logger.warning(f"Artwork extraction for {album_hash} failed: {e}")
+
+    def _start(self, key: str, func: Callable[[], object]) -> asyncio.Future:
+        """Run `func` in a thread unless a job with the same key is already running."""
+        job = self._extractions.get(key)
+        if job is None:
+            job = asyncio.ensure_future(asyncio.to_thread(func))
+            self._extractions[key] = job
+            job.add_done_callback(lambda _: self._extractions.pop(key, None))
+        return job
+
+    def _put(self, key: tuple[str, str, str], image: ArtworkImage) -> None:
+        if len(image.data) > self.max_bytes:
+            return
+        previous = self._images.pop(key, None)
+        if previous is not None:
+            self._bytes -= len(previous.data)
+        self._images[key] = image
+        self._bytes += len(image.data)
+        while self._bytes > self.max_bytes:
+            _, evicted = self._images.popitem(last=False)
+            self._bytes -= len(evicted.data)
+
+    def invalidate(self, album_hash: str) -> None:
+        """Drop every size of an album's artwork (after it's replaced or deleted).
+
+        Safe to call from worker threads; the cache itself is only touched on
+        the event loop.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            if self._loop is not None and not self._loop.is_closed():
+                self._loop.call_soon_threadsafe(self._invalidate, album_hash)
+            return
+        self._invalidate(album_hash)
+
+    def _invalidate(self, album_hash: str) -> None:
+        for key in [key for key in self._images if key[0] == album_hash]:
+            self._bytes -= len(self._images.pop(key).data)
+        for key in [key for key in self._missing if key[0] == album_hash]:
+            del self._missing[key]
+
+
+def artwork_response(request: Request, image: ArtworkImage) -> Response:
+    """Artwork bytes, or 304 if the client's copy is current."""
+    headers = {"Cache-Control": ARTWORK_CACHE_CONTROL, "ETag": image.etag, "Vary": "Accept"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        if "*" in tags or image.etag in tags:
+            return Response(status_code=304, headers=headers)
+    return Response(content=image.data, media_type=image.media_type, headers=headers)
+
+
+# Singleton
+_artwork_cache: ArtworkCache | None = None
+
+
+def get_artwork_cache() -> ArtworkCache:
+    """Get the singleton ArtworkCache instance."""
+    global _artwork_cache
+    if _artwork_cache is None:
+        _artwork_cache = ArtworkCache()
+    return _artwork_cache
@@ -0,0 +1,318 @@
+"""Audio file responses for /tracks/{id}/stream.
+
+File bytes never touch the event loop:
+
+- Servers offering the ASGI zero-copy extension get the file descriptor and
+  offsets (sendfile); servers offering path-send get the path for full files.
+- Otherwise chunks are read with os.pread in a worker thread.
+
+Hot tracks keep an open descriptor in a small LRU, shared by all streams of
+that file (pread and sendfile with an offset don't move the file position).
+
+Supports single, suffix and multiple byte ranges (multipart/byteranges),
+ETag/Last-Modified validators, If-None-Match/If-Modified-Since (304) and
+If-Range.
+"""
+
+import asyncio
+import os
+import secrets
+import stat as stat_module
+import threading
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from functools import partial
+from pathlib import Path
+
+import anyio
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from app.config import settings
+
+CHUNK_SIZE = 256 * 1024
+# More ranges than this (after merging) are served as the whole file
+MAX_RANGES = 16
+
+
+class OpenFile:
+    """A cached read-only descriptor, closed once evicted and no longer in use."""
+
+    def __init__(self, path: str, fd: int, stat: os.stat_result):
+        self.path = path
+        self.fd = fd
+        self.stat = stat
+        self._users = 0
+        self._evicted = False
+
+
+class FileHandleCache:
+    """LRU of open audio file descriptors, validated against the file on each use."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._files: OrderedDict[str, OpenFile] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, path: Path) -> OpenFile:
+        """Open (or reuse) a descriptor for `path`. Blocking; raises OSError."""
+        key = str(path)
+        current = os.stat(key)
+        with self._lock:
+            handle = self._files.get(key)
+            if handle is not None and _same_file(handle.stat, current):
+                self._files.move_to_end(key)
+                handle._users += 1
+                return handle
+
+        fd = os.open(key, os.O_RDONLY)
+        handle = OpenFile(key, fd, os.fstat(fd))
+        if not stat_module.S_ISREG(handle.stat.st_mode):
+            os.close(fd)
+            raise IsADirectoryError(key)
+        with self._lock:
+            handle._users += 1
+            previous = self._files.pop(key, None)
+            if previous is not None:
+                self._retire(previous)  # Replaced or modified file
+            if self.capacity > 0:
+                self._files[key] = handle
+            else:
+                handle._evicted = True
+            while len(self._files) > self.capacity:
+                _, evicted = self._files.popitem(last=False)
+                self._retire(evicted)
+        return handle
+
+    def release(self, handle: OpenFile) -> None:
+        with self._lock:
+            handle._users -= 1
+            close = handle._evicted and handle._users == 0
+        if close:
+            os.close(handle.fd)
+
+    def _retire(self, handle: OpenFile) -> None:
+        """Close a handle dropped from the cache (now, or when its last stream ends)."""
+        handle._evicted = True
+        if handle._users == 0:
+            os.close(handle.fd)
+
+
+def _same_file(a: os.stat_result, b: os.stat_result) -> bool:
+    return (a.st_dev, a.st_ino, a.st_size, a.st_mtime_ns) == (b.st_dev, b.st_ino, b.st_size, b.st_mtime_ns)
+
+
+def make_etag(stat: os.stat_result) -> str:
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+def parse_ranges(header: str, size: int) -> list[tuple[int, int]] | None:
+    """Parse a Range header into sorted, merged inclusive (start, end) pairs.
+
+    Returns None when the header should be ignored (malformed, another unit,
+    or too many ranges) and an empty list when no range is satisfiable.
+    """
+    unit, _, specs = header.partition("=")
+    if unit.strip().lower() != "bytes" or not specs.strip():
+        return None
+
+    ranges = []
+    for spec in specs.split(","):
+        first, sep, last = spec.strip().partition("-")
+        first, last = first.strip(), last.strip()
+        if not sep or (first and not first.isdigit()) or (last and not last.isdigit()):
+            return None
+        if not first:  # Suffix: the last N bytes
+            if not last:
+                return None
+            length = int(last)
+            if length == 0:
+                continue
+            ranges.append((max(0, size - length), size - 1))
+            continue
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if last and int(last) < start:
+            return None
+        if start < size:
+            ranges.append((start, end))
+
+    merged: list[tuple[int, int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    if len(merged) > MAX_RANGES:
+        return None
+    return merged
+
+
+def _not_modified(request: Request, etag: str, mtime: float) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _range_applies(request: Request, etag: str, last_modified: str) -> bool:
+    """If-Range: honor Range only if the client's copy is still current."""
+    if_range = request.headers.get("if-range")
+    if if_range is None:
+        return True
+    if_range = if_range.strip()
+    if if_range.startswith('"'):
+        return if_range == etag  # Strong comparison
+    return if_range == last_modified
+
+
+class AudioFileResponse(Response):
+    """Full, single-range or multi-range response body sent from a cached descriptor."""
+
+    def __init__(
+        self,
+        handles: FileHandleCache,
+        handle: OpenFile,
+        media_type: str,
+        ranges: list[tuple[int, int]] | None,
+        headers: dict[str, str],
+    ):
+        super().__init__(media_type=media_type, headers=headers)
+        self._handles = handles
+        self._handle = handle
+        size = handle.stat.st_size
+
+        # (prefix bytes, start, end) parts; ranges=None is the whole file
+        self._parts: list[tuple[bytes, int, int]] = []
+        self._epilogue = b""
+        if ranges is None:
+            self.status_code = 200
+            self._parts.append((b"", 0, size - 1))
+            length = size
+        elif len(ranges) == 1:
+            self.status_code = 206
+            start, end = ranges[0]
+            self.headers["content-range"] = f"bytes {start}-{end}/{size}"
+            self._parts.append((b"", start, end))
+            length = end - start + 1
+        else:
+            self.status_code = 206
+            boundary = secrets.token_hex(16)
+            self.headers["content-type"] = f"multipart/byteranges; boundary={boundary}"
+            length = 0
+            for i, (start, end) in enumerate(ranges):
+                prefix = (b"" if i == 0 else b"\r\n") + (
+                    f"--{boundary}\r\n"
+                    f"Content-Type: {media_type}\r\n"
+                    f"Content-Range: bytes {start}-{end}/{size}\r\n\r\n"
+                ).encode("latin-1")
+                self._parts.append((prefix, start, end))
+                length += len(prefix) + end - start + 1
+            self._epilogue = f"\r\n--{boundary}--\r\n".encode("latin-1")
+            length += len(self._epilogue)
+        self.headers["content-length"] = str(length)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+            if scope["method"].upper() == "HEAD":
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+                return
+
+            async with anyio.create_task_group() as task_group:
+
+                async def run_then_cancel(func) -> None:  # type: ignore[no-untyped-def]
+                    await func()
+                    task_group.cancel_scope.cancel()
+
+                task_group.start_soon(run_then_cancel, partial(self._send_body, scope, send))
+                await run_then_cancel(partial(self._wait_for_disconnect, receive))
+        finally:
+            self._handles.release(self._handle)
+
+    async def _wait_for_disconnect(self, receive: Receive) -> None:
+        while (await receive())["type"] != "http.disconnect":
+            pass
+
+    async def _send_body(self, scope: Scope, send: Send) -> None:
+        extensions = scope.get("extensions") or {}
+        if "http.response.pathsend" in extensions and self.status_code == 200:
+            await send({"type": "http.response.pathsend", "path": self._handle.path})
+            return
+
+        zerocopy = "http.response.zerocopy" in extensions
+        file = os.fdopen(self._handle.fd, "rb", closefd=False) if zerocopy else None
+        for prefix, start, end in self._parts:
+            if prefix:
+                await send({"type": "http.response.body", "body": prefix, "more_body": True})
+            if file is not None:
+                if end >= start:
+                    await send({
+                        "type": "http.response.zerocopy",
+                        "file": file,
+                        "offset": start,
+                        "count": end - start + 1,
+                        "more_body": True,
+                    })
+                continue
+            offset = start
+            while offset <= end:
+                chunk = await asyncio.to_thread(
+                    os.pread, self._handle.fd, min(CHUNK_SIZE, end - offset + 1), offset
+                )
+                if not chunk:
+                    break  # Truncated since we opened it
+                offset += len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": self._epilogue, "more_body": False})
+
+
+_handles: FileHandleCache | None = None
+
+
+def get_file_handles() -> FileHandleCache:
+    """Get the process-wide audio file descriptor cache."""
+    global _handles
+    if _handles is None:
+        _handles = FileHandleCache(settings.stream_handle_cache_size)
+    return _handles
+
+
+async def stream_file(request: Request, path: Path, media_type: str) -> Response:
+    """Serve an audio file honoring Range and conditional request headers.
+
+    Raises FileNotFoundError (or another OSError) if the file can't be opened.
+    """
+    handles = get_file_handles()
+    handle = await asyncio.to_thread(handles.acquire, path)
+    try:
+        stat = handle.stat
+        etag = make_etag(stat)
+        last_modified = formatdate(stat.st_mtime, usegmt=True)
+        headers = {"Accept-Ranges": "bytes", "ETag": etag, "Last-Modified": last_modified}
+
+        if _not_modified(request, etag, stat.st_mtime):
+            handles.release(handle)
+            return Response(status_code=304, headers=headers)
+
+        ranges = None
+        range_header = request.headers.get("range")
+        if range_header and _range_applies(request, etag, last_modified):
+            ranges = parse_ranges(range_header, stat.st_size)
+            if ranges == []:
+                handles.release(handle)
+                return Response(
+                    status_code=416, headers={**headers, "Content-Range": f"bytes */{stat.st_size}"}
+                )
+        return AudioFileResponse(handles, handle, media_type, ranges, headers)
+    except BaseException:
+        handles.release(handle)
+        raise
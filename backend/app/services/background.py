@@ -1,9 +1,10 @@
 """In-process background task manager using asyncio and ProcessPoolExecutor.
 
 Key features:
-1. Uses spawn-based ProcessPoolExecutor (avoids fork/OpenBLAS SIGSEGV)
-2. Runs periodic tasks via APScheduler
-3. Reports progress via Redis for frontend consumption
+1. Uses spawn-based ProcessPoolExecutors (avoids fork/OpenBLAS SIGSEGV)
+2. Separate analysis pools per phase, admitted against a shared memory budget
+3. Runs periodic tasks via APScheduler
+4. Reports progress via Redis for frontend consumption
 """
 
 import asyncio
@@ -12,10 +13,12 @@ import logging
 import multiprocessing as mp
 import os
 import time
-from collections.abc import Callable
+from collections.abc import AsyncIterator, Callable
 from concurrent.futures import ProcessPoolExecutor
 from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager
 from typing import Any
+from uuid import UUID
 
 import redis
 
@@ -25,6 +28,33 @@ from app.config import settings
 EXECUTOR_RESET_COOLDOWN = 30.0  # Minimum seconds between executor resets
 EXECUTOR_MAX_CONSECUTIVE_FAILURES = 5  # Max failures before giving up
 
+# Analysis phases with their own process pool
+ANALYSIS_POOLS = ("features", "embedding")
+
+# Completed analysis jobs per phase, bucketed per minute (shared by all workers)
+ANALYSIS_THROUGHPUT_KEY = "familiar:analysis:done:{phase}:{minute}"
+THROUGHPUT_WINDOW_MINUTES = 5
+
+# Value of the sync lock while the library watcher applies a batch of changes
+# (a short, scanner-only hold - not reported as a running sync)
+WATCH_BATCH_LOCK_VALUE = b"watch"
+WATCH_BATCH_LOCK_TTL = 300
+
+# Held while one worker generates missing artwork variants at startup
+ARTWORK_BACKFILL_LOCK_KEY = "familiar:artwork:variant_backfill"
+
+# Held while one worker checks (and if needed rebuilds) the map centroids at startup;
+# the version key records the CENTROIDS_VERSION of the last rebuild
+CENTROIDS_REBUILD_LOCK_KEY = "familiar:centroids:rebuild"
+CENTROIDS_VERSION_KEY = "familiar:centroids:version"
+
+# Seconds to gather analysis completions into one refresh of the stats
+# snapshots and smart playlist membership
+LIBRARY_REFRESH_DELAY = 60.0
+
+# Held while one worker rebuilds the smart playlists with within_days rules
+SMART_PLAYLIST_REFRESH_LOCK_KEY = "familiar:smart_playlists:time_refresh"
+
 logger = logging.getLogger(__name__)
 
 
@@ -40,22 +70,236 @@ def _analysis_worker_init() -> None:
     except Exception as e:
         logging.warning(f"Could not set nice priority: {e}")
 
+
+def _run_with_peak_memory(func: Callable, *args: Any) -> tuple[Any, float]:
+    """Run an analysis job in a worker and report the worker's peak RSS (MB)."""
+    from app.services.tasks import get_memory_mb
+
+    result = func(*args)
+    return result, get_memory_mb()
+
+
 # Force spawn context to avoid fork issues with numpy/OpenBLAS
 mp_context = mp.get_context("spawn")
 
 
+class AnalysisAdmission:
+    """Admits analysis jobs while projected worker memory stays within a budget.
+
+    Each job reserves its phase's estimated peak RSS: the configured default
+    until a worker reports its peak (sampled with get_memory_mb), then the
+    largest peak seen. A job starts only if its pool has a free worker and
+    the reservations fit the budget. One job is always allowed when nothing
+    is running, so an estimate above the budget can't stall analysis.
+    Waiters are admitted in arrival order, so cheap feature jobs can't starve
+    a waiting embedding job.
+    """
+
+    def __init__(
+        self,
+        budget_mb: float,
+        workers: dict[str, int],
+        default_job_mb: dict[str, float],
+    ):
+        self.budget_mb = budget_mb
+        self.workers = workers
+        self._default_job_mb = default_job_mb
+        self._observed_job_mb: dict[str, float] = {}
+        self._running = dict.fromkeys(workers, 0)
+        self._reserved_mb = 0.0
+        self._waiting: list[tuple[int, str]] = []  # (ticket, phase), oldest first
+        self._next_ticket = 0
+        self._cond = asyncio.Condition()
+
+    def job_estimate_mb(self, phase: str) -> float:
+        """Projected peak RSS of one job in this phase."""
+        return self._observed_job_mb.get(phase, self._default_job_mb[phase])
+
+    def _can_admit(self, ticket: int, phase: str) -> bool:
+        if self._running[phase] >= self.workers[phase]:
+            return False
+        # An older waiter that only lacks memory goes first
+        for waiting_ticket, waiting_phase in self._waiting:
+            if waiting_ticket >= ticket:
+                break
+            if self._running[waiting_phase] < self.workers[waiting_phase]:
+                return False
+        if not any(self._running.values()):
+            return True
+        return self._reserved_mb + self.job_estimate_mb(phase) <= self.budget_mb
+
+    @asynccontextmanager
+    async def admit(self, phase: str) -> AsyncIterator[Callable[[float], None]]:
+        """Hold a worker slot and memory reservation for one job.
+
+        Yields a callback for reporting the worker's sampled peak RSS.
+        """
+        ticket = self._next_ticket
+        self._next_ticket += 1
+        async with self._cond:
+            self._waiting.append((ticket, phase))
+            try:
+                await self._cond.wait_for(lambda: self._can_admit(ticket, phase))
+            finally:
+                self._waiting.remove((ticket, phase))
+                # Removing a waiter can unblock younger ones
+                self._cond.notify_all()
+            reserved_mb = self.job_estimate_mb(phase)
+            self._running[phase] += 1
+            self._reserved_mb += reserved_mb
+
+        def record_peak(peak_mb: float) -> None:
+            if peak_mb > 0:
+                self._observed_job_mb[phase] = max(self._observed_job_mb.get(phase, 0.0), peak_mb)
+
+        try:
+            yield record_peak
+        finally:
+            async with self._cond:
+                self._running[phase] -= 1
+                self._reserved_mb -= reserved_mb
+                self._cond.notify_all()
+
+    def get_status(self) -> dict[str, Any]:
+        """Pool sizes, running jobs, and memory reservations."""
+        return {
+            "budget_mb": round(self.budget_mb),
+            "reserved_mb": round(self._reserved_mb),
+            "pools": {
+                phase: {
+                    "workers": self.workers[phase],
+                    "running": self._running[phase],
+                    "waiting": sum(1 for _, p in self._waiting if p == phase),
+                    "job_estimate_mb": round(self.job_estimate_mb(phase)),
+                }
+                for phase in self.workers
+            },
+        }
+
+
+class EmbeddingBatcher:
+    """Groups embedding jobs into batches for the warm CLAP workers.
+
+    Tracks submitted close together (up to clap_batch_size, waiting at most
+    clap_batch_wait_ms for a batch to fill) share one run_embedding_batch call,
+    so the embedding pool runs full inference mini-batches instead of one clip
+    per job. Each submitter still gets its own track's result.
+    """
+
+    def __init__(self, manager: "BackgroundManager", batch_size: int, max_wait_s: float):
+        self._manager = manager
+        self.batch_size = max(1, batch_size)
+        self.max_wait_s = max_wait_s
+        self._pending: list[tuple[str, asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._batch_tasks: set[asyncio.Task] = set()
+
+    async def submit(self, track_id: str) -> dict[str, Any]:
+        """Queue a track for the next batch and wait for its result."""
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future = loop.create_future()
+        self._pending.append((track_id, future))
+        if len(self._pending) >= self.batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_s, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        """Start a batch job with the oldest pending tracks."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch = self._pending[:self.batch_size]
+        self._pending = self._pending[self.batch_size:]
+        if self._pending:
+            self._timer = asyncio.get_running_loop().call_later(self.max_wait_s, self._flush)
+        if batch:
+            task = asyncio.create_task(self._run_batch(batch))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    async def _run_batch(self, batch: list[tuple[str, asyncio.Future]]) -> None:
+        from app.services.tasks import run_embedding_batch
+
+        # Skip submitters that were cancelled while waiting
+        live = [(track_id, future) for track_id, future in batch if not future.done()]
+        track_ids = list(dict.fromkeys(track_id for track_id, _ in live))
+        if not track_ids:
+            return
+        try:
+            results = await self._manager.run_cpu_bound(
+                run_embedding_batch, track_ids, pool="embedding", track_ids=track_ids
+            )
+        except Exception as e:
+            for _, future in live:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for track_id, future in live:
+            if not future.done():
+                future.set_result(
+                    results.get(track_id, {"status": "error", "error": "No result from batch"})
+                )
+        embedded = [track_id for track_id, r in results.items() if r.get("embedding_generated")]
+        self._manager.record_analysis_throughput("embedding", len(embedded))
+        if embedded and settings.similar_tracks_cache_size > 0:
+            await self._manager.refresh_similar_tracks(embedded)
+
+    def cancel(self) -> None:
+        """Drop pending tracks and cancel running batches (on shutdown)."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        for _, future in self._pending:
+            future.cancel()
+        self._pending = []
+        for task in self._batch_tasks:
+            task.cancel()
+
+
+def _default_analysis_workers() -> dict[str, int]:
+    """Worker counts per pool: features scale with cores, CLAP stays gated."""
+    cpus = os.cpu_count() or 2
+    features = settings.analysis_features_workers or max(1, min(cpus - 1, 8))
+    embedding = settings.analysis_embedding_workers or 1
+    return {"features": features, "embedding": embedding}
+
+
+def _default_memory_budget_mb() -> float:
+    """Analysis memory budget: configured, or half of system RAM."""
+    if settings.analysis_memory_budget_mb > 0:
+        return float(settings.analysis_memory_budget_mb)
+    try:
+        import psutil
+
+        return psutil.virtual_memory().total / (1024 * 1024) / 2
+    except Exception:
+        return 4096.0
+
+
 class BackgroundManager:
     """Manages background tasks in the API process.
 
     Key features:
-    - ProcessPoolExecutor with spawn context (not fork) to avoid OpenBLAS crashes
+    - ProcessPoolExecutors with spawn context (not fork) to avoid OpenBLAS crashes
+    - Memory-aware admission of analysis jobs across the per-phase pools
     - APScheduler for periodic tasks
     - Redis for progress reporting
     - Task deduplication to prevent running multiple syncs simultaneously
     """
 
     def __init__(self):
-        self._executor: ProcessPoolExecutor | None = None
+        self._executors: dict[str, ProcessPoolExecutor] = {}
+        self._admission = AnalysisAdmission(
+            budget_mb=_default_memory_budget_mb(),
+            workers=_default_analysis_workers(),
+            default_job_mb={
+                "features": settings.analysis_features_job_mb,
+                "embedding": settings.analysis_embedding_job_mb,
+            },
+        )
         self._scheduler = None
         self._redis: redis.Redis | None = None
         self._current_sync_task: asyncio.Task | None = None
@@ -63,12 +307,22 @@ class BackgroundManager:
         self._lock = asyncio.Lock()
         # Executor rate limiting state
         self._executor_lock = asyncio.Lock()  # Protects executor reset
-        self._last_executor_reset: float = 0.0
+        self._last_executor_reset: dict[str, float] = {}  # Per pool
         self._consecutive_executor_failures: int = 0
         self._executor_disabled: bool = False
-        # Track current work for crash diagnostics
-        self._current_track_id: str | None = None
+        # Track current work per pool for crash diagnostics
+        self._running_track_ids: dict[str, set[str]] = {pool: set() for pool in ANALYSIS_POOLS}
+        self._embedding_batcher = EmbeddingBatcher(
+            self,
+            batch_size=settings.clap_batch_size,
+            max_wait_s=settings.clap_batch_wait_ms / 1000,
+        )
         self._crashed_track_ids: set[str] = set()  # Tracks that have caused crashes
+        self._library_watcher = None  # LibraryWatcher, started in startup()
+        self._analysis_queue = None  # AnalysisQueueConsumer, started in startup()
+        self._neighbors_lock = asyncio.Lock()  # Serializes similar-track cache refreshes
+        self._stats_lock = asyncio.Lock()  # Serializes stats snapshot refreshes
+        self._library_refresh_task: asyncio.Task | None = None
 
     @property
     def redis(self) -> redis.Redis:
@@ -77,25 +331,28 @@ class BackgroundManager:
             self._redis = redis.from_url(settings.redis_url)
         return self._redis
 
-    @property
-    def executor(self) -> ProcessPoolExecutor:
-        """Lazy ProcessPoolExecutor with spawn context."""
-        if self._executor is None:
-            self._create_executor()
-        return self._executor
+    def executor(self, pool: str) -> ProcessPoolExecutor:
+        """Lazy ProcessPoolExecutor with spawn context for one analysis pool."""
+        if pool not in self._executors:
+            self._create_executor(pool)
+        return self._executors[pool]
 
-    def _create_executor(self) -> None:
+    def _create_executor(self, pool: str) -> None:
         """Create a new ProcessPoolExecutor with spawn context."""
+        workers = self._admission.workers[pool]
         # Use spawn to get clean processes (fork can inherit corrupted OpenBLAS state)
-        self._executor = ProcessPoolExecutor(
-            max_workers=1,  # Single worker to limit memory (CLAP model is ~1.5GB)
+        self._executors[pool] = ProcessPoolExecutor(
+            max_workers=workers,  # Memory is bounded by admission, not pool size
             mp_context=mp_context,
             initializer=_analysis_worker_init,  # Run workers at lower priority
         )
-        logger.info("ProcessPoolExecutor initialized with spawn context (1 worker, nice=10)")
+        logger.info(
+            f"ProcessPoolExecutor '{pool}' initialized with spawn context "
+            f"({workers} workers, nice=10)"
+        )
 
-    def _reset_executor(self) -> bool:
-        """Reset the executor after a crash. Creates a fresh process pool.
+    def _reset_executor(self, pool: str) -> bool:
+        """Reset a pool's executor after a crash. Creates a fresh process pool.
 
         Returns True if reset succeeded, False if rate-limited or disabled.
         """
@@ -106,7 +363,7 @@ class BackgroundManager:
 
         # Check cooldown period
         now = time.monotonic()
-        time_since_last_reset = now - self._last_executor_reset
+        time_since_last_reset = now - self._last_executor_reset.get(pool, 0.0)
         if time_since_last_reset < EXECUTOR_RESET_COOLDOWN:
             logger.warning(
                 f"Executor reset rate-limited (last reset {time_since_last_reset:.1f}s ago, "
@@ -125,26 +382,28 @@ class BackgroundManager:
             return False
 
         # Shutdown old executor (wait briefly to allow cleanup)
-        if self._executor is not None:
+        old_executor = self._executors.pop(pool, None)
+        if old_executor is not None:
             try:
-                self._executor.shutdown(wait=True, cancel_futures=True)
+                old_executor.shutdown(wait=True, cancel_futures=True)
             except Exception:
                 pass
-            self._executor = None
 
-        self._create_executor()
-        self._last_executor_reset = now
-        # Log which track was being processed when the crash occurred
-        if self._current_track_id:
-            self._crashed_track_ids.add(self._current_track_id)
+        self._create_executor(pool)
+        self._last_executor_reset[pool] = now
+        # Log which tracks were being processed when the crash occurred
+        # (with several workers, any of them may be the culprit)
+        suspects = self._running_track_ids[pool]
+        if suspects:
+            self._crashed_track_ids.update(suspects)
             logger.warning(
-                f"ProcessPoolExecutor was reset after crash "
+                f"ProcessPoolExecutor '{pool}' was reset after crash "
                 f"(failure {self._consecutive_executor_failures}/{EXECUTOR_MAX_CONSECUTIVE_FAILURES}). "
-                f"Track being processed: {self._current_track_id}"
+                f"Tracks being processed: {', '.join(sorted(suspects))}"
             )
         else:
             logger.warning(
-                f"ProcessPoolExecutor was reset after crash "
+                f"ProcessPoolExecutor '{pool}' was reset after crash "
                 f"(failure {self._consecutive_executor_failures}/{EXECUTOR_MAX_CONSECUTIVE_FAILURES})"
             )
         return True
@@ -162,19 +421,16 @@ class BackgroundManager:
         # Reset state
         self._executor_disabled = False
         self._consecutive_executor_failures = 0
-        self._last_executor_reset = 0.0
+        self._last_executor_reset.clear()
         self._crashed_track_ids.clear()
 
-        # Shutdown old executor if exists
-        if self._executor is not None:
+        # Shutdown old executors; fresh ones are created on next use
+        for executor in self._executors.values():
             try:
-                self._executor.shutdown(wait=False, cancel_futures=True)
+                executor.shutdown(wait=False, cancel_futures=True)
             except Exception:
                 pass
-            self._executor = None
-
-        # Create fresh executor
-        self._create_executor()
+        self._executors.clear()
 
         logger.info(
             f"Executor circuit breaker manually reset. Was disabled: {was_disabled}, "
@@ -195,9 +451,42 @@ class BackgroundManager:
             "consecutive_failures": self._consecutive_executor_failures,
             "max_failures": EXECUTOR_MAX_CONSECUTIVE_FAILURES,
             "crashed_track_ids": list(self._crashed_track_ids),
-            "last_reset_ago": time.monotonic() - self._last_executor_reset if self._last_executor_reset else None,
+            "last_reset_ago": (
+                time.monotonic() - max(self._last_executor_reset.values())
+                if self._last_executor_reset else None
+            ),
+            **self._admission.get_status(),
         }
 
+    def record_analysis_throughput(self, phase: str, count: int) -> None:
+        """Count completed analysis jobs for the tracks-per-minute stats."""
+        if count <= 0:
+            return
+        key = ANALYSIS_THROUGHPUT_KEY.format(phase=phase, minute=int(time.time() // 60))
+        try:
+            pipe = self.redis.pipeline()
+            pipe.incrby(key, count)
+            pipe.expire(key, (THROUGHPUT_WINDOW_MINUTES + 2) * 60)
+            pipe.execute()
+        except Exception:
+            pass
+
+    def get_analysis_throughput(self) -> dict[str, float]:
+        """Tracks per minute for each analysis phase, averaged over the last full minutes."""
+        current_minute = int(time.time() // 60)
+        minutes = range(current_minute - THROUGHPUT_WINDOW_MINUTES, current_minute)
+        throughput: dict[str, float] = {}
+        for phase in ANALYSIS_POOLS:
+            try:
+                counts = self.redis.mget(
+                    [ANALYSIS_THROUGHPUT_KEY.format(phase=phase, minute=m) for m in minutes]
+                )
+                done = sum(int(c) for c in counts if c)  # type: ignore[union-attr]
+            except Exception:
+                done = 0
+            throughput[phase] = round(done / THROUGHPUT_WINDOW_MINUTES, 1)
+        return throughput
+
     def _cleanup_stale_redis_state(self) -> None:
         """Clean up stale Redis state from previous runs.
 
@@ -260,8 +549,19 @@ class BackgroundManager:
                 replace_existing=True,
             )
 
+            # Hourly rebuild of smart playlists whose within_days rules move with time
+            self._scheduler.add_job(
+                self._refresh_time_based_smart_playlists,
+                CronTrigger(minute=30),
+                id="smart_playlists_time_rules",
+                replace_existing=True,
+            )
+
             self._scheduler.start()
-            logger.info("APScheduler started with periodic sync (every 2 hours) and daily new releases check (3 AM)")
+            logger.info(
+                "APScheduler started with periodic sync (every 2 hours), daily new releases check (3 AM) "
+                "and hourly smart playlist refresh"
+            )
 
             # Schedule startup sync after a short delay
             asyncio.create_task(self._startup_sync())
@@ -271,6 +571,34 @@ class BackgroundManager:
         except Exception as e:
             logger.error(f"Failed to start scheduler: {e}")
 
+        # Incremental sync of changed paths between the periodic full syncs
+        from app.services.library_watcher import LibraryWatcher
+        self._library_watcher = LibraryWatcher(self)
+        await self._library_watcher.start()
+
+        # Durable analysis queue (consumed by one worker process)
+        from app.services.analysis_queue import AnalysisQueueConsumer
+        workers = self._admission.workers
+        self._analysis_queue = AnalysisQueueConsumer(
+            self,
+            limits={
+                # Keep each features worker busy with one job queued behind it,
+                # and give the embedding batcher enough jobs to fill a batch
+                "features": workers["features"] * 2,
+                "embedding": max(settings.clap_batch_size, workers["embedding"]),
+            },
+        )
+        await self._analysis_queue.start()
+
+        # Build the similar-tracks index in the background (one worker process)
+        asyncio.create_task(self._maintain_similarity_index())
+
+        # Fill the map centroids if they are missing or outdated
+        asyncio.create_task(self._rebuild_centroids_if_needed())
+
+        # Generate artwork sizes/formats missing from albums saved before they existed
+        asyncio.create_task(self._backfill_artwork_variants())
+
     async def shutdown(self) -> None:
         """Cleanup on app shutdown."""
         logger.info("Shutting down BackgroundManager...")
@@ -280,6 +608,14 @@ class BackgroundManager:
         artwork_fetcher = get_artwork_fetcher()
         await artwork_fetcher.stop()
 
+        # Stop library watcher
+        if self._library_watcher:
+            await self._library_watcher.stop()
+
+        # Stop consuming the analysis queue (claimed jobs go back to the queue)
+        if self._analysis_queue:
+            await self._analysis_queue.stop()
+
         # Cancel running tasks
         if self._current_sync_task and not self._current_sync_task.done():
             self._current_sync_task.cancel()
@@ -291,14 +627,17 @@ class BackgroundManager:
         for task in self._analysis_tasks.values():
             if not task.done():
                 task.cancel()
+        self._embedding_batcher.cancel()
+        if self._library_refresh_task and not self._library_refresh_task.done():
+            self._library_refresh_task.cancel()
 
         # Stop scheduler
         if self._scheduler:
             self._scheduler.shutdown(wait=False)
 
-        # Shutdown executor
-        if self._executor:
-            self._executor.shutdown(wait=False)
+        # Shutdown executors
+        for executor in self._executors.values():
+            executor.shutdown(wait=False)
 
         logger.info("BackgroundManager shutdown complete")
 
@@ -355,7 +694,11 @@ class BackgroundManager:
 
         # Check Redis state
         try:
-            has_lock = bool(self.redis.get("familiar:sync:lock"))
+            lock_value = self.redis.get("familiar:sync:lock")
+            if lock_value == WATCH_BATCH_LOCK_VALUE:
+                # Library watcher applying a batch - not a sync
+                return False
+            has_lock = bool(lock_value)
             data: bytes | None = self.redis.get("familiar:sync:progress")  # type: ignore[assignment]
 
             if data:
@@ -404,6 +747,40 @@ class BackgroundManager:
         except Exception:
             return False
 
+    def acquire_watch_batch_lock(self) -> bool:
+        """Hold the sync lock while the library watcher applies a batch of changes.
+
+        Keeps full syncs and watcher batches from scanning the same files at once.
+        Returns False if a sync (or another batch) holds the lock.
+        """
+        try:
+            return bool(
+                self.redis.set(
+                    "familiar:sync:lock", WATCH_BATCH_LOCK_VALUE, nx=True, ex=WATCH_BATCH_LOCK_TTL
+                )
+            )
+        except Exception:
+            return False
+
+    def release_watch_batch_lock(self) -> None:
+        """Release the sync lock if it is still held by a watcher batch."""
+        try:
+            if self.redis.get("familiar:sync:lock") == WATCH_BATCH_LOCK_VALUE:
+                self.redis.delete("familiar:sync:lock")
+        except Exception:
+            pass
+
+    async def _wait_for_watch_batch(self, timeout: float = 60.0) -> None:
+        """Wait (bounded) for an in-progress watcher batch to release the sync lock."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                if self.redis.get("familiar:sync:lock") != WATCH_BATCH_LOCK_VALUE:
+                    return
+            except Exception:
+                return
+            await asyncio.sleep(1)
+
     def _release_sync_lock(self) -> None:
         """Release the sync lock in Redis."""
         try:
@@ -417,12 +794,22 @@ class BackgroundManager:
             self._current_sync_task.cancel()
         self._release_sync_lock()
 
-    async def run_cpu_bound(self, func: Callable, *args: Any, max_retries: int = 1) -> Any:
-        """Run CPU-bound function in process pool (spawned, not forked).
+    async def run_cpu_bound(
+        self,
+        func: Callable,
+        *args: Any,
+        pool: str = "features",
+        track_ids: list[str] | None = None,
+        max_retries: int = 1,
+    ) -> Any:
+        """Run CPU-bound function in an analysis process pool (spawned, not forked).
 
         This is the key to avoiding OpenBLAS SIGSEGV - spawned processes
         don't inherit corrupted library state from the parent.
 
+        The job waits for admission first: a free worker in its pool and room
+        in the memory budget (see AnalysisAdmission).
+
         If the process pool crashes (BrokenProcessPool), it will be automatically
         recreated and the operation retried once.
 
@@ -434,13 +821,28 @@ class BackgroundManager:
         if self._executor_disabled:
             raise RuntimeError("Process pool executor is disabled due to repeated failures")
 
+        async with self._admission.admit(pool) as record_peak:
+            self._running_track_ids[pool].update(track_ids or ())
+            try:
+                result, peak_mb = await self._run_in_pool(pool, func, *args, max_retries=max_retries)
+            finally:
+                self._running_track_ids[pool].difference_update(track_ids or ())
+            record_peak(peak_mb)
+            return result
+
+    async def _run_in_pool(
+        self, pool: str, func: Callable, *args: Any, max_retries: int
+    ) -> tuple[Any, float]:
+        """Run an admitted job, recreating the pool if a worker crashed."""
         loop = asyncio.get_event_loop()
         retries = 0
         last_error: Exception | None = None
 
         while retries <= max_retries:
             try:
-                result = await loop.run_in_executor(self.executor, func, *args)
+                result = await loop.run_in_executor(
+                    self.executor(pool), _run_with_peak_memory, func, *args
+                )
                 # Success! Reset failure counter
                 self._consecutive_executor_failures = 0
                 return result
@@ -458,7 +860,7 @@ class BackgroundManager:
                         # Check if executor was already reset by another task while we waited
                         # If so, _reset_executor will be rate-limited but that's OK - we'll
                         # just retry with the already-reset executor
-                        time_since_reset = time.monotonic() - self._last_executor_reset
+                        time_since_reset = time.monotonic() - self._last_executor_reset.get(pool, 0.0)
                         if time_since_reset < EXECUTOR_RESET_COOLDOWN:
                             # Another task just reset it - the executor should be fresh
                             logger.info(
@@ -471,7 +873,7 @@ class BackgroundManager:
                                 f"Process pool crashed, attempting reset "
                                 f"(attempt {retries + 1}/{max_retries + 1})"
                             )
-                            reset_ok = self._reset_executor()
+                            reset_ok = self._reset_executor(pool)
                             if not reset_ok:
                                 # Disabled due to too many failures
                                 raise RuntimeError(
@@ -484,12 +886,124 @@ class BackgroundManager:
                     raise
         raise last_error  # Should not reach here, but for type safety
 
+    async def _maintain_similarity_index(self) -> None:
+        """Startup maintenance of the similar-tracks index and neighbor cache."""
+        from app.services.similarity import maintain_similarity_index
+
+        try:
+            await maintain_similarity_index()
+        except Exception as e:
+            logger.error(f"Similar-tracks index maintenance failed: {e}")
+
+    async def _rebuild_centroids_if_needed(self) -> None:
+        """Re-sum the map centroids when empty or built by an older CENTROIDS_VERSION.
+
+        Otherwise the triggers keep them current; a rebuild locks both tables.
+        """
+        from app.db.session import async_session_maker
+        from app.services.centroids import CENTROIDS_VERSION, centroids_missing, rebuild_centroids
+
+        try:
+            if not self.redis.set(CENTROIDS_REBUILD_LOCK_KEY, os.getpid(), nx=True, ex=3600):
+                return
+            try:
+                outdated = self.redis.get(CENTROIDS_VERSION_KEY) != str(CENTROIDS_VERSION).encode()
+                if not outdated:
+                    async with async_session_maker() as db:
+                        outdated = await centroids_missing(db)
+                if outdated:
+                    await rebuild_centroids()
+                    self.redis.set(CENTROIDS_VERSION_KEY, CENTROIDS_VERSION)
+            finally:
+                self.redis.delete(CENTROIDS_REBUILD_LOCK_KEY)
+        except Exception as e:
+            logger.error(f"Centroid rebuild failed: {e}")
+
+    async def _backfill_artwork_variants(self) -> None:
+        """Create missing artwork variants once per deployment (one worker does it)."""
+        from app.services.artwork import backfill_artwork_variants
+
+        try:
+            if not self.redis.set(ARTWORK_BACKFILL_LOCK_KEY, os.getpid(), nx=True, ex=3600):
+                return
+            updated = await asyncio.to_thread(backfill_artwork_variants)
+            if updated:
+                logger.info(f"Generated artwork variants for {updated} albums")
+        except Exception as e:
+            logger.error(f"Artwork variant backfill failed: {e}")
+
+    async def refresh_similar_tracks(self, track_ids: list[str]) -> None:
+        """Update cached neighbor lists for tracks that just got embeddings."""
+        from app.db.session import async_session_maker
+        from app.services.similarity import refresh_neighbors
+
+        try:
+            async with self._neighbors_lock, async_session_maker() as db:
+                await refresh_neighbors(db, [UUID(track_id) for track_id in track_ids])
+                await db.commit()
+        except Exception as e:
+            logger.warning(f"Failed to refresh similar-track cache: {e}")
+
+    async def refresh_library_stats(self) -> None:
+        """Recompute the dashboard stats snapshots (library counts, mood grid)."""
+        from app.db.session import async_session_maker
+        from app.services.library_stats import refresh_stats_snapshots
+
+        try:
+            async with self._stats_lock, async_session_maker() as db:
+                await refresh_stats_snapshots(db)
+                await db.commit()
+        except Exception as e:
+            logger.warning(f"Failed to refresh library stats: {e}")
+
+    async def refresh_smart_playlists(self, time_based_only: bool = False) -> None:
+        """Sync smart playlist membership with changed tracks (see smart_playlists)."""
+        from app.db.session import async_session_maker
+        from app.services.smart_playlists import refresh_smart_playlists
+
+        try:
+            async with async_session_maker() as db:
+                await refresh_smart_playlists(db, time_based_only=time_based_only)
+        except Exception as e:
+            logger.warning(f"Failed to refresh smart playlists: {e}")
+
+    def schedule_library_refresh(self) -> None:
+        """Refresh the stats snapshots and smart playlists after LIBRARY_REFRESH_DELAY.
+
+        Completions during the delay share the one refresh, so a running
+        analysis refreshes them about once a minute.
+        """
+        if self._library_refresh_task is None or self._library_refresh_task.done():
+            self._library_refresh_task = asyncio.create_task(self._delayed_library_refresh())
+
+    async def _delayed_library_refresh(self) -> None:
+        await asyncio.sleep(LIBRARY_REFRESH_DELAY)
+        await self.refresh_library_stats()
+        await self.refresh_smart_playlists()
+
+    async def _refresh_time_based_smart_playlists(self) -> None:
+        """Rebuild smart playlists with within_days rules (scheduled hourly, one worker)."""
+        try:
+            if not self.redis.set(SMART_PLAYLIST_REFRESH_LOCK_KEY, os.getpid(), nx=True, ex=1800):
+                return
+        except Exception:
+            pass  # Without Redis every worker refreshes; rebuilds are idempotent
+        await self.refresh_smart_playlists(time_based_only=True)
+
+    def wake_analysis_queue(self) -> None:
+        """Start newly queued analysis jobs now if this process consumes the queue."""
+        if self._analysis_queue:
+            self._analysis_queue.wake()
+
     async def run_analysis(
         self,
         track_id: str,
         phase: str = "full",
     ) -> dict[str, Any]:
-        """Queue a track for analysis.
+        """Start analyzing a track in this process right away.
+
+        This bypasses the durable queue: work queued with enqueue_analysis()
+        (app.services.analysis_queue) survives restarts and is prioritized.
 
         Args:
             track_id: Track UUID
@@ -509,6 +1023,16 @@ class BackgroundManager:
             if not task.done():
                 return {"status": "already_queued"}
 
+        self.start_analysis_task(track_id, phase)
+        return {"status": "queued"}
+
+    def start_analysis_task(self, track_id: str, phase: str) -> asyncio.Task:
+        """Start the analysis task for a track and phase (or return the running one)."""
+        task_key = f"{track_id}:{phase}"
+        task = self._analysis_tasks.get(task_key)
+        if task and not task.done():
+            return task
+
         # Create analysis task for the specified phase
         if phase == "features":
             task = asyncio.create_task(self._do_features(track_id))
@@ -518,7 +1042,7 @@ class BackgroundManager:
             task = asyncio.create_task(self._do_analysis(track_id))
 
         self._analysis_tasks[task_key] = task
-        return {"status": "queued"}
+        return task
 
     async def _do_features(self, track_id: str) -> dict[str, Any]:
         """Execute feature extraction only (Phase 1).
@@ -530,14 +1054,17 @@ class BackgroundManager:
 
         task_key = f"{track_id}:features"
         try:
-            self._current_track_id = track_id
-            result = await self.run_cpu_bound(run_track_features, track_id)
+            result = await self.run_cpu_bound(
+                run_track_features, track_id, pool="features", track_ids=[track_id]
+            )
+            if result.get("status") == "success":
+                self.record_analysis_throughput("features", 1)
+                self.schedule_library_refresh()
             return result
         except Exception as e:
             logger.error(f"Feature extraction failed for {track_id}: {e}")
             return {"status": "error", "error": str(e)}
         finally:
-            self._current_track_id = None
             self._analysis_tasks.pop(task_key, None)
 
     async def _do_embedding(self, track_id: str) -> dict[str, Any]:
@@ -548,8 +1075,6 @@ class BackgroundManager:
         """
         import os
 
-        from app.services.tasks import run_track_embedding
-
         task_key = f"{track_id}:embedding"
         try:
             # Check if CLAP embeddings are disabled
@@ -559,14 +1084,12 @@ class BackgroundManager:
             if clap_disabled:
                 return {"status": "skipped", "embedding_generated": False}
 
-            self._current_track_id = track_id
-            result = await self.run_cpu_bound(run_track_embedding, track_id)
+            result = await self._embedding_batcher.submit(track_id)
             return result
         except Exception as e:
             logger.error(f"Embedding generation failed for {track_id}: {e}")
             return {"status": "error", "error": str(e)}
         finally:
-            self._current_track_id = None
             self._analysis_tasks.pop(task_key, None)
 
     async def _do_analysis(self, track_id: str) -> dict[str, Any]:
@@ -582,17 +1105,19 @@ class BackgroundManager:
         """
         import os
 
-        from app.services.tasks import run_track_embedding, run_track_features
+        from app.services.tasks import run_track_features
 
         task_key = f"{track_id}:full"
         try:
-            self._current_track_id = track_id
-
             # Phase 1: Extract features (librosa, artwork, fingerprint)
-            features_result = await self.run_cpu_bound(run_track_features, track_id)
+            features_result = await self.run_cpu_bound(
+                run_track_features, track_id, pool="features", track_ids=[track_id]
+            )
 
             if features_result.get("status") != "success":
                 return features_result
+            self.record_analysis_throughput("features", 1)
+            self.schedule_library_refresh()
 
             # Phase 2: Extract CLAP embedding (if enabled)
             clap_disabled = os.environ.get("DISABLE_CLAP_EMBEDDINGS", "").lower() in (
@@ -606,7 +1131,7 @@ class BackgroundManager:
                     "embedding_skipped": True,
                 }
 
-            embedding_result = await self.run_cpu_bound(run_track_embedding, track_id)
+            embedding_result = await self._embedding_batcher.submit(track_id)
 
             return {
                 **features_result,
@@ -618,7 +1143,6 @@ class BackgroundManager:
             logger.error(f"Analysis failed for {track_id}: {e}")
             return {"status": "error", "error": str(e)}
         finally:
-            self._current_track_id = None
             self._analysis_tasks.pop(task_key, None)
 
     async def run_spotify_sync(
@@ -854,7 +1378,8 @@ class BackgroundManager:
             if self.is_sync_running():
                 return {"status": "already_running"}
 
-            # Try to acquire Redis lock
+            # Let a watcher batch finish first, then try to acquire Redis lock
+            await self._wait_for_watch_batch()
             if not self._acquire_sync_lock():
                 return {"status": "already_running"}
 
@@ -874,6 +1399,8 @@ class BackgroundManager:
 
         try:
             result = await run_library_sync(reread_unchanged=reread_unchanged)
+            await self.refresh_library_stats()
+            await self.refresh_smart_playlists()
             return result
         except Exception as e:
             logger.error(f"Sync failed: {e}", exc_info=True)
@@ -0,0 +1,211 @@
+"""Artist and album embedding centroids for the music maps.
+
+The centroid tables hold a running sum and count of each group's track
+embeddings, maintained by database triggers (see migration
+20261016_000004_centroids), so a map reads one row per artist or album.
+The representative track of a group (closest to its mean) is cleared by the
+triggers whenever the group changes and refilled here, for just those
+groups, from the in-process embedding store.
+"""
+
+import logging
+from collections import defaultdict
+from typing import Any, Literal
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import func, select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import AlbumCentroid, ArtistCentroid, Track, TrackStatus
+
+logger = logging.getLogger(__name__)
+
+UNKNOWN_ARTIST = "Unknown Artist"
+
+# Bump to re-sum every group once at the next startup (e.g. after a trigger fix)
+CENTROIDS_VERSION = 1
+
+# Re-sum every group from scratch: float32 sums drift slowly under the
+# triggers' adds and subtracts. Representatives are kept; they are only previews.
+REBUILD_ARTISTS_SQL = """
+    WITH fresh AS (
+        SELECT btrim(t.artist) AS artist, sum(a.embedding) AS embedding_sum,
+               count(*) AS track_count, (array_agg(t.id ORDER BY t.id))[1] AS first_track_id
+        FROM tracks t
+        CROSS JOIN LATERAL (SELECT track_current_embedding(t.id) AS embedding) a
+        WHERE t.status = 'active' AND a.embedding IS NOT NULL AND btrim(coalesce(t.artist, '')) <> ''
+        GROUP BY btrim(t.artist)
+    ), gone AS (
+        DELETE FROM artist_centroids c
+        WHERE NOT EXISTS (SELECT 1 FROM fresh f WHERE f.artist = c.artist)
+    )
+    INSERT INTO artist_centroids (artist, embedding_sum, track_count, first_track_id)
+    SELECT artist, embedding_sum, track_count, first_track_id FROM fresh
+    ON CONFLICT (artist) DO UPDATE SET
+        embedding_sum = excluded.embedding_sum,
+        track_count = excluded.track_count,
+        first_track_id = excluded.first_track_id
+"""
+
+REBUILD_ALBUMS_SQL = """
+    WITH fresh AS (
+        SELECT coalesce(nullif(btrim(coalesce(t.artist, '')), ''), 'Unknown Artist') AS artist,
+               btrim(t.album) AS album, sum(a.embedding) AS embedding_sum,
+               count(*) AS track_count, (array_agg(t.id ORDER BY t.id))[1] AS first_track_id
+        FROM tracks t
+        CROSS JOIN LATERAL (SELECT track_current_embedding(t.id) AS embedding) a
+        WHERE t.status = 'active' AND a.embedding IS NOT NULL AND btrim(coalesce(t.album, '')) <> ''
+        GROUP BY 1, 2
+    ), gone AS (
+        DELETE FROM album_centroids c
+        WHERE NOT EXISTS (SELECT 1 FROM fresh f WHERE f.artist = c.artist AND f.album = c.album)
+    )
+    INSERT INTO album_centroids (artist, album, embedding_sum, track_count, first_track_id)
+    SELECT artist, album, embedding_sum, track_count, first_track_id FROM fresh
+    ON CONFLICT (artist, album) DO UPDATE SET
+        embedding_sum = excluded.embedding_sum,
+        track_count = excluded.track_count,
+        first_track_id = excluded.first_track_id
+"""
+
+
+async def centroids_missing(db: AsyncSession) -> bool:
+    """Whether the centroid tables are empty although embeddings exist."""
+    return bool(await db.scalar(text("""
+        SELECT NOT EXISTS (SELECT 1 FROM artist_centroids)
+           AND NOT EXISTS (SELECT 1 FROM album_centroids)
+           AND EXISTS (SELECT 1 FROM track_analysis WHERE embedding IS NOT NULL)
+    """)))
+
+
+async def rebuild_centroids() -> None:
+    """Re-sum both centroid tables from the tracks.
+
+    Blocks the triggers, and so every embedding and track write, until it
+    commits; run it only when the tables are missing or CENTROIDS_VERSION changed.
+    """
+    from app.db.session import async_session_maker
+
+    async with async_session_maker() as db:
+        # Block trigger updates until the new sums are committed
+        await db.execute(text("LOCK TABLE artist_centroids, album_centroids IN EXCLUSIVE MODE"))
+        await db.execute(text(REBUILD_ARTISTS_SQL))
+        await db.execute(text(REBUILD_ALBUMS_SQL))
+        await db.commit()
+    logger.info("Rebuilt artist and album centroids")
+
+
+def album_key(artist: str, album: str) -> str:
+    """Map node id for an album centroid."""
+    return f"{artist} - {album}"
+
+
+async def get_centroids(
+    db: AsyncSession, entity_type: Literal["artists", "albums"]
+) -> dict[str, dict]:
+    """Mean embeddings for all artists or albums.
+
+    Returns dict mapping artist name (or "Artist - Album") to:
+        - mean_embedding: averaged 512D vector
+        - track_count: number of tracks
+        - first_track_id: UUID for artwork lookup
+        - representative_track_id: track closest to the mean (best for preview)
+    """
+    groups: list[tuple[tuple[str, ...], ArtistCentroid | AlbumCentroid]]
+    if entity_type == "artists":
+        artists = await db.execute(select(ArtistCentroid))
+        groups = [((c.artist,), c) for c in artists.scalars().all()]
+    else:
+        albums = await db.execute(select(AlbumCentroid))
+        groups = [((c.artist, c.album), c) for c in albums.scalars().all()]
+
+    rows: dict[tuple[str, ...], dict[str, Any]] = {}
+    for key, c in groups:
+        rows[key] = {
+            "mean_embedding": np.asarray(c.embedding_sum, dtype=np.float32) / c.track_count,
+            "track_count": c.track_count,
+            "first_track_id": c.first_track_id,
+            "representative_track_id": c.representative_track_id,
+        }
+
+    stale = {
+        key: row for key, row in rows.items()
+        if row["first_track_id"] is None or row["representative_track_id"] is None
+    }
+    if stale:
+        await _fill_track_ids(db, entity_type, stale)
+
+    centroids = {}
+    for key, row in rows.items():
+        if row["first_track_id"] is None:
+            continue  # No member found in the embedding store yet
+        name = key[0] if entity_type == "artists" else album_key(*key)
+        centroids[name] = {
+            **row,
+            "first_track_id": str(row["first_track_id"]),
+            "representative_track_id": (
+                str(row["representative_track_id"]) if row["representative_track_id"] else None
+            ),
+        }
+    return centroids
+
+
+async def _fill_track_ids(
+    db: AsyncSession,
+    entity_type: Literal["artists", "albums"],
+    centroids: dict[tuple[str, ...], dict[str, Any]],
+) -> None:
+    """Recompute first and representative tracks for groups the triggers cleared.
+
+    Updates the given centroid dicts and persists the ids.
+    """
+    from app.services.embedding_store import get_embedding_store
+
+    # Member tracks of just these groups (ids only; vectors come from the store)
+    artist = func.btrim(Track.artist)
+    if entity_type == "artists":
+        query = select(Track.id, artist).where(artist.in_([key[0] for key in centroids]))
+    else:
+        album = func.btrim(Track.album)
+        query = select(Track.id, artist, album).where(album.in_(list({key[1] for key in centroids})))
+    result = await db.execute(query.where(Track.status == TrackStatus.ACTIVE))
+
+    members: dict[tuple[str, ...], list[UUID]] = defaultdict(list)
+    for track_id, *names in result.all():
+        if entity_type == "albums":
+            names = [names[0] or UNKNOWN_ARTIST, names[1]]
+        key = tuple(names)
+        if key in centroids:
+            members[key].append(track_id)
+
+    found, all_vectors = await get_embedding_store().get_vectors(
+        [track_id for key in centroids for track_id in sorted(members.get(key, []))]
+    )
+    row_of = {track_id: i for i, track_id in enumerate(found)}
+
+    updates = []
+    for key, row in centroids.items():
+        track_ids = [track_id for track_id in sorted(members.get(key, [])) if track_id in row_of]
+        if not track_ids:
+            continue
+        vectors = all_vectors[[row_of[track_id] for track_id in track_ids]]
+        mean = row["mean_embedding"]
+        norms = np.linalg.norm(vectors, axis=1) * (np.linalg.norm(mean) + 1e-8) + 1e-8
+        closest = int(np.argmax(vectors @ mean / norms))
+
+        row["first_track_id"] = row["first_track_id"] or track_ids[0]
+        row["representative_track_id"] = track_ids[closest]
+        pk = {"artist": key[0]} if entity_type == "artists" else {"artist": key[0], "album": key[1]}
+        updates.append({
+            **pk,
+            "first_track_id": row["first_track_id"],
+            "representative_track_id": row["representative_track_id"],
+        })
+
+    if updates:
+        model: type[ArtistCentroid] | type[AlbumCentroid] = (
+            ArtistCentroid if entity_type == "artists" else AlbumCentroid
+        )
+        await db.execute(update(model), updates)
+        await db.commit()
@@ -8,16 +8,11 @@ import hashlib
 import json
 import logging
 import math
-from collections import defaultdict
 from dataclasses import dataclass
 
 import numpy as np
 from sklearn.metrics.pairwise import cosine_similarity
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
-
-from app.db.models import Track, TrackStatus
 
 logger = logging.getLogger(__name__)
 
@@ -141,58 +136,14 @@ class EgoMapService:
             - track_count: number of tracks
             - first_track_id: UUID for artwork lookup
         """
-        from app.config import ANALYSIS_VERSION
-
-        # Fetch all tracks with embeddings
-        query = (
-            select(Track)
-            .options(selectinload(Track.analyses))
-            .where(
-                Track.status == TrackStatus.ACTIVE,
-                Track.artist.isnot(None),
-                Track.artist != "",
-                Track.analysis_version >= ANALYSIS_VERSION,
-            )
-        )
-        result = await db.execute(query)
-        tracks = result.scalars().all()
-
-        # Group by artist
-        artist_embeddings: dict[str, dict] = defaultdict(
-            lambda: {"embeddings": [], "track_count": 0, "first_track_id": None}
-        )
-
-        for track in tracks:
-            if not track.analyses:
-                continue
-
-            # Get latest analysis with embedding
-            latest = max(track.analyses, key=lambda a: a.version)
-            if latest.embedding is None:
-                continue
-
-            artist = track.artist.strip()
-            if not artist:
-                continue
-
-            embedding = np.array(latest.embedding)
-            artist_data = artist_embeddings[artist]
-            artist_data["embeddings"].append(embedding)
-            artist_data["track_count"] += 1
-            if artist_data["first_track_id"] is None:
-                artist_data["first_track_id"] = str(track.id)
-
-        # Compute mean embeddings
-        result_dict = {}
-        for artist, data in artist_embeddings.items():
-            if data["track_count"] >= MIN_TRACKS_PER_ARTIST:
-                result_dict[artist] = {
-                    "mean_embedding": np.mean(data["embeddings"], axis=0),
-                    "track_count": data["track_count"],
-                    "first_track_id": data["first_track_id"],
-                }
-
-        return result_dict
+        from app.services.centroids import get_centroids
+
+        # One row per artist from the trigger-maintained centroid table
+        centroids = await get_centroids(db, "artists")
+        return {
+            artist: data for artist, data in centroids.items()
+            if data["track_count"] >= MIN_TRACKS_PER_ARTIST
+        }
 
     def _compute_stable_angle(self, artist_name: str) -> float:
         """Compute a stable angle for an artist based on name hash.
@@ -1,22 +1,22 @@
 """Embedding-based music map visualization.
 
 Computes 2D positions for artists/albums based on audio similarity
-using UMAP dimensionality reduction on CLAP embeddings.
+using UMAP dimensionality reduction on CLAP embeddings. Layouts are kept
+between computations and updated incrementally (see map_layout).
 """
 
+import asyncio
 import json
 import logging
-from collections import defaultdict
 from collections.abc import AsyncGenerator
 from dataclasses import dataclass
 from typing import Literal
 
 import numpy as np
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
-from app.db.models import Track, TrackStatus
+from app.services.knn import knn_edges
+from app.services.map_layout import MapLayoutStore
 
 logger = logging.getLogger(__name__)
 
@@ -96,37 +96,37 @@ class EmbeddingMapService:
     """Service for computing embedding-based music maps."""
 
     def __init__(self):
-        self._umap_2d = None
-        self._umap_3d = None
+        self._layouts = MapLayoutStore()
+        self._refits: dict[str, asyncio.Future] = {}
 
-    def _get_umap(self, n_components: int = 2):
-        """Lazy-load UMAP to avoid import overhead."""
-        try:
-            from umap import UMAP
-        except ImportError:
-            logger.error("umap-learn not installed")
-            raise ImportError("umap-learn is required for music map visualization")
-
-        if n_components == 3:
-            if self._umap_3d is None:
-                self._umap_3d = UMAP(
-                    n_components=3,
-                    n_neighbors=15,
-                    min_dist=0.1,
-                    metric="cosine",
-                    random_state=42,
-                )
-            return self._umap_3d
-        else:
-            if self._umap_2d is None:
-                self._umap_2d = UMAP(
-                    n_components=2,
-                    n_neighbors=15,
-                    min_dist=0.1,
-                    metric="cosine",
-                    random_state=42,
-                )
-            return self._umap_2d
+    def _layout(
+        self, entity_type: str, names: list[str], matrix: np.ndarray, n_components: int
+    ) -> np.ndarray:
+        """Raw UMAP coordinates for the entities, reusing the persisted layout.
+
+        Entities already on the map keep their positions and new or changed
+        ones are placed with transform(); a seeded full refit is started in
+        the background when the layout has drifted or aged.
+        """
+        key = f"{entity_type}_{n_components}d"
+        positions, refit_due = self._layouts.place(key, names, matrix, n_components)
+        if refit_due and key not in self._refits and self._layouts.claim_refit(key):
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(
+                None, self._layouts.refit, key, list(names), matrix.copy(), n_components
+            )
+            self._refits[key] = future
+            future.add_done_callback(lambda f: self._refit_done(key, f))
+        return positions
+
+    def _refit_done(self, key: str, future: asyncio.Future) -> None:
+        self._refits.pop(key, None)
+        self._layouts.release_refit(key)
+        if future.exception() is not None:
+            logger.error(f"Refitting {key} map layout failed: {future.exception()}")
+            return
+        # Serve the refreshed layout from the next request on
+        self.invalidate_cache()
 
     def _get_cache_key(self, entity_type: str, limit: int) -> str:
         """Generate Redis cache key for map data."""
@@ -260,8 +260,7 @@ class EmbeddingMapService:
         )
 
         try:
-            umap = self._get_umap()
-            positions_2d = umap.fit_transform(matrix)
+            positions_2d = self._layout(entity_type, names, matrix, n_components=2)
         except Exception as e:
             logger.error(f"UMAP failed: {e}")
             raise
@@ -355,8 +354,7 @@ class EmbeddingMapService:
 
         # UMAP reduction: 512D -> 2D
         try:
-            umap = self._get_umap()
-            positions_2d = umap.fit_transform(matrix)
+            positions_2d = self._layout(entity_type, names, matrix, n_components=2)
         except Exception as e:
             logger.error(f"UMAP failed: {e}")
             raise
@@ -406,80 +404,13 @@ class EmbeddingMapService:
             - first_track_id: UUID for artwork lookup
             - representative_track_id: track closest to centroid (best for preview)
         """
-        from app.config import ANALYSIS_VERSION
-
-        # Fetch all tracks with embeddings
-        query = (
-            select(Track)
-            .options(selectinload(Track.analyses))
-            .where(
-                Track.status == TrackStatus.ACTIVE,
-                Track.artist.isnot(None),
-                Track.artist != "",
-                Track.analysis_version >= ANALYSIS_VERSION,
-            )
-        )
-        result = await db.execute(query)
-        tracks = result.scalars().all()
-
-        # Group by artist - store both embeddings and track IDs
-        artist_embeddings: dict[str, dict] = defaultdict(
-            lambda: {
-                "embeddings": [],
-                "track_ids": [],
-                "track_count": 0,
-                "first_track_id": None,
-            }
-        )
+        from app.services.centroids import get_centroids
 
-        for track in tracks:
-            if not track.analyses:
-                continue
-
-            # Get latest analysis with embedding
-            latest = max(track.analyses, key=lambda a: a.version)
-            if latest.embedding is None:
-                continue
-
-            artist = track.artist.strip()
-            if not artist:
-                continue
-
-            embedding = np.array(latest.embedding)
-            artist_data = artist_embeddings[artist]
-            artist_data["embeddings"].append(embedding)
-            artist_data["track_ids"].append(str(track.id))
-            artist_data["track_count"] += 1
-            if artist_data["first_track_id"] is None:
-                artist_data["first_track_id"] = str(track.id)
-
-        # Compute mean embeddings and find representative track
-        result_dict = {}
-        for artist, data in artist_embeddings.items():
-            if data["track_count"] >= MIN_TRACKS_PER_ENTITY:
-                embeddings_matrix = np.array(data["embeddings"])
-                mean_embedding = np.mean(embeddings_matrix, axis=0)
-
-                # Find track closest to centroid (representative track)
-                representative_track_id = data["first_track_id"]
-                if len(embeddings_matrix) > 1:
-                    # Compute cosine similarity of each track to centroid
-                    # Normalize embeddings for cosine similarity
-                    norm_mean = mean_embedding / (np.linalg.norm(mean_embedding) + 1e-8)
-                    norms = np.linalg.norm(embeddings_matrix, axis=1, keepdims=True) + 1e-8
-                    norm_embeddings = embeddings_matrix / norms
-                    similarities = norm_embeddings @ norm_mean
-                    closest_idx = int(np.argmax(similarities))
-                    representative_track_id = data["track_ids"][closest_idx]
-
-                result_dict[artist] = {
-                    "mean_embedding": mean_embedding,
-                    "track_count": data["track_count"],
-                    "first_track_id": data["first_track_id"],
-                    "representative_track_id": representative_track_id,
-                }
-
-        return result_dict
+        centroids = await get_centroids(db, "artists")
+        return {
+            name: data for name, data in centroids.items()
+            if data["track_count"] >= MIN_TRACKS_PER_ENTITY
+        }
 
     async def _aggregate_by_album(
         self, db: AsyncSession
@@ -488,58 +419,13 @@ class EmbeddingMapService:
 
         Returns dict mapping "Artist - Album" to embedding data.
         """
-        from app.config import ANALYSIS_VERSION
-
-        query = (
-            select(Track)
-            .options(selectinload(Track.analyses))
-            .where(
-                Track.status == TrackStatus.ACTIVE,
-                Track.album.isnot(None),
-                Track.album != "",
-                Track.analysis_version >= ANALYSIS_VERSION,
-            )
-        )
-        result = await db.execute(query)
-        tracks = result.scalars().all()
+        from app.services.centroids import get_centroids
 
-        # Group by artist-album
-        album_embeddings: dict[str, dict] = defaultdict(
-            lambda: {"embeddings": [], "track_count": 0, "first_track_id": None}
-        )
-
-        for track in tracks:
-            if not track.analyses:
-                continue
-
-            latest = max(track.analyses, key=lambda a: a.version)
-            if latest.embedding is None:
-                continue
-
-            artist = (track.artist or "Unknown Artist").strip()
-            album = track.album.strip()
-            if not album:
-                continue
-
-            key = f"{artist} - {album}"
-            embedding = np.array(latest.embedding)
-            album_data = album_embeddings[key]
-            album_data["embeddings"].append(embedding)
-            album_data["track_count"] += 1
-            if album_data["first_track_id"] is None:
-                album_data["first_track_id"] = str(track.id)
-
-        # Compute mean embeddings
-        result_dict = {}
-        for key, data in album_embeddings.items():
-            if data["track_count"] >= MIN_TRACKS_PER_ENTITY:
-                result_dict[key] = {
-                    "mean_embedding": np.mean(data["embeddings"], axis=0),
-                    "track_count": data["track_count"],
-                    "first_track_id": data["first_track_id"],
-                }
-
-        return result_dict
+        centroids = await get_centroids(db, "albums")
+        return {
+            name: data for name, data in centroids.items()
+            if data["track_count"] >= MIN_TRACKS_PER_ENTITY
+        }
 
     def _get_3d_cache_key(self, entity_type: str) -> str:
         """Generate Redis cache key for 3D map data."""
@@ -653,8 +539,7 @@ class EmbeddingMapService:
 
         # UMAP reduction: 512D -> 3D
         try:
-            umap = self._get_umap(n_components=3)
-            positions_3d = umap.fit_transform(matrix)
+            positions_3d = self._layout(entity_type, names, matrix, n_components=3)
         except Exception as e:
             logger.error(f"3D UMAP failed: {e}")
             raise
@@ -761,8 +646,7 @@ class EmbeddingMapService:
         )
 
         try:
-            umap = self._get_umap(n_components=3)
-            positions_3d = umap.fit_transform(matrix)
+            positions_3d = self._layout(entity_type, names, matrix, n_components=3)
         except Exception as e:
             logger.error(f"3D UMAP failed: {e}")
             raise
@@ -825,40 +709,11 @@ class EmbeddingMapService:
         Returns:
             List of edges connecting similar entities
         """
-        from sklearn.metrics.pairwise import cosine_similarity
-
-        # Compute pairwise similarities
-        similarities = cosine_similarity(embeddings)
-
-        # For each entity, find k nearest neighbors
-        edges = []
-        seen_pairs = set()
-
-        for i in range(len(names)):
-            # Get indices of k most similar (excluding self)
-            sim_scores = similarities[i].copy()
-            sim_scores[i] = -1  # Exclude self
-            top_k_indices = np.argsort(sim_scores)[-k:][::-1]
-
-            for j in top_k_indices:
-                if sim_scores[j] <= 0:
-                    continue
-
-                # Avoid duplicate edges
-                pair = tuple(sorted([i, j]))
-                if pair in seen_pairs:
-                    continue
-                seen_pairs.add(pair)
-
-                edges.append(
-                    MapEdge(
-                        source=names[i],
-                        target=names[j],
-                        weight=float(sim_scores[j]),
-                    )
-                )
-
-        return edges
+        sources, targets, weights = knn_edges(embeddings, k)
+        return [
+            MapEdge(source=names[i], target=names[j], weight=float(w))
+            for i, j, w in zip(sources.tolist(), targets.tolist(), weights.tolist(), strict=True)
+        ]
 
 
 # Singleton instance
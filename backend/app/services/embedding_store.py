@@ -0,0 +1,354 @@
+"""In-process store of CLAP track embeddings.
+
+Keeps every track's latest embedding in one float32 (N, 512) matrix with a
+track-id-to-row index, so maps and similarity tools can gather and compare
+vectors with NumPy instead of loading ORM objects from Postgres.
+
+The matrix is memory-mapped from a snapshot on disk (shared through the page
+cache by all worker processes) and kept current incrementally:
+
+- run_embedding_batch publishes the ids it wrote to a Redis change log
+  (a sorted set scored by a global change counter).
+- Before each use the store reads the ids changed since its own watermark
+  and fetches just those vectors. Rows already in the snapshot are updated in
+  place (copy-on-write, the file is untouched); new rows go to an in-memory
+  tail, which is folded into a new snapshot once it grows.
+- A missing or unreadable snapshot, or a change log that no longer reaches
+  back to the watermark, triggers a full reload from the database.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import shutil
+import time
+from collections.abc import Sequence
+from pathlib import Path
+from typing import cast
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import select
+
+from app.config import settings
+from app.db.models import TrackAnalysis
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_DIM = 512
+
+# Redis change log: INCR counter + sorted set of track ids scored by counter value
+CHANGE_COUNTER_KEY = "familiar:embeddings:version"
+CHANGE_LOG_KEY = "familiar:embeddings:changes"
+CHANGE_FLOOR_KEY = "familiar:embeddings:floor"  # Highest counter value trimmed from the log
+CHANGE_LOG_MAX = 100_000
+
+# Fold the tail into a new snapshot once it holds this many rows (or 10% of the base)
+COMPACT_MIN_ROWS = 1024
+
+CURRENT_FILE = "CURRENT"
+LOAD_CHUNK_SIZE = 5000
+
+
+def publish_embedding_updates(track_ids: Sequence[str]) -> None:
+    """Record that these tracks' embeddings changed (called after commit).
+
+    Synchronous: runs in the embedding worker subprocess.
+    """
+    if not track_ids:
+        return
+    try:
+        from app.services.tasks import get_redis
+
+        r = get_redis()
+        top = int(r.incrby(CHANGE_COUNTER_KEY, len(track_ids)))
+        first = top - len(track_ids) + 1
+        r.zadd(CHANGE_LOG_KEY, {str(track_id): first + i for i, track_id in enumerate(track_ids)})
+
+        # Trim the oldest entries; readers older than the floor reload fully
+        excess = r.zcard(CHANGE_LOG_KEY) - CHANGE_LOG_MAX
+        if excess > 0:
+            trimmed = r.zrange(CHANGE_LOG_KEY, excess - 1, excess - 1, withscores=True)
+            r.zremrangebyrank(CHANGE_LOG_KEY, 0, excess - 1)
+            if trimmed:
+                r.set(CHANGE_FLOOR_KEY, int(trimmed[0][1]))
+    except Exception as e:
+        logger.warning(f"Failed to publish embedding updates: {e}")
+
+
+def _snapshot_order(name: str) -> tuple[int, int]:
+    """Sort key of a snapshot-{millis}-{pid} directory name (unparseable names sort first)."""
+    _, _, rest = name.partition("-")
+    millis, _, pid = rest.partition("-")
+    try:
+        return int(millis), int(pid)
+    except ValueError:
+        return 0, 0
+
+
+class EmbeddingStore:
+    """Contiguous matrix of track embeddings with an id-to-row index."""
+
+    def __init__(self, path: Path | None = None):
+        self.path = path or settings.embedding_store_path
+        self._lock = asyncio.Lock()
+        self._loaded = False
+        self._watermark = 0  # Change counter value included in the matrix
+        self._base = np.empty((0, EMBEDDING_DIM), dtype=np.float32)  # Memory-mapped snapshot
+        self._tail = np.empty((0, EMBEDDING_DIM), dtype=np.float32)  # Rows added since
+        self._tail_len = 0
+        self._norms = np.empty(0, dtype=np.float32)  # Per row; 0 for removed rows
+        self._ids: list[UUID] = []  # Row -> track id
+        self._rows: dict[UUID, int] = {}  # Track id -> row
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    # --- Queries ---
+
+    async def get_vectors(self, track_ids: Sequence[UUID]) -> tuple[list[UUID], np.ndarray]:
+        """Embeddings for the given tracks, skipping tracks without one.
+
+        Returns the ids that were found (in the given order) and a (len, 512)
+        float32 matrix of their vectors.
+        """
+        await self.sync()
+        found = [track_id for track_id in track_ids if track_id in self._rows]
+        rows = np.fromiter((self._rows[track_id] for track_id in found), dtype=np.int64, count=len(found))
+        return found, self._gather(rows)
+
+    async def nearest(
+        self,
+        query: np.ndarray | Sequence[float],
+        k: int,
+        exclude: set[UUID] | None = None,
+    ) -> list[tuple[UUID, float]]:
+        """The k tracks with the highest cosine similarity to `query`."""
+        await self.sync()
+        return self.nearest_rows(np.asarray(query, dtype=np.float32), k, exclude)
+
+    def nearest_rows(
+        self, query: np.ndarray, k: int, exclude: set[UUID] | None = None
+    ) -> list[tuple[UUID, float]]:
+        """Exact top-k by cosine similarity over every stored vector."""
+        if not self._rows or k <= 0:
+            return []
+        n = len(self._ids)
+        query = query / (np.linalg.norm(query) + 1e-8)
+        scores = np.concatenate([self._base @ query, self._tail[:self._tail_len] @ query])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scores = np.where(self._norms[:n] > 0, scores / self._norms[:n], -np.inf)
+        for track_id in exclude or ():
+            row = self._rows.get(track_id)
+            if row is not None:
+                scores[row] = -np.inf
+
+        k = min(k, n)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self._ids[row], float(scores[row])) for row in top if np.isfinite(scores[row])]
+
+    def _gather(self, rows: np.ndarray) -> np.ndarray:
+        """Copy the given rows out of the snapshot and tail."""
+        out = np.empty((len(rows), EMBEDDING_DIM), dtype=np.float32)
+        in_base = rows < len(self._base)
+        out[in_base] = self._base[rows[in_base]]
+        out[~in_base] = self._tail[rows[~in_base] - len(self._base)]
+        return out
+
+    # --- Updates ---
+
+    def apply(self, updates: dict[UUID, np.ndarray | None]) -> None:
+        """Set (or, for None, remove) the embeddings of these tracks."""
+        for track_id, vector in updates.items():
+            row = self._rows.get(track_id)
+            if vector is None:
+                if row is not None:
+                    del self._rows[track_id]
+                    self._norms[row] = 0.0
+                continue
+
+            vector = np.asarray(vector, dtype=np.float32)
+            if row is None:
+                row = self._append(track_id)
+            if row < len(self._base):
+                self._base[row] = vector  # Copy-on-write: private to this process
+            else:
+                self._tail[row - len(self._base)] = vector
+            self._norms[row] = np.linalg.norm(vector)
+
+    def _append(self, track_id: UUID) -> int:
+        """Allocate a tail row for a new track, growing the tail as needed."""
+        if self._tail_len == len(self._tail):
+            capacity = max(256, len(self._tail) * 2)
+            tail = np.empty((capacity, EMBEDDING_DIM), dtype=np.float32)
+            tail[:self._tail_len] = self._tail[:self._tail_len]
+            self._tail = tail
+        row = len(self._ids)
+        if row == len(self._norms):
+            self._norms = np.concatenate([self._norms, np.zeros(max(256, row), dtype=np.float32)])
+        self._tail_len += 1
+        self._ids.append(track_id)
+        self._rows[track_id] = row
+        return row
+
+    def _set_matrix(self, base: np.ndarray, ids: list[UUID], watermark: int) -> None:
+        """Replace all contents with `base` (rows in `ids` order)."""
+        self._base = base
+        self._tail = np.empty((0, EMBEDDING_DIM), dtype=np.float32)
+        self._tail_len = 0
+        self._ids = list(ids)
+        self._rows = {track_id: row for row, track_id in enumerate(self._ids)}
+        self._norms = np.linalg.norm(base, axis=1).astype(np.float32) if len(base) else np.empty(0, np.float32)
+        self._watermark = watermark
+
+    # --- Snapshots ---
+
+    def write_snapshot(self) -> None:
+        """Write live rows to a new snapshot directory and point CURRENT at it."""
+        live = np.fromiter(sorted(self._rows.values()), dtype=np.int64, count=len(self._rows))
+        name = f"snapshot-{int(time.time() * 1000)}-{os.getpid()}"
+        tmp = self.path / f".{name}"
+        tmp.mkdir(parents=True, exist_ok=True)
+        np.save(tmp / "vectors.npy", self._gather(live))
+        ids = np.frombuffer(b"".join(self._ids[row].bytes for row in live), dtype=np.uint8)
+        np.save(tmp / "track_ids.npy", ids.reshape(-1, 16))
+        (tmp / "meta.json").write_text(json.dumps({"watermark": self._watermark, "count": len(live)}))
+        tmp.rename(self.path / name)
+
+        pointer = self.path / f".{CURRENT_FILE}.{os.getpid()}"
+        pointer.write_text(name)
+        pointer.replace(self.path / CURRENT_FILE)
+
+        self._remap(self.path / name)
+
+        # Other processes may still map old snapshots; unlinking is safe for them.
+        # Newer ones may be another process's, not yet mapped - leave those
+        for old in self.path.glob("snapshot-*"):
+            if _snapshot_order(old.name) < _snapshot_order(name):
+                shutil.rmtree(old, ignore_errors=True)
+
+    def load_snapshot(self) -> bool:
+        """Map the current snapshot. Returns False if there is none (or it's unreadable)."""
+        try:
+            name = (self.path / CURRENT_FILE).read_text().strip()
+            self._remap(self.path / name)
+            return True
+        except (OSError, ValueError) as e:
+            logger.info(f"No usable embedding snapshot in {self.path}: {e}")
+            return False
+
+    def _remap(self, directory: Path) -> None:
+        meta = json.loads((directory / "meta.json").read_text())
+        if meta["count"]:
+            base = np.load(directory / "vectors.npy", mmap_mode="c")
+        else:
+            base = np.empty((0, EMBEDDING_DIM), dtype=np.float32)  # Empty files can't be mapped
+        ids = np.load(directory / "track_ids.npy")
+        if base.shape != (meta["count"], EMBEDDING_DIM) or len(ids) != meta["count"]:
+            raise ValueError(f"Snapshot {directory.name} has unexpected shape {base.shape}")
+        self._set_matrix(base, [UUID(bytes=row.tobytes()) for row in ids], meta["watermark"])
+
+    # --- Synchronization ---
+
+    async def sync(self) -> None:
+        """Load the store on first use, then apply changes published since."""
+        async with self._lock:
+            try:
+                from app.services.tasks import get_redis
+
+                r = get_redis()
+                counter, floor = (
+                    int(value or 0)
+                    for value in await asyncio.to_thread(r.mget, CHANGE_COUNTER_KEY, CHANGE_FLOOR_KEY)
+                )
+            except Exception as e:
+                logger.warning(f"Embedding change log unavailable: {e}")
+                if not self._loaded:
+                    await self._full_reload(0)
+                return
+
+            if not self._loaded and await asyncio.to_thread(self.load_snapshot):
+                self._loaded = True
+            # The log was trimmed past us, or Redis lost its counter: start over
+            if not self._loaded or self._watermark < floor or counter < self._watermark:
+                await self._full_reload(counter)
+                return
+            if counter == self._watermark:
+                return
+
+            try:
+                changed = cast(list[bytes], await asyncio.to_thread(
+                    r.zrangebyscore, CHANGE_LOG_KEY, f"({self._watermark}", counter
+                ))
+            except Exception as e:
+                logger.warning(f"Embedding change log unavailable: {e}")
+                return  # Keep serving the current vectors; the next sync retries
+            track_ids = [UUID(track_id.decode()) for track_id in changed]
+            self.apply(await self._fetch(track_ids))
+            self._watermark = counter
+
+            if self._tail_len >= max(COMPACT_MIN_ROWS, len(self._base) // 10):
+                try:
+                    await asyncio.to_thread(self.write_snapshot)
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Failed to write embedding snapshot: {e}")
+
+    async def _full_reload(self, counter: int) -> None:
+        """Load every track's latest embedding from the database and snapshot it."""
+        from app.db.session import async_session_maker
+
+        ids: list[UUID] = []
+        chunks: list[np.ndarray] = []
+        async with async_session_maker() as db:
+            # Latest analysis per track; tracks whose latest row has no embedding are skipped
+            query = (
+                select(TrackAnalysis.track_id, TrackAnalysis.embedding)
+                .distinct(TrackAnalysis.track_id)
+                .order_by(TrackAnalysis.track_id, TrackAnalysis.version.desc())
+                .execution_options(yield_per=LOAD_CHUNK_SIZE)
+            )
+            result = await db.stream(query)
+            async for partition in result.partitions():
+                rows = [(track_id, vec) for track_id, vec in partition if vec is not None]
+                if rows:
+                    ids.extend(track_id for track_id, _ in rows)
+                    chunks.append(np.asarray([vec for _, vec in rows], dtype=np.float32))
+
+        base = np.concatenate(chunks) if chunks else np.empty((0, EMBEDDING_DIM), dtype=np.float32)
+        self._set_matrix(base, ids, counter)
+        self._loaded = True
+        logger.info(f"Loaded {len(ids)} embeddings into the embedding store")
+        try:
+            await asyncio.to_thread(self.write_snapshot)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Failed to write embedding snapshot: {e}")
+
+    async def _fetch(self, track_ids: list[UUID]) -> dict[UUID, np.ndarray | None]:
+        """Latest embedding (or None) of each changed track."""
+        from app.db.session import async_session_maker
+
+        updates: dict[UUID, np.ndarray | None] = dict.fromkeys(track_ids)
+        async with async_session_maker() as db:
+            result = await db.execute(
+                select(TrackAnalysis.track_id, TrackAnalysis.embedding)
+                .where(TrackAnalysis.track_id.in_(track_ids))
+                .distinct(TrackAnalysis.track_id)
+                .order_by(TrackAnalysis.track_id, TrackAnalysis.version.desc())
+            )
+            for track_id, vec in result.all():
+                updates[track_id] = None if vec is None else np.asarray(vec, dtype=np.float32)
+        return updates
+
+
+# Singleton
+_embedding_store: EmbeddingStore | None = None
+
+
+def get_embedding_store() -> EmbeddingStore:
+    """Get the singleton EmbeddingStore instance."""
+    global _embedding_store
+    if _embedding_store is None:
+        _embedding_store = EmbeddingStore()
+    return _embedding_store
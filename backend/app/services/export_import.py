@@ -10,7 +10,6 @@ from datetime import datetime
 from typing import Any
 from uuid import UUID
 
-from rapidfuzz import fuzz
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -27,7 +26,7 @@ from app.db.models import (
     SmartPlaylist,
     Track,
 )
-from app.services.external_track_matcher import normalize_for_matching
+from app.services.match_index import MatchQuery, get_match_index, load_matched_tracks
 
 logger = logging.getLogger(__name__)
 
@@ -47,39 +46,16 @@ class TrackMatcher:
 
     def __init__(self, db: AsyncSession) -> None:
         self.db = db
-        self._track_cache: dict[str, Track] | None = None
 
-    async def _get_all_tracks(self) -> list[Track]:
-        """Get all tracks from database (cached for batch matching)."""
-        result = await self.db.execute(
-            select(Track).where(
-                Track.title.isnot(None),
-                Track.artist.isnot(None),
-            )
+    @staticmethod
+    def _query(track_ref: dict[str, Any]) -> MatchQuery:
+        return MatchQuery(
+            title=track_ref.get("title"),
+            artist=track_ref.get("artist"),
+            isrc=track_ref.get("isrc"),
+            musicbrainz_id=track_ref.get("musicbrainz_id"),
+            duration=track_ref.get("duration_seconds"),
         )
-        return list(result.scalars().all())
-
-    async def _build_track_cache(self) -> None:
-        """Build lookup caches for fast matching."""
-        if self._track_cache is not None:
-            return
-
-        tracks = await self._get_all_tracks()
-        self._track_cache = {}
-
-        for track in tracks:
-            # Index by ISRC
-            if track.isrc:
-                self._track_cache[f"isrc:{track.isrc}"] = track
-
-            # Index by MusicBrainz ID
-            if track.musicbrainz_track_id:
-                self._track_cache[f"mbid:{track.musicbrainz_track_id}"] = track
-
-            # Index by exact title+artist (lowercase)
-            if track.title and track.artist:
-                key = f"exact:{track.title.lower().strip()}:{track.artist.lower().strip()}"
-                self._track_cache[key] = track
 
     async def match_track_ref(
         self,
@@ -87,92 +63,17 @@ class TrackMatcher:
     ) -> tuple[Track | None, str | None, float | None]:
         """Match a track reference to a local track.
 
+        Tries ISRC, MusicBrainz ID, exact title + artist, then fuzzy matching
+        (with duration disambiguation).
+
         Args:
             track_ref: Track reference dict with isrc, musicbrainz_id, title, artist, album, duration_seconds
 
         Returns:
             Tuple of (matched_track, match_method, confidence)
         """
-        await self._build_track_cache()
-        assert self._track_cache is not None
-
-        isrc = track_ref.get("isrc")
-        musicbrainz_id = track_ref.get("musicbrainz_id")
-        title = track_ref.get("title", "")
-        artist = track_ref.get("artist", "")
-        album = track_ref.get("album")
-        duration = track_ref.get("duration_seconds")
-
-        # 1. Try ISRC match (most reliable)
-        if isrc:
-            track = self._track_cache.get(f"isrc:{isrc}")
-            if track:
-                return track, "isrc", 1.0
-
-        # 2. Try MusicBrainz ID match
-        if musicbrainz_id:
-            track = self._track_cache.get(f"mbid:{musicbrainz_id}")
-            if track:
-                return track, "musicbrainz", 1.0
-
-        # 3. Try exact title + artist match
-        if title and artist:
-            key = f"exact:{title.lower().strip()}:{artist.lower().strip()}"
-            track = self._track_cache.get(key)
-            if track:
-                return track, "exact", 1.0
-
-        # 4. Try fuzzy matching
-        if title and artist:
-            return await self._fuzzy_match(title, artist, album, duration)
-
-        return None, None, None
-
-    async def _fuzzy_match(
-        self,
-        title: str,
-        artist: str,
-        album: str | None,
-        duration: float | None,
-    ) -> tuple[Track | None, str | None, float | None]:
-        """Fuzzy match against all tracks."""
-        normalized_title = normalize_for_matching(title)
-        normalized_artist = normalize_for_matching(artist)
-
-        tracks = await self._get_all_tracks()
-        best_match: Track | None = None
-        best_score: float = 0.0
-
-        for track in tracks:
-            if not track.title or not track.artist:
-                continue
-
-            local_title = normalize_for_matching(track.title)
-            local_artist = normalize_for_matching(track.artist)
-
-            # Calculate fuzzy scores
-            title_score = fuzz.ratio(normalized_title, local_title)
-            artist_score = fuzz.ratio(normalized_artist, local_artist)
-
-            # Combined score with weights (title matters more)
-            combined = (title_score * 0.6) + (artist_score * 0.4)
-
-            # Duration disambiguation: boost score if durations match closely
-            if duration and track.duration_seconds:
-                duration_diff = abs(duration - track.duration_seconds)
-                if duration_diff < 3:  # Within 3 seconds
-                    combined = min(100, combined + 5)
-                elif duration_diff > 30:  # Very different duration
-                    combined = combined * 0.9
-
-            if combined >= self.FUZZY_THRESHOLD and combined > best_score:
-                best_score = combined
-                best_match = track
-
-        if best_match:
-            return best_match, "fuzzy", best_score / 100.0
-
-        return None, None, None
+        [(_, track, method, confidence)] = await self.match_batch([track_ref])
+        return track, method, confidence
 
     async def match_batch(
         self,
@@ -182,14 +83,17 @@ class TrackMatcher:
 
         Returns list of (track_ref, matched_track, method, confidence) tuples.
         """
-        await self._build_track_cache()
-
-        results = []
-        for ref in track_refs:
-            track, method, confidence = await self.match_track_ref(ref)
-            results.append((ref, track, method, confidence))
-
-        return results
+        results = await get_match_index().match_many(
+            self.db,
+            [self._query(ref) for ref in track_refs],
+            self.FUZZY_THRESHOLD,
+            partial=False,
+        )
+        tracks = await load_matched_tracks(self.db, results)
+        return [
+            (ref, track, result.method, result.confidence) if result and track else (ref, None, None, None)
+            for ref, result, track in zip(track_refs, results, tracks, strict=True)
+        ]
 
 
 class ExportImportService:
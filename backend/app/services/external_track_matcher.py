@@ -5,7 +5,6 @@ Used for Spotify imports, LLM recommendations, and wishlist functionality.
 """
 
 import logging
-import re
 from datetime import datetime
 from typing import Any
 from uuid import UUID
@@ -15,37 +14,16 @@ from sqlalchemy import func, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.models import ExternalTrack, ExternalTrackSource, Track
+from app.services.match_index import (
+    MatchQuery,
+    get_match_index,
+    load_matched_tracks,
+    normalize_for_matching,
+)
 
 logger = logging.getLogger(__name__)
 
 
-def normalize_for_matching(s: str) -> str:
-    """Normalize string for matching comparisons.
-
-    Removes common variations like featuring credits, remaster annotations,
-    and normalizes punctuation/whitespace.
-    """
-    # Remove featuring/feat variations
-    s = re.sub(
-        r'\s*[\(\[](feat\.?|ft\.?|featuring)[^\)\]]*[\)\]]',
-        '',
-        s,
-        flags=re.IGNORECASE
-    )
-    # Remove remaster/remix annotations
-    s = re.sub(
-        r'\s*[\(\[][^\)\]]*(?:remaster|remix|version|edit|deluxe|bonus)[^\)\]]*[\)\]]',
-        '',
-        s,
-        flags=re.IGNORECASE
-    )
-    # Normalize apostrophes
-    s = s.replace("'", "'").replace("'", "'").replace("`", "'")
-    # Remove extra whitespace
-    s = ' '.join(s.split())
-    return s.strip().lower()
-
-
 class ExternalTrackMatcher:
     """Service for matching external tracks to local library and vice versa."""
 
@@ -241,11 +219,22 @@ class ExternalTrackMatcher:
         )
         unmatched = result.scalars().all()
 
-        for ext in unmatched:
+        queries = [
+            MatchQuery(title=ext.title, artist=ext.artist, isrc=ext.isrc) for ext in unmatched
+        ]
+        results = await get_match_index().match_many(self.db, queries, self.FUZZY_THRESHOLD)
+        tracks = await load_matched_tracks(self.db, results)
+
+        now = datetime.utcnow()
+        for ext, match, track in zip(unmatched, results, tracks, strict=True):
             stats["processed"] += 1
-            match = await self.match_external_track(ext, commit=False)
-            if match:
-                stats["matched"] += 1
+            if match is None or track is None:
+                continue
+            ext.matched_track_id = track.id
+            ext.matched_at = now
+            ext.match_method = match.method
+            ext.match_confidence = match.confidence
+            stats["matched"] += 1
 
         await self.db.commit()
         logger.info(f"Rematch completed: {stats}")
@@ -336,79 +325,13 @@ class ExternalTrackMatcher:
         Returns:
             Tuple of (matched_track, match_method, confidence)
         """
-        # 1. Try ISRC match
-        if isrc:
-            result = await self.db.execute(
-                select(Track).where(Track.isrc == isrc)
-            )
-            match = result.scalar_one_or_none()
-            if match:
-                return match, "isrc", 1.0
-
-        if not title or not artist:
-            return None, None, None
-
-        title_lower = title.lower().strip()
-        artist_lower = artist.lower().strip()
-        normalized_title = normalize_for_matching(title)
-        normalized_artist = normalize_for_matching(artist)
-
-        # 2. Try exact artist + title match
-        result = await self.db.execute(
-            select(Track).where(
-                func.lower(Track.title) == title_lower,
-                func.lower(Track.artist) == artist_lower,
-            ).limit(1)
-        )
-        match = result.scalars().first()
-        if match:
-            return match, "exact", 1.0
-
-        # 3. Try partial match (title contains, artist contains)
-        result = await self.db.execute(
-            select(Track).where(
-                func.lower(Track.title).contains(title_lower),
-                func.lower(Track.artist).contains(artist_lower),
-            ).limit(1)
+        result = await get_match_index().match(
+            self.db, MatchQuery(title=title, artist=artist, isrc=isrc), self.FUZZY_THRESHOLD
         )
-        match = result.scalars().first()
-        if match:
-            return match, "partial", 0.9
-
-        # 4. Fuzzy match with rapidfuzz
-        # Get candidate tracks - limit to reasonable set for performance
-        result = await self.db.execute(
-            select(Track)
-            .where(Track.title.isnot(None), Track.artist.isnot(None))
-            .limit(5000)
-        )
-        candidates = result.scalars().all()
-
-        best_match: Track | None = None
-        best_score: float = 0.0
-
-        for track in candidates:
-            if not track.title or not track.artist:
-                continue
-
-            local_title = normalize_for_matching(track.title)
-            local_artist = normalize_for_matching(track.artist)
-
-            # Calculate fuzzy scores
-            title_score = fuzz.ratio(normalized_title, local_title)
-            artist_score = fuzz.ratio(normalized_artist, local_artist)
-
-            # Combined score with weights (title matters more)
-            combined = (title_score * 0.6) + (artist_score * 0.4)
-
-            if combined >= self.FUZZY_THRESHOLD and combined > best_score:
-                best_score = combined
-                best_match = track
-
-        if best_match:
-            return best_match, "fuzzy", best_score / 100.0
-
-        return None, None, None
+        [match] = await load_matched_tracks(self.db, [result])
+        if result is None or match is None:
+            return None, None, None
+        return match, result.method, result.confidence
 
     async def create_external_track(
         self,
@@ -0,0 +1,67 @@
+"""Blocked exact k-nearest-neighbor search over embedding matrices.
+
+Similarities are computed a block of rows at a time, so memory stays at
+roughly one (block x N) float32 matrix instead of N x N, and each row's top k
+is selected with argpartition instead of a full sort.
+"""
+
+import numpy as np
+
+# Upper bound on the similarity block held at once (bytes)
+BLOCK_BYTES = 32 * 1024 * 1024
+
+
+def top_k_cosine(
+    embeddings: np.ndarray, k: int, block_bytes: int = BLOCK_BYTES
+) -> tuple[np.ndarray, np.ndarray]:
+    """The k most cosine-similar other rows of every row.
+
+    Returns (indices, similarities), both (N, min(k, N - 1)), each row sorted
+    by descending similarity.
+    """
+    n = len(embeddings)
+    k = min(k, n - 1)
+    if k <= 0:
+        return np.empty((n, 0), dtype=np.int64), np.empty((n, 0), dtype=np.float32)
+
+    vectors = np.asarray(embeddings, dtype=np.float32)
+    vectors = vectors / (np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-8)
+    block = max(1, block_bytes // (n * 4))
+
+    indices = np.empty((n, k), dtype=np.int64)
+    similarities = np.empty((n, k), dtype=np.float32)
+    for start in range(0, n, block):
+        stop = min(start + block, n)
+        sims = vectors[start:stop] @ vectors.T
+        rows = np.arange(stop - start)
+        sims[rows, rows + start] = -np.inf  # Exclude self
+
+        top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        top_sims = np.take_along_axis(sims, top, axis=1)
+        order = np.argsort(-top_sims, axis=1)
+        indices[start:stop] = np.take_along_axis(top, order, axis=1)
+        similarities[start:stop] = np.take_along_axis(top_sims, order, axis=1)
+    return indices, similarities
+
+
+def knn_edges(
+    embeddings: np.ndarray, k: int, block_bytes: int = BLOCK_BYTES
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Undirected k-NN graph edges with positive similarity.
+
+    Each pair appears once, from the row that lists it first (rows in order,
+    neighbors by descending similarity). Returns (sources, targets, weights).
+    """
+    indices, similarities = top_k_cosine(embeddings, k, block_bytes)
+    sources = np.repeat(np.arange(len(indices)), indices.shape[1])
+    targets = indices.ravel()
+    weights = similarities.ravel()
+
+    keep = weights > 0
+    sources, targets, weights = sources[keep], targets[keep], weights[keep]
+
+    # First occurrence of each unordered pair
+    pairs = np.minimum(sources, targets) * len(indices) + np.maximum(sources, targets)
+    _, first = np.unique(pairs, return_index=True)
+    first.sort()
+    return sources[first], targets[first], weights[first]
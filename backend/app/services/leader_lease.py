@@ -0,0 +1,55 @@
+"""Redis leases for background loops that must run in only one worker.
+
+Every uvicorn worker has its own BackgroundManager. Loops that must run once
+per deployment (the library watcher, the analysis queue consumer) hold a
+lease key with a short TTL; if the holder dies, the key expires and another
+worker takes over.
+"""
+
+import os
+import socket
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from app.services.background import BackgroundManager
+
+
+class LeaderLease:
+    """A Redis key held by one worker process, refreshed while it leads."""
+
+    def __init__(self, manager: "BackgroundManager", key: str, ttl: int):
+        self._manager = manager
+        self.key = key
+        self.ttl = ttl
+        self.token = f"{socket.gethostname()}:{os.getpid()}"
+
+    def acquire(self) -> bool:
+        """Become the leader if no other worker is."""
+        try:
+            redis_client = self._manager.redis
+            if redis_client.set(self.key, self.token, nx=True, ex=self.ttl):
+                return True
+            return redis_client.get(self.key) == self.token.encode()
+        except Exception:
+            return False
+
+    def refresh(self) -> bool:
+        """Extend the lease. Returns False if another worker has taken over."""
+        try:
+            redis_client = self._manager.redis
+            if redis_client.get(self.key) != self.token.encode():
+                return False
+            redis_client.expire(self.key, self.ttl)
+            return True
+        except Exception:
+            # Redis hiccup - keep leading rather than flapping
+            return True
+
+    def release(self) -> None:
+        """Give up the lease if held, so another worker can take over right away."""
+        try:
+            redis_client = self._manager.redis
+            if redis_client.get(self.key) == self.token.encode():
+                redis_client.delete(self.key)
+        except Exception:
+            pass
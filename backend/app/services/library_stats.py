@@ -0,0 +1,170 @@
+"""Library dashboard stats, aggregated in the database and kept as snapshots.
+
+Library counts are one aggregate query, and the mood distribution bins the
+latest analysis of every active track with width_bucket/GROUP BY, taking
+sample track IDs with a window function, so no track rows reach the API
+process. Results are stored in library_stats_snapshots and refreshed after
+scans and analysis batches; a dashboard request reads one row. Snapshots
+missing or older than SNAPSHOT_MAX_AGE (for changes made outside scans and
+analysis, e.g. deletions from the UI) are recomputed on read.
+"""
+
+import logging
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import ANALYSIS_VERSION
+from app.db.models import AlbumType, LibraryStatsSnapshot, Track, TrackStatus
+
+logger = logging.getLogger(__name__)
+
+LIBRARY_SNAPSHOT = "library"
+MOOD_SNAPSHOT_PREFIX = "mood:"  # Followed by the grid size
+DEFAULT_MOOD_GRID_SIZE = 10
+MAX_MOOD_GRID_SIZE = 50  # Each grid size requested gets its own snapshot
+MOOD_SAMPLE_SIZE = 5  # Sample track IDs per mood cell
+SNAPSHOT_MAX_AGE = timedelta(hours=1)
+
+# Energy/valence cells of the latest analysis of each active track (from
+# track_features). Cell indexes follow min(int(x * n), n - 1): width_bucket
+# puts 1.0 in bucket n + 1 and values below 0 in bucket 0, so buckets are
+# clamped to 1..n.
+MOOD_DISTRIBUTION_SQL = """
+    WITH cells AS (
+        SELECT f.track_id,
+               least(greatest(width_bucket(f.energy, 0, 1, :grid_size), 1), :grid_size) - 1 AS energy_cell,
+               least(greatest(width_bucket(f.valence, 0, 1, :grid_size), 1), :grid_size) - 1 AS valence_cell
+        FROM track_features f
+        JOIN tracks t ON t.id = f.track_id
+        WHERE t.status = 'active' AND f.energy IS NOT NULL AND f.valence IS NOT NULL
+    ), ranked AS (
+        SELECT energy_cell, valence_cell, track_id,
+               row_number() OVER (PARTITION BY energy_cell, valence_cell ORDER BY track_id) AS rank
+        FROM cells
+    )
+    SELECT energy_cell, valence_cell, count(*) AS track_count,
+           array_agg(track_id ORDER BY track_id) FILTER (WHERE rank <= :samples) AS sample_track_ids
+    FROM ranked
+    GROUP BY energy_cell, valence_cell
+    ORDER BY energy_cell, valence_cell
+"""
+
+
+async def compute_library_stats(db: AsyncSession) -> dict[str, int]:
+    """Track, album, artist and analysis counts in one query."""
+    row = (await db.execute(
+        select(
+            func.count(Track.id),
+            func.count(func.distinct(Track.album)),
+            func.count(func.distinct(Track.artist)),
+            func.count(Track.id).filter(Track.album_type == AlbumType.ALBUM),
+            func.count(Track.id).filter(Track.album_type == AlbumType.COMPILATION),
+            func.count(Track.id).filter(Track.album_type == AlbumType.SOUNDTRACK),
+            # Only tracks at the current analysis version count as analyzed
+            func.count(Track.id).filter(Track.analysis_version >= ANALYSIS_VERSION),
+        )
+    )).one()
+    total_tracks, total_albums, total_artists, albums, compilations, soundtracks, analyzed = row
+    return {
+        "total_tracks": total_tracks,
+        "total_albums": total_albums,
+        "total_artists": total_artists,
+        "albums": albums,
+        "compilations": compilations,
+        "soundtracks": soundtracks,
+        "analyzed_tracks": analyzed,
+        "pending_analysis": total_tracks - analyzed,
+    }
+
+
+async def compute_mood_distribution(db: AsyncSession, grid_size: int) -> dict[str, Any]:
+    """Energy × valence grid of the active tracks (only non-empty cells)."""
+    result = await db.execute(
+        text(MOOD_DISTRIBUTION_SQL), {"grid_size": grid_size, "samples": MOOD_SAMPLE_SIZE}
+    )
+    cell_size = 1.0 / grid_size
+    cells = []
+    total_with_mood = 0
+    for energy_cell, valence_cell, track_count, sample_track_ids in result:
+        total_with_mood += track_count
+        cells.append({
+            "energy_min": energy_cell * cell_size,
+            "energy_max": (energy_cell + 1) * cell_size,
+            "valence_min": valence_cell * cell_size,
+            "valence_max": (valence_cell + 1) * cell_size,
+            "track_count": track_count,
+            "sample_track_ids": [str(track_id) for track_id in sample_track_ids],
+        })
+
+    active_tracks = await db.scalar(
+        select(func.count(Track.id)).where(Track.status == TrackStatus.ACTIVE)
+    ) or 0
+    return {
+        "cells": cells,
+        "grid_size": grid_size,
+        "total_with_mood": total_with_mood,
+        "total_without_mood": max(0, active_tracks - total_with_mood),
+    }
+
+
+async def get_library_stats(db: AsyncSession) -> dict[str, int]:
+    """Library counts from the snapshot (computed if missing or stale)."""
+    return await _get_snapshot(db, LIBRARY_SNAPSHOT)
+
+
+async def get_mood_distribution(db: AsyncSession, grid_size: int = DEFAULT_MOOD_GRID_SIZE) -> dict[str, Any]:
+    """Mood grid from the snapshot (computed if missing or stale)."""
+    return await _get_snapshot(db, f"{MOOD_SNAPSHOT_PREFIX}{grid_size}")
+
+
+async def refresh_stats_snapshots(db: AsyncSession) -> None:
+    """Recompute the library snapshot and every mood grid size requested so far."""
+    names = set(await db.scalars(select(LibraryStatsSnapshot.name)))
+    names |= {LIBRARY_SNAPSHOT, f"{MOOD_SNAPSHOT_PREFIX}{DEFAULT_MOOD_GRID_SIZE}"}
+    for name in sorted(names):
+        compute = _computation(db, name)
+        if compute is None:
+            logger.warning(f"Dropping unknown stats snapshot {name!r}")
+            await db.execute(delete(LibraryStatsSnapshot).where(LibraryStatsSnapshot.name == name))
+            continue
+        await _store(db, name, await compute())
+
+
+async def _get_snapshot(db: AsyncSession, name: str) -> dict[str, Any]:
+    row = (await db.execute(
+        select(LibraryStatsSnapshot.data, LibraryStatsSnapshot.computed_at)
+        .where(LibraryStatsSnapshot.name == name)
+    )).one_or_none()
+    if row is not None and row.computed_at > datetime.utcnow() - SNAPSHOT_MAX_AGE:
+        return row.data
+
+    compute = _computation(db, name)
+    assert compute is not None
+    data = await compute()
+    await _store(db, name, data)
+    await db.commit()
+    return data
+
+
+def _computation(db: AsyncSession, name: str) -> Callable[[], Awaitable[dict[str, Any]]] | None:
+    """The query behind a snapshot name, or None for names this version doesn't know."""
+    if name == LIBRARY_SNAPSHOT:
+        return lambda: compute_library_stats(db)
+    grid = name.removeprefix(MOOD_SNAPSHOT_PREFIX)
+    if name.startswith(MOOD_SNAPSHOT_PREFIX) and grid.isdigit() and int(grid) > 0:
+        return lambda: compute_mood_distribution(db, int(grid))
+    return None
+
+
+async def _store(db: AsyncSession, name: str, data: dict[str, Any]) -> None:
+    now = datetime.utcnow()
+    stmt = pg_insert(LibraryStatsSnapshot).values(name=name, data=data, computed_at=now)
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=[LibraryStatsSnapshot.name],
+        set_={"data": stmt.excluded.data, "computed_at": stmt.excluded.computed_at},
+    ))
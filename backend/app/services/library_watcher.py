@@ -0,0 +1,222 @@
+"""Filesystem watcher for incremental library sync.
+
+Subscribes to inotify events (via watchfiles) under each library path and
+feeds only the changed paths into LibraryScanner.sync_paths(), so new,
+edited, moved, and deleted files show up within seconds instead of at the
+next periodic sync.
+
+Inotify doesn't see changes made on other hosts, so network mounts are not
+watched; they (and any path where watching fails, e.g. when the inotify
+watch limit is hit) rely on the periodic full sync.
+
+With several uvicorn workers, only one watches: leadership is held in Redis
+with a short TTL and taken over by another worker if the leader dies.
+"""
+
+import asyncio
+import logging
+import os
+from contextlib import suppress
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from app.config import AUDIO_EXTENSIONS, settings
+from app.services.analysis_queue import PRIORITY_NEW, enqueue_analysis
+from app.services.leader_lease import LeaderLease
+from app.services.scanner import LibraryScanner, LibraryValidationError, is_network_filesystem
+
+if TYPE_CHECKING:
+    from app.services.background import BackgroundManager
+
+logger = logging.getLogger(__name__)
+
+WATCH_LEADER_KEY = "familiar:watch:leader"
+LEADER_TTL = 60  # Seconds before a dead leader's key expires
+LEADER_REFRESH_INTERVAL = 20  # Seconds between leadership refreshes (and deferred batch retries)
+WATCH_RETRY_INTERVAL = 30  # Seconds between leadership attempts by non-leaders
+WATCH_ERROR_RETRY_INTERVAL = 600  # Seconds before retrying after watching failed
+
+_AUDIO_EXT_LOWER = {ext.lower() for ext in AUDIO_EXTENSIONS}
+
+
+def _watch_filter(change, path: str) -> bool:
+    """Only pass events that can affect tracks: audio files and directories.
+
+    Hidden files (rsync/download temp files) are ignored; the final rename
+    produces its own event. A deleted path can't be checked for being a
+    directory, so deletions of anything without a file-like extension pass.
+    """
+    from watchfiles import Change
+
+    name = os.path.basename(path)
+    if name.startswith("."):
+        return False
+    ext = os.path.splitext(name)[1]
+    if ext.lower() in _AUDIO_EXT_LOWER:
+        return True
+    if change == Change.deleted:
+        # "Vol. 2" is a directory, "cover.jpg" is not
+        return not (len(ext) <= 5 and ext[1:].isalnum())
+    return os.path.isdir(path)
+
+
+def _library_root_for(path: Path, roots: list[Path]) -> Path | None:
+    """Find the library root containing path (deepest first, for nested roots)."""
+    for root in roots:
+        if path == root or path.is_relative_to(root):
+            return root
+    return None
+
+
+class LibraryWatcher:
+    """Watches library paths and applies changed paths as small incremental syncs."""
+
+    def __init__(self, manager: "BackgroundManager"):
+        self._manager = manager
+        self._lease = LeaderLease(manager, WATCH_LEADER_KEY, LEADER_TTL)
+        self._task: asyncio.Task | None = None
+        self._pending: set[Path] = set()
+        self._changed = asyncio.Event()
+        self._skipped_paths: set[Path] = set()  # Already logged as not watchable
+
+    async def start(self) -> None:
+        """Start the watcher (no-op if disabled or watchfiles is missing)."""
+        if not settings.library_watch_enabled:
+            logger.info("Library watcher disabled - relying on periodic sync")
+            return
+        try:
+            import watchfiles  # noqa: F401
+        except ImportError:
+            logger.warning("watchfiles not installed - library watcher disabled")
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop watching and give up leadership."""
+        if self._task and not self._task.done():
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+        self._task = None
+        self._lease.release()
+
+    async def _run(self) -> None:
+        """Compete for leadership; watch while leader, retry otherwise."""
+        while True:
+            retry_after = WATCH_RETRY_INTERVAL
+            if self._lease.acquire():
+                try:
+                    await self._lead()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.warning(
+                        f"Library watcher failed, falling back to periodic sync: {e}"
+                    )
+                    retry_after = WATCH_ERROR_RETRY_INTERVAL
+                finally:
+                    self._lease.release()
+            await asyncio.sleep(retry_after)
+
+    async def _lead(self) -> None:
+        """Watch the library paths until leadership is lost or the paths change."""
+        roots = self._watchable_paths()
+        if not roots:
+            return
+
+        stop_event = asyncio.Event()
+        watch_task = asyncio.create_task(self._watch(roots, stop_event))
+        logger.info(f"Library watcher started for {len(roots)} path(s)")
+        try:
+            while not watch_task.done():
+                with suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self._changed.wait(), timeout=LEADER_REFRESH_INTERVAL)
+                self._changed.clear()
+
+                if not self._lease.refresh():
+                    logger.info("Library watcher lost leadership")
+                    break
+                if self._watchable_paths() != roots:
+                    logger.info("Library paths changed - restarting library watcher")
+                    break
+                await self._apply_pending(roots)
+
+            if watch_task.done():
+                # Re-raise the watch error (e.g. inotify watch limit reached)
+                watch_task.result()
+        finally:
+            stop_event.set()
+            watch_task.cancel()
+            with suppress(asyncio.CancelledError, Exception):
+                await watch_task
+
+    async def _watch(self, roots: list[Path], stop_event: asyncio.Event) -> None:
+        """Collect debounced filesystem changes into the pending set."""
+        from watchfiles import awatch
+
+        async for changes in awatch(
+            *roots,
+            watch_filter=_watch_filter,
+            debounce=settings.library_watch_debounce_ms,
+            stop_event=stop_event,
+            ignore_permission_denied=True,
+        ):
+            self._pending.update(Path(path) for _, path in changes)
+            self._changed.set()
+
+    async def _apply_pending(self, roots: list[Path]) -> None:
+        """Sync pending paths, unless a full sync is running (retried on the next tick)."""
+        if not self._pending:
+            return
+        if self._manager.is_sync_running() or not self._manager.acquire_watch_batch_lock():
+            logger.debug(f"Deferring {len(self._pending)} changed paths until sync finishes")
+            return
+
+        from app.db.session import async_session_maker
+
+        changed, self._pending = self._pending, set()
+        by_root: dict[Path, list[Path]] = {}
+        for path in changed:
+            root = _library_root_for(path, roots)
+            if root is not None:
+                by_root.setdefault(root, []).append(path)
+
+        analysis_ids: list[str] = []
+        try:
+            async with async_session_maker() as db:
+                scanner = LibraryScanner(db)
+                for root, paths in by_root.items():
+                    try:
+                        results = await scanner.sync_paths(root, paths)
+                    except LibraryValidationError as e:
+                        # Unmounted or emptied library - leave its tracks alone
+                        logger.warning(f"Skipping watcher batch for {root}: {e}")
+                        continue
+                    except Exception as e:
+                        logger.error(f"Watcher batch failed for {root}: {e}", exc_info=True)
+                        await db.rollback()
+                        continue
+                    analysis_ids.extend(results["analysis_ids"])
+        finally:
+            self._manager.release_watch_batch_lock()
+        self._manager.schedule_library_refresh()
+
+        if analysis_ids:
+            async with async_session_maker() as db:
+                await enqueue_analysis(db, analysis_ids, phase="full", priority=PRIORITY_NEW)
+                await db.commit()
+            self._manager.wake_analysis_queue()
+
+    def _watchable_paths(self) -> list[Path]:
+        """Library paths that inotify can watch, deepest first."""
+        roots = []
+        for path in settings.music_library_paths:
+            if not path.is_dir():
+                continue
+            if is_network_filesystem(path):
+                if path not in self._skipped_paths:
+                    logger.info(f"Not watching network mount {path} - relying on periodic sync")
+                    self._skipped_paths.add(path)
+                continue
+            roots.append(path)
+        return sorted(roots, key=lambda p: len(p.parts), reverse=True)
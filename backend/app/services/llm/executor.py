@@ -22,6 +22,8 @@ from app.db.models import (
     SpotifyProfile,
     Track,
     TrackAnalysis,
+    TrackFeatures,
+    TrackStatus,
 )
 from app.services.app_settings import get_app_settings_service
 from app.services.external_track_matcher import ExternalTrackMatcher
@@ -287,28 +289,16 @@ Respond with ONLY the playlist name, nothing else."""
         except (ValueError, TypeError):
             limit = 10
 
-        stmt = (
-            select(TrackAnalysis.embedding)
-            .where(TrackAnalysis.track_id == UUID(track_id))
-            .order_by(TrackAnalysis.version.desc())
-            .limit(1)
-        )
-        result = await self.db.execute(stmt)
-        embedding = result.scalar_one_or_none()
+        from app.services.embedding_store import get_embedding_store
 
-        if embedding is None:
+        store = get_embedding_store()
+        _, vectors = await store.get_vectors([UUID(track_id)])
+        if not len(vectors):
             return {"error": "Track not analyzed yet", "tracks": []}
 
-        similar_stmt = (
-            select(Track)
-            .join(TrackAnalysis, Track.id == TrackAnalysis.track_id)
-            .where(Track.id != UUID(track_id))
-            .where(TrackAnalysis.embedding.isnot(None))
-            .order_by(TrackAnalysis.embedding.cosine_distance(embedding))
-            .limit(limit * 4)
-        )
-        result = await self.db.execute(similar_stmt)
-        all_tracks = list(result.scalars().all())
+        # A few extra in case some neighbors are no longer active
+        nearest = await store.nearest(vectors[0], limit * 4 + 10, exclude={UUID(track_id)})
+        all_tracks = (await self._load_active_tracks([tid for tid, _ in nearest]))[:limit * 4]
 
         diverse_tracks = self._apply_diversity(all_tracks, max_per_artist=2, max_per_album=2)
         selected = diverse_tracks[:limit]
@@ -319,6 +309,16 @@ Respond with ONLY the playlist name, nothing else."""
             "note": f"Similar tracks from {len(set(t.artist for t in selected))} different artists",
         }
 
+    async def _load_active_tracks(self, track_ids: list[UUID]) -> list[Track]:
+        """Load ACTIVE tracks by id, keeping the given order."""
+        if not track_ids:
+            return []
+        result = await self.db.execute(
+            select(Track).where(Track.id.in_(track_ids), Track.status == TrackStatus.ACTIVE)
+        )
+        tracks = {track.id: track for track in result.scalars().all()}
+        return [tracks[track_id] for track_id in track_ids if track_id in tracks]
+
     async def _semantic_search(self, description: str, limit: int = 20) -> dict[str, Any]:
         """Search for tracks using text-to-audio semantic similarity via CLAP embeddings."""
         from app.services.analysis import extract_text_embedding, get_analysis_capabilities
@@ -347,16 +347,11 @@ Respond with ONLY the playlist name, nothing else."""
                 "fallback_suggestion": "Try search_library or filter_tracks_by_features instead",
             }
 
-        # Query for similar tracks using cosine distance
-        similar_stmt = (
-            select(Track)
-            .join(TrackAnalysis, Track.id == TrackAnalysis.track_id)
-            .where(TrackAnalysis.embedding.isnot(None))
-            .order_by(TrackAnalysis.embedding.cosine_distance(embedding))
-            .limit(limit * 4)  # Fetch extra for diversity filtering
-        )
-        result = await self.db.execute(similar_stmt)
-        all_tracks = list(result.scalars().all())
+        # Nearest tracks by cosine similarity (extra for diversity filtering)
+        from app.services.embedding_store import get_embedding_store
+
+        nearest = await get_embedding_store().nearest(embedding, limit * 4 + 10)
+        all_tracks = (await self._load_active_tracks([tid for tid, _ in nearest]))[:limit * 4]
 
         # Apply diversity filtering
         diverse_tracks = self._apply_diversity(all_tracks, max_per_artist=2, max_per_album=3)
@@ -384,7 +379,7 @@ Respond with ONLY the playlist name, nothing else."""
         instrumentalness_min: float | None = None,
         limit: int = 20,
     ) -> dict[str, Any]:
-        """Filter tracks by audio features stored in JSONB."""
+        """Filter tracks by the audio features of their latest analysis."""
         # Convert string params to proper types (LLM tool calls may pass strings)
         def to_float(v: Any) -> float | None:
             if v is None:
@@ -413,17 +408,14 @@ Respond with ONLY the playlist name, nothing else."""
         instrumentalness_min = to_float(instrumentalness_min)
         limit = to_int(limit, 20)
 
-        stmt = select(Track).join(TrackAnalysis, Track.id == TrackAnalysis.track_id)
+        # Typed copy of each track's latest analysis features
+        stmt = select(Track).join(TrackFeatures, Track.id == TrackFeatures.track_id)
 
         conditions = []
         if bpm_min is not None:
-            conditions.append(
-                text("(features->>'bpm')::float >= :bpm_min").bindparams(bpm_min=bpm_min)
-            )
+            conditions.append(TrackFeatures.bpm >= bpm_min)
         if bpm_max is not None:
-            conditions.append(
-                text("(features->>'bpm')::float <= :bpm_max").bindparams(bpm_max=bpm_max)
-            )
+            conditions.append(TrackFeatures.bpm <= bpm_max)
         if key is not None:
             # Normalize key input - handle "F", "F major", "F minor", "F#", "F sharp", etc.
             key_normalized = key.strip().upper()
@@ -440,51 +432,21 @@ Respond with ONLY the playlist name, nothing else."""
                 elif key_root in flat_to_sharp:
                     key_root = flat_to_sharp[key_root]
             # Exact match for the key
-            conditions.append(
-                text("features->>'key' = :key_value").bindparams(key_value=key_root)
-            )
+            conditions.append(TrackFeatures.key == key_root)
         if energy_min is not None:
-            conditions.append(
-                text("(features->>'energy')::float >= :energy_min").bindparams(
-                    energy_min=energy_min
-                )
-            )
+            conditions.append(TrackFeatures.energy >= energy_min)
         if energy_max is not None:
-            conditions.append(
-                text("(features->>'energy')::float <= :energy_max").bindparams(
-                    energy_max=energy_max
-                )
-            )
+            conditions.append(TrackFeatures.energy <= energy_max)
         if danceability_min is not None:
-            conditions.append(
-                text("(features->>'danceability')::float >= :danceability_min").bindparams(
-                    danceability_min=danceability_min
-                )
-            )
+            conditions.append(TrackFeatures.danceability >= danceability_min)
         if valence_min is not None:
-            conditions.append(
-                text("(features->>'valence')::float >= :valence_min").bindparams(
-                    valence_min=valence_min
-                )
-            )
+            conditions.append(TrackFeatures.valence >= valence_min)
         if valence_max is not None:
-            conditions.append(
-                text("(features->>'valence')::float <= :valence_max").bindparams(
-                    valence_max=valence_max
-                )
-            )
+            conditions.append(TrackFeatures.valence <= valence_max)
         if acousticness_min is not None:
-            conditions.append(
-                text("(features->>'acousticness')::float >= :acousticness_min").bindparams(
-                    acousticness_min=acousticness_min
-                )
-            )
+            conditions.append(TrackFeatures.acousticness >= acousticness_min)
         if instrumentalness_min is not None:
-            conditions.append(
-                text("(features->>'instrumentalness')::float >= :instrumentalness_min").bindparams(
-                    instrumentalness_min=instrumentalness_min
-                )
-            )
+            conditions.append(TrackFeatures.instrumentalness >= instrumentalness_min)
 
         for condition in conditions:
             stmt = stmt.where(condition)
@@ -0,0 +1,236 @@
+"""Incremental UMAP layouts for the music maps.
+
+A full UMAP fit over every artist or album takes seconds to minutes and lays
+the map out differently each time the input changes. Instead, each layout
+(entity type x 2D/3D) keeps its fitted model and every entity's coordinates
+on disk:
+
+- Entities whose embedding is unchanged keep their coordinates.
+- New or changed entities are placed with the model's transform(), which is
+  fast and leaves everything else where it was.
+- Once too many entities have been placed that way, or the fit is a week
+  old, the layout is refit in the background, seeded with the current
+  coordinates so the map keeps its overall shape.
+
+Only the very first layout is fit synchronously.
+"""
+
+import logging
+import os
+import pickle
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Refit once this share of entities has been placed by transform() since the last fit
+LAYOUT_DRIFT_THRESHOLD = 0.2
+# Refit layouts older than this even without drift (seconds)
+LAYOUT_MAX_AGE = 7 * 24 * 3600
+# Cosine distance above which an entity's embedding counts as changed
+EMBEDDING_CHANGE_THRESHOLD = 0.01
+
+REFIT_LOCK_PREFIX = "familiar:map_layout:refit"
+REFIT_LOCK_TTL = 3600
+
+
+def create_umap(n_components: int, init: str | np.ndarray = "spectral"):
+    """Lazy-load UMAP to avoid import overhead."""
+    try:
+        from umap import UMAP
+    except ImportError:
+        logger.error("umap-learn not installed")
+        raise ImportError("umap-learn is required for music map visualization")
+
+    return UMAP(
+        n_components=n_components,
+        n_neighbors=15,
+        min_dist=0.1,
+        metric="cosine",
+        random_state=42,
+        init=init,
+    )
+
+
+@dataclass
+class LayoutState:
+    """A fitted model and the raw (unnormalized) coordinates of every placed entity."""
+
+    model: Any
+    names: list[str]
+    embeddings: np.ndarray  # Embedding each entity was placed with
+    coords: np.ndarray
+    fitted_count: int  # Entities in the last full fit
+    transformed_count: int = 0  # Entities placed with transform() since
+    fitted_at: float = field(default_factory=time.time)
+
+    def needs_refit(self) -> bool:
+        drift = self.transformed_count / max(self.fitted_count, 1)
+        return drift > LAYOUT_DRIFT_THRESHOLD or time.time() - self.fitted_at > LAYOUT_MAX_AGE
+
+
+def _cosine_distance(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Row-wise cosine distance between two matrices of the same shape."""
+    norms = np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1) + 1e-8
+    return 1 - np.sum(a * b, axis=1) / norms
+
+
+class MapLayoutStore:
+    """Persisted UMAP layouts, keyed by e.g. "artists_2d"."""
+
+    def __init__(self, path: Path | None = None):
+        self.path = path or settings.map_layout_path
+        self._states: dict[str, tuple[float, LayoutState]] = {}  # key -> (file mtime, state)
+
+    def place(
+        self, key: str, names: list[str], matrix: np.ndarray, n_components: int
+    ) -> tuple[np.ndarray, bool]:
+        """Coordinates for `names` (rows of `matrix`), and whether a refit is due."""
+        state = self._load(key)
+        if state is None or state.coords.shape[1] != n_components:
+            logger.info(f"Fitting {key} map layout for {len(names)} entities")
+            state = self._fit(names, matrix, n_components)
+            self._save(key, state)
+            return state.coords.copy(), False
+
+        known, stale, positions = self._positions(state, names, matrix)
+        if stale.any():
+            # Record the new placements; entities outside this request keep theirs
+            for row in np.flatnonzero(stale):
+                i = known[row]
+                if i < 0:
+                    state.names.append(names[row])
+                    state.embeddings = np.vstack([state.embeddings, matrix[row]])
+                    state.coords = np.vstack([state.coords, positions[row]])
+                else:
+                    state.embeddings[i] = matrix[row]
+                    state.coords[i] = positions[row]
+            state.transformed_count += int(stale.sum())
+            logger.info(f"Placed {int(stale.sum())} of {len(names)} entities in {key} map layout")
+            self._save(key, state)
+
+        return positions, state.needs_refit()
+
+    def refit(self, key: str, names: list[str], matrix: np.ndarray, n_components: int) -> None:
+        """Refit the layout, starting from the current coordinates (blocking)."""
+        state = self._load(key)
+        if state is not None and state.coords.shape[1] != n_components:
+            state = None
+
+        init: str | np.ndarray = "spectral"
+        if state is not None:
+            # Snapshot what's needed: requests may place entities while this runs
+            state = LayoutState(
+                model=state.model,
+                names=list(state.names),
+                embeddings=state.embeddings.copy(),
+                coords=state.coords.copy(),
+                fitted_count=state.fitted_count,
+            )
+            _, _, init = self._positions(state, names, matrix)
+
+        started = time.monotonic()
+        refitted = self._fit(names, matrix, n_components, init)
+        # Keep entities that weren't part of this refit (e.g. beyond a 2D map's limit)
+        if state is not None:
+            included = set(names)
+            extra = [i for i, name in enumerate(state.names) if name not in included]
+            if extra:
+                refitted.names.extend(state.names[i] for i in extra)
+                refitted.embeddings = np.vstack([refitted.embeddings, state.embeddings[extra]])
+                refitted.coords = np.vstack(
+                    [refitted.coords, refitted.model.transform(state.embeddings[extra])]
+                )
+        self._save(key, refitted)
+        logger.info(f"Refit {key} map layout in {time.monotonic() - started:.1f}s")
+
+    def _positions(
+        self, state: LayoutState, names: list[str], matrix: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Look up or transform() each entity's coordinates without changing `state`.
+
+        Returns each entity's index in the state (-1 if new), a mask of the
+        entities that were (re)placed, and the coordinates.
+        """
+        index = {name: i for i, name in enumerate(state.names)}
+        known = np.array([index.get(name, -1) for name in names], dtype=np.int64)
+        stale = known < 0
+        if (~stale).any():
+            distance = _cosine_distance(state.embeddings[known[~stale]], matrix[~stale])
+            stale[np.flatnonzero(~stale)[distance > EMBEDDING_CHANGE_THRESHOLD]] = True
+
+        positions = np.empty((len(names), state.coords.shape[1]), dtype=np.float32)
+        positions[~stale] = state.coords[known[~stale]]
+        if stale.any():
+            positions[stale] = state.model.transform(matrix[stale])
+        return known, stale, positions
+
+    def _fit(
+        self,
+        names: list[str],
+        matrix: np.ndarray,
+        n_components: int,
+        init: str | np.ndarray = "spectral",
+    ) -> LayoutState:
+        model = create_umap(n_components, init)
+        coords = np.asarray(model.fit_transform(matrix), dtype=np.float32)
+        return LayoutState(
+            model=model,
+            names=list(names),
+            embeddings=np.array(matrix, dtype=np.float32),
+            coords=coords,
+            fitted_count=len(names),
+        )
+
+    def _load(self, key: str) -> LayoutState | None:
+        """The layout on disk, re-read when another worker has replaced it."""
+        file = self.path / f"{key}.pkl"
+        try:
+            mtime = file.stat().st_mtime
+        except OSError:
+            return None
+        cached = self._states.get(key)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        try:
+            with file.open("rb") as f:
+                state = pickle.load(f)
+        except Exception as e:
+            logger.warning(f"Discarding unreadable map layout {file}: {e}")
+            return None
+        self._states[key] = (mtime, state)
+        return state
+
+    def _save(self, key: str, state: LayoutState) -> None:
+        """Write the layout atomically so other workers never read half a file."""
+        self.path.mkdir(parents=True, exist_ok=True)
+        file = self.path / f"{key}.pkl"
+        tmp = self.path / f".{key}.{os.getpid()}.pkl"
+        with tmp.open("wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp.replace(file)
+        self._states[key] = (file.stat().st_mtime, state)
+
+    def claim_refit(self, key: str) -> bool:
+        """Take the cross-worker refit lock for a layout."""
+        try:
+            from app.services.tasks import get_redis
+
+            return bool(get_redis().set(f"{REFIT_LOCK_PREFIX}:{key}", os.getpid(), nx=True, ex=REFIT_LOCK_TTL))
+        except Exception as e:
+            logger.warning(f"Map layout refit lock unavailable: {e}")
+            return True
+
+    def release_refit(self, key: str) -> None:
+        try:
+            from app.services.tasks import get_redis
+
+            get_redis().delete(f"{REFIT_LOCK_PREFIX}:{key}")
+        except Exception:
+            pass
@@ -0,0 +1,399 @@
+"""In-memory index of the library for matching external track references.
+
+Spotify favorites, external (missing) tracks and imported playlists are all
+matched to local tracks the same way: ISRC, MusicBrainz ID, exact
+title/artist, substring, then fuzzy title/artist similarity. This index keeps
+the strings and identifiers of every track in memory so none of those steps
+needs a query per item.
+
+Fuzzy matching is blocked by artist: a query's artist is scored against the
+distinct normalized artist names of the library first, and only tracks by
+artists that could still reach the threshold have their titles scored. Both
+steps use rapidfuzz's batch scorer.
+
+The index is built on first use and kept current incrementally from
+Track.updated_at; a changed track count (deletions) triggers a rebuild.
+"""
+
+import asyncio
+import logging
+import re
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any
+from uuid import UUID
+
+import numpy as np
+from rapidfuzz import fuzz, process
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import Track
+
+logger = logging.getLogger(__name__)
+
+# Fuzzy matching threshold (0-100) on the weighted title/artist score
+FUZZY_THRESHOLD = 85
+TITLE_WEIGHT = 0.6
+ARTIST_WEIGHT = 0.4
+# Duration disambiguation (when the reference has a duration)
+DURATION_CLOSE_SECONDS = 3
+DURATION_CLOSE_BONUS = 5
+DURATION_FAR_SECONDS = 30
+DURATION_FAR_FACTOR = 0.9
+
+# Queries scored per batch before yielding to the event loop
+BATCH_SIZE = 256
+# Skip the freshness check if the index was refreshed this recently (seconds)
+REFRESH_INTERVAL = 1.0
+# Re-read rows updated this long before the newest seen, for transactions that
+# committed late
+REFRESH_OVERLAP = timedelta(minutes=10)
+
+
+def normalize_for_matching(s: str) -> str:
+    """Normalize string for matching comparisons.
+
+    Removes common variations like featuring credits, remaster annotations,
+    and normalizes punctuation/whitespace.
+    """
+    # Remove featuring/feat variations
+    s = re.sub(
+        r'\s*[\(\[](feat\.?|ft\.?|featuring)[^\)\]]*[\)\]]',
+        '',
+        s,
+        flags=re.IGNORECASE
+    )
+    # Remove remaster/remix annotations
+    s = re.sub(
+        r'\s*[\(\[][^\)\]]*(?:remaster|remix|version|edit|deluxe|bonus)[^\)\]]*[\)\]]',
+        '',
+        s,
+        flags=re.IGNORECASE
+    )
+    # Normalize apostrophes
+    s = s.replace("'", "'").replace("'", "'").replace("`", "'")
+    # Remove extra whitespace
+    s = ' '.join(s.split())
+    return s.strip().lower()
+
+
+@dataclass(frozen=True)
+class MatchQuery:
+    """A track reference to look up in the library."""
+
+    title: str | None
+    artist: str | None
+    isrc: str | None = None
+    musicbrainz_id: str | None = None
+    duration: float | None = None
+
+    @classmethod
+    def from_spotify(cls, spotify_track: dict[str, Any]) -> "MatchQuery":
+        """Query for a Spotify API track object (first artist only)."""
+        artists = spotify_track.get("artists") or []
+        return cls(
+            title=spotify_track.get("name"),
+            artist=artists[0]["name"] if artists else None,
+            isrc=(spotify_track.get("external_ids") or {}).get("isrc"),
+        )
+
+
+@dataclass(frozen=True)
+class MatchResult:
+    track_id: UUID
+    method: str  # "isrc", "musicbrainz", "exact", "partial" or "fuzzy"
+    confidence: float
+
+
+@dataclass
+class _Entry:
+    track_id: UUID
+    isrc: str | None
+    mbid: str | None
+    title: str | None  # Lowercased, for exact and substring matching
+    artist: str | None
+    norm_title: str | None  # normalize_for_matching, for fuzzy matching
+    norm_artist: str | None
+    duration: float | None
+
+
+class TrackMatchIndex:
+    """Identifiers and title/artist strings of every library track."""
+
+    def __init__(self) -> None:
+        self._entries: dict[UUID, _Entry] = {}
+        self._by_isrc: dict[str, UUID] = {}
+        self._by_mbid: dict[str, UUID] = {}
+        self._by_exact: dict[tuple[str, str], UUID] = {}
+        # Blocks: lowercased artist -> tracks (substring step), normalized
+        # artist -> tracks (fuzzy step)
+        self._by_artist: dict[str, set[UUID]] = {}
+        self._by_norm_artist: dict[str, set[UUID]] = {}
+        self._norm_artists: list[str] | None = None  # Distinct keys, rebuilt after changes
+        self._watermark: datetime | None = None
+        self._refreshed_at = 0.0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def refresh(self, db: AsyncSession, force: bool = False) -> None:
+        """Load tracks added or changed since the last refresh."""
+        if not force and time.monotonic() - self._refreshed_at < REFRESH_INTERVAL:
+            return
+
+        columns = select(
+            Track.id,
+            Track.isrc,
+            Track.musicbrainz_track_id,
+            Track.title,
+            Track.artist,
+            Track.duration_seconds,
+            Track.updated_at,
+        )
+        if self._watermark is not None:
+            result = await db.execute(columns.where(Track.updated_at >= self._watermark - REFRESH_OVERLAP))
+            self._load(result.all())
+
+        count = await db.scalar(select(func.count(Track.id)))
+        if self._watermark is None or count != len(self._entries):
+            started = time.monotonic()
+            self.clear()
+            result = await db.execute(columns)
+            self._load(result.all())
+            logger.info(f"Built track match index: {len(self._entries)} tracks in {time.monotonic() - started:.2f}s")
+        self._refreshed_at = time.monotonic()
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._by_isrc.clear()
+        self._by_mbid.clear()
+        self._by_exact.clear()
+        self._by_artist.clear()
+        self._by_norm_artist.clear()
+        self._norm_artists = None
+        self._watermark = None
+
+    def _load(self, rows) -> None:  # type: ignore[no-untyped-def]
+        for track_id, isrc, mbid, title, artist, duration, updated_at in rows:
+            self.add(track_id, isrc, mbid, title, artist, duration)
+            if updated_at is not None and (self._watermark is None or updated_at > self._watermark):
+                self._watermark = updated_at
+        if self._watermark is None:
+            self._watermark = datetime.min + REFRESH_OVERLAP  # Empty library: the next refresh reads everything
+
+    def add(
+        self,
+        track_id: UUID,
+        isrc: str | None,
+        mbid: str | None,
+        title: str | None,
+        artist: str | None,
+        duration: float | None = None,
+    ) -> None:
+        """Index a track, replacing its previous entry."""
+        self.discard(track_id)
+        entry = _Entry(
+            track_id=track_id,
+            isrc=isrc or None,
+            mbid=mbid or None,
+            title=title.lower().strip() if title else None,
+            artist=artist.lower().strip() if artist else None,
+            norm_title=normalize_for_matching(title) if title else None,
+            norm_artist=normalize_for_matching(artist) if artist else None,
+            duration=duration,
+        )
+        self._entries[track_id] = entry
+        if entry.isrc:
+            self._by_isrc.setdefault(entry.isrc, track_id)
+        if entry.mbid:
+            self._by_mbid.setdefault(entry.mbid, track_id)
+        if entry.title and entry.artist:
+            self._by_exact.setdefault((entry.title, entry.artist), track_id)
+            self._by_artist.setdefault(entry.artist, set()).add(track_id)
+        if entry.norm_title and entry.norm_artist:
+            if entry.norm_artist not in self._by_norm_artist:
+                self._norm_artists = None
+            self._by_norm_artist.setdefault(entry.norm_artist, set()).add(track_id)
+
+    def discard(self, track_id: UUID) -> None:
+        """Remove a track (e.g. one that was deleted) from the index."""
+        entry = self._entries.pop(track_id, None)
+        if entry is None:
+            return
+        if entry.isrc and self._by_isrc.get(entry.isrc) == track_id:
+            del self._by_isrc[entry.isrc]
+        if entry.mbid and self._by_mbid.get(entry.mbid) == track_id:
+            del self._by_mbid[entry.mbid]
+        if entry.title and entry.artist:
+            if self._by_exact.get((entry.title, entry.artist)) == track_id:
+                del self._by_exact[(entry.title, entry.artist)]
+            _remove_from_block(self._by_artist, entry.artist, track_id)
+        if entry.norm_title and entry.norm_artist:
+            if _remove_from_block(self._by_norm_artist, entry.norm_artist, track_id):
+                self._norm_artists = None
+
+    async def match(
+        self,
+        db: AsyncSession,
+        query: MatchQuery,
+        threshold: float = FUZZY_THRESHOLD,
+        partial: bool = True,
+    ) -> MatchResult | None:
+        """Find the local track for one reference."""
+        return (await self.match_many(db, [query], threshold, partial))[0]
+
+    async def match_many(
+        self,
+        db: AsyncSession,
+        queries: list[MatchQuery],
+        threshold: float = FUZZY_THRESHOLD,
+        partial: bool = True,
+    ) -> list[MatchResult | None]:
+        """Find the local track for each reference (None where there's no match).
+
+        Matching priority: ISRC, MusicBrainz ID, exact title + artist
+        (case-insensitive), title and artist substrings (if `partial`), then
+        fuzzy title/artist similarity of at least `threshold`.
+        """
+        await self.refresh(db)
+        results: list[MatchResult | None] = []
+        for start in range(0, len(queries), BATCH_SIZE):
+            if start:
+                await asyncio.sleep(0)
+            results.extend(self.find(queries[start:start + BATCH_SIZE], threshold, partial))
+        return results
+
+    def find(
+        self,
+        queries: list[MatchQuery],
+        threshold: float = FUZZY_THRESHOLD,
+        partial: bool = True,
+    ) -> list[MatchResult | None]:
+        """match_many against the index as it is, without refreshing."""
+        results: list[MatchResult | None] = [None] * len(queries)
+        fuzzy: list[int] = []
+        for i, query in enumerate(queries):
+            if query.isrc and query.isrc in self._by_isrc:
+                results[i] = MatchResult(self._by_isrc[query.isrc], "isrc", 1.0)
+                continue
+            if query.musicbrainz_id and query.musicbrainz_id in self._by_mbid:
+                results[i] = MatchResult(self._by_mbid[query.musicbrainz_id], "musicbrainz", 1.0)
+                continue
+            title = (query.title or "").lower().strip()
+            artist = (query.artist or "").lower().strip()
+            if not title or not artist:
+                continue
+            track_id = self._by_exact.get((title, artist))
+            if track_id is not None:
+                results[i] = MatchResult(track_id, "exact", 1.0)
+                continue
+            if partial:
+                track_id = self._find_partial(title, artist)
+                if track_id is not None:
+                    results[i] = MatchResult(track_id, "partial", 0.9)
+                    continue
+            fuzzy.append(i)
+
+        if fuzzy:
+            for i, result in zip(fuzzy, self._find_fuzzy([queries[i] for i in fuzzy], threshold), strict=True):
+                results[i] = result
+        return results
+
+    def _find_partial(self, title: str, artist: str) -> UUID | None:
+        """A track whose title and artist contain the given ones."""
+        for local_artist, track_ids in self._by_artist.items():
+            if artist not in local_artist:
+                continue
+            for track_id in track_ids:
+                local_title = self._entries[track_id].title
+                if local_title and title in local_title:
+                    return track_id
+        return None
+
+    def _find_fuzzy(self, queries: list[MatchQuery], threshold: float) -> list[MatchResult | None]:
+        if self._norm_artists is None:
+            self._norm_artists = list(self._by_norm_artist)
+        norm_artists = self._norm_artists
+        if not norm_artists:
+            return [None] * len(queries)
+
+        titles = [normalize_for_matching(query.title or "") for query in queries]
+        artists = [normalize_for_matching(query.artist or "") for query in queries]
+        # Lowest artist score that can still reach the threshold with a perfect title
+        min_artist_score = max(0.0, (threshold - DURATION_CLOSE_BONUS - 100 * TITLE_WEIGHT) / ARTIST_WEIGHT)
+        artist_scores = process.cdist(
+            artists, norm_artists, scorer=fuzz.ratio, dtype=np.float32, workers=-1
+        )
+
+        results: list[MatchResult | None] = []
+        for query, title, scores in zip(queries, titles, artist_scores, strict=True):
+            candidates: list[_Entry] = []
+            candidate_artist_scores: list[float] = []
+            for j in np.flatnonzero(scores >= min_artist_score):
+                block = self._by_norm_artist[norm_artists[j]]
+                candidates.extend(self._entries[track_id] for track_id in block)
+                candidate_artist_scores.extend([float(scores[j])] * len(block))
+            if not candidates:
+                results.append(None)
+                continue
+
+            title_scores = process.cdist(
+                [title], [entry.norm_title for entry in candidates], scorer=fuzz.ratio, dtype=np.float32
+            )[0]
+            combined = title_scores * TITLE_WEIGHT + np.asarray(candidate_artist_scores) * ARTIST_WEIGHT
+            if query.duration:
+                durations = np.array([entry.duration or np.nan for entry in candidates])
+                diff = np.abs(durations - query.duration)
+                combined = np.where(
+                    diff < DURATION_CLOSE_SECONDS, np.minimum(100, combined + DURATION_CLOSE_BONUS), combined
+                )
+                combined = np.where(diff > DURATION_FAR_SECONDS, combined * DURATION_FAR_FACTOR, combined)
+
+            best = int(np.argmax(combined))
+            if combined[best] >= threshold:
+                results.append(MatchResult(candidates[best].track_id, "fuzzy", float(combined[best]) / 100.0))
+            else:
+                results.append(None)
+        return results
+
+
+def _remove_from_block(blocks: dict[str, set[UUID]], key: str, track_id: UUID) -> bool:
+    """Remove a track from a block; True if the block is now gone."""
+    block = blocks.get(key)
+    if block is None:
+        return False
+    block.discard(track_id)
+    if block:
+        return False
+    del blocks[key]
+    return True
+
+
+async def load_matched_tracks(db: AsyncSession, results: list[MatchResult | None]) -> list[Track | None]:
+    """The Track rows for match results, in one query.
+
+    Tracks deleted since the index was refreshed come back as None (and are
+    dropped from the index).
+    """
+    track_ids = {result.track_id for result in results if result is not None}
+    tracks: dict[UUID, Track] = {}
+    if track_ids:
+        rows = await db.execute(select(Track).where(Track.id.in_(track_ids)))
+        tracks = {track.id: track for track in rows.scalars()}
+    for track_id in track_ids - tracks.keys():
+        get_match_index().discard(track_id)
+    return [tracks.get(result.track_id) if result is not None else None for result in results]
+
+
+# Singleton
+_match_index: TrackMatchIndex | None = None
+
+
+def get_match_index() -> TrackMatchIndex:
+    """Get the singleton TrackMatchIndex instance."""
+    global _match_index
+    if _match_index is None:
+        _match_index = TrackMatchIndex()
+    return _match_index
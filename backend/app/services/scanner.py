@@ -4,17 +4,23 @@ import asyncio
 import hashlib
 import logging
 import os
+import stat
+import threading
+from collections.abc import AsyncGenerator, Callable, Iterable
 from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextlib import aclosing, suppress
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
 from typing import Any
 
-from sqlalchemy import select
+from sqlalchemy import func, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.config import AUDIO_EXTENSIONS
+from app.config import AUDIO_EXTENSIONS, settings
 from app.db.models import Track, TrackStatus
+from app.services.metadata import TrackMetadata, read_metadata
 
 
 class LibraryValidationError(Exception):
@@ -130,10 +136,12 @@ def compute_file_hash(path: Path, chunk_size: int = 8192) -> str:
 
     Uses first and last chunks plus file size for speed on large files.
     """
-    file_size = path.stat().st_size
     hasher = hashlib.sha256()
 
     with open(path, "rb") as f:
+        # fstat on the open handle avoids a second path lookup (a round-trip on network mounts)
+        file_size = os.fstat(f.fileno()).st_size
+
         # Hash first chunk
         hasher.update(f.read(chunk_size))
 
@@ -148,55 +156,418 @@ def compute_file_hash(path: Path, chunk_size: int = 8192) -> str:
     return hasher.hexdigest()
 
 
-def _discover_files_sync(library_path: Path, progress_callback=None) -> list[Path]:
-    """Synchronous file discovery using single-pass os.walk (runs in thread pool).
+@dataclass
+class DiscoveredFile:
+    """Audio file found during discovery, with the stat signature taken during the walk."""
 
-    Much faster than multiple rglob calls, especially on network volumes.
-    Logs progress every 500 directories scanned.
+    path: Path
+    size: int
+    mtime: datetime
+    inode: int | None  # None where the filesystem doesn't provide stable inodes
 
-    Args:
-        library_path: Root directory to scan
-        progress_callback: Optional callable(dirs_scanned, files_found) for progress updates
+
+# Directory batches buffered between the discovery walkers and the scan pipeline
+_DISCOVERY_QUEUE_SIZE = 64
+
+
+class _DiscoveryCancelled(Exception):
+    """Raised inside walker threads when the consumer stopped reading."""
+
+
+def _scan_directory_sync(directory: str) -> tuple[list[DiscoveredFile], list[str]]:
+    """List one directory: audio files (stat'ed during the listing) and subdirectories.
+
+    Each audio file is stat'ed here so rescans can compare stat signatures
+    without opening unchanged files. Both lists are returned in name order.
     """
-    files: list[Path] = []
-    dirs_scanned = 0
+    files: list[DiscoveredFile] = []
+    subdirs: list[str] = []
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir():
+                        # Like os.walk, don't descend into symlinked directories
+                        if not entry.is_symlink():
+                            subdirs.append(entry.path)
+                        continue
+
+                    # Fast extension check (case-insensitive)
+                    ext = os.path.splitext(entry.name)[1].lower()
+                    if ext in _AUDIO_EXT_LOWER:
+                        st = entry.stat()
+                        files.append(
+                            DiscoveredFile(
+                                path=Path(entry.path),
+                                size=st.st_size,
+                                mtime=datetime.fromtimestamp(st.st_mtime),
+                                inode=st.st_ino or None,
+                            )
+                        )
+                except (OSError, ValueError, OverflowError):
+                    # Broken symlink, file vanished mid-walk, or an out-of-range mtime
+                    continue
+    except OSError as e:
+        logger.warning(f"Cannot read directory {directory}: {e}")
+
+    files.sort(key=lambda f: f.path)
+    subdirs.sort()
+    return files, subdirs
 
-    logger.info(f"Starting single-pass directory walk of {library_path}")
 
-    for root, dirs, filenames in os.walk(library_path):
-        dirs_scanned += 1
+def _walk_tree_sync(root: str, emit: Callable[[list[DiscoveredFile]], None]) -> None:
+    """Depth-first walk of one subtree, emitting each directory's audio files (runs in thread pool)."""
+    pending_dirs = [root]
+    while pending_dirs:
+        files, subdirs = _scan_directory_sync(pending_dirs.pop())
+        # Reversed so directories are popped in name order
+        pending_dirs.extend(reversed(subdirs))
+        emit(files)
 
-        # Log and report progress every 25 directories (more frequent for slow network mounts)
-        if dirs_scanned % 25 == 0:
-            logger.info(f"Discovery progress: scanned {dirs_scanned} directories, found {len(files)} audio files so far...")
-            if progress_callback:
-                progress_callback(dirs_scanned, len(files))
 
-        # Check each file in this directory
-        for filename in filenames:
-            # Fast extension check (case-insensitive)
-            ext = os.path.splitext(filename)[1].lower()
-            if ext in _AUDIO_EXT_LOWER:
-                files.append(Path(root) / filename)
+async def discover_files(
+    library_path: Path,
+    walkers: int = 4,
+    progress_callback: Callable[[int, int], None] | None = None,
+) -> AsyncGenerator[DiscoveredFile, None]:
+    """Stream audio files under library_path as they are found.
 
-    logger.info(f"Discovery complete: scanned {dirs_scanned} directories, found {len(files)} audio files")
+    The root directory is listed first, then each top-level subdirectory is
+    walked by its own thread (up to `walkers` at once), so the scan can start
+    processing long before the walk finishes and never holds the full file
+    list. Files within a directory arrive in name order; the interleaving of
+    different subtrees is not deterministic.
+
+    Args:
+        library_path: Root directory to scan
+        walkers: Number of top-level subtrees walked in parallel
+        progress_callback: Optional callable(dirs_scanned, files_found), called every 25 directories
+    """
+    loop = asyncio.get_running_loop()
+    logger.info(f"Starting streaming directory walk of {library_path}")
+
+    root_files, top_dirs = await loop.run_in_executor(
+        _file_executor, _scan_directory_sync, str(library_path)
+    )
+    dirs_scanned = 1
+    files_found = len(root_files)
+    for discovered in root_files:
+        yield discovered
+
+    # None marks a finished walker and an exception a failed one; lists are
+    # one directory's audio files each
+    batches: asyncio.Queue[list[DiscoveredFile] | Exception | None] = asyncio.Queue(
+        maxsize=_DISCOVERY_QUEUE_SIZE
+    )
+    stop = threading.Event()
+
+    def put_blocking(item: list[DiscoveredFile] | Exception | None) -> None:
+        # Blocks the walker thread while the queue is full (backpressure)
+        future = asyncio.run_coroutine_threadsafe(batches.put(item), loop)
+        while True:
+            try:
+                future.result(timeout=0.5)
+                return
+            except FutureTimeoutError:
+                if stop.is_set():
+                    future.cancel()
+                    raise _DiscoveryCancelled() from None
+
+    def walk(root: str) -> None:
+        try:
+            _walk_tree_sync(root, put_blocking)
+            put_blocking(None)
+        except _DiscoveryCancelled:
+            return
+        except Exception as e:
+            # Hand the failure to the consumer, which would otherwise wait forever;
+            # a partial walk must not be mistaken for files having gone missing
+            with suppress(_DiscoveryCancelled):
+                put_blocking(e)
+
+    walk_executor = ThreadPoolExecutor(
+        max_workers=max(1, min(walkers, len(top_dirs) or 1)), thread_name_prefix="scanner-walk"
+    )
+    try:
+        for top_dir in top_dirs:
+            walk_executor.submit(walk, top_dir)
+
+        active_walkers = len(top_dirs)
+        while active_walkers:
+            batch = await batches.get()
+            if batch is None:
+                active_walkers -= 1
+                continue
+            if isinstance(batch, Exception):
+                raise batch
+
+            dirs_scanned += 1
+            files_found += len(batch)
+            # Report progress every 25 directories (more frequent for slow network mounts)
+            if dirs_scanned % 25 == 0:
+                logger.info(f"Discovery progress: scanned {dirs_scanned} directories, found {files_found} audio files so far...")
+                if progress_callback:
+                    progress_callback(dirs_scanned, files_found)
+
+            for discovered in batch:
+                yield discovered
+    finally:
+        stop.set()
+        walk_executor.shutdown(wait=False, cancel_futures=True)
+
+    logger.info(f"Discovery complete: scanned {dirs_scanned} directories, found {files_found} audio files")
     # Final progress update
     if progress_callback:
-        progress_callback(dirs_scanned, len(files))
-    return sorted(files)
+        progress_callback(dirs_scanned, files_found)
 
 
-def _get_file_info_sync(file_path: Path) -> tuple[str, datetime]:
-    """Get file hash and mtime (runs in thread pool)."""
-    file_hash = compute_file_hash(file_path)
-    file_mtime = datetime.fromtimestamp(file_path.stat().st_mtime)
-    return file_hash, file_mtime
+def _resolve_changed_paths_sync(
+    paths: list[Path],
+) -> tuple[list[DiscoveredFile], list[str]]:
+    """Split changed paths into audio files present now and paths that vanished.
 
+    Paths are judged by the current filesystem state, not by the event that
+    reported them. Directories are walked, so a copied-in album yields all its
+    files. Runs in thread pool.
+    """
+    found: dict[Path, DiscoveredFile] = {}
+    gone: list[str] = []
+
+    def add_files(files: list[DiscoveredFile]) -> None:
+        for discovered in files:
+            found[discovered.path] = discovered
+
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            gone.append(str(path))
+            continue
+        except OSError as e:
+            logger.warning(f"Cannot stat changed path {path}: {e}")
+            continue
+
+        if stat.S_ISDIR(st.st_mode):
+            _walk_tree_sync(str(path), add_files)
+        elif stat.S_ISREG(st.st_mode) and path.suffix.lower() in _AUDIO_EXT_LOWER:
+            add_files([
+                DiscoveredFile(
+                    path=path,
+                    size=st.st_size,
+                    mtime=datetime.fromtimestamp(st.st_mtime),
+                    inode=st.st_ino or None,
+                )
+            ])
 
-def _extract_metadata_sync(file_path: Path) -> dict[str, Any]:
+    return [found[p] for p in sorted(found)], sorted(gone)
+
+
+def _stat_signature_matches(track: Track, discovered: DiscoveredFile) -> bool:
+    """Check whether a file's stat signature matches the one recorded at the last scan."""
+    if track.file_size is None or track.file_modified_at is None:
+        # Scanned before signatures were recorded - hash once to backfill
+        return False
+    if track.file_size != discovered.size or track.file_modified_at != discovered.mtime:
+        return False
+    # Inode catches files replaced in place with the same size and a preserved mtime
+    return track.file_inode is None or discovered.inode is None or track.file_inode == discovered.inode
+
+
+def _hash_file_sync(file_path: Path) -> str:
+    """Compute file hash (runs in thread pool)."""
+    return compute_file_hash(file_path)
+
+
+def _extract_metadata_sync(file_path: Path) -> TrackMetadata:
     """Extract metadata from file (runs in thread pool)."""
-    from app.services.metadata import extract_metadata
-    return extract_metadata(file_path)
+    return read_metadata(file_path)
+
+
+# Filesystem types where per-file latency dominates and many requests in flight pay off
+_NETWORK_FS_TYPES = {
+    "nfs", "nfs4", "cifs", "smb3", "smbfs", "afpfs", "9p", "davfs",
+    "fuse.sshfs", "fuse.rclone", "fuse.s3fs",
+}
+
+
+@dataclass
+class ScanConcurrency:
+    """Worker counts for the pipelined scan."""
+
+    io_workers: int  # Concurrent hash/stat jobs
+    metadata_workers: int  # Concurrent mutagen jobs
+    storage: str  # "network", "rotational", "ssd" or "unknown"
+
+
+def _find_mount_fstype(path: Path) -> str | None:
+    """Get the filesystem type of the mount containing path (Linux only)."""
+    try:
+        with open("/proc/mounts") as f:
+            mounts = [line.split() for line in f]
+    except OSError:
+        return None
+
+    resolved = str(path.resolve())
+    best_mount = ""
+    best_type = None
+    for fields in mounts:
+        if len(fields) < 3:
+            continue
+        mount_point = fields[1].replace("\\040", " ")
+        under_mount = resolved == mount_point or resolved.startswith(mount_point.rstrip("/") + "/")
+        if under_mount and len(mount_point) >= len(best_mount):
+            best_mount = mount_point
+            best_type = fields[2]
+    return best_type
+
+
+def _is_rotational(path: Path) -> bool | None:
+    """Check whether the block device backing path is a spinning disk (Linux only)."""
+    try:
+        st_dev = path.stat().st_dev
+        dev_dir = Path(f"/sys/dev/block/{os.major(st_dev)}:{os.minor(st_dev)}").resolve()
+    except OSError:
+        return None
+
+    # Partitions keep their queue attributes on the parent device
+    for candidate in (dev_dir, dev_dir.parent):
+        flag = candidate / "queue" / "rotational"
+        try:
+            return flag.read_text().strip() == "1"
+        except OSError:
+            continue
+    return None
+
+
+def is_network_filesystem(path: Path) -> bool:
+    """Check whether path lives on a network mount (NFS, SMB, sshfs, ...)."""
+    fstype = _find_mount_fstype(path)
+    return bool(fstype) and (fstype in _NETWORK_FS_TYPES or fstype.startswith("nfs"))
+
+
+def detect_scan_concurrency(library_path: Path) -> ScanConcurrency:
+    """Pick hash and metadata worker counts suited to the library's storage.
+
+    Network mounts are latency-bound, so many jobs in flight hide the round-trips.
+    Spinning disks thrash on random seeks, so they get very few. Explicit
+    SCAN_IO_WORKERS / SCAN_METADATA_WORKERS settings override the detection.
+    """
+    cpus = os.cpu_count() or 4
+
+    if is_network_filesystem(library_path):
+        concurrency = ScanConcurrency(io_workers=32, metadata_workers=16, storage="network")
+    else:
+        rotational = _is_rotational(library_path)
+        if rotational:
+            concurrency = ScanConcurrency(io_workers=2, metadata_workers=2, storage="rotational")
+        elif rotational is False:
+            concurrency = ScanConcurrency(
+                io_workers=min(16, cpus * 2), metadata_workers=min(8, cpus), storage="ssd"
+            )
+        else:
+            concurrency = ScanConcurrency(io_workers=4, metadata_workers=4, storage="unknown")
+
+    if settings.scan_io_workers > 0:
+        concurrency.io_workers = settings.scan_io_workers
+    if settings.scan_metadata_workers > 0:
+        concurrency.metadata_workers = settings.scan_metadata_workers
+    return concurrency
+
+
+@dataclass
+class _ScannedFile:
+    """Output of the I/O stage of the scan pipeline for a single file."""
+
+    path: Path
+    file_hash: str
+    file_mtime: datetime
+    file_size: int
+    file_inode: int | None
+    metadata: TrackMetadata | None = None  # Prefetched when the file will be created/updated
+
+
+# Track columns filled from read_metadata()
+_METADATA_FIELDS = (
+    "title",
+    "artist",
+    "album",
+    "album_artist",
+    "track_number",
+    "disc_number",
+    "year",
+    "genre",
+    "duration_seconds",
+    "sample_rate",
+    "bit_depth",
+    "bitrate",
+    "bitrate_mode",
+    "format",
+)
+
+# Columns overwritten when an upserted path already exists
+_UPSERT_COLUMNS = (
+    "file_hash", "file_modified_at", "file_size", "file_inode", *_METADATA_FIELDS
+)
+
+# Rows per INSERT statement (asyncpg allows at most 32767 bind parameters)
+_UPSERT_CHUNK_ROWS = 1000
+
+
+def _track_values(
+    file_path: Path,
+    file_hash: str,
+    file_mtime: datetime,
+    metadata: TrackMetadata,
+    file_size: int | None = None,
+    file_inode: int | None = None,
+) -> dict[str, Any]:
+    """Build the column values for inserting a track."""
+    values: dict[str, Any] = {
+        "file_path": str(file_path),
+        "file_hash": file_hash,
+        "file_modified_at": file_mtime,
+        "file_size": file_size,
+        "file_inode": file_inode,
+    }
+    for field in _METADATA_FIELDS:
+        values[field] = getattr(metadata, field)
+    return values
+
+
+class _NewTrackBatch:
+    """New tracks buffered during a scan and written with one bulk upsert per batch.
+
+    Rows are keyed by path, with a hash index so a later file with the same
+    content can relocate a row before it is ever written (same semantics as
+    relocating an existing track).
+    """
+
+    def __init__(self) -> None:
+        self.rows: dict[str, dict[str, Any]] = {}
+        self.paths_by_hash: dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def add(self, values: dict[str, Any]) -> None:
+        self.rows[values["file_path"]] = values
+        self.paths_by_hash.setdefault(values["file_hash"], values["file_path"])
+
+    def relocate(self, scanned: _ScannedFile) -> str:
+        """Move the pending row with scanned's hash to scanned's path. Returns the old path."""
+        old_path = self.paths_by_hash[scanned.file_hash]
+        row = self.rows.pop(old_path)
+        row["file_path"] = str(scanned.path)
+        row["file_modified_at"] = scanned.file_mtime
+        row["file_size"] = scanned.file_size
+        row["file_inode"] = scanned.file_inode
+        self.rows[row["file_path"]] = row
+        self.paths_by_hash[scanned.file_hash] = row["file_path"]
+        return old_path
+
+    def clear(self) -> None:
+        self.rows.clear()
+        self.paths_by_hash.clear()
 
 
 class LibraryScanner:
@@ -229,21 +600,7 @@ class LibraryScanner:
         if full_scan is not None:
             reread_unchanged = full_scan
         # Validate library path before scanning
-        validation = validate_library_path(library_path)
-        if not validation.exists:
-            raise LibraryValidationError(f"Library path does not exist: {library_path}")
-        if not validation.is_directory:
-            raise LibraryValidationError(f"Library path is not a directory: {library_path}")
-        if not validation.is_readable:
-            raise LibraryValidationError(f"Library path is not readable: {library_path}")
-        if validation.is_empty:
-            raise EmptyLibraryError(
-                f"Library path is empty or has no content: {library_path}. "
-                "This may indicate an unmounted volume or misconfigured path. "
-                "Scan aborted to prevent accidental track deletion."
-            )
-
-        loop = asyncio.get_event_loop()
+        self._check_library_path(library_path)
 
         # Get all existing tracks from database
         logger.info("Loading existing tracks from database...")
@@ -259,22 +616,8 @@ class LibraryScanner:
 
         logger.info(f"Found {len(existing_tracks)} existing tracks in database ({len(existing_hashes)} unique hashes)")
 
-        # Find all audio files (in thread pool to not block)
-        logger.info(f"Discovering audio files in {library_path}...")
-
-        # Create progress callback that updates scan_state
-        def discovery_progress(dirs_scanned: int, files_found: int):
-            if self.scan_state:
-                self.scan_state.set_discovery(dirs_scanned, files_found)
-
-        found_files = await loop.run_in_executor(
-            _file_executor, _discover_files_sync, library_path, discovery_progress
-        )
-        found_paths = {str(p) for p in found_files}
-        logger.info(f"Discovered {len(found_files)} audio files")
-
         results = {
-            "total": len(found_files),
+            "total": 0,
             "new": 0,
             "updated": 0,
             "unchanged": 0,
@@ -288,91 +631,121 @@ class LibraryScanner:
         # Track IDs to queue for analysis after commit
         pending_analysis_ids: list[str] = []
 
+        # New tracks are accumulated and bulk-upserted once per batch
+        new_tracks = _NewTrackBatch()
+
+        # Pipeline: discovery streams files into hash and metadata jobs running on
+        # separate pools, while results are applied to the DB strictly in discovery
+        # order. Ordering matters because hash-based relocation depends on earlier files.
+        concurrency = detect_scan_concurrency(library_path)
+        logger.info(
+            f"Scan pipeline: {concurrency.io_workers} hash workers, "
+            f"{concurrency.metadata_workers} metadata workers ({concurrency.storage} storage)"
+        )
+        io_executor = ThreadPoolExecutor(
+            max_workers=concurrency.io_workers, thread_name_prefix="scanner-hash"
+        )
+        metadata_executor = ThreadPoolExecutor(
+            max_workers=concurrency.metadata_workers, thread_name_prefix="scanner-meta"
+        )
+        window = 2 * (concurrency.io_workers + concurrency.metadata_workers)
+        batch_size = max(1, settings.scan_batch_size)
+
+        # Compact set of seen paths for missing-file detection (no full file list is kept)
+        found_paths: set[str] = set()
+
+        # Bounded queue of in-flight prepare jobs, in discovery order
+        prepared: asyncio.Queue[asyncio.Task[_ScannedFile] | None] = asyncio.Queue(maxsize=window)
+
+        async def produce() -> None:
+            try:
+                async with aclosing(
+                    discover_files(library_path, walkers=min(8, concurrency.io_workers))
+                ) as discovered_files:
+                    async for discovered in discovered_files:
+                        found_paths.add(str(discovered.path))
+                        prepare = self._prepare_file(
+                            discovered,
+                            existing_paths,
+                            existing_hashes,
+                            io_executor,
+                            metadata_executor,
+                            reread_unchanged=reread_unchanged,
+                        )
+                        await prepared.put(asyncio.create_task(prepare))
+            finally:
+                # Wake the consumer; discovery errors are re-raised by awaiting the producer
+                await prepared.put(None)
+
+        # Find audio files while processing them. Discovery progress shows up as the
+        # growing processing total, since both phases run at once.
+        logger.info(f"Discovering audio files in {library_path}...")
+        producer = asyncio.create_task(produce())
+
         # Process found files
         processed = 0
-        for file_path in found_files:
-            path_str = str(file_path)
-            processed += 1
-
-            # Update progress state
-            if self.scan_state and processed % 10 == 0:
-                self.scan_state.set_processing(
-                    processed=processed,
-                    total=len(found_files),
-                    new=results["new"],
-                    updated=results["updated"],
-                    unchanged=results["unchanged"],
-                    current=file_path.name,
-                    recovered=results["recovered"],
+        try:
+            while True:
+                next_task = await prepared.get()
+                if next_task is None:
+                    break
+                scanned = await next_task
+                await self._apply_scanned_file(
+                    scanned,
+                    existing_paths,
+                    existing_hashes,
+                    results,
+                    pending_analysis_ids,
+                    new_tracks,
+                    reread_unchanged=reread_unchanged,
+                    reanalyze_changed=reanalyze_changed,
                 )
+                processed += 1
+
+                # Update progress state (total grows while discovery is still running)
+                if self.scan_state and processed % 10 == 0:
+                    self.scan_state.set_processing(
+                        processed=processed,
+                        total=len(found_paths),
+                        new=results["new"],
+                        updated=results["updated"],
+                        unchanged=results["unchanged"],
+                        current=scanned.path.name,
+                        recovered=results["recovered"],
+                    )
 
-            # Log progress every 100 files
-            if processed % 100 == 0:
-                logger.info(f"Progress: {processed}/{len(found_files)} files ({results['new']} new, {results['updated']} updated, {results['unchanged']} unchanged)")
-
-            # Get file info in thread pool
-            file_hash, file_mtime = await loop.run_in_executor(
-                _file_executor, _get_file_info_sync, file_path
-            )
+                # Log progress every 100 files
+                if processed % 100 == 0:
+                    logger.info(f"Progress: {processed}/{len(found_paths)} files ({results['new']} new, {results['updated']} updated, {results['unchanged']} unchanged)")
 
-            if path_str not in existing_paths:
-                # Path not found - check if same file exists at different path (by hash)
-                if file_hash in existing_hashes:
-                    # Found by hash - this is a relocated file, update its path
-                    existing = existing_hashes[file_hash]
-                    old_path = existing.file_path
-                    logger.info(f"RELOCATED (by hash): {Path(old_path).name} -> {path_str}")
-                    existing.file_path = path_str
-                    existing.status = TrackStatus.ACTIVE
-                    existing.missing_since = None
-                    results["relocated"] += 1
-                    # Update path lookup so we don't process old path as missing
-                    existing_paths[path_str] = existing
-                    if old_path in existing_paths:
-                        del existing_paths[old_path]
-                else:
-                    # Truly new file
-                    logger.info(f"NEW: {file_path.name}")
-                    track = await self._create_track(file_path, file_hash, file_mtime)
-                    pending_analysis_ids.append(str(track.id))
-                    results["new"] += 1
-                    results["queued"] += 1
-                    # Add to hash lookup so subsequent files with same hash are detected
-                    existing_hashes[file_hash] = track
-            else:
-                existing = existing_paths[path_str]
-
-                # Check if track was previously missing and is now recovered
-                if existing.status in (TrackStatus.MISSING, TrackStatus.PENDING_DELETION):
-                    logger.info(f"RECOVERED: {file_path.name}")
-                    existing.status = TrackStatus.ACTIVE
-                    existing.missing_since = None
-                    results["recovered"] += 1
-
-                file_changed = existing.file_hash != file_hash
-                if reread_unchanged or file_changed:
-                    # Re-read metadata (reread_unchanged=True or file changed)
-                    logger.info(f"UPDATED: {file_path.name}")
-                    # Only reset analysis if file content actually changed AND reanalyze_changed is True
-                    reset_analysis = file_changed and reanalyze_changed
-                    track = await self._update_track(
-                        existing, file_hash, file_mtime, reset_analysis=reset_analysis
+                # Commit in ordered batches to make tracks visible and free memory
+                if processed % batch_size == 0:
+                    pending_analysis_ids.extend(
+                        await self._flush_new_tracks(new_tracks, existing_paths, existing_hashes)
                     )
-                    if reset_analysis:
-                        pending_analysis_ids.append(str(track.id))
-                        results["queued"] += 1
-                    results["updated"] += 1
-                else:
-                    results["unchanged"] += 1
-
-            # Commit periodically to make tracks visible and free memory
-            if processed % 50 == 0:
-                await self.db.commit()
-                # Note: Analysis is now queued after scan completes via queue_unanalyzed_tracks
-                pending_analysis_ids = []
-                await asyncio.sleep(0)
+                    await self.db.commit()
+                    # Note: Analysis is now queued after scan completes via queue_unanalyzed_tracks
+                    pending_analysis_ids = []
+                    await asyncio.sleep(0)
+
+            # Re-raise any discovery error
+            await producer
+        finally:
+            producer.cancel()
+            while not prepared.empty():
+                leftover = prepared.get_nowait()
+                if leftover is not None:
+                    leftover.cancel()
+            io_executor.shutdown(wait=False, cancel_futures=True)
+            metadata_executor.shutdown(wait=False, cancel_futures=True)
+
+        results["total"] = len(found_paths)
+        logger.info(f"Discovered {len(found_paths)} audio files")
 
         # Commit any remaining tracks from the last batch
+        pending_analysis_ids.extend(
+            await self._flush_new_tracks(new_tracks, existing_paths, existing_hashes)
+        )
         if pending_analysis_ids:
             await self.db.commit()
             # Note: Analysis is now queued after scan completes via queue_unanalyzed_tracks
@@ -388,13 +761,14 @@ class LibraryScanner:
         if missing_paths:
             logger.info(f"Found {len(missing_paths)} missing files, searching for relocated files...")
 
-        # Build filename -> path map for relocated file search
+        # Build filename -> path map for relocated file search (only needed if files went missing)
         filename_to_path: dict[str, str] = {}
-        for path_str in found_paths:
-            filename = Path(path_str).name.lower()
-            # Only use first occurrence to avoid ambiguity
-            if filename not in filename_to_path:
-                filename_to_path[filename] = path_str
+        if missing_paths:
+            for path_str in sorted(found_paths):
+                filename = Path(path_str).name.lower()
+                # Only use first occurrence to avoid ambiguity
+                if filename not in filename_to_path:
+                    filename_to_path[filename] = path_str
 
         now = datetime.now()
         for path_str in missing_paths:
@@ -417,21 +791,7 @@ class LibraryScanner:
                     continue
 
             # File not found - mark as missing instead of deleting
-            if track.status == TrackStatus.ACTIVE:
-                # First time this track is missing
-                logger.info(f"MISSING: {Path(path_str).name}")
-                track.status = TrackStatus.MISSING
-                track.missing_since = now
-                results["marked_missing"] += 1
-            elif track.status == TrackStatus.MISSING:
-                # Already missing, check if >30 days
-                if track.missing_since and (now - track.missing_since).days >= 30:
-                    logger.info(f"PENDING_DELETION: {Path(path_str).name} (missing >30 days)")
-                    track.status = TrackStatus.PENDING_DELETION
-                results["still_missing"] += 1
-            else:
-                # PENDING_DELETION - stays in that state until user confirms
-                results["still_missing"] += 1
+            self._mark_missing(track, now, results)
 
         # Update cleanup progress with final counts
         if self.scan_state and (results["marked_missing"] > 0 or results["still_missing"] > 0):
@@ -448,21 +808,323 @@ class LibraryScanner:
 
         # Match new tracks to external/missing tracks
         if results["new"] > 0:
-            try:
-                from app.services.external_track_matcher import ExternalTrackMatcher
+            await self._match_external_tracks(results)
 
-                matcher = ExternalTrackMatcher(self.db)
-                match_stats = await matcher.rematch_all_unmatched()
-                if match_stats["matched"] > 0:
-                    logger.info(
-                        f"Matched {match_stats['matched']} external tracks to new library additions"
-                    )
-                    results["external_matched"] = match_stats["matched"]
-            except Exception as e:
-                logger.warning(f"External track matching failed (non-fatal): {e}")
+        return results
+
+    async def sync_paths(
+        self,
+        library_path: Path,
+        changed_paths: Iterable[Path],
+        reanalyze_changed: bool = True,
+    ) -> dict[str, Any]:
+        """Apply changed paths under library_path without walking the whole library.
+
+        Used by the filesystem watcher. Each path is judged by its current state:
+        audio files go through the same per-file create/update/relocate logic as
+        scan(), directories are walked, and vanished paths (files or whole
+        directories) have their tracks marked missing.
+
+        Returns:
+            Dict with the same counters as scan(), plus "analysis_ids": tracks
+            that were created or changed and need analysis
+        """
+        self._check_library_path(library_path)
+        loop = asyncio.get_event_loop()
+
+        found, gone = await loop.run_in_executor(
+            _file_executor, _resolve_changed_paths_sync, sorted(set(changed_paths))
+        )
+        results: dict[str, Any] = {
+            "total": len(found),
+            "new": 0,
+            "updated": 0,
+            "unchanged": 0,
+            "queued": 0,
+            "marked_missing": 0,
+            "still_missing": 0,
+            "recovered": 0,
+            "relocated": 0,
+        }
+        pending_analysis_ids: list[str] = []
+        if not found and not gone:
+            results["analysis_ids"] = pending_analysis_ids
+            return results
+
+        # Load only the tracks these paths can touch
+        found_paths = {str(d.path) for d in found}
+        existing_paths = {
+            t.file_path: t for t in await self._get_tracks_for_paths(sorted(found_paths), gone)
+        }
+
+        # Files that are new at their path may be tracks that moved here. Only tracks
+        # whose old file is gone qualify, so a copy doesn't steal the original's track.
+        new_paths = found_paths - existing_paths.keys()
+        prepared = await asyncio.gather(*(
+            self._prepare_file(d, existing_paths, {}, _file_executor, _file_executor)
+            for d in found
+        ))
+        new_hashes = {s.file_hash for s in prepared if str(s.path) in new_paths}
+        existing_hashes: dict[str, Track] = {}
+        for track in await self._get_tracks_for_hashes(sorted(new_hashes)):
+            if track.file_path in existing_paths:
+                continue
+            if not await loop.run_in_executor(_file_executor, os.path.exists, track.file_path):
+                existing_hashes.setdefault(track.file_hash, track)
+        for track in existing_paths.values():
+            if track.file_hash and track.file_path not in found_paths and track.file_hash in new_hashes:
+                existing_hashes.setdefault(track.file_hash, track)
+
+        new_tracks = _NewTrackBatch()
+        for scanned in prepared:
+            await self._apply_scanned_file(
+                scanned,
+                existing_paths,
+                existing_hashes,
+                results,
+                pending_analysis_ids,
+                new_tracks,
+                reread_unchanged=False,
+                reanalyze_changed=reanalyze_changed,
+            )
+        pending_analysis_ids.extend(
+            await self._flush_new_tracks(new_tracks, existing_paths, existing_hashes)
+        )
 
+        # Tracks under vanished paths that weren't relocated above
+        now = datetime.now()
+        for path_str, track in existing_paths.items():
+            if path_str in found_paths:
+                continue
+            if any(path_str == g or path_str.startswith(g.rstrip("/") + "/") for g in gone):
+                self._mark_missing(track, now, results)
+
+        await self.db.commit()
+
+        logger.info(
+            f"Synced {len(found)} changed files and {len(gone)} removed paths: "
+            f"{results['new']} new, {results['updated']} updated, "
+            f"{results['relocated']} relocated, {results['marked_missing']} marked missing"
+        )
+
+        if results["new"] > 0:
+            await self._match_external_tracks(results)
+
+        results["analysis_ids"] = pending_analysis_ids
         return results
 
+    @staticmethod
+    def _check_library_path(library_path: Path) -> None:
+        """Refuse to touch tracks under a missing, unreadable, or empty library path."""
+        validation = validate_library_path(library_path)
+        if not validation.exists:
+            raise LibraryValidationError(f"Library path does not exist: {library_path}")
+        if not validation.is_directory:
+            raise LibraryValidationError(f"Library path is not a directory: {library_path}")
+        if not validation.is_readable:
+            raise LibraryValidationError(f"Library path is not readable: {library_path}")
+        if validation.is_empty:
+            raise EmptyLibraryError(
+                f"Library path is empty or has no content: {library_path}. "
+                "This may indicate an unmounted volume or misconfigured path. "
+                "Scan aborted to prevent accidental track deletion."
+            )
+
+    async def _prepare_file(
+        self,
+        discovered: DiscoveredFile,
+        existing_paths: dict[str, Track],
+        existing_hashes: dict[str, Track],
+        io_executor: ThreadPoolExecutor,
+        metadata_executor: ThreadPoolExecutor,
+        reread_unchanged: bool = False,
+    ) -> _ScannedFile:
+        """Hash a discovered file and prefetch its metadata when it will be needed.
+
+        Runs concurrently for many files; only reads the lookups, never updates them.
+        """
+        loop = asyncio.get_event_loop()
+        file_path = discovered.path
+        existing = existing_paths.get(str(file_path))
+
+        # Fast path: unchanged stat signature means unchanged content - no file open
+        if (
+            existing is not None
+            and not reread_unchanged
+            and _stat_signature_matches(existing, discovered)
+        ):
+            return _ScannedFile(
+                path=file_path,
+                file_hash=existing.file_hash,
+                file_mtime=discovered.mtime,
+                file_size=discovered.size,
+                file_inode=discovered.inode,
+            )
+
+        file_hash = await loop.run_in_executor(io_executor, _hash_file_sync, file_path)
+        scanned = _ScannedFile(
+            path=file_path,
+            file_hash=file_hash,
+            file_mtime=discovered.mtime,
+            file_size=discovered.size,
+            file_inode=discovered.inode,
+        )
+        # Prefetch metadata for files that will (most likely) be created or updated.
+        # A wrong guess only costs a wasted read or a late fetch in _apply_scanned_file.
+        if existing is None:
+            needs_metadata = file_hash not in existing_hashes
+        else:
+            needs_metadata = reread_unchanged or existing.file_hash != file_hash
+        if needs_metadata:
+            scanned.metadata = await loop.run_in_executor(
+                metadata_executor, _extract_metadata_sync, file_path
+            )
+        return scanned
+
+    async def _apply_scanned_file(
+        self,
+        scanned: _ScannedFile,
+        existing_paths: dict[str, Track],
+        existing_hashes: dict[str, Track],
+        results: dict[str, Any],
+        pending_analysis_ids: list[str],
+        new_tracks: _NewTrackBatch,
+        reread_unchanged: bool,
+        reanalyze_changed: bool,
+    ) -> None:
+        """Apply one file from the scan pipeline to the database.
+
+        Must be called in discovery order: relocation-by-hash relies on the
+        lookups reflecting every file applied before this one. New files are
+        only buffered in new_tracks; _flush_new_tracks writes them.
+        """
+        file_path = scanned.path
+        file_hash = scanned.file_hash
+        file_mtime = scanned.file_mtime
+        path_str = str(file_path)
+
+        if path_str not in existing_paths:
+            # Path not found - check if same file exists at different path (by hash)
+            if file_hash in existing_hashes:
+                # Found by hash - this is a relocated file, update its path
+                existing = existing_hashes[file_hash]
+                old_path = existing.file_path
+                logger.info(f"RELOCATED (by hash): {Path(old_path).name} -> {path_str}")
+                existing.file_path = path_str
+                existing.status = TrackStatus.ACTIVE
+                existing.missing_since = None
+                self._record_stat_signature(existing, scanned)
+                results["relocated"] += 1
+                # Update path lookup so we don't process old path as missing
+                existing_paths[path_str] = existing
+                if old_path in existing_paths:
+                    del existing_paths[old_path]
+            elif file_hash in new_tracks.paths_by_hash:
+                # Same content as a new track that hasn't been written yet
+                old_path = new_tracks.relocate(scanned)
+                logger.info(f"RELOCATED (by hash): {Path(old_path).name} -> {path_str}")
+                results["relocated"] += 1
+            else:
+                # Truly new file
+                logger.info(f"NEW: {file_path.name}")
+                metadata = scanned.metadata
+                if metadata is None:
+                    loop = asyncio.get_event_loop()
+                    metadata = await loop.run_in_executor(
+                        _file_executor, _extract_metadata_sync, file_path
+                    )
+                # The batch's hash index lets subsequent files with the same hash be detected
+                new_tracks.add(
+                    _track_values(
+                        file_path,
+                        file_hash,
+                        file_mtime,
+                        metadata,
+                        file_size=scanned.file_size,
+                        file_inode=scanned.file_inode,
+                    )
+                )
+                results["new"] += 1
+                results["queued"] += 1
+        else:
+            existing = existing_paths[path_str]
+
+            # Check if track was previously missing and is now recovered
+            if existing.status in (TrackStatus.MISSING, TrackStatus.PENDING_DELETION):
+                logger.info(f"RECOVERED: {file_path.name}")
+                existing.status = TrackStatus.ACTIVE
+                existing.missing_since = None
+                results["recovered"] += 1
+
+            file_changed = existing.file_hash != file_hash
+            if reread_unchanged or file_changed:
+                # Re-read metadata (reread_unchanged=True or file changed)
+                logger.info(f"UPDATED: {file_path.name}")
+                # Only reset analysis if file content actually changed AND reanalyze_changed is True
+                reset_analysis = file_changed and reanalyze_changed
+                track = await self._update_track(
+                    existing,
+                    file_hash,
+                    file_mtime,
+                    reset_analysis=reset_analysis,
+                    metadata=scanned.metadata,
+                )
+                self._record_stat_signature(track, scanned)
+                if reset_analysis:
+                    pending_analysis_ids.append(str(track.id))
+                    results["queued"] += 1
+                results["updated"] += 1
+            else:
+                # Content unchanged - remember the (possibly touched) stat signature
+                # so the next rescan can take the fast path
+                self._record_stat_signature(existing, scanned)
+                results["unchanged"] += 1
+
+    @staticmethod
+    def _record_stat_signature(track: Track, scanned: _ScannedFile) -> None:
+        """Store the file's stat signature, only touching columns that changed."""
+        if track.file_modified_at != scanned.file_mtime:
+            track.file_modified_at = scanned.file_mtime
+        if track.file_size != scanned.file_size:
+            track.file_size = scanned.file_size
+        if track.file_inode != scanned.file_inode:
+            track.file_inode = scanned.file_inode
+
+    @staticmethod
+    def _mark_missing(track: Track, now: datetime, results: dict[str, Any]) -> None:
+        """Mark a track whose file is gone as missing (never deleted outright)."""
+        name = Path(track.file_path).name
+        if track.status == TrackStatus.ACTIVE:
+            # First time this track is missing
+            logger.info(f"MISSING: {name}")
+            track.status = TrackStatus.MISSING
+            track.missing_since = now
+            results["marked_missing"] += 1
+        elif track.status == TrackStatus.MISSING:
+            # Already missing, check if >30 days
+            if track.missing_since and (now - track.missing_since).days >= 30:
+                logger.info(f"PENDING_DELETION: {name} (missing >30 days)")
+                track.status = TrackStatus.PENDING_DELETION
+            results["still_missing"] += 1
+        else:
+            # PENDING_DELETION - stays in that state until user confirms
+            results["still_missing"] += 1
+
+    async def _match_external_tracks(self, results: dict[str, Any]) -> None:
+        """Match newly added tracks to external/missing tracks (non-fatal)."""
+        try:
+            from app.services.external_track_matcher import ExternalTrackMatcher
+
+            matcher = ExternalTrackMatcher(self.db)
+            match_stats = await matcher.rematch_all_unmatched()
+            if match_stats["matched"] > 0:
+                logger.info(
+                    f"Matched {match_stats['matched']} external tracks to new library additions"
+                )
+                results["external_matched"] = match_stats["matched"]
+        except Exception as e:
+            logger.warning(f"External track matching failed (non-fatal): {e}")
+
     async def cleanup_orphaned_tracks(self, configured_paths: list[Path]) -> dict[str, int]:
         """Mark tracks as missing if they're not under any configured library path.
 
@@ -506,68 +1168,113 @@ class LibraryScanner:
         result = await self.db.execute(select(Track))
         return list(result.scalars().all())
 
-    async def _create_track(
-        self, file_path: Path, file_hash: str, file_mtime: datetime
-    ) -> Track:
-        """Create a new track record, or update if it already exists (upsert)."""
+    async def _get_tracks_for_paths(self, paths: list[str], prefixes: list[str]) -> list[Track]:
+        """Get tracks at the given paths or anywhere under the given directory prefixes."""
+        tracks: dict[Any, Track] = {}
+        for start in range(0, len(paths), _UPSERT_CHUNK_ROWS):
+            result = await self.db.execute(
+                select(Track).where(Track.file_path.in_(paths[start:start + _UPSERT_CHUNK_ROWS]))
+            )
+            tracks.update((t.id, t) for t in result.scalars().all())
+        for prefix in prefixes:
+            result = await self.db.execute(
+                select(Track).where(
+                    or_(
+                        Track.file_path == prefix,
+                        Track.file_path.startswith(prefix.rstrip("/") + "/", autoescape=True),
+                    )
+                )
+            )
+            tracks.update((t.id, t) for t in result.scalars().all())
+        return list(tracks.values())
+
+    async def _get_tracks_for_hashes(self, hashes: list[str]) -> list[Track]:
+        """Get tracks with any of the given file hashes."""
+        tracks: list[Track] = []
+        for start in range(0, len(hashes), _UPSERT_CHUNK_ROWS):
+            result = await self.db.execute(
+                select(Track).where(Track.file_hash.in_(hashes[start:start + _UPSERT_CHUNK_ROWS]))
+            )
+            tracks.extend(result.scalars().all())
+        return tracks
+
+    async def _flush_new_tracks(
+        self,
+        new_tracks: _NewTrackBatch,
+        existing_paths: dict[str, Track],
+        existing_hashes: dict[str, Track],
+    ) -> list[str]:
+        """Bulk-upsert buffered new tracks and register them in the scan lookups.
+
+        Returns the IDs of the written tracks.
+        """
+        if not new_tracks:
+            return []
+
+        tracks = await self._upsert_tracks(list(new_tracks.rows.values()))
+        new_tracks.clear()
+
+        for track in tracks:
+            # Registered as existing so later files and the missing-file pass see them
+            existing_paths[track.file_path] = track
+            # Add to hash lookup so subsequent files with same hash are detected
+            existing_hashes.setdefault(track.file_hash, track)
+
+        logger.info(f"Bulk inserted {len(tracks)} new tracks")
+        return [str(track.id) for track in tracks]
+
+    async def _upsert_tracks(self, rows: list[dict[str, Any]]) -> list[Track]:
+        """Insert tracks with multi-row INSERT ... ON CONFLICT (file_path) DO UPDATE.
+
+        Upsert handles race conditions (another process may have inserted a track).
+        """
         from sqlalchemy.dialects.postgresql import insert as pg_insert
 
-        loop = asyncio.get_event_loop()
+        tracks: list[Track] = []
+        for start in range(0, len(rows), _UPSERT_CHUNK_ROWS):
+            insert_stmt = pg_insert(Track).values(rows[start:start + _UPSERT_CHUNK_ROWS])
+            upsert_stmt = insert_stmt.on_conflict_do_update(
+                index_elements=["file_path"],
+                # updated_at marks changed tracks for the match index and smart playlists
+                set_={
+                    **{column: insert_stmt.excluded[column] for column in _UPSERT_COLUMNS},
+                    "updated_at": func.now(),
+                },
+            ).returning(Track)
+
+            result = await self.db.execute(
+                upsert_stmt, execution_options={"populate_existing": True}
+            )
+            tracks.extend(result.scalars().all())
+        return tracks
 
-        # Extract metadata from file (in thread pool)
-        metadata = await loop.run_in_executor(
-            _file_executor, _extract_metadata_sync, file_path
-        )
+    async def _create_track(
+        self,
+        file_path: Path,
+        file_hash: str,
+        file_mtime: datetime,
+        metadata: TrackMetadata | None = None,
+        file_size: int | None = None,
+        file_inode: int | None = None,
+    ) -> Track:
+        """Create a new track record, or update if it already exists (upsert).
 
-        values = {
-            "file_path": str(file_path),
-            "file_hash": file_hash,
-            "file_modified_at": file_mtime,
-            "title": metadata.get("title"),
-            "artist": metadata.get("artist"),
-            "album": metadata.get("album"),
-            "album_artist": metadata.get("album_artist"),
-            "track_number": metadata.get("track_number"),
-            "disc_number": metadata.get("disc_number"),
-            "year": metadata.get("year"),
-            "genre": metadata.get("genre"),
-            "duration_seconds": metadata.get("duration_seconds"),
-            "sample_rate": metadata.get("sample_rate"),
-            "bit_depth": metadata.get("bit_depth"),
-            "bitrate": metadata.get("bitrate"),
-            "bitrate_mode": metadata.get("bitrate_mode"),
-            "format": metadata.get("format"),
-        }
+        Metadata is extracted from the file unless already provided by the caller.
+        """
+        if metadata is None:
+            # Extract metadata from file (in thread pool)
+            loop = asyncio.get_event_loop()
+            metadata = await loop.run_in_executor(
+                _file_executor, _extract_metadata_sync, file_path
+            )
 
-        # Use upsert to handle race conditions (another process may have inserted this track)
-        insert_stmt = pg_insert(Track).values(**values)
-        upsert_stmt = insert_stmt.on_conflict_do_update(
-            index_elements=["file_path"],
-            set_={
-                "file_hash": insert_stmt.excluded.file_hash,
-                "file_modified_at": insert_stmt.excluded.file_modified_at,
-                "title": insert_stmt.excluded.title,
-                "artist": insert_stmt.excluded.artist,
-                "album": insert_stmt.excluded.album,
-                "album_artist": insert_stmt.excluded.album_artist,
-                "track_number": insert_stmt.excluded.track_number,
-                "disc_number": insert_stmt.excluded.disc_number,
-                "year": insert_stmt.excluded.year,
-                "genre": insert_stmt.excluded.genre,
-                "duration_seconds": insert_stmt.excluded.duration_seconds,
-                "sample_rate": insert_stmt.excluded.sample_rate,
-                "bit_depth": insert_stmt.excluded.bit_depth,
-                "bitrate": insert_stmt.excluded.bitrate,
-                "bitrate_mode": insert_stmt.excluded.bitrate_mode,
-                "format": insert_stmt.excluded.format,
-            },
-        ).returning(Track)
-
-        result = await self.db.execute(upsert_stmt)
-        track = result.scalar_one()
+        values = _track_values(
+            file_path, file_hash, file_mtime, metadata, file_size=file_size, file_inode=file_inode
+        )
+        tracks = await self._upsert_tracks([values])
 
         # Note: Analysis is queued by the caller after commit
-        return track
+        return tracks[0]
 
     async def detect_compilation_albums(self) -> dict[str, int]:
         """Detect compilation albums and set album_artist for tracks.
@@ -582,7 +1289,7 @@ class LibraryScanner:
         Uses case-insensitive album matching to handle variations like
         "Alice In Ultraland" vs "Alice in Ultraland".
         """
-        from sqlalchemy import func, update
+        from sqlalchemy import update
 
         # Find albums with multiple artists (compilation candidates)
         # Only consider tracks where album_artist is not already set
@@ -637,6 +1344,7 @@ class LibraryScanner:
         file_hash: str,
         file_mtime: datetime,
         reset_analysis: bool = True,
+        metadata: TrackMetadata | None = None,
     ) -> Track:
         """Update an existing track record.
 
@@ -645,30 +1353,19 @@ class LibraryScanner:
             file_hash: New file hash
             file_mtime: New file modification time
             reset_analysis: If True, reset analysis status to trigger re-analysis
+            metadata: Pre-extracted metadata (re-read from the file if None)
         """
-        loop = asyncio.get_event_loop()
-
-        # Re-extract metadata (in thread pool)
-        metadata = await loop.run_in_executor(
-            _file_executor, _extract_metadata_sync, Path(track.file_path)
-        )
+        if metadata is None:
+            # Re-extract metadata (in thread pool)
+            loop = asyncio.get_event_loop()
+            metadata = await loop.run_in_executor(
+                _file_executor, _extract_metadata_sync, Path(track.file_path)
+            )
 
         track.file_hash = file_hash
         track.file_modified_at = file_mtime
-        track.title = metadata.get("title")
-        track.artist = metadata.get("artist")
-        track.album = metadata.get("album")
-        track.album_artist = metadata.get("album_artist")
-        track.track_number = metadata.get("track_number")
-        track.disc_number = metadata.get("disc_number")
-        track.year = metadata.get("year")
-        track.genre = metadata.get("genre")
-        track.duration_seconds = metadata.get("duration_seconds")
-        track.sample_rate = metadata.get("sample_rate")
-        track.bit_depth = metadata.get("bit_depth")
-        track.bitrate = metadata.get("bitrate")
-        track.bitrate_mode = metadata.get("bitrate_mode")
-        track.format = metadata.get("format")
+        for field in _METADATA_FIELDS:
+            setattr(track, field, getattr(metadata, field))
 
         # Only reset analysis status if requested (when file content changed)
         if reset_analysis:
@@ -0,0 +1,308 @@
+"""Nearest-neighbor search over CLAP track embeddings.
+
+Similar-track queries are answered from an HNSW index on
+track_analysis.embedding. The app builds that index itself, concurrently and
+in the background, because a build over a large library takes minutes; it is
+rebuilt when a build was interrupted or the index definition changes.
+
+A partial index can only filter on its own table, so the index covers every
+stored embedding and the queries keep only the latest analysis of ACTIVE
+tracks, over-fetching candidates so that filtered rows don't shorten results.
+
+Optionally (settings.similar_tracks_cache_size > 0) each track's top-K
+neighbors are materialized in track_neighbors, refreshed as embeddings arrive.
+"""
+
+import logging
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import Float, Uuid, column, delete, func, select, text, values
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.config import settings
+from app.db.models import Track, TrackAnalysis, TrackNeighbor, TrackStatus
+
+logger = logging.getLogger(__name__)
+
+# Indexes on track_analysis with this prefix belong to the app, not to
+# migrations (alembic autogenerate ignores them, see migrations/env.py).
+# Bump the suffix when changing the definition so existing installs rebuild.
+MANAGED_INDEX_PREFIX = "ix_track_analysis_embedding_"
+EMBEDDING_INDEX_NAME = f"{MANAGED_INDEX_PREFIX}hnsw_v1"
+EMBEDDING_INDEX_DDL = f"""
+    CREATE INDEX CONCURRENTLY IF NOT EXISTS {EMBEDDING_INDEX_NAME}
+    ON track_analysis USING hnsw (embedding vector_cosine_ops)
+    WITH (m = 16, ef_construction = 64)
+    WHERE embedding IS NOT NULL
+"""
+
+# Session-level advisory lock so only one worker process builds the index
+INDEX_LOCK_KEY = 0x46616D53  # "FamS"
+
+# HNSW returns at most ef_search rows, so it is raised to the candidate count
+MIN_EF_SEARCH = 40
+CANDIDATE_SLACK = 20  # Extra candidates for the query track and filtered rows
+MAX_CANDIDATES = 1000
+
+BACKFILL_BATCH_SIZE = 100
+
+
+async def ensure_embedding_index(conn: Any) -> None:
+    """Create the HNSW index if missing, dropping stale or invalid ones first.
+
+    Runs on an AUTOCOMMIT connection (CREATE INDEX CONCURRENTLY can't run in
+    a transaction). An interrupted concurrent build leaves an INVALID index
+    behind, which is dropped and built again.
+    """
+    result = await conn.execute(text("""
+        SELECT c.relname, i.indisvalid
+        FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE i.indrelid = 'track_analysis'::regclass
+    """))
+    valid = False
+    for name, is_valid in result.all():
+        if not name.startswith(MANAGED_INDEX_PREFIX):
+            continue
+        if name == EMBEDDING_INDEX_NAME and is_valid:
+            valid = True
+            continue
+        logger.info(f"Dropping embedding index {name} (valid={is_valid})")
+        await conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"'))
+
+    if not valid:
+        logger.info(f"Building embedding index {EMBEDDING_INDEX_NAME}")
+        await conn.execute(text(EMBEDDING_INDEX_DDL))
+        logger.info(f"Embedding index {EMBEDDING_INDEX_NAME} ready")
+
+
+async def maintain_similarity_index() -> None:
+    """Build the embedding index and backfill the neighbor cache.
+
+    Called at startup by every worker process; the advisory lock makes all
+    but one of them return immediately.
+    """
+    from app.db.session import engine
+
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        if not await conn.scalar(select(func.pg_try_advisory_lock(INDEX_LOCK_KEY))):
+            return
+        try:
+            await ensure_embedding_index(conn)
+            if settings.similar_tracks_cache_size > 0:
+                await backfill_neighbor_cache()
+        finally:
+            await conn.execute(select(func.pg_advisory_unlock(INDEX_LOCK_KEY)))
+
+
+async def get_track_embedding(db: AsyncSession, track_id: UUID) -> Any | None:
+    """Embedding from a track's latest analysis, or None if it has none."""
+    result = await db.execute(
+        select(TrackAnalysis.embedding)
+        .where(TrackAnalysis.track_id == track_id)
+        .order_by(TrackAnalysis.version.desc())
+        .limit(1)
+    )
+    return result.scalar_one_or_none()
+
+
+async def nearest_tracks(
+    db: AsyncSession,
+    embedding: Any,
+    limit: int,
+    exclude_track_id: UUID | None = None,
+) -> list[tuple[Track, float]]:
+    """ACTIVE tracks whose latest embedding is closest to `embedding`.
+
+    Returns (track, cosine distance) pairs, nearest first. Candidates come
+    from the HNSW index; if filtering leaves fewer than `limit`, the search
+    widens (up to MAX_CANDIDATES) so latency stays bounded.
+    """
+    fetch = min(limit * 2 + CANDIDATE_SLACK, MAX_CANDIDATES)
+    while True:
+        await db.execute(
+            select(func.set_config("hnsw.ef_search", str(max(fetch, MIN_EF_SEARCH)), True))
+        )
+        distance = TrackAnalysis.embedding.cosine_distance(embedding)
+        result = await db.execute(
+            select(TrackAnalysis.track_id, TrackAnalysis.version, distance)
+            .where(TrackAnalysis.embedding.isnot(None))
+            .order_by(distance)
+            .limit(fetch)
+        )
+        candidates = result.all()
+        if not candidates:
+            return []
+
+        # Keep each track's latest analysis, for ACTIVE tracks only
+        latest = aliased(TrackAnalysis)
+        latest_version = (
+            select(func.max(latest.version))
+            .where(latest.track_id == Track.id)
+            .scalar_subquery()
+        )
+        result = await db.execute(
+            select(Track, latest_version)
+            .where(Track.id.in_({track_id for track_id, _, _ in candidates}))
+            .where(Track.status == TrackStatus.ACTIVE)
+        )
+        tracks = {track.id: (track, version) for track, version in result.all()}
+
+        nearest = []
+        for track_id, version, dist in candidates:
+            if track_id == exclude_track_id or track_id not in tracks:
+                continue
+            track, latest_version_value = tracks[track_id]
+            if version == latest_version_value:
+                nearest.append((track, float(dist)))
+
+        if len(nearest) >= limit or len(candidates) < fetch or fetch >= MAX_CANDIDATES:
+            return nearest[:limit]
+        fetch = min(fetch * 4, MAX_CANDIDATES)
+
+
+async def get_similar_tracks(db: AsyncSession, track_id: UUID, limit: int) -> list[Track] | None:
+    """Tracks most similar to `track_id`, or None if it has no embedding.
+
+    Uses the materialized neighbor list when it holds enough ACTIVE tracks,
+    otherwise queries the index.
+    """
+    if settings.similar_tracks_cache_size >= limit:
+        result = await db.execute(
+            select(Track)
+            .join(TrackNeighbor, TrackNeighbor.neighbor_id == Track.id)
+            .where(TrackNeighbor.track_id == track_id)
+            .where(Track.status == TrackStatus.ACTIVE)
+            .order_by(TrackNeighbor.distance)
+            .limit(limit)
+        )
+        cached = list(result.scalars().all())
+        if len(cached) == limit:
+            return cached
+
+    embedding = await get_track_embedding(db, track_id)
+    if embedding is None:
+        return None
+    nearest = await nearest_tracks(db, embedding, limit, exclude_track_id=track_id)
+    return [track for track, _ in nearest]
+
+
+async def refresh_neighbors(db: AsyncSession, track_ids: list[UUID], merge: bool = True) -> None:
+    """Recompute the cached neighbor lists of `track_ids` (caller commits).
+
+    With `merge`, each track is also added to (or removed from) the existing
+    lists of the tracks it is close to, keeping those lists at the top K
+    without recomputing them. Lists are only merged into if they exist, so a
+    cached list is always complete.
+    """
+    k = settings.similar_tracks_cache_size
+    if k <= 0:
+        return
+
+    for track_id in track_ids:
+        await db.execute(delete(TrackNeighbor).where(TrackNeighbor.track_id == track_id))
+        if merge:
+            # The embedding changed (or went away): drop stale distances to it
+            await db.execute(delete(TrackNeighbor).where(TrackNeighbor.neighbor_id == track_id))
+
+        embedding = await get_track_embedding(db, track_id)
+        if embedding is None:
+            continue
+        nearest = await nearest_tracks(db, embedding, k, exclude_track_id=track_id)
+        if not nearest:
+            continue
+
+        await db.execute(
+            pg_insert(TrackNeighbor).values([
+                {"track_id": track_id, "neighbor_id": track.id, "distance": dist}
+                for track, dist in nearest
+            ])
+        )
+        if merge:
+            await _merge_into_neighbor_lists(db, track_id, nearest, k)
+
+
+async def _merge_into_neighbor_lists(
+    db: AsyncSession, track_id: UUID, nearest: list[tuple[Track, float]], k: int
+) -> None:
+    """Insert `track_id` into its neighbors' cached lists and trim them to k."""
+    rows = values(
+        column("track_id", Uuid),
+        column("neighbor_id", Uuid),
+        column("distance", Float),
+        name="merged",
+    ).data([(track.id, track_id, dist) for track, dist in nearest])
+    has_list = select(TrackNeighbor.track_id).where(TrackNeighbor.track_id == rows.c.track_id).exists()
+
+    stmt = pg_insert(TrackNeighbor).from_select(
+        ["track_id", "neighbor_id", "distance"], select(rows).where(has_list)
+    )
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["track_id", "neighbor_id"],
+            set_={"distance": stmt.excluded.distance},
+        )
+    )
+
+    ranked = (
+        select(
+            TrackNeighbor.track_id,
+            TrackNeighbor.neighbor_id,
+            func.row_number().over(
+                partition_by=TrackNeighbor.track_id, order_by=TrackNeighbor.distance
+            ).label("rank"),
+        )
+        .where(TrackNeighbor.track_id.in_([track.id for track, _ in nearest]))
+        .subquery()
+    )
+    await db.execute(
+        delete(TrackNeighbor)
+        .where(TrackNeighbor.track_id == ranked.c.track_id)
+        .where(TrackNeighbor.neighbor_id == ranked.c.neighbor_id)
+        .where(ranked.c.rank > k)
+    )
+
+
+async def backfill_neighbor_cache() -> int:
+    """Compute neighbor lists for embedded ACTIVE tracks that have none.
+
+    Walks tracks in id order, one committed batch at a time. Returns the
+    number of tracks filled.
+    """
+    from app.db.session import async_session_maker
+
+    filled = 0
+    last_id: UUID | None = None
+    while True:
+        async with async_session_maker() as db:
+            query = (
+                select(Track.id)
+                .where(Track.status == TrackStatus.ACTIVE)
+                .where(
+                    select(TrackAnalysis.id)
+                    .where(TrackAnalysis.track_id == Track.id)
+                    .where(TrackAnalysis.embedding.isnot(None))
+                    .exists()
+                )
+                .where(~select(TrackNeighbor.track_id).where(TrackNeighbor.track_id == Track.id).exists())
+                .order_by(Track.id)
+                .limit(BACKFILL_BATCH_SIZE)
+            )
+            if last_id is not None:
+                query = query.where(Track.id > last_id)
+            track_ids = list((await db.execute(query)).scalars().all())
+            if not track_ids:
+                break
+
+            # Every list is being computed from the index, so skip merging
+            await refresh_neighbors(db, track_ids, merge=False)
+            await db.commit()
+            filled += len(track_ids)
+            last_id = track_ids[-1]
+
+    if filled:
+        logger.info(f"Backfilled similar-track cache for {filled} tracks")
+    return filled
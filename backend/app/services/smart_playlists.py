@@ -1,13 +1,22 @@
-"""Smart playlist service for rule-based auto-updating playlists."""
+"""Smart playlist service for rule-based auto-updating playlists.
+
+Membership is materialized in smart_playlist_tracks, and reads page from
+there. It is built from the whole library when a playlist is created or
+edited; after that only tracks changed since the last sync (Track.updated_at
+for scans and metadata edits, TrackFeatures.updated_at for new analysis) are
+re-evaluated. Playlists with within_days rules are rebuilt on a schedule, as
+tracks age out of the window without changing.
+"""
 
 from datetime import datetime, timedelta
 from typing import Any
 from uuid import UUID
 
-from sqlalchemy import Float, and_, cast, func, or_, select
+from sqlalchemy import Uuid, and_, delete, exists, func, literal, or_, select, union
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.models import SmartPlaylist, Track, TrackAnalysis
+from app.db.models import SmartPlaylist, SmartPlaylistTrack, Track, TrackFeatures
 
 # Fields that exist directly on the Track model
 TRACK_FIELDS = {
@@ -25,7 +34,7 @@ STRING_FIELDS = {"title", "artist", "album", "album_artist", "genre", "format",
 # Numeric fields
 NUMERIC_FIELDS = {"year", "track_number", "disc_number", "duration_seconds"}
 
-# Fields that exist in TrackAnalysis.features JSONB
+# Fields of the latest analysis, typed columns of TrackFeatures
 ANALYSIS_FIELDS = {
     "bpm", "key", "energy", "valence", "danceability",
     "acousticness", "instrumentalness", "speechiness",
@@ -42,6 +51,10 @@ OPERATORS = {
     "within_days",  # For date fields
 }
 
+# Re-check tracks changed this long before the last sync, for transactions
+# that committed late
+MEMBERSHIP_OVERLAP = timedelta(minutes=10)
+
 
 class SmartPlaylistService:
     """Service for managing and executing smart playlists."""
@@ -100,8 +113,9 @@ class SmartPlaylistService:
         await self.db.commit()
         await self.db.refresh(playlist)
 
-        # Refresh to update count
-        await self.refresh_playlist(playlist)
+        # Membership only depends on the rules
+        if "rules" in kwargs or "match_mode" in kwargs:
+            await self.refresh_playlist(playlist)
 
         return playlist
 
@@ -135,15 +149,24 @@ class SmartPlaylistService:
         limit: int | None = None,
         offset: int = 0,
     ) -> list[Track]:
-        """Get tracks matching the smart playlist rules."""
-        query = self._build_query(playlist)
+        """Get tracks matching the smart playlist rules (a page of its membership)."""
+        await self.sync_members(playlist)
+        query = select(Track).join(
+            SmartPlaylistTrack,
+            and_(
+                SmartPlaylistTrack.track_id == Track.id,
+                SmartPlaylistTrack.smart_playlist_id == playlist.id,
+            ),
+        )
+        if playlist.order_by in ANALYSIS_FIELDS:
+            query = query.outerjoin(TrackFeatures, Track.id == TrackFeatures.track_id)
 
-        # Apply ordering
+        # Apply ordering (track ID breaks ties, so pages don't overlap)
         order_column = self._get_order_column(playlist.order_by)
         if playlist.order_direction == "desc":
-            query = query.order_by(order_column.desc())
+            query = query.order_by(order_column.desc(), Track.id)
         else:
-            query = query.order_by(order_column.asc())
+            query = query.order_by(order_column.asc(), Track.id)
 
         # Apply limits
         effective_limit = limit
@@ -160,19 +183,71 @@ class SmartPlaylistService:
 
     async def get_track_count(self, playlist: SmartPlaylist) -> int:
         """Get the count of tracks matching the rules."""
-        query = self._build_query(playlist)
-        count_query = select(func.count()).select_from(query.subquery())
-        result = await self.db.execute(count_query)
-        return result.scalar() or 0
+        await self.sync_members(playlist)
+        return playlist.cached_track_count
 
     async def refresh_playlist(self, playlist: SmartPlaylist) -> int:
-        """Refresh the cached track count."""
-        count = await self.get_track_count(playlist)
-        playlist.cached_track_count = count
+        """Rebuild the membership from the whole library and cache the count."""
+        await self.sync_members(playlist, rebuild=True)
         playlist.last_refreshed_at = datetime.utcnow()
         await self.db.commit()
         await self.db.refresh(playlist)
-        return count
+        return playlist.cached_track_count
+
+    async def sync_members(
+        self,
+        playlist: SmartPlaylist,
+        rebuild: bool = False,
+        check_changes: bool = True,
+    ) -> None:
+        """Bring the materialized membership and cached count up to date.
+
+        The membership is rebuilt the first time (or with `rebuild`);
+        otherwise only tracks changed since the last sync, with
+        MEMBERSHIP_OVERLAP, are re-evaluated. With `check_changes`, nothing
+        is done unless a track changed in that same window. Commits.
+        """
+        last_synced = None if rebuild else playlist.members_synced_at
+        if last_synced is not None and check_changes and not await self._changed_since(
+            last_synced - MEMBERSHIP_OVERLAP
+        ):
+            return
+
+        # One sync per playlist at a time; the new watermark is on the clock
+        # the change timestamps use
+        await self.db.execute(
+            select(SmartPlaylist.id).where(SmartPlaylist.id == playlist.id).with_for_update()
+        )
+        synced_at = await self.db.scalar(select(func.localtimestamp()))
+
+        members = SmartPlaylistTrack.smart_playlist_id == playlist.id
+        matches = self._build_query(playlist, literal(playlist.id, Uuid), Track.id)
+        if last_synced is None:
+            await self.db.execute(delete(SmartPlaylistTrack).where(members))
+        else:
+            changed = _changed_tracks(last_synced - MEMBERSHIP_OVERLAP)
+            await self.db.execute(
+                delete(SmartPlaylistTrack).where(members, SmartPlaylistTrack.track_id.in_(changed))
+            )
+            matches = matches.where(Track.id.in_(changed))
+        await self.db.execute(
+            pg_insert(SmartPlaylistTrack)
+            .from_select(["smart_playlist_id", "track_id"], matches)
+            .on_conflict_do_nothing()
+        )
+
+        playlist.members_synced_at = synced_at
+        playlist.cached_track_count = await self.db.scalar(
+            select(func.count()).select_from(SmartPlaylistTrack).where(members)
+        ) or 0
+        await self.db.commit()
+
+    async def _changed_since(self, since: datetime) -> bool:
+        """Whether any track or its features changed since `since`."""
+        return bool(await self.db.scalar(select(or_(
+            exists().where(Track.updated_at >= since),
+            exists().where(TrackFeatures.updated_at >= since),
+        ))))
 
     def _validate_rules(self, rules: list[dict[str, Any]]) -> None:
         """Validate rule structure."""
@@ -208,41 +283,18 @@ class SmartPlaylistService:
             if operator not in ("is_empty", "is_not_empty") and "value" not in rule:
                 raise ValueError(f"Rule with operator '{operator}' requires 'value'")
 
-    def _build_query(self, playlist: SmartPlaylist) -> Any:
-        """Build SQLAlchemy query from playlist rules."""
+    def _build_query(self, playlist: SmartPlaylist, *columns: Any) -> Any:
+        """Build SQLAlchemy query from playlist rules (selecting `columns`, or Track)."""
         # Start with base query
-        # Join with latest analysis for feature queries
+        # Join with the latest analysis features for feature rules (only
+        # analyzed tracks match)
         needs_analysis = any(
             rule["field"] in ANALYSIS_FIELDS for rule in playlist.rules
         )
 
+        query = select(*columns) if columns else select(Track)
         if needs_analysis:
-            # Subquery to get latest analysis per track
-            latest_analysis = (
-                select(
-                    TrackAnalysis.track_id,
-                    func.max(TrackAnalysis.version).label("max_version"),
-                )
-                .group_by(TrackAnalysis.track_id)
-                .subquery()
-            )
-
-            query = (
-                select(Track)
-                .join(
-                    latest_analysis,
-                    Track.id == latest_analysis.c.track_id,
-                )
-                .join(
-                    TrackAnalysis,
-                    and_(
-                        Track.id == TrackAnalysis.track_id,
-                        TrackAnalysis.version == latest_analysis.c.max_version,
-                    ),
-                )
-            )
-        else:
-            query = select(Track)
+            query = query.join(TrackFeatures, Track.id == TrackFeatures.track_id)
 
         # Build conditions from rules
         conditions = []
@@ -270,8 +322,7 @@ class SmartPlaylistService:
         if field in TRACK_FIELDS:
             column = getattr(Track, field)
         elif field in ANALYSIS_FIELDS and has_analysis_join:
-            # Access JSONB field
-            column = cast(TrackAnalysis.features[field].astext, Float)
+            column = getattr(TrackFeatures, field)
         else:
             return None
 
@@ -340,11 +391,37 @@ class SmartPlaylistService:
         if order_by in TRACK_FIELDS:
             return getattr(Track, order_by)
         elif order_by in ANALYSIS_FIELDS:
-            return cast(TrackAnalysis.features[order_by].astext, Float)
+            return getattr(TrackFeatures, order_by)
         else:
             return Track.title  # Default
 
 
+def _changed_tracks(since: datetime) -> Any:
+    """IDs of tracks whose row or features changed since `since`."""
+    return union(
+        select(Track.id).where(Track.updated_at >= since),
+        select(TrackFeatures.track_id).where(TrackFeatures.updated_at >= since),
+    )
+
+
+async def refresh_smart_playlists(db: AsyncSession, time_based_only: bool = False) -> int:
+    """Sync the membership of every smart playlist with the library.
+
+    With `time_based_only`, rebuild just the playlists with within_days
+    rules, whose membership changes with time alone. Returns the number of
+    playlists synced.
+    """
+    query = select(SmartPlaylist)
+    if time_based_only:
+        query = query.where(SmartPlaylist.rules.contains([{"operator": "within_days"}]))
+    playlists = list((await db.scalars(query)).all())
+
+    service = SmartPlaylistService(db)
+    for playlist in playlists:
+        await service.sync_members(playlist, rebuild=time_based_only, check_changes=False)
+    return len(playlists)
+
+
 async def get_smart_playlist_service(db: AsyncSession) -> SmartPlaylistService:
     """Factory function for dependency injection."""
     return SmartPlaylistService(db)
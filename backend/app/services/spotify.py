@@ -22,6 +22,7 @@ from app.db.models import (
     Track,
 )
 from app.services.app_settings import get_app_settings_service
+from app.services.match_index import MatchQuery, get_match_index, load_matched_tracks
 
 logger = logging.getLogger(__name__)
 
@@ -416,99 +417,9 @@ class SpotifySyncService:
         3. Contains match (substring)
         4. Fuzzy matching with rapidfuzz (threshold 85%)
         """
-        from rapidfuzz import fuzz
-
-        # Extract info from Spotify track
-        isrc = spotify_track.get("external_ids", {}).get("isrc")
-        track_name = spotify_track.get("name", "").lower().strip()
-        artists = spotify_track.get("artists", [])
-        artist_name = artists[0]["name"].lower().strip() if artists else ""
-
-        # Normalize for matching - remove common variations
-        def normalize(s: str) -> str:
-            """Normalize string for matching."""
-            import re
-            # Remove featuring/feat variations
-            s = re.sub(r'\s*[\(\[](feat\.?|ft\.?|featuring)[^\)\]]*[\)\]]', '', s, flags=re.IGNORECASE)
-            # Remove remaster/remix annotations
-            s = re.sub(r'\s*[\(\[][^\)\]]*(?:remaster|remix|version|edit)[^\)\]]*[\)\]]', '', s, flags=re.IGNORECASE)
-            # Normalize apostrophes
-            s = s.replace("'", "'").replace("'", "'").replace("`", "'")
-            # Remove extra whitespace
-            s = ' '.join(s.split())
-            return s.strip()
-
-        normalized_track_name = normalize(track_name)
-        normalized_artist_name = normalize(artist_name)
-
-        # 1. Try ISRC match
-        if isrc:
-            result = await self.db.execute(
-                select(Track).where(Track.isrc == isrc)
-            )
-            match = result.scalar_one_or_none()
-            if match:
-                return match
-
-        # 2. Try exact artist + title match
-        if track_name and artist_name:
-            result = await self.db.execute(
-                select(Track).where(
-                    func.lower(Track.title) == track_name,
-                    func.lower(Track.artist) == artist_name,
-                ).limit(1)
-            )
-            match = result.scalars().first()
-            if match:
-                return match
-
-            # 3. Try partial match (title contains, artist contains)
-            result = await self.db.execute(
-                select(Track).where(
-                    func.lower(Track.title).contains(track_name),
-                    func.lower(Track.artist).contains(artist_name),
-                ).limit(1)
-            )
-            match = result.scalars().first()
-            if match:
-                return match
-
-        # 4. Fuzzy match with rapidfuzz
-        if normalized_track_name and normalized_artist_name:
-            # Get candidate tracks - limit to reasonable set for performance
-            result = await self.db.execute(
-                select(Track)
-                .where(Track.title.isnot(None), Track.artist.isnot(None))
-                .limit(5000)  # Safety limit
-            )
-            candidates = result.scalars().all()
-
-            best_match: Track | None = None
-            best_score: float = 0.0
-            threshold = 85  # Minimum combined score to accept
-
-            for track in candidates:
-                if not track.title or not track.artist:
-                    continue
-
-                local_title = normalize(track.title.lower())
-                local_artist = normalize(track.artist.lower())
-
-                # Calculate fuzzy scores
-                title_score = fuzz.ratio(normalized_track_name, local_title)
-                artist_score = fuzz.ratio(normalized_artist_name, local_artist)
-
-                # Combined score with weights (title matters more)
-                combined = (title_score * 0.6) + (artist_score * 0.4)
-
-                if combined >= threshold and combined > best_score:
-                    best_score = combined
-                    best_match = track
-
-            if best_match:
-                return best_match
-
-        return None
+        result = await get_match_index().match(self.db, MatchQuery.from_spotify(spotify_track))
+        [match] = await load_matched_tracks(self.db, [result])
+        return match
 
     def _extract_track_data(self, spotify_track: dict[str, Any]) -> dict[str, Any]:
         """Extract relevant data from Spotify track object."""
@@ -450,7 +450,7 @@ async def run_library_sync(
 
                 while True:
                     async with local_session_maker() as db:
-                        from app.db.models import TrackAnalysis
+                        from app.db.models import AnalysisJob, TrackAnalysis
 
                         # Count tracks with successful embeddings
                         embeddings_success_result = await db.execute(
@@ -512,8 +512,15 @@ async def run_library_sync(
                             f"Embedding progress stalled for {stall_threshold}s "
                             f"({pending_embeddings} still pending)"
                         )
-                        # If still no queueable tracks, exit gracefully
+                        # If still no queueable or queued tracks, exit gracefully
                         queued = await queue_tracks_for_embeddings(limit=200)
+                        if queued == 0:
+                            async with local_session_maker() as db:
+                                queued = await db.scalar(
+                                    select(func.count())
+                                    .select_from(AnalysisJob)
+                                    .where(AnalysisJob.phase.in_(["embedding", "full"]))
+                                ) or 0
                         if queued == 0 and pending_embeddings > 0:
                             logger.warning(
                                 f"Cannot queue more embeddings but {pending_embeddings} "
@@ -892,7 +899,7 @@ def run_track_features(track_id: str) -> dict[str, Any]:
                 features = extract_features(file_path)
                 features_source = "local"
                 computed_locally = True
-                gc.collect()
+            gc.collect()
 
             # Contribute features to community cache if computed locally
             if (
@@ -917,7 +924,7 @@ def run_track_features(track_id: str) -> dict[str, Any]:
             acoustid_metadata = None
             musicbrainz_recording_id = None
             if acoustid_fingerprint:
-                id_result = identify_track(file_path)
+                id_result = identify_track(file_path, fp_result)
                 if id_result.get("metadata"):
                     acoustid_metadata = id_result["metadata"]
                     musicbrainz_recording_id = acoustid_metadata.get("musicbrainz_recording_id")
@@ -1076,14 +1083,30 @@ def _record_embedding_failure(track_id: str, error_msg: str) -> None:
 def run_track_embedding(track_id: str) -> dict[str, Any]:
     """Extract CLAP embedding for a track - runs in subprocess via ProcessPoolExecutor.
 
+    Phase 2 of analysis for a single track. See run_embedding_batch.
+    """
+    return run_embedding_batch([track_id])[track_id]
+
+
+def run_embedding_batch(track_ids: list[str]) -> dict[str, dict[str, Any]]:
+    """Extract CLAP embeddings for a batch of tracks - runs in the embedding pool.
+
     Phase 2 of analysis: CLAP embedding for similarity search.
     This runs in a separate subprocess from feature extraction to reduce peak memory.
     The CLAP model uses ~2-3GB of memory, so isolating it prevents OOM kills.
 
+    Pool workers are long-lived, so the model is loaded once per worker and
+    stays warm across batches. Audio is decoded on CLAP_DECODE_THREADS threads,
+    inference runs CLAP_BATCH_SIZE clips per forward pass, and all embeddings
+    are written back in one commit.
+
     Community Cache:
     Before running expensive CLAP extraction, checks if embedding is available in
     the community cache (keyed by AcoustID fingerprint hash). If contribution is
     enabled and we compute locally, the embedding is shared with other users.
+
+    Returns:
+        Result dict per track ID
     """
     import asyncio
     import logging
@@ -1097,143 +1120,192 @@ def run_track_embedding(track_id: str) -> dict[str, Any]:
 
     from app.db.models import Track, TrackAnalysis
     from app.db.session import sync_session_maker
-    from app.services.analysis import AnalysisError, extract_embedding
+    from app.services.analysis import AnalysisError, extract_embeddings
     from app.services.app_settings import get_app_settings_service
     from app.services.community_cache import get_community_cache_service
+    from app.services.embedding_store import publish_embedding_updates
 
     log_memory("embedding_start")
 
+    results: dict[str, dict[str, Any]] = {}
     try:
         with sync_session_maker() as db:
-            result = db.execute(
-                select(Track).where(Track.id == UUID(track_id))
-            )
-            track = result.scalar_one_or_none()
-
-            if not track:
-                return {"error": f"Track not found: {track_id}", "permanent": True}
-
-            file_path = Path(track.file_path)
+            track_uuids = [UUID(track_id) for track_id in track_ids]
+            tracks = {
+                str(track.id): track
+                for track in db.execute(
+                    select(Track).where(Track.id.in_(track_uuids))
+                ).scalars()
+            }
 
-            if not file_path.exists():
-                return {"error": f"File not found: {track.file_path}", "permanent": True}
+            def load_analyses(ids: list[UUID]) -> dict[str, TrackAnalysis]:
+                """Latest analysis record per track."""
+                latest: dict[str, TrackAnalysis] = {}
+                for analysis in db.execute(
+                    select(TrackAnalysis)
+                    .where(TrackAnalysis.track_id.in_(ids))
+                    .order_by(TrackAnalysis.version.desc())
+                ).scalars():
+                    latest.setdefault(str(analysis.track_id), analysis)
+                return latest
 
-            logger.info(f"Extracting embedding: {track.title} by {track.artist}")
+            analyses = load_analyses(track_uuids)
 
             # Get app settings for community cache
             app_settings = get_app_settings_service().get()
-            embedding_source = "local"
-            embedding: list[float] | None = None
-            acoustid_fingerprint: str | None = None
-
-            # Get the analysis record to get AcoustID fingerprint
-            analysis_result = db.execute(
-                select(TrackAnalysis)
-                .where(TrackAnalysis.track_id == track.id)
-                .order_by(TrackAnalysis.version.desc())
-            )
-            existing_analysis = analysis_result.scalar_one_or_none()
-
-            if existing_analysis and existing_analysis.acoustid:
-                acoustid_fingerprint = existing_analysis.acoustid
-
-            # Try community cache first if enabled
-            if app_settings.community_cache_enabled and acoustid_fingerprint:
-                try:
-                    cache_service = get_community_cache_service(
-                        cache_url=app_settings.community_cache_url
-                    )
-                    cached = asyncio.run(
-                        cache_service.lookup(acoustid_fingerprint)
-                    )
-                    if cached:
-                        embedding = cached.embedding
-                        embedding_source = "community_cache"
-                        logger.info(
-                            f"Community cache hit for {track.title} "
-                            f"(contributed by {cached.contributor_count} users)"
-                        )
-                except Exception as e:
-                    logger.warning(f"Community cache lookup failed: {e}")
+            cache_service = None
+            if app_settings.community_cache_enabled or app_settings.community_cache_contribute:
+                cache_service = get_community_cache_service(
+                    cache_url=app_settings.community_cache_url
+                )
 
-            # Fall back to local CLAP extraction if no cache hit
-            if embedding is None:
-                embedding = extract_embedding(file_path)
-                embedding_source = "local"
-                gc.collect()
+            embeddings: dict[str, tuple[list[float], str]] = {}
+            to_compute: list[str] = []
+            for track_id in track_ids:
+                track = tracks.get(track_id)
+                if not track:
+                    results[track_id] = {"error": f"Track not found: {track_id}", "permanent": True}
+                    continue
+                if not Path(track.file_path).exists():
+                    results[track_id] = {"error": f"File not found: {track.file_path}", "permanent": True}
+                    continue
 
-                # Contribute to community cache if enabled and we have a fingerprint
-                if (
-                    embedding is not None
-                    and app_settings.community_cache_contribute
-                    and acoustid_fingerprint
-                ):
+                # Try community cache first if enabled
+                analysis = analyses.get(track_id)
+                acoustid_fingerprint = analysis.acoustid if analysis else None
+                if cache_service and app_settings.community_cache_enabled and acoustid_fingerprint:
                     try:
-                        cache_service = get_community_cache_service(
-                            cache_url=app_settings.community_cache_url
-                        )
-                        asyncio.run(
-                            cache_service.contribute(acoustid_fingerprint, embedding)
-                        )
+                        cached = asyncio.run(cache_service.lookup(acoustid_fingerprint))
+                        if cached:
+                            embeddings[track_id] = (cached.embedding, "community_cache")
+                            logger.info(
+                                f"Community cache hit for {track.title} "
+                                f"(contributed by {cached.contributor_count} users)"
+                            )
+                            continue
                     except Exception as e:
-                        logger.debug(f"Community cache contribution failed: {e}")
+                        logger.warning(f"Community cache lookup failed: {e}")
+                to_compute.append(track_id)
+
+            # Fall back to local CLAP extraction for cache misses
+            failures: dict[str, str] = {}
+            if to_compute:
+                logger.info(f"Extracting embeddings for {len(to_compute)} tracks")
+                computed = extract_embeddings(
+                    [Path(tracks[track_id].file_path) for track_id in to_compute],
+                    batch_size=settings.clap_batch_size,
+                    decode_threads=settings.clap_decode_threads,
+                    durations=[tracks[track_id].duration_seconds for track_id in to_compute],
+                )
+                gc.collect()
+                for track_id, embedding in zip(to_compute, computed or [], strict=False):
+                    if isinstance(embedding, AnalysisError):
+                        failures[track_id] = str(embedding)[:500]
+                        continue
+                    embeddings[track_id] = (embedding, "local")
+
+                    # Contribute to community cache if enabled and we have a fingerprint
+                    analysis = analyses.get(track_id)
+                    if (
+                        cache_service
+                        and app_settings.community_cache_contribute
+                        and analysis
+                        and analysis.acoustid
+                    ):
+                        try:
+                            asyncio.run(cache_service.contribute(analysis.acoustid, embedding))
+                        except Exception as e:
+                            logger.debug(f"Community cache contribution failed: {e}")
 
             log_memory("after_embedding")
 
-            if embedding is None:
-                # Embeddings disabled or failed - not an error, just skip
-                logger.info(f"No embedding generated for {track.title} (CLAP disabled or failed)")
-                return {
-                    "track_id": track_id,
-                    "status": "success",
-                    "phase": "embedding",
-                    "embedding_generated": False,
-                }
+            def write_back(analyses: dict[str, TrackAnalysis]) -> dict[str, dict[str, Any]]:
+                """Set embeddings and failures on the analysis records; returns the results."""
+                written = dict(prior)
+                for track_id in track_ids:
+                    if track_id in written:
+                        continue
+                    analysis = analyses.get(track_id)
+                    if track_id in failures:
+                        # Record embedding failure in TrackAnalysis so sync doesn't get stuck
+                        logger.error(f"Embedding extraction error for {track_id}: {failures[track_id]}")
+                        if analysis:
+                            analysis.embedding_error = failures[track_id]
+                            analysis.embedding_failed_at = datetime.utcnow()
+                        written[track_id] = {
+                            "error": failures[track_id], "status": "partial", "phase": "embedding"
+                        }
+                    elif track_id not in embeddings:
+                        # Embeddings disabled - not an error, just skip
+                        written[track_id] = {
+                            "track_id": track_id,
+                            "status": "success",
+                            "phase": "embedding",
+                            "embedding_generated": False,
+                        }
+                    elif analysis is None:
+                        # No analysis record yet - this shouldn't happen if phase 1 ran first
+                        logger.warning(f"No analysis record found for {track_id}, skipping embedding save")
+                        written[track_id] = {
+                            "track_id": track_id,
+                            "status": "skipped",
+                            "reason": "no_analysis_record",
+                            "embedding_generated": True,
+                        }
+                    else:
+                        embedding, embedding_source = embeddings[track_id]
+                        analysis.embedding = embedding
+                        analysis.embedding_source = embedding_source
+                        analysis.version = ANALYSIS_VERSION  # Ensure version is current
+                        written[track_id] = {
+                            "track_id": track_id,
+                            "status": "success",
+                            "phase": "embedding",
+                            "embedding_generated": True,
+                            "embedding_source": embedding_source,
+                        }
+                return written
 
-            # Update the existing analysis record with embedding
-            # We already have existing_analysis from earlier fingerprint lookup
-            if existing_analysis:
-                existing_analysis.embedding = embedding
-                existing_analysis.embedding_source = embedding_source
-                existing_analysis.version = ANALYSIS_VERSION  # Ensure version is current
+            # Write everything back in one commit
+            prior = dict(results)  # Tracks settled before the write (not found, missing file)
+            results = write_back(analyses)
+            try:
                 db.commit()
-                logger.info(f"Embedding saved for {track.title} (source={embedding_source})")
-            else:
-                # No analysis record yet - this shouldn't happen if phase 1 ran first
-                logger.warning(f"No analysis record found for {track_id}, skipping embedding save")
-                return {
-                    "track_id": track_id,
-                    "status": "skipped",
-                    "reason": "no_analysis_record",
-                    "embedding_generated": True,
+            except StaleDataError:
+                # Tracks were deleted mid-batch: save the embeddings of the rest
+                db.rollback()
+                remaining = {
+                    str(track_id)
+                    for track_id in db.scalars(select(Track.id).where(Track.id.in_(track_uuids)))
                 }
+                deleted = [track_id for track_id in track_ids if track_id not in remaining]
+                logger.info(f"{len(deleted)} tracks were deleted during embedding, saving the rest")
+                for track_id in deleted:
+                    prior[track_id] = {"status": "skipped", "reason": "track_deleted"}
+                results = write_back(load_analyses([UUID(track_id) for track_id in remaining]))
+                db.commit()
 
-            gc.collect()
-            log_memory("embedding_end")
+            saved = [
+                track_id for track_id, r in results.items()
+                if r.get("embedding_generated") and r.get("status") == "success"
+            ]
+            logger.info(f"Embeddings saved for {len(saved)}/{len(track_ids)} tracks")
+            publish_embedding_updates(saved)
 
-            return {
-                "track_id": track_id,
-                "status": "success",
-                "phase": "embedding",
-                "embedding_generated": True,
-                "embedding_source": embedding_source,
-            }
+        gc.collect()
+        log_memory("embedding_end")
+        return results
 
-    except AnalysisError as e:
-        error_msg = str(e)[:500]
-        logger.error(f"Embedding extraction error for {track_id}: {error_msg}")
-        # Record embedding failure in TrackAnalysis so sync doesn't get stuck
-        _record_embedding_failure(track_id, error_msg)
-        return {"error": error_msg, "status": "partial", "phase": "embedding"}
-    except StaleDataError:
-        logger.info(f"Track {track_id} was deleted during embedding, skipping")
-        return {"status": "skipped", "reason": "track_deleted"}
     except Exception as e:
         error_msg = str(e)[:500]
-        logger.error(f"Error extracting embedding for {track_id}: {error_msg}")
-        # Record embedding failure in TrackAnalysis so sync doesn't get stuck
-        _record_embedding_failure(track_id, error_msg)
-        return {"error": error_msg, "status": "partial", "phase": "embedding"}
+        logger.error(f"Error extracting embeddings for {len(track_ids)} tracks: {error_msg}")
+        for track_id in track_ids:
+            if results.get(track_id, {}).get("permanent"):
+                continue
+            # Nothing was saved - record the failure so sync doesn't get stuck
+            _record_embedding_failure(track_id, error_msg)
+            results[track_id] = {"error": error_msg, "status": "partial", "phase": "embedding"}
+        return results
 
 
 def run_track_analysis(track_id: str) -> dict[str, Any]:
@@ -1263,12 +1335,14 @@ async def queue_tracks_for_features(limit: int = 500) -> int:
     """Queue tracks that need feature extraction (Phase 1).
 
     This includes tracks that haven't been analyzed or have old analysis version.
+    Tracks already in the analysis queue are skipped.
     Returns the number of tracks queued.
     """
     from sqlalchemy import and_, or_, select
 
     from app.db.models import Track
     from app.db.session import async_session_maker
+    from app.services.analysis_queue import enqueue_analysis, not_queued
     from app.services.background import get_background_manager
 
     queued = 0
@@ -1301,17 +1375,19 @@ async def queue_tracks_for_features(limit: int = 500) -> int:
                         Track.analysis_failed_at.is_not(None),
                         Track.analysis_failed_at < failure_cutoff,
                     ),
-                )
+                ),
+                not_queued(Track.id, ["features", "full"]),
             )
             .limit(limit)
         )
         track_ids = [str(row[0]) for row in result.fetchall()]
 
-    if track_ids:
-        manager = get_background_manager()
-        for track_id in track_ids:
-            await manager.run_analysis(track_id, phase="features")
-            queued += 1
+        if track_ids:
+            queued = await enqueue_analysis(db, track_ids, phase="features")
+            await db.commit()
+
+    if queued:
+        get_background_manager().wake_analysis_queue()
 
     return queued
 
@@ -1320,12 +1396,14 @@ async def queue_tracks_for_embeddings(limit: int = 500) -> int:
     """Queue tracks that need embedding generation (Phase 2).
 
     This includes tracks with features extracted but no embedding.
+    Tracks already in the analysis queue are skipped.
     Returns the number of tracks queued.
     """
     from sqlalchemy import and_, or_, select
 
     from app.db.models import Track, TrackAnalysis
     from app.db.session import async_session_maker
+    from app.services.analysis_queue import enqueue_analysis, not_queued
     from app.services.app_settings import get_app_settings_service
     from app.services.background import get_background_manager
 
@@ -1352,17 +1430,19 @@ async def queue_tracks_for_embeddings(limit: int = 500) -> int:
                         TrackAnalysis.embedding_failed_at.is_(None),
                         TrackAnalysis.embedding_failed_at < failure_cutoff,
                     ),
+                    not_queued(Track.id, ["embedding", "full"]),
                 )
             )
             .limit(limit)
         )
         track_ids = [str(row[0]) for row in result.fetchall()]
 
-    if track_ids:
-        manager = get_background_manager()
-        for track_id in track_ids:
-            await manager.run_analysis(track_id, phase="embedding")
-            queued += 1
+        if track_ids:
+            queued = await enqueue_analysis(db, track_ids, phase="embedding")
+            await db.commit()
+
+    if queued:
+        get_background_manager().wake_analysis_queue()
 
     return queued
 
@@ -1373,13 +1453,15 @@ async def queue_unanalyzed_tracks(limit: int = 500) -> int:
     DEPRECATED: Use queue_tracks_for_features() and queue_tracks_for_embeddings()
     for better memory efficiency and progress tracking.
 
-    This function is kept for backwards compatibility and queues for full analysis.
+    This function is kept for backwards compatibility and queues for full analysis
+    at user priority (it backs the manual "analyze now" action).
     """
     from sqlalchemy import and_, or_, select
 
     from app.db.models import Track, TrackAnalysis
     from app.db.session import async_session_maker
     from app.services.analysis import get_analysis_capabilities
+    from app.services.analysis_queue import PRIORITY_USER, enqueue_analysis
     from app.services.background import get_background_manager
 
     caps = get_analysis_capabilities()
@@ -1434,25 +1516,23 @@ async def queue_unanalyzed_tracks(limit: int = 500) -> int:
                     f"Found {len(missing_embedding_ids)} tracks with missing embeddings "
                     "(embeddings now enabled)"
                 )
-                # Queue embedding-only tasks instead of resetting to re-analyze everything
+                # Queue embedding-only jobs instead of resetting to re-analyze everything
                 # This preserves existing features and just adds embeddings
-                bg = get_background_manager()
-                for track_id in missing_embedding_ids:
-                    await bg.run_analysis(track_id, phase="embedding")
-                    queued += 1
+                queued += await enqueue_analysis(
+                    db, missing_embedding_ids, phase="embedding", priority=PRIORITY_USER
+                )
                 # Don't add to track_ids - we already queued them for embedding-only
 
-        if not track_ids:
-            logger.info("No tracks need analysis")
-            return queued
+        if track_ids:
+            queued += await enqueue_analysis(db, track_ids, phase="full", priority=PRIORITY_USER)
+        await db.commit()
 
-        # Queue each track for analysis
-        bg = get_background_manager()
-        for track_id in track_ids:
-            await bg.run_analysis(track_id)
-            queued += 1
+    if not queued:
+        logger.info("No tracks need analysis")
+        return queued
 
-        logger.info(f"Queued {queued} tracks for analysis")
+    get_background_manager().wake_analysis_queue()
+    logger.info(f"Queued {queued} tracks for analysis")
 
     return queued
 
@@ -1608,6 +1688,7 @@ async def run_spotify_sync(
     from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
     from app.db.models import ProfileFavorite, SpotifyFavorite, SpotifyProfile
+    from app.services.match_index import MatchQuery, get_match_index
     from app.services.spotify import SpotifyService
 
     progress = SpotifySyncProgressReporter(profile_id)
@@ -1678,8 +1759,15 @@ async def run_spotify_sync(
             added_track_ids: set[str] = set()
             matched_local_track_ids: list[UUID] = []
 
+            # Match everything against the library in one pass
+            progress.set_matching(processed=0, total=len(all_tracks), new=0, matched=0, unmatched=0)
+            matches = await get_match_index().match_many(
+                db,
+                [MatchQuery.from_spotify(item.get("track") or {}) for item in all_tracks],
+            )
+
             # Process tracks
-            for i, item in enumerate(all_tracks):
+            for i, (item, local_match) in enumerate(zip(all_tracks, matches, strict=True)):
                 spotify_track = item.get("track")
                 if not spotify_track:
                     continue
@@ -1703,9 +1791,6 @@ async def run_spotify_sync(
                         current=f"{artist_name} - {track_name}",
                     )
 
-                # Try to match to local library
-                local_match = await _match_to_local(db, spotify_track)
-
                 parsed_added_at = None
                 if added_at:
                     parsed_dt = dt.fromisoformat(added_at.replace("Z", "+00:00"))
@@ -1714,7 +1799,7 @@ async def run_spotify_sync(
                 favorite = SpotifyFavorite(
                     profile_id=profile_uuid,
                     spotify_track_id=track_id,
-                    matched_track_id=local_match.id if local_match else None,
+                    matched_track_id=local_match.track_id if local_match else None,
                     track_data=_extract_track_data(spotify_track),
                     added_at=parsed_added_at,
                 )
@@ -1725,7 +1810,7 @@ async def run_spotify_sync(
                 if local_match:
                     stats["matched"] += 1
                     if favorite_matched:
-                        matched_local_track_ids.append(local_match.id)
+                        matched_local_track_ids.append(local_match.track_id)
                 else:
                     stats["unmatched"] += 1
 
@@ -1779,37 +1864,6 @@ async def run_spotify_sync(
         await local_engine.dispose()
 
 
-async def _match_to_local(db, spotify_track: dict[str, Any]):
-    """Try to match a Spotify track to local library."""
-    from sqlalchemy import func, select
-
-    from app.db.models import Track
-
-    isrc = spotify_track.get("external_ids", {}).get("isrc")
-    track_name = spotify_track.get("name", "").lower().strip()
-    artists = spotify_track.get("artists", [])
-    artist_name = artists[0]["name"].lower().strip() if artists else ""
-
-    if isrc:
-        result = await db.execute(select(Track).where(Track.isrc == isrc))
-        match = result.scalar_one_or_none()
-        if match:
-            return match
-
-    if track_name and artist_name:
-        result = await db.execute(
-            select(Track).where(
-                func.lower(Track.title) == track_name,
-                func.lower(Track.artist) == artist_name,
-            ).limit(1)
-        )
-        match = result.scalars().first()
-        if match:
-            return match
-
-    return None
-
-
 def _extract_track_data(spotify_track: dict[str, Any]) -> dict[str, Any]:
     """Extract relevant data from Spotify track object."""
     artists = spotify_track.get("artists", [])
@@ -2317,7 +2371,7 @@ async def run_track_enrichment(track_id: str) -> dict[str, Any]:
     from sqlalchemy import select
     from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
-    from app.db.models import Track
+    from app.db.models import Track, TrackAnalysis
     from app.services.analysis import lookup_acoustid
     from app.services.app_settings import get_app_settings_service
     from app.services.artwork import compute_album_hash, save_artwork
@@ -2365,10 +2419,22 @@ async def run_track_enrichment(track_id: str) -> dict[str, Any]:
 
             logger.info(f"Enriching metadata for: {track.artist} - {track.title}")
 
-            # Step 1: Lookup via AcoustID
+            # Step 1: Lookup via AcoustID, reusing the fingerprint from analysis
+            # so the file isn't decoded again
             musicbrainz_id = None
+            stored_fingerprint = (
+                await db.execute(
+                    select(TrackAnalysis.acoustid)
+                    .where(TrackAnalysis.track_id == track.id)
+                    .order_by(TrackAnalysis.version.desc())
+                    .limit(1)
+                )
+            ).scalar_one_or_none()
+            fingerprint = None
+            if stored_fingerprint and track.duration_seconds:
+                fingerprint = (int(track.duration_seconds), stored_fingerprint)
             try:
-                acoustid_result = lookup_acoustid(file_path)
+                acoustid_result = lookup_acoustid(file_path, fingerprint)
                 if acoustid_result:
                     musicbrainz_id = acoustid_result.get("musicbrainz_recording_id")
             except Exception as e:
@@ -0,0 +1,214 @@
+"""On-the-fly transcoding for /tracks/{id}/stream?format=...
+
+ffmpeg's output is piped to the client as it is produced, so playback starts
+immediately. A stream that runs from the start of the track to the end is
+also written to an on-disk cache; later requests for the same track, format
+and bitrate are served from the finished file (with range support). The
+cache is trimmed least-recently-used first to a size cap.
+
+Seeking (`start` seconds) transcodes from that point with an input seek and
+isn't cached.
+"""
+
+import asyncio
+import contextlib
+import hashlib
+import logging
+import os
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from pathlib import Path
+from uuid import UUID, uuid4
+
+from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse
+
+from app.config import settings
+from app.services.audio_stream import stream_file
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+
+
+@dataclass(frozen=True)
+class TranscodeFormat:
+    """ffmpeg encoder settings for one output format."""
+
+    codec: str
+    container: str
+    extension: str
+    media_type: str
+    default_bitrate: int  # kbps
+
+
+TRANSCODE_FORMATS = {
+    "opus": TranscodeFormat("libopus", "ogg", ".opus", "audio/ogg", 128),
+    "aac": TranscodeFormat("aac", "adts", ".aac", "audio/aac", 192),
+    "mp3": TranscodeFormat("libmp3lame", "mp3", ".mp3", "audio/mpeg", 192),
+}
+
+
+def ffmpeg_command(source: Path, fmt: TranscodeFormat, bitrate: int, start: float = 0.0) -> list[str]:
+    cmd = ["ffmpeg", "-nostdin", "-v", "error"]
+    if start > 0:
+        cmd += ["-ss", f"{start:.3f}"]
+    cmd += [
+        "-i", str(source),
+        "-map", "0:a:0", "-vn", "-map_metadata", "-1",
+        "-c:a", fmt.codec, "-b:a", f"{bitrate}k",
+        "-f", fmt.container, "pipe:1",
+    ]
+    return cmd
+
+
+class TranscodeCache:
+    """Finished transcodes on disk, trimmed by last use to a size cap."""
+
+    def __init__(self, path: Path | None = None, max_bytes: int | None = None):
+        self.path = path or settings.transcode_cache_path
+        self.max_bytes = settings.transcode_cache_max_mb * 1024 * 1024 if max_bytes is None else max_bytes
+        self._pending: set[Path] = set()  # Pre-transcodes in progress
+
+    def entry(self, track_id: UUID, source: Path, fmt: str, bitrate: int) -> Path:
+        """Cache file for a transcode; the source's size and mtime are in the key,
+        so an edited file never matches an old transcode. Blocking (stats source)."""
+        stat = source.stat()
+        key = hashlib.sha1(
+            f"{track_id}:{stat.st_size}:{stat.st_mtime_ns}:{fmt}:{bitrate}".encode()
+        ).hexdigest()
+        return self.path / key[:2] / f"{key}{TRANSCODE_FORMATS[fmt].extension}"
+
+    def lookup(self, entry: Path) -> bool:
+        """Whether a finished transcode exists, marking it recently used."""
+        try:
+            os.utime(entry)
+            return True
+        except OSError:
+            return False
+
+    def temp_path(self, entry: Path) -> Path:
+        """A unique in-progress file next to `entry` (blocking; creates the directory)."""
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        return entry.with_name(f".{entry.name}.{uuid4().hex}")
+
+    def commit(self, temp: Path, entry: Path) -> None:
+        """Publish a finished transcode and trim the cache (blocking)."""
+        temp.replace(entry)
+        self.trim()
+
+    def trim(self) -> None:
+        """Delete least recently used transcodes until the cache fits."""
+        files = []
+        total = 0
+        for file in self.path.rglob("*"):
+            if not file.is_file() or file.name.startswith("."):
+                continue
+            try:
+                stat = file.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, file))
+            total += stat.st_size
+        for _, size, file in sorted(files):
+            if total <= self.max_bytes:
+                break
+            file.unlink(missing_ok=True)
+            total -= size
+
+    async def pretranscode(self, track_id: UUID, source: Path, fmt: str, bitrate: int) -> None:
+        """Transcode a whole track into the cache ahead of playback."""
+        entry = await asyncio.to_thread(self.entry, track_id, source, fmt, bitrate)
+        if entry in self._pending or await asyncio.to_thread(self.lookup, entry):
+            return
+        self._pending.add(entry)
+        temp: Path | None = None
+        try:
+            temp = await asyncio.to_thread(self.temp_path, entry)
+            with temp.open("wb") as out:
+                process = await asyncio.create_subprocess_exec(
+                    *ffmpeg_command(source, TRANSCODE_FORMATS[fmt], bitrate),
+                    stdout=out,
+                    stderr=asyncio.subprocess.PIPE,
+                )
+                _, stderr = await process.communicate()
+            if process.returncode != 0:
+                logger.warning(f"Pre-transcoding {source} failed: {stderr.decode(errors='replace').strip()}")
+                return
+            await asyncio.to_thread(self.commit, temp, entry)
+        finally:
+            self._pending.discard(entry)
+            if temp is not None:
+                temp.unlink(missing_ok=True)
+
+
+async def _pipe_transcode(
+    cache: TranscodeCache, source: Path, fmt: str, bitrate: int, start: float, entry: Path | None
+) -> AsyncIterator[bytes]:
+    """Yield ffmpeg's output as it's produced, saving it to the cache if `entry` is set."""
+    temp = await asyncio.to_thread(cache.temp_path, entry) if entry else None
+    out = None
+    process = None
+    try:
+        out = temp.open("wb") if temp else None
+        process = await asyncio.create_subprocess_exec(
+            *ffmpeg_command(source, TRANSCODE_FORMATS[fmt], bitrate, start),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        assert process.stdout is not None
+        while chunk := await process.stdout.read(CHUNK_SIZE):
+            if out is not None:
+                await asyncio.to_thread(out.write, chunk)
+            yield chunk
+        await process.wait()
+        if out is not None and temp is not None and entry is not None and process.returncode == 0:
+            out.close()
+            await asyncio.to_thread(cache.commit, temp, entry)
+    finally:
+        if process is not None and process.returncode is None:  # Client went away mid-stream
+            with contextlib.suppress(ProcessLookupError):
+                process.kill()
+            await process.wait()
+        if out is not None:
+            out.close()
+        if temp is not None:
+            temp.unlink(missing_ok=True)
+
+
+async def transcode_response(
+    request: Request,
+    track_id: UUID,
+    source: Path,
+    fmt: str,
+    bitrate: int | None = None,
+    start: float = 0.0,
+) -> Response:
+    """Serve a track transcoded to `fmt`, from the cache when possible.
+
+    Raises FileNotFoundError (or another OSError) if the source is missing.
+    """
+    cache = get_transcode_cache()
+    bitrate = bitrate or TRANSCODE_FORMATS[fmt].default_bitrate
+    media_type = TRANSCODE_FORMATS[fmt].media_type
+    entry = await asyncio.to_thread(cache.entry, track_id, source, fmt, bitrate)
+
+    if start <= 0 and await asyncio.to_thread(cache.lookup, entry):
+        return await stream_file(request, entry, media_type)
+
+    return StreamingResponse(
+        _pipe_transcode(cache, source, fmt, bitrate, start, entry if start <= 0 else None),
+        media_type=media_type,
+        headers={"Accept-Ranges": "none", "Cache-Control": "no-store"},
+    )
+
+
+_transcode_cache: TranscodeCache | None = None
+
+
+def get_transcode_cache() -> TranscodeCache:
+    """Get the singleton TranscodeCache instance."""
+    global _transcode_cache
+    if _transcode_cache is None:
+        _transcode_cache = TranscodeCache()
+    return _transcode_cache
@@ -0,0 +1,31 @@
+"""Add file_size and file_inode to tracks for the scanner's stat fast path.
+
+Rescans compare size + mtime (+ inode) against these columns and only
+re-hash files whose stat signature changed.
+
+Revision ID: 20261016_000001_track_stat_signature
+Revises: 20241231_000000_baseline
+Create Date: 2026-10-16 00:00:01
+"""
+from collections.abc import Sequence
+
+from alembic import op
+from sqlalchemy import text
+
+# revision identifiers, used by Alembic.
+revision: str = "20261016_000001_track_stat_signature"
+down_revision: str | None = "20241231_000000_baseline"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Add stat signature columns (no-op on fresh databases created by baseline)."""
+    op.execute(text("ALTER TABLE tracks ADD COLUMN IF NOT EXISTS file_size BIGINT"))
+    op.execute(text("ALTER TABLE tracks ADD COLUMN IF NOT EXISTS file_inode BIGINT"))
+
+
+def downgrade() -> None:
+    """Drop stat signature columns."""
+    op.execute(text("ALTER TABLE tracks DROP COLUMN IF EXISTS file_inode"))
+    op.execute(text("ALTER TABLE tracks DROP COLUMN IF EXISTS file_size"))
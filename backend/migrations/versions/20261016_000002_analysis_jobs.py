@@ -0,0 +1,39 @@
+"""Add the analysis_jobs table backing the durable analysis queue.
+
+Revision ID: 20261016_000002_analysis_jobs
+Revises: 20261016_000001_track_stat_signature
+Create Date: 2026-10-16 00:00:02
+"""
+from collections.abc import Sequence
+
+from alembic import op
+from sqlalchemy import text
+
+# revision identifiers, used by Alembic.
+revision: str = "20261016_000002_analysis_jobs"
+down_revision: str | None = "20261016_000001_track_stat_signature"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Create analysis_jobs (no-op on fresh databases created by baseline)."""
+    op.execute(text("""
+        CREATE TABLE IF NOT EXISTS analysis_jobs (
+            track_id UUID NOT NULL REFERENCES tracks(id) ON DELETE CASCADE,
+            phase VARCHAR(20) NOT NULL,
+            priority INTEGER NOT NULL,
+            attempts INTEGER NOT NULL,
+            not_before TIMESTAMP WITHOUT TIME ZONE DEFAULT now() NOT NULL,
+            last_error VARCHAR(500),
+            claimed_by VARCHAR(100),
+            claimed_at TIMESTAMP WITHOUT TIME ZONE,
+            created_at TIMESTAMP WITHOUT TIME ZONE DEFAULT now() NOT NULL,
+            PRIMARY KEY (track_id, phase)
+        )
+    """))
+
+
+def downgrade() -> None:
+    """Drop analysis_jobs."""
+    op.execute(text("DROP TABLE IF EXISTS analysis_jobs"))
@@ -0,0 +1,45 @@
+"""Add the track_neighbors table (materialized similar-track cache).
+
+The HNSW index on track_analysis.embedding is not created here: building it
+over a large library takes minutes, so the app builds it concurrently in the
+background (see app/services/similarity.py).
+
+Revision ID: 20261016_000003_track_neighbors
+Revises: 20261016_000002_analysis_jobs
+Create Date: 2026-10-16 00:00:03
+"""
+from collections.abc import Sequence
+
+from alembic import op
+from sqlalchemy import text
+
+# revision identifiers, used by Alembic.
+revision: str = "20261016_000003_track_neighbors"
+down_revision: str | None = "20261016_000002_analysis_jobs"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Create track_neighbors (no-op on fresh databases created by baseline)."""
+    op.execute(text("""
+        CREATE TABLE IF NOT EXISTS track_neighbors (
+            track_id UUID NOT NULL REFERENCES tracks(id) ON DELETE CASCADE,
+            neighbor_id UUID NOT NULL REFERENCES tracks(id) ON DELETE CASCADE,
+            distance DOUBLE PRECISION NOT NULL,
+            PRIMARY KEY (track_id, neighbor_id)
+        )
+    """))
+    op.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_track_neighbors_track_distance "
+        "ON track_neighbors (track_id, distance)"
+    ))
+    op.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_track_neighbors_neighbor_id "
+        "ON track_neighbors (neighbor_id)"
+    ))
+
+
+def downgrade() -> None:
+    """Drop track_neighbors."""
+    op.execute(text("DROP TABLE IF EXISTS track_neighbors"))
@@ -0,0 +1,250 @@
+"""Add artist/album centroid tables maintained by triggers.
+
+Each centroid is a running sum of the latest CLAP embedding of every active
+track in the group, plus a count. Triggers on tracks (artist, album, status,
+delete) and track_analysis (embedding/version changes) subtract a track's old
+contribution and add its new one, so the music maps read one row per artist
+or album instead of every track.
+
+Revision ID: 20261016_000004_centroids
+Revises: 20261016_000003_track_neighbors
+Create Date: 2026-10-16 00:00:04
+"""
+from collections.abc import Sequence
+
+from alembic import op
+from sqlalchemy import text
+
+# revision identifiers, used by Alembic.
+revision: str = "20261016_000004_centroids"
+down_revision: str | None = "20261016_000003_track_neighbors"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Create the centroid tables, their triggers, and fill them."""
+    op.execute(text("""
+        CREATE TABLE IF NOT EXISTS artist_centroids (
+            artist VARCHAR(500) NOT NULL PRIMARY KEY,
+            embedding_sum VECTOR(512) NOT NULL,
+            track_count INTEGER NOT NULL,
+            first_track_id UUID,
+            representative_track_id UUID
+        )
+    """))
+    op.execute(text("""
+        CREATE TABLE IF NOT EXISTS album_centroids (
+            artist VARCHAR(500) NOT NULL,
+            album VARCHAR(500) NOT NULL,
+            embedding_sum VECTOR(512) NOT NULL,
+            track_count INTEGER NOT NULL,
+            first_track_id UUID,
+            representative_track_id UUID,
+            PRIMARY KEY (artist, album)
+        )
+    """))
+
+    # A track's embedding is the one on its latest analysis row
+    op.execute(text("""
+        CREATE OR REPLACE FUNCTION track_current_embedding(p_track uuid) RETURNS vector AS $$
+            SELECT embedding FROM track_analysis
+            WHERE track_id = p_track ORDER BY version DESC LIMIT 1
+        $$ LANGUAGE sql STABLE
+    """))
+
+    # Add (p_sign = 1) or remove (p_sign = -1) one track's embedding
+    op.execute(text("""
+        CREATE OR REPLACE FUNCTION centroid_apply(
+            p_artist text, p_album text, p_track uuid, p_embedding vector, p_sign integer
+        ) RETURNS void AS $$
+        DECLARE
+            v_artist text := nullif(btrim(coalesce(p_artist, '')), '');
+            v_album text := nullif(btrim(coalesce(p_album, '')), '');
+            v_album_artist text := coalesce(v_artist, 'Unknown Artist');
+        BEGIN
+            IF p_embedding IS NULL THEN
+                RETURN;
+            END IF;
+
+            IF v_artist IS NOT NULL THEN
+                IF p_sign > 0 THEN
+                    INSERT INTO artist_centroids AS c (artist, embedding_sum, track_count, first_track_id)
+                    VALUES (v_artist, p_embedding, 1, p_track)
+                    ON CONFLICT (artist) DO UPDATE SET
+                        embedding_sum = c.embedding_sum + excluded.embedding_sum,
+                        track_count = c.track_count + 1,
+                        first_track_id = coalesce(c.first_track_id, excluded.first_track_id),
+                        representative_track_id = NULL;
+                ELSE
+                    UPDATE artist_centroids SET
+                        embedding_sum = embedding_sum - p_embedding,
+                        track_count = track_count - 1,
+                        first_track_id = nullif(first_track_id, p_track),
+                        representative_track_id = NULL
+                    WHERE artist = v_artist;
+                    DELETE FROM artist_centroids WHERE artist = v_artist AND track_count <= 0;
+                END IF;
+            END IF;
+
+            IF v_album IS NOT NULL THEN
+                IF p_sign > 0 THEN
+                    INSERT INTO album_centroids AS c (artist, album, embedding_sum, track_count, first_track_id)
+                    VALUES (v_album_artist, v_album, p_embedding, 1, p_track)
+                    ON CONFLICT (artist, album) DO UPDATE SET
+                        embedding_sum = c.embedding_sum + excluded.embedding_sum,
+                        track_count = c.track_count + 1,
+                        first_track_id = coalesce(c.first_track_id, excluded.first_track_id),
+                        representative_track_id = NULL;
+                ELSE
+                    UPDATE album_centroids SET
+                        embedding_sum = embedding_sum - p_embedding,
+                        track_count = track_count - 1,
+                        first_track_id = nullif(first_track_id, p_track),
+                        representative_track_id = NULL
+                    WHERE artist = v_album_artist AND album = v_album;
+                    DELETE FROM album_centroids
+                    WHERE artist = v_album_artist AND album = v_album AND track_count <= 0;
+                END IF;
+            END IF;
+        END;
+        $$ LANGUAGE plpgsql
+    """))
+
+    # Metadata/status changes move the track's current embedding between groups.
+    # BEFORE DELETE runs while the track's analyses are still visible.
+    op.execute(text("""
+        CREATE OR REPLACE FUNCTION tracks_centroid_trigger() RETURNS trigger AS $$
+        DECLARE
+            v_embedding vector;
+        BEGIN
+            IF TG_OP = 'UPDATE'
+                AND NEW.artist IS NOT DISTINCT FROM OLD.artist
+                AND NEW.album IS NOT DISTINCT FROM OLD.album
+                AND NEW.status IS NOT DISTINCT FROM OLD.status THEN
+                RETURN NEW;
+            END IF;
+
+            v_embedding := track_current_embedding(OLD.id);
+            IF v_embedding IS NOT NULL THEN
+                IF OLD.status = 'active' THEN
+                    PERFORM centroid_apply(OLD.artist, OLD.album, OLD.id, v_embedding, -1);
+                END IF;
+                IF TG_OP = 'UPDATE' AND NEW.status = 'active' THEN
+                    PERFORM centroid_apply(NEW.artist, NEW.album, NEW.id, v_embedding, 1);
+                END IF;
+            END IF;
+
+            IF TG_OP = 'DELETE' THEN
+                RETURN OLD;
+            END IF;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """))
+
+    # Embedding changes replace the track's contribution. BEFORE row triggers
+    # see the table as it was before this row changed, so the old embedding is
+    # the current one and the new one is computed with this row swapped in.
+    op.execute(text("""
+        CREATE OR REPLACE FUNCTION track_analysis_centroid_trigger() RETURNS trigger AS $$
+        DECLARE
+            v_track_id uuid;
+            v_track record;
+            v_old vector;
+            v_new vector;
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                v_track_id := OLD.track_id;
+            ELSE
+                v_track_id := NEW.track_id;
+            END IF;
+
+            IF TG_OP = 'UPDATE'
+                AND NEW.track_id = OLD.track_id
+                AND NEW.version = OLD.version
+                AND NEW.embedding IS NOT DISTINCT FROM OLD.embedding THEN
+                RETURN NEW;
+            END IF;
+
+            -- Deleted along with its track (tracks_centroid_trigger already ran)
+            SELECT artist, album, status INTO v_track FROM tracks WHERE id = v_track_id;
+            IF NOT FOUND OR v_track.status <> 'active' THEN
+                IF TG_OP = 'DELETE' THEN
+                    RETURN OLD;
+                END IF;
+                RETURN NEW;
+            END IF;
+
+            v_old := track_current_embedding(v_track_id);
+            IF TG_OP = 'DELETE' THEN
+                SELECT embedding INTO v_new FROM track_analysis
+                WHERE track_id = v_track_id AND id <> OLD.id
+                ORDER BY version DESC LIMIT 1;
+            ELSE
+                SELECT s.embedding INTO v_new FROM (
+                    SELECT version, embedding FROM track_analysis
+                    WHERE track_id = v_track_id AND id <> NEW.id
+                    UNION ALL
+                    SELECT NEW.version, NEW.embedding
+                ) s ORDER BY s.version DESC LIMIT 1;
+            END IF;
+
+            IF v_old IS DISTINCT FROM v_new THEN
+                PERFORM centroid_apply(v_track.artist, v_track.album, v_track_id, v_old, -1);
+                PERFORM centroid_apply(v_track.artist, v_track.album, v_track_id, v_new, 1);
+            END IF;
+
+            IF TG_OP = 'DELETE' THEN
+                RETURN OLD;
+            END IF;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """))
+
+    op.execute(text("DROP TRIGGER IF EXISTS tracks_centroids ON tracks"))
+    op.execute(text("""
+        CREATE TRIGGER tracks_centroids
+        BEFORE UPDATE OF artist, album, status OR DELETE ON tracks
+        FOR EACH ROW EXECUTE FUNCTION tracks_centroid_trigger()
+    """))
+    op.execute(text("DROP TRIGGER IF EXISTS track_analysis_centroids ON track_analysis"))
+    op.execute(text("""
+        CREATE TRIGGER track_analysis_centroids
+        BEFORE INSERT OR UPDATE OF embedding, version, track_id OR DELETE ON track_analysis
+        FOR EACH ROW EXECUTE FUNCTION track_analysis_centroid_trigger()
+    """))
+
+    # Initial fill (the app re-sums both tables at startup to undo float drift)
+    op.execute(text("DELETE FROM artist_centroids"))
+    op.execute(text("DELETE FROM album_centroids"))
+    op.execute(text("""
+        INSERT INTO artist_centroids (artist, embedding_sum, track_count, first_track_id)
+        SELECT btrim(t.artist), sum(a.embedding), count(*), (array_agg(t.id ORDER BY t.id))[1]
+        FROM tracks t
+        CROSS JOIN LATERAL (SELECT track_current_embedding(t.id) AS embedding) a
+        WHERE t.status = 'active' AND a.embedding IS NOT NULL AND btrim(coalesce(t.artist, '')) <> ''
+        GROUP BY btrim(t.artist)
+    """))
+    op.execute(text("""
+        INSERT INTO album_centroids (artist, album, embedding_sum, track_count, first_track_id)
+        SELECT coalesce(nullif(btrim(coalesce(t.artist, '')), ''), 'Unknown Artist'), btrim(t.album),
+               sum(a.embedding), count(*), (array_agg(t.id ORDER BY t.id))[1]
+        FROM tracks t
+        CROSS JOIN LATERAL (SELECT track_current_embedding(t.id) AS embedding) a
+        WHERE t.status = 'active' AND a.embedding IS NOT NULL AND btrim(coalesce(t.album, '')) <> ''
+        GROUP BY 1, 2
+    """))
+
+
+def downgrade() -> None:
+    """Drop the triggers, functions and centroid tables."""
+    op.execute(text("DROP TRIGGER IF EXISTS track_analysis_centroids ON track_analysis"))
+    op.execute(text("DROP TRIGGER IF EXISTS tracks_centroids ON tracks"))
+    op.execute(text("DROP FUNCTION IF EXISTS track_analysis_centroid_trigger()"))
+    op.execute(text("DROP FUNCTION IF EXISTS tracks_centroid_trigger()"))
+    op.execute(text("DROP FUNCTION IF EXISTS centroid_apply(text, text, uuid, vector, integer)"))
+    op.execute(text("DROP FUNCTION IF EXISTS track_current_embedding(uuid)"))
+    op.execute(text("DROP TABLE IF EXISTS album_centroids"))
+    op.execute(text("DROP TABLE IF EXISTS artist_centroids"))
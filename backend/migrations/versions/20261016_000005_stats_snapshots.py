@@ -0,0 +1,32 @@
+"""Add library_stats_snapshots for precomputed dashboard stats.
+
+Revision ID: 20261016_000005_stats_snapshots
+Revises: 20261016_000004_centroids
+Create Date: 2026-10-16 00:00:05
+"""
+from collections.abc import Sequence
+
+from alembic import op
+from sqlalchemy import text
+
+# revision identifiers, used by Alembic.
+revision: str = "20261016_000005_stats_snapshots"
+down_revision: str | None = "20261016_000004_centroids"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Create the snapshot table (filled by the app on first read)."""
+    op.execute(text("""
+        CREATE TABLE IF NOT EXISTS library_stats_snapshots (
+            name VARCHAR(100) NOT NULL PRIMARY KEY,
+            data JSONB NOT NULL,
+            computed_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT now()
+        )
+    """))
+
+
+def downgrade() -> None:
+    """Drop the snapshot table."""
+    op.execute(text("DROP TABLE IF EXISTS library_stats_snapshots"))
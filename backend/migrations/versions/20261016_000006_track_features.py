@@ -0,0 +1,131 @@
+"""Add track_features, a typed projection of the latest analysis features.
+
+Smart playlists, track filters and the assistant's feature search used to
+cast JSONB fields of the latest analysis (found with a max(version)
+subquery) on every query. track_features holds one row per analyzed track
+with the filterable features as typed, B-tree indexed columns. A trigger on
+track_analysis rewrites a track's row whenever its analyses change.
+
+Revision ID: 20261016_000006_track_features
+Revises: 20261016_000005_stats_snapshots
+Create Date: 2026-10-16 00:00:06
+"""
+from collections.abc import Sequence
+
+from alembic import op
+from sqlalchemy import text
+
+# revision identifiers, used by Alembic.
+revision: str = "20261016_000006_track_features"
+down_revision: str | None = "20261016_000005_stats_snapshots"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+FLOAT_FEATURES = (
+    "bpm", "energy", "valence", "danceability", "acousticness",
+    "instrumentalness", "speechiness", "loudness_db", "dynamic_range_db",
+)
+INDEXED_COLUMNS = (*FLOAT_FEATURES, "key")
+
+# Column list, values computed from a `features` jsonb, and upsert assignments
+COLUMNS = ", ".join(INDEXED_COLUMNS)
+VALUES = ", ".join(
+    [f"feature_float(features, '{name}')" for name in FLOAT_FEATURES] + ["left(features ->> 'key', 20)"]
+)
+ASSIGNMENTS = ", ".join(f"{column} = excluded.{column}" for column in INDEXED_COLUMNS)
+
+
+def upgrade() -> None:
+    """Create the table, its indexes and trigger, and fill it."""
+    op.execute(text("""
+        CREATE TABLE IF NOT EXISTS track_features (
+            track_id UUID NOT NULL PRIMARY KEY REFERENCES tracks (id) ON DELETE CASCADE,
+            version INTEGER NOT NULL,
+            bpm DOUBLE PRECISION,
+            energy DOUBLE PRECISION,
+            valence DOUBLE PRECISION,
+            danceability DOUBLE PRECISION,
+            acousticness DOUBLE PRECISION,
+            instrumentalness DOUBLE PRECISION,
+            speechiness DOUBLE PRECISION,
+            loudness_db DOUBLE PRECISION,
+            dynamic_range_db DOUBLE PRECISION,
+            key VARCHAR(20)
+        )
+    """))
+    for column in INDEXED_COLUMNS:
+        op.execute(text(
+            f"CREATE INDEX IF NOT EXISTS ix_track_features_{column} ON track_features ({column})"
+        ))
+
+    # JSON numbers as floats; anything else (missing, null, strings) is NULL
+    op.execute(text("""
+        CREATE OR REPLACE FUNCTION feature_float(p_features jsonb, p_name text) RETURNS double precision AS $$
+            SELECT CASE WHEN jsonb_typeof(p_features -> p_name) = 'number'
+                        THEN (p_features ->> p_name)::double precision END
+        $$ LANGUAGE sql IMMUTABLE
+    """))
+
+    # Copy a track's latest analysis into track_features (or drop its row)
+    op.execute(text(f"""
+        CREATE OR REPLACE FUNCTION track_features_refresh(p_track uuid) RETURNS void AS $$
+        DECLARE
+            v_latest record;
+        BEGIN
+            SELECT version, features INTO v_latest FROM track_analysis
+            WHERE track_id = p_track ORDER BY version DESC LIMIT 1;
+            IF NOT FOUND THEN
+                DELETE FROM track_features WHERE track_id = p_track;
+                RETURN;
+            END IF;
+
+            INSERT INTO track_features (track_id, version, {COLUMNS})
+            SELECT p_track, v_latest.version, {VALUES}
+            FROM (SELECT coalesce(v_latest.features, '{{}}'::jsonb) AS features) f
+            ON CONFLICT (track_id) DO UPDATE SET
+                version = excluded.version,
+                {ASSIGNMENTS};
+        END;
+        $$ LANGUAGE plpgsql
+    """))
+
+    op.execute(text("""
+        CREATE OR REPLACE FUNCTION track_analysis_features_trigger() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                PERFORM track_features_refresh(OLD.track_id);
+            END IF;
+            IF TG_OP = 'INSERT' OR (TG_OP = 'UPDATE' AND NEW.track_id <> OLD.track_id) THEN
+                PERFORM track_features_refresh(NEW.track_id);
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """))
+    op.execute(text("DROP TRIGGER IF EXISTS track_analysis_features ON track_analysis"))
+    op.execute(text("""
+        CREATE TRIGGER track_analysis_features
+        AFTER INSERT OR UPDATE OF features, version, track_id OR DELETE ON track_analysis
+        FOR EACH ROW EXECUTE FUNCTION track_analysis_features_trigger()
+    """))
+
+    # Initial fill from the latest analysis of every track
+    op.execute(text(f"""
+        INSERT INTO track_features (track_id, version, {COLUMNS})
+        SELECT track_id, version, {VALUES}
+        FROM (
+            SELECT DISTINCT ON (track_id) track_id, version, coalesce(features, '{{}}'::jsonb) AS features
+            FROM track_analysis
+            ORDER BY track_id, version DESC
+        ) latest
+        ON CONFLICT (track_id) DO NOTHING
+    """))
+
+
+def downgrade() -> None:
+    """Drop the trigger, functions and table."""
+    op.execute(text("DROP TRIGGER IF EXISTS track_analysis_features ON track_analysis"))
+    op.execute(text("DROP FUNCTION IF EXISTS track_analysis_features_trigger()"))
+    op.execute(text("DROP FUNCTION IF EXISTS track_features_refresh(uuid)"))
+    op.execute(text("DROP FUNCTION IF EXISTS feature_float(jsonb, text)"))
+    op.execute(text("DROP TABLE IF EXISTS track_features"))
@@ -0,0 +1,133 @@
+"""Add materialized smart playlist membership.
+
+smart_playlist_tracks holds the tracks matching each smart playlist.
+Membership is re-evaluated only for tracks changed since the playlist's
+members_synced_at: tracks.updated_at for scans and metadata edits, and a new
+track_features.updated_at (set by the features trigger) for new analysis.
+Both timestamps get indexes.
+
+Revision ID: 20261016_000007_smart_playlist_members
+Revises: 20261016_000006_track_features
+Create Date: 2026-10-16 00:00:07
+"""
+from collections.abc import Sequence
+
+from alembic import op
+from sqlalchemy import text
+
+# revision identifiers, used by Alembic.
+revision: str = "20261016_000007_smart_playlist_members"
+down_revision: str | None = "20261016_000006_track_features"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Create the membership table and the change timestamps it relies on."""
+    op.execute(text("""
+        CREATE TABLE IF NOT EXISTS smart_playlist_tracks (
+            smart_playlist_id UUID NOT NULL REFERENCES smart_playlists (id) ON DELETE CASCADE,
+            track_id UUID NOT NULL REFERENCES tracks (id) ON DELETE CASCADE,
+            PRIMARY KEY (smart_playlist_id, track_id)
+        )
+    """))
+    op.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_smart_playlist_tracks_track_id ON smart_playlist_tracks (track_id)"
+    ))
+    op.execute(text("ALTER TABLE smart_playlists ADD COLUMN IF NOT EXISTS members_synced_at TIMESTAMP"))
+
+    op.execute(text("CREATE INDEX IF NOT EXISTS ix_tracks_updated_at ON tracks (updated_at)"))
+    op.execute(text(
+        "ALTER TABLE track_features ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP NOT NULL DEFAULT now()"
+    ))
+    op.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_track_features_updated_at ON track_features (updated_at)"
+    ))
+
+    # Same as in 20261016_000006_track_features, plus updated_at on rewrites
+    op.execute(text("""
+        CREATE OR REPLACE FUNCTION track_features_refresh(p_track uuid) RETURNS void AS $$
+        DECLARE
+            v_latest record;
+        BEGIN
+            SELECT version, features INTO v_latest FROM track_analysis
+            WHERE track_id = p_track ORDER BY version DESC LIMIT 1;
+            IF NOT FOUND THEN
+                DELETE FROM track_features WHERE track_id = p_track;
+                RETURN;
+            END IF;
+
+            INSERT INTO track_features (
+                track_id, version, bpm, energy, valence, danceability, acousticness,
+                instrumentalness, speechiness, loudness_db, dynamic_range_db, key, updated_at
+            )
+            SELECT p_track, v_latest.version,
+                   feature_float(features, 'bpm'), feature_float(features, 'energy'),
+                   feature_float(features, 'valence'), feature_float(features, 'danceability'),
+                   feature_float(features, 'acousticness'), feature_float(features, 'instrumentalness'),
+                   feature_float(features, 'speechiness'), feature_float(features, 'loudness_db'),
+                   feature_float(features, 'dynamic_range_db'), left(features ->> 'key', 20), now()
+            FROM (SELECT coalesce(v_latest.features, '{}'::jsonb) AS features) f
+            ON CONFLICT (track_id) DO UPDATE SET
+                version = excluded.version,
+                bpm = excluded.bpm,
+                energy = excluded.energy,
+                valence = excluded.valence,
+                danceability = excluded.danceability,
+                acousticness = excluded.acousticness,
+                instrumentalness = excluded.instrumentalness,
+                speechiness = excluded.speechiness,
+                loudness_db = excluded.loudness_db,
+                dynamic_range_db = excluded.dynamic_range_db,
+                key = excluded.key,
+                updated_at = excluded.updated_at;
+        END;
+        $$ LANGUAGE plpgsql
+    """))
+
+
+def downgrade() -> None:
+    """Drop the membership table and the change timestamps."""
+    op.execute(text("""
+        CREATE OR REPLACE FUNCTION track_features_refresh(p_track uuid) RETURNS void AS $$
+        DECLARE
+            v_latest record;
+        BEGIN
+            SELECT version, features INTO v_latest FROM track_analysis
+            WHERE track_id = p_track ORDER BY version DESC LIMIT 1;
+            IF NOT FOUND THEN
+                DELETE FROM track_features WHERE track_id = p_track;
+                RETURN;
+            END IF;
+
+            INSERT INTO track_features (
+                track_id, version, bpm, energy, valence, danceability, acousticness,
+                instrumentalness, speechiness, loudness_db, dynamic_range_db, key
+            )
+            SELECT p_track, v_latest.version,
+                   feature_float(features, 'bpm'), feature_float(features, 'energy'),
+                   feature_float(features, 'valence'), feature_float(features, 'danceability'),
+                   feature_float(features, 'acousticness'), feature_float(features, 'instrumentalness'),
+                   feature_float(features, 'speechiness'), feature_float(features, 'loudness_db'),
+                   feature_float(features, 'dynamic_range_db'), left(features ->> 'key', 20)
+            FROM (SELECT coalesce(v_latest.features, '{}'::jsonb) AS features) f
+            ON CONFLICT (track_id) DO UPDATE SET
+                version = excluded.version,
+                bpm = excluded.bpm,
+                energy = excluded.energy,
+                valence = excluded.valence,
+                danceability = excluded.danceability,
+                acousticness = excluded.acousticness,
+                instrumentalness = excluded.instrumentalness,
+                speechiness = excluded.speechiness,
+                loudness_db = excluded.loudness_db,
+                dynamic_range_db = excluded.dynamic_range_db,
+                key = excluded.key;
+        END;
+        $$ LANGUAGE plpgsql
+    """))
+    op.execute(text("DROP INDEX IF EXISTS ix_track_features_updated_at"))
+    op.execute(text("ALTER TABLE track_features DROP COLUMN IF EXISTS updated_at"))
+    op.execute(text("DROP INDEX IF EXISTS ix_tracks_updated_at"))
+    op.execute(text("ALTER TABLE smart_playlists DROP COLUMN IF EXISTS members_synced_at"))
+    op.execute(text("DROP TABLE IF EXISTS smart_playlist_tracks"))
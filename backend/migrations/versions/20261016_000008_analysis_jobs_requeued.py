@@ -0,0 +1,29 @@
+"""Add requeued_at to analysis_jobs.
+
+Enqueueing a job that is already claimed sets requeued_at; the consumer then
+hands the job back to the queue when the run finishes instead of deleting it.
+
+Revision ID: 20261016_000008_analysis_jobs_requeued
+Revises: 20261016_000007_smart_playlist_members
+Create Date: 2026-10-16 00:00:08
+"""
+from collections.abc import Sequence
+
+from alembic import op
+from sqlalchemy import text
+
+# revision identifiers, used by Alembic.
+revision: str = "20261016_000008_analysis_jobs_requeued"
+down_revision: str | None = "20261016_000007_smart_playlist_members"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Add requeued_at (no-op on fresh databases created by baseline)."""
+    op.execute(text("ALTER TABLE analysis_jobs ADD COLUMN IF NOT EXISTS requeued_at TIMESTAMP"))
+
+
+def downgrade() -> None:
+    """Drop requeued_at."""
+    op.execute(text("ALTER TABLE analysis_jobs DROP COLUMN IF EXISTS requeued_at"))
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""Micro-benchmark for the librosa feature extractor.
+
+Times the shared-STFT feature engine against the previous implementation
+(kept below as the baseline) on a fixed corpus, and checks that both
+produce the same features.
+
+Each file is decoded once, outside the timed region, so the numbers
+compare feature computation only. Decode time is reported separately.
+
+Usage:
+    # From the backend directory (the test fixtures are the default corpus):
+    uv run python scripts/benchmark_features.py
+
+    # Or with a directory of your own files and more repeats:
+    uv run python scripts/benchmark_features.py /path/to/corpus --repeat 5
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add the app to the path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.config import AUDIO_EXTENSIONS  # noqa: E402
+from app.services.analysis import (  # noqa: E402
+    DECODE_SAMPLE_RATE,
+    _extract_features_impl,
+    decode_audio,
+)
+
+DEFAULT_CORPUS = Path(__file__).parent.parent / "tests" / "fixtures" / "audio"
+
+
+def baseline_features(y: np.ndarray, sr: int) -> dict:
+    """The feature extractor before the shared-STFT rewrite (ANALYSIS_VERSION 5)."""
+    import librosa
+
+    features: dict = {}
+
+    onset_env = librosa.onset.onset_strength(y=y, sr=sr)
+    tempo = librosa.feature.tempo(onset_envelope=onset_env, sr=sr)
+    features["bpm"] = float(tempo) if not isinstance(tempo, np.ndarray) else float(tempo[0])
+
+    n_fft = 2048
+    spec = np.abs(librosa.stft(y, n_fft=n_fft))
+    power_spec = spec ** 2
+
+    chroma_fb = librosa.filters.chroma(sr=sr, n_fft=n_fft)
+    chroma = librosa.util.normalize(np.dot(chroma_fb, power_spec), norm=np.inf, axis=0)
+    key_idx = np.argmax(np.mean(chroma, axis=1))
+    key_names = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
+    features["key"] = key_names[key_idx]
+
+    rms = librosa.feature.rms(y=y)[0]
+    rms_db = 20 * np.log10(float(np.mean(rms)) + 1e-10)
+    features["energy"] = float(np.clip((rms_db + 60) / 54, 0, 1))
+
+    spectral_centroid = librosa.feature.spectral_centroid(y=y, sr=sr)[0]
+    pulse = librosa.beat.plp(onset_envelope=onset_env, sr=sr)
+    features["danceability"] = float(np.mean(pulse))
+
+    zcr = librosa.feature.zero_crossing_rate(y)[0]
+    _mfcc = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=13)
+    _contrast = librosa.feature.spectral_contrast(y=y, sr=sr)
+
+    centroid_norm = np.mean(spectral_centroid) / (sr / 2)
+    features["acousticness"] = float(max(0, 1 - centroid_norm * 2))
+
+    freqs = librosa.fft_frequencies(sr=sr, n_fft=n_fft)
+    vocal_mask = (freqs >= 300) & (freqs <= 3000)
+    vocal_ratio = np.mean(spec[vocal_mask, :]) / (np.mean(spec) + 1e-6)
+    features["instrumentalness"] = float(max(0, 1 - vocal_ratio))
+
+    chroma_rotated = np.roll(chroma, -key_idx, axis=0)
+    major_energy = np.mean(chroma_rotated[[0, 4, 7], :])
+    minor_energy = np.mean(chroma_rotated[[0, 3, 7], :])
+    mode_indicator = (major_energy - minor_energy) / (major_energy + minor_energy + 1e-6)
+    mode_score = (mode_indicator + 1) / 2
+    brightness_score = np.clip(centroid_norm * 2, 0, 1)
+    bpm = features["bpm"]
+    tempo_score = np.clip((bpm - 60) / 120, 0, 1) if bpm else 0.5
+    contrast = librosa.feature.spectral_contrast(S=spec, sr=sr)
+    contrast_score = np.clip(np.mean(contrast) / 25, 0, 1)
+    dynamics_score = np.clip(np.std(rms) / 0.08, 0, 1)
+    raw_valence = (
+        mode_score * 0.30 + brightness_score * 0.25 + tempo_score * 0.20
+        + contrast_score * 0.15 + dynamics_score * 0.10
+    )
+    centered = raw_valence - 0.5
+    spread = np.sign(centered) * (np.abs(centered) ** 0.6) * 1.8
+    features["valence"] = float(np.clip(spread + 0.5, 0, 1))
+
+    _flatness = librosa.feature.spectral_flatness(y=y)[0]
+    features["speechiness"] = float(min(1, np.mean(zcr) * 2))
+
+    return features
+
+
+def time_call(func, y: np.ndarray, repeat: int) -> tuple[float, dict]:
+    """Best-of-repeat wall time in seconds, and the last result."""
+    best = float("inf")
+    result: dict = {}
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(y, DECODE_SAMPLE_RATE)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("corpus", nargs="?", type=Path, default=DEFAULT_CORPUS)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per file (best is kept)")
+    parser.add_argument("--limit", type=int, default=20, help="Maximum files to benchmark")
+    args = parser.parse_args()
+
+    audio_ext = {ext.lower() for ext in AUDIO_EXTENSIONS}
+    files = sorted(p for p in args.corpus.rglob("*") if p.suffix.lower() in audio_ext)
+    files = files[:args.limit]
+    if not files:
+        print(f"No audio files found under {args.corpus}")
+        sys.exit(1)
+
+    print(f"Benchmarking {len(files)} files from {args.corpus} (best of {args.repeat})")
+    print(f"{'file':40} {'decode':>9} {'before':>9} {'after':>9} {'speedup':>8}  max diff")
+
+    totals = {"decode": 0.0, "before": 0.0, "after": 0.0}
+    for path in files:
+        start = time.perf_counter()
+        y = decode_audio(path)
+        decode_s = time.perf_counter() - start
+
+        before_s, before = time_call(baseline_features, y, args.repeat)
+        after_s, after = time_call(_extract_features_impl, y, args.repeat)
+
+        diffs = [
+            abs(before[k] - after[k]) for k in before
+            if isinstance(before[k], float) and isinstance(after[k], float)
+        ]
+        key_note = "" if before["key"] == after["key"] else "  KEY MISMATCH"
+        print(
+            f"{path.name[:40]:40} {decode_s * 1000:7.0f}ms {before_s * 1000:7.0f}ms "
+            f"{after_s * 1000:7.0f}ms {before_s / after_s:7.2f}x  {max(diffs):.2e}{key_note}"
+        )
+        totals["decode"] += decode_s
+        totals["before"] += before_s
+        totals["after"] += after_s
+
+    n = len(files)
+    print("-" * 90)
+    print(
+        f"{'mean per track':40} {totals['decode'] / n * 1000:7.0f}ms "
+        f"{totals['before'] / n * 1000:7.0f}ms {totals['after'] / n * 1000:7.0f}ms "
+        f"{totals['before'] / totals['after']:7.2f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Benchmark for the music map k-NN edge computation.
+
+Compares the blocked top-k engine against the previous implementation (a
+dense N x N similarity matrix with a per-row sort, kept below as the
+baseline) on random 512-dim embeddings, reporting wall time and peak
+traced memory, and checks that both produce the same edges.
+
+The baseline needs N x N x 8 bytes (20 GB at 50k nodes), so it only runs up
+to --baseline-max nodes.
+
+Usage:
+    # From the backend directory:
+    uv run python scripts/benchmark_knn.py
+
+    # Other sizes:
+    uv run python scripts/benchmark_knn.py --sizes 2000 20000 --baseline-max 20000
+"""
+
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+# Add the app to the path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.knn import knn_edges  # noqa: E402
+
+
+def baseline_edges(embeddings: np.ndarray, k: int) -> list[tuple[int, int, float]]:
+    """The edge computation before the blocked rewrite."""
+    from sklearn.metrics.pairwise import cosine_similarity
+
+    similarities = cosine_similarity(embeddings)
+    edges = []
+    seen_pairs = set()
+    for i in range(len(embeddings)):
+        sim_scores = similarities[i].copy()
+        sim_scores[i] = -1
+        top_k_indices = np.argsort(sim_scores)[-k:][::-1]
+        for j in top_k_indices:
+            if sim_scores[j] <= 0:
+                continue
+            pair = tuple(sorted([i, int(j)]))
+            if pair in seen_pairs:
+                continue
+            seen_pairs.add(pair)
+            edges.append((i, int(j), float(sim_scores[j])))
+    return edges
+
+
+def blocked_edges(embeddings: np.ndarray, k: int) -> list[tuple[int, int, float]]:
+    sources, targets, weights = knn_edges(embeddings, k)
+    return list(zip(sources.tolist(), targets.tolist(), weights.tolist(), strict=True))
+
+
+def measure(func, embeddings: np.ndarray, k: int) -> tuple[float, float, list]:
+    """Wall time (s), peak traced memory (MB) and the result of one call."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(embeddings, k)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1024 / 1024, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--baseline-max", type=int, default=10000, help="Largest N for the baseline")
+    parser.add_argument("-k", type=int, default=5, help="Neighbors per node")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    print(f"{'nodes':>7} {'before':>9} {'peak':>9} {'after':>9} {'peak':>9} {'speedup':>8}  edges")
+    for n in args.sizes:
+        # Clustered data, closer to real centroids than uniform noise
+        centers = rng.normal(size=(max(1, n // 50), 512))
+        embeddings = (centers[rng.integers(len(centers), size=n)] + rng.normal(size=(n, 512)) * 0.5)
+        embeddings = embeddings.astype(np.float32)
+
+        after_s, after_mb, after = measure(blocked_edges, embeddings, args.k)
+        if n > args.baseline_max:
+            print(f"{n:7d} {'-':>9} {'-':>9} {after_s * 1000:7.0f}ms {after_mb:7.0f}MB {'-':>8}  {len(after)}")
+            continue
+
+        before_s, before_mb, before = measure(baseline_edges, embeddings, args.k)
+        same = {(i, j) for i, j, _ in before} == {(i, j) for i, j, _ in after}
+        note = "" if same else "  EDGES DIFFER"
+        print(
+            f"{n:7d} {before_s * 1000:7.0f}ms {before_mb:7.0f}MB {after_s * 1000:7.0f}ms "
+            f"{after_mb:7.0f}MB {before_s / after_s:7.2f}x  {len(after)}{note}"
+        )
+
+
+if __name__ == "__main__":
+    main()
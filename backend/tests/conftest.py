@@ -21,13 +21,19 @@ def reset_artwork_fetcher():
     This prevents asyncio loop issues when tests run with different event loops
     but share the global singleton.
     """
+    import app.services.artwork_cache as ac
     import app.services.artwork_fetcher as af
+    import app.services.match_index as mi
 
     # Reset before test
     af._artwork_fetcher = None
+    ac._artwork_cache = None
+    mi._match_index = None
     yield
     # Reset after test
     af._artwork_fetcher = None
+    ac._artwork_cache = None
+    mi._match_index = None
 
 
 @pytest.fixture(scope="session")
@@ -10,7 +10,9 @@ from unittest.mock import MagicMock, patch
 import pytest
 
 from app.services.analysis import (
+    DECODE_SAMPLE_RATE,
     AnalysisError,
+    decode_audio,
     extract_features,
     generate_fingerprint,
     get_analysis_capabilities,
@@ -129,6 +131,82 @@ class TestExtractFeatures:
             extract_features(Path("/nonexistent/file.mp3"))
 
 
+class TestDecodeAudio:
+    """Tests for the shared single-pass decode."""
+
+    def test_decode_audio_returns_mono_float32(self):
+        """Decoded audio is a 1-D float32 buffer at the shared sample rate."""
+        audio_file = FIXTURES_DIR / "electronic_short.mp3"
+        if not audio_file.exists():
+            pytest.skip("Audio fixture not available")
+
+        audio = decode_audio(audio_file)
+
+        assert audio.ndim == 1
+        assert audio.dtype.name == "float32"
+        assert len(audio) > DECODE_SAMPLE_RATE  # More than a second of audio
+
+    def test_decode_audio_clip_decodes_only_the_clip(self):
+        """offset/duration decode just that window."""
+        audio_file = FIXTURES_DIR / "electronic_short.mp3"
+        if not audio_file.exists():
+            pytest.skip("Audio fixture not available")
+
+        clip = decode_audio(audio_file, 48000, offset=0.5, duration=1.0)
+
+        assert abs(len(clip) - 48000) <= 4800
+
+    def test_decode_audio_before_ffmpeg_version_uses_librosa(self):
+        """Older analysis versions keep librosa's resampling, so their values don't move."""
+        from app.services.analysis import FFMPEG_DECODE_VERSION
+
+        with (
+            patch("app.services.analysis.subprocess.run") as run,
+            patch("app.services.analysis.librosa.load", return_value=("audio", 22050)) as load,
+        ):
+            audio = decode_audio(Path("a.mp3"), version=FFMPEG_DECODE_VERSION - 1)
+
+        assert audio == "audio"
+        run.assert_not_called()
+        load.assert_called_once()
+
+    def test_decode_audio_nonexistent_file_raises(self):
+        """Should raise AnalysisError for non-existent file."""
+        with pytest.raises(AnalysisError):
+            decode_audio(Path("/nonexistent/file.mp3"))
+
+    def test_features_from_shared_buffer_match_file(self):
+        """Passing the decoded buffer gives the same features as decoding again."""
+        audio_file = FIXTURES_DIR / "electronic_short.mp3"
+        if not audio_file.exists():
+            pytest.skip("Audio fixture not available")
+
+        audio = decode_audio(audio_file)
+
+        assert extract_features(audio_file, audio) == extract_features(audio_file)
+
+
+class TestFeatureEngineVersions:
+    """Tests for the ANALYSIS_VERSION switch in the feature engine."""
+
+    def test_spectral_rms_version_keeps_rhythm_and_key(self):
+        """Only energy-derived values may change between engine versions."""
+        from app.services.analysis import SPECTRAL_RMS_VERSION, _extract_features_impl
+
+        audio_file = FIXTURES_DIR / "electronic_short.mp3"
+        if not audio_file.exists():
+            pytest.skip("Audio fixture not available")
+
+        audio = decode_audio(audio_file)
+        before = _extract_features_impl(audio, version=SPECTRAL_RMS_VERSION - 1)
+        after = _extract_features_impl(audio, version=SPECTRAL_RMS_VERSION)
+
+        assert set(before) == set(after)
+        for key in ["bpm", "key", "danceability", "acousticness", "speechiness"]:
+            assert before[key] == after[key], key
+        assert 0 <= after["energy"] <= 1
+
+
 class TestGenerateFingerprint:
     """Tests for AcoustID fingerprint generation."""
 
@@ -160,6 +238,25 @@ class TestGenerateFingerprint:
         if result1 is not None and result2 is not None:
             assert result1[1] == result2[1], "Fingerprints should match"
 
+    def test_generate_fingerprint_matches_fpcalc(self):
+        """The community cache is keyed on the exact string, so it must be fpcalc's."""
+        import acoustid
+
+        from app.services.community_cache import CommunityCacheService
+
+        audio_file = FIXTURES_DIR / "electronic_short.mp3"
+        try:
+            _, expected = acoustid.fingerprint_file(str(audio_file), force_fpcalc=True)
+        except (acoustid.NoBackendError, acoustid.FingerprintGenerationError):
+            pytest.skip("fpcalc not available")
+
+        result = generate_fingerprint(audio_file)
+
+        assert result is not None
+        assert CommunityCacheService.hash_fingerprint(result[1]) == (
+            CommunityCacheService.hash_fingerprint(expected)
+        )
+
     def test_generate_fingerprint_nonexistent_file(self):
         """Should return None for non-existent file."""
         result = generate_fingerprint(Path("/nonexistent/file.mp3"))
@@ -0,0 +1,170 @@
+"""Tests for the durable analysis queue consumer.
+
+Uses a mocked BackgroundManager and database session.
+"""
+
+import asyncio
+from datetime import timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.sql.dml import Delete, Update
+
+from app.services.analysis_queue import (
+    BACKOFF_MAX_SECONDS,
+    MAX_ATTEMPTS,
+    AnalysisQueueConsumer,
+    enqueue_analysis,
+    retry_delay,
+)
+
+TRACK_ID = "00000000-0000-0000-0000-000000000001"
+
+
+@pytest.fixture
+def db():
+    """Mocked async session, returned by a patched async_session_maker."""
+    session = AsyncMock()
+    session_maker = MagicMock()
+    session_maker.return_value.__aenter__.return_value = session
+    with patch("app.db.session.async_session_maker", session_maker):
+        yield session
+
+
+@pytest.fixture
+def consumer():
+    """Consumer over a mocked manager."""
+    manager = MagicMock()
+    manager._executor_disabled = False
+    return AnalysisQueueConsumer(manager, limits={"features": 2, "embedding": 4})
+
+
+def executed(db) -> list:
+    """Statements executed on the mocked session."""
+    return [call.args[0] for call in db.execute.call_args_list]
+
+
+def sql(statement) -> str:
+    """Statement compiled for Postgres."""
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+class TestRetryDelay:
+    """Tests for the retry backoff schedule."""
+
+    def test_backoff_grows_exponentially(self):
+        assert retry_delay(1) == timedelta(minutes=1)
+        assert retry_delay(2) == timedelta(minutes=4)
+        assert retry_delay(3) == timedelta(minutes=16)
+
+    def test_backoff_is_capped(self):
+        assert retry_delay(20) == timedelta(seconds=BACKOFF_MAX_SECONDS)
+
+
+class TestFinish:
+    """Tests for acknowledging and retrying jobs."""
+
+    @pytest.mark.asyncio
+    async def test_success_deletes_job(self, consumer, db):
+        await consumer._finish((TRACK_ID, "features"), 0, {"status": "success"})
+
+        statements = executed(db)
+        assert isinstance(statements[0], Delete)
+        assert "requeued_at IS NULL" in sql(statements[0])
+        db.commit.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_permanent_failure_deletes_job(self, consumer, db):
+        """Task-level failures are recorded on the track, not retried by the queue."""
+        result = {"status": "failed", "error": "corrupt file", "permanent": True}
+
+        await consumer._finish((TRACK_ID, "features"), 0, result)
+
+        assert isinstance(executed(db)[0], Delete)
+
+    @pytest.mark.asyncio
+    async def test_transient_failure_backs_off(self, consumer, db):
+        result = {"status": "error", "error": "Process pool crashed"}
+
+        await consumer._finish((TRACK_ID, "features"), 0, result)
+
+        statement = executed(db)[0]
+        assert isinstance(statement, Update)
+        params = statement.compile().params
+        assert params["attempts"] == 1
+        assert params["claimed_by"] is None
+        assert params["last_error"] == "Process pool crashed"
+
+    @pytest.mark.asyncio
+    async def test_transient_failure_dropped_after_max_attempts(self, consumer, db):
+        result = {"status": "error", "error": "Process pool crashed"}
+
+        await consumer._finish((TRACK_ID, "features"), MAX_ATTEMPTS - 1, result)
+
+        assert isinstance(executed(db)[0], Delete)
+
+
+class TestEnqueueDuringRun:
+    """A job re-requested while it runs must run again afterwards."""
+
+    @pytest.mark.asyncio
+    async def test_reenqueue_marks_job_requeued_and_clears_backoff(self):
+        db = AsyncMock()
+
+        await enqueue_analysis(db, [TRACK_ID], phase="full", priority=100)
+
+        compiled = executed(db)[0].compile(dialect=postgresql.dialect())
+        conflict = str(compiled)[str(compiled).index("ON CONFLICT"):]
+        assert "requeued_at = now()" in conflict
+        assert "not_before = now()" in conflict
+        assert "attempts = %(param_1)s" in conflict and compiled.params["param_1"] == 0
+        assert "greatest(analysis_jobs.priority, excluded.priority)" in conflict
+
+    @pytest.mark.asyncio
+    async def test_finish_hands_requeued_job_back(self, consumer, db):
+        await consumer._finish((TRACK_ID, "full"), 0, {"status": "success"})
+
+        delete_stmt, release = executed(db)
+        assert "requeued_at IS NULL" in sql(delete_stmt)
+        assert isinstance(release, Update)
+        assert "requeued_at IS NOT NULL" in sql(release)
+        params = release.compile().params
+        assert params["claimed_by"] is None
+        assert params["claimed_at"] is None
+
+    @pytest.mark.asyncio
+    async def test_retry_skips_requeued_job(self, consumer, db):
+        await consumer._finish((TRACK_ID, "full"), 0, {"status": "error", "error": "boom"})
+
+        backoff, release = executed(db)
+        assert "requeued_at IS NULL" in sql(backoff)
+        assert "requeued_at IS NOT NULL" in sql(release)
+
+
+class TestProcess:
+    """Tests for running claimed jobs."""
+
+    @pytest.mark.asyncio
+    async def test_process_runs_job_and_frees_slot(self, consumer, db):
+        async def analysis():
+            return {"status": "success"}
+
+        consumer._manager.start_analysis_task.return_value = asyncio.ensure_future(analysis())
+        key = (TRACK_ID, "embedding")
+        consumer._in_flight[key] = MagicMock()
+
+        await consumer._process(key, 0)
+
+        consumer._manager.start_analysis_task.assert_called_once_with(TRACK_ID, "embedding")
+        assert key not in consumer._in_flight
+        assert isinstance(executed(db)[0], Delete)
+
+    def test_in_flight_counts_full_jobs_against_features_pool(self, consumer):
+        consumer._in_flight = {
+            ("a", "full"): MagicMock(),
+            ("b", "features"): MagicMock(),
+            ("c", "embedding"): MagicMock(),
+        }
+
+        assert consumer.in_flight() == {"features": 2, "embedding": 1}
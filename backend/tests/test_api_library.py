@@ -315,6 +315,12 @@ class TestMoodDistribution:
             assert 0 <= cell["valence_max"] <= 1
             assert cell["track_count"] >= 0
 
+    def test_mood_distribution_rejects_bad_grid_size(self, client: TestClient) -> None:
+        """Grid sizes outside 1-50 are rejected."""
+        for grid_size in (0, 51):
+            response = client.get(f"/api/v1/library/mood-distribution?grid_size={grid_size}")
+            assert response.status_code == 422
+
 
 class TestCancelOperations:
     """Tests for cancel endpoints."""
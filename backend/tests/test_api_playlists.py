@@ -254,6 +254,52 @@ def test_remove_track_from_playlist(client: TestClient, test_profile: dict) -> N
         assert len(get_response.json()["tracks"]) == 1
 
 
+def test_reorder_and_page_playlist_items(client: TestClient, test_profile: dict) -> None:
+    """Test reordering items and reading them back a page at a time."""
+    headers = make_profile_headers(test_profile)
+
+    list_response = client.get("/api/v1/tracks?page_size=3")
+    tracks = list_response.json()["items"]
+
+    if len(tracks) >= 2:
+        track_ids = [t["id"] for t in tracks]
+        create_response = client.post(
+            "/api/v1/playlists",
+            headers=headers,
+            json={"name": "Paged Playlist", "track_ids": track_ids},
+        )
+        playlist_id = create_response.json()["id"]
+        item_ids = [t["playlist_track_id"] for t in create_response.json()["tracks"]]
+
+        # Reverse the order; unknown and malformed ids are ignored
+        response = client.put(
+            f"/api/v1/playlists/{playlist_id}/tracks/reorder",
+            headers=headers,
+            json={"playlist_track_ids": [*reversed(item_ids), str(uuid4()), "not-a-uuid"]},
+        )
+        assert response.status_code == 200
+        assert [t["playlist_track_id"] for t in response.json()["tracks"]] == item_ids[::-1]
+
+        # Page through one item at a time
+        paged = []
+        cursor = None
+        while True:
+            params: dict = {"limit": 1}
+            if cursor:
+                params["after"] = cursor
+            page = client.get(f"/api/v1/playlists/{playlist_id}", headers=headers, params=params).json()
+            paged.extend(t["playlist_track_id"] for t in page["tracks"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        assert paged == item_ids[::-1]
+
+        response = client.get(
+            f"/api/v1/playlists/{playlist_id}?limit=1&after=garbage", headers=headers
+        )
+        assert response.status_code == 400
+
+
 def test_playlist_isolation_between_profiles(client: TestClient) -> None:
     """Test that profiles cannot see each other's playlists."""
     # Create two profiles
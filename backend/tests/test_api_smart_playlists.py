@@ -228,3 +228,70 @@ class TestAvailableFields:
         )
         assert bpm_field is not None
         assert "range" in bpm_field
+
+
+class TestFeatureRules:
+    """Tests for rules on audio features."""
+
+    def test_feature_rules_and_sort(self, client: TestClient, test_profile: dict) -> None:
+        """Numeric and key feature rules, sorted by a feature, return tracks."""
+        headers = make_profile_headers(test_profile)
+        response = client.post(
+            "/api/v1/smart-playlists",
+            headers=headers,
+            json={
+                "name": f"Energetic {uuid4().hex[:8]}",
+                "rules": [
+                    {"field": "energy", "operator": "between", "value": [0.5, 1]},
+                    {"field": "key", "operator": "equals", "value": "A"},
+                ],
+                "order_by": "bpm",
+                "order_direction": "desc",
+            },
+        )
+        assert response.status_code == 201
+        playlist_id = response.json()["id"]
+
+        response = client.get(f"/api/v1/smart-playlists/{playlist_id}/tracks", headers=headers)
+        assert response.status_code == 200
+        client.delete(f"/api/v1/smart-playlists/{playlist_id}", headers=headers)
+
+
+class TestMembership:
+    """Tests for materialized smart playlist membership."""
+
+    def test_tracks_count_and_refresh_agree(self, client: TestClient, test_profile: dict) -> None:
+        """Paged tracks, total, cached count and a rebuild all agree."""
+        headers = make_profile_headers(test_profile)
+        response = client.post(
+            "/api/v1/smart-playlists",
+            headers=headers,
+            json={
+                "name": f"Recent {uuid4().hex[:8]}",
+                "rules": [{"field": "created_at", "operator": "within_days", "value": 30}],
+            },
+        )
+        assert response.status_code == 201
+        playlist = response.json()
+
+        response = client.get(
+            f"/api/v1/smart-playlists/{playlist['id']}/tracks?limit=5", headers=headers
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data["tracks"]) == min(5, data["total"])
+        assert data["total"] == playlist["cached_track_count"]
+
+        response = client.post(f"/api/v1/smart-playlists/{playlist['id']}/refresh", headers=headers)
+        assert response.status_code == 200
+        assert response.json()["cached_track_count"] == data["total"]
+
+        # Editing the rules rebuilds the membership
+        response = client.put(
+            f"/api/v1/smart-playlists/{playlist['id']}",
+            headers=headers,
+            json={"rules": [{"field": "title", "operator": "contains", "value": uuid4().hex}]},
+        )
+        assert response.status_code == 200
+        assert response.json()["cached_track_count"] == 0
+        client.delete(f"/api/v1/smart-playlists/{playlist['id']}", headers=headers)
@@ -0,0 +1,66 @@
+"""Tests for saving artwork variants."""
+
+from io import BytesIO
+from unittest.mock import patch
+
+import pytest
+from PIL import Image
+
+from app.services.artwork import (
+    ALL_ARTWORK_SIZES,
+    ARTWORK_FORMATS,
+    backfill_artwork_variants,
+    generate_artwork_variants,
+    get_artwork_path,
+    save_artwork,
+)
+
+
+@pytest.fixture
+def art_dir(tmp_path):
+    with patch("app.services.artwork.settings") as mock_settings:
+        mock_settings.art_path = tmp_path
+        yield tmp_path
+
+
+def image_bytes(size: int = 800) -> bytes:
+    buffer = BytesIO()
+    Image.new("RGBA", (size, size), (200, 30, 30, 255)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def test_save_writes_every_size_and_format(art_dir):
+    saved = save_artwork(image_bytes(), "abc")
+
+    assert set(saved) == set(ALL_ARTWORK_SIZES)
+    for size, max_dim in ALL_ARTWORK_SIZES.items():
+        for fmt in ARTWORK_FORMATS:
+            with Image.open(get_artwork_path("abc", size, fmt)) as img:
+                assert img.size == (max_dim, max_dim)
+    assert not list(art_dir.glob(".*"))  # No temporary files left behind
+
+
+def test_backfill_generates_variants_from_full_jpeg(art_dir):
+    Image.new("RGB", (500, 500)).save(get_artwork_path("old", "full"), "JPEG")
+
+    assert backfill_artwork_variants() == 1
+
+    with Image.open(get_artwork_path("old", "64", "webp")) as img:
+        assert img.size == (64, 64)
+    assert get_artwork_path("old", "thumb").exists()
+    assert backfill_artwork_variants() == 0  # Nothing left to do
+
+
+def test_generate_variants_keeps_existing_files(art_dir):
+    Image.new("RGB", (500, 500)).save(get_artwork_path("old", "full"), "JPEG")
+    existing = get_artwork_path("old", "128", "webp")
+    existing.write_bytes(b"kept")
+
+    assert generate_artwork_variants("old")
+
+    assert existing.read_bytes() == b"kept"
+    assert get_artwork_path("old", "128").exists()
+
+
+def test_generate_variants_without_full_jpeg_fails(art_dir):
+    assert not generate_artwork_variants("missing")
@@ -0,0 +1,113 @@
+"""Tests for the in-memory artwork cache."""
+
+import asyncio
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from app.services.artwork_cache import ArtworkCache, accepts_webp
+
+
+@pytest.fixture
+def art_dir(tmp_path):
+    with patch("app.services.artwork.settings") as mock_settings:
+        mock_settings.art_path = tmp_path
+        yield tmp_path
+
+
+@pytest.mark.asyncio
+async def test_hit_is_served_from_memory(art_dir):
+    (art_dir / "abc_thumb.jpg").write_bytes(b"thumb")
+    cache = ArtworkCache(max_bytes=1024)
+
+    first = await cache.get("abc", "thumb")
+    (art_dir / "abc_thumb.jpg").unlink()
+    second = await cache.get("abc", "thumb")
+
+    assert first is second
+    assert second.data == b"thumb"
+    assert second.etag.startswith('"')
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_extraction(art_dir):
+    calls = 0
+    release = threading.Event()
+
+    def extract():
+        nonlocal calls
+        calls += 1
+        release.wait(5)
+        (art_dir / "abc.jpg").write_bytes(b"full")
+        (art_dir / "abc_thumb.jpg").write_bytes(b"thumb")
+
+    cache = ArtworkCache(max_bytes=1024)
+    waiting = [
+        asyncio.create_task(cache.get("abc", size, extract=extract))
+        for size in ("full", "thumb", "full")
+    ]
+    await asyncio.sleep(0.05)
+    release.set()
+    images = await asyncio.gather(*waiting)
+
+    assert calls == 1
+    assert [image.data for image in images] == [b"full", b"thumb", b"full"]
+
+
+@pytest.mark.asyncio
+async def test_lru_is_bounded_by_bytes(art_dir):
+    for name in ("a", "b", "c"):
+        (art_dir / f"{name}.jpg").write_bytes(b"x" * 40)
+    cache = ArtworkCache(max_bytes=100)
+
+    for name in ("a", "b", "c"):
+        await cache.get(name, "full")
+
+    assert ("a", "full", "jpeg") not in cache._images
+    assert cache._bytes == 80
+
+
+@pytest.mark.asyncio
+async def test_invalidate_drops_album(art_dir):
+    (art_dir / "abc.jpg").write_bytes(b"old")
+    cache = ArtworkCache(max_bytes=1024)
+    await cache.get("abc", "full")
+
+    (art_dir / "abc.jpg").write_bytes(b"new")
+    cache.invalidate("abc")
+
+    assert (await cache.get("abc", "full")).data == b"new"
+
+
+def test_accepts_webp():
+    assert accepts_webp("image/avif,image/webp,*/*")
+    assert accepts_webp("image/webp;q=0.8")
+    assert not accepts_webp("image/webp;q=0, image/jpeg")
+    assert not accepts_webp(None)
+
+
+@pytest.mark.asyncio
+async def test_negotiates_webp_and_falls_back_to_jpeg(art_dir):
+    (art_dir / "abc_256.webp").write_bytes(b"webp")
+    (art_dir / "abc_256.jpg").write_bytes(b"jpeg")
+    cache = ArtworkCache(max_bytes=1024)
+
+    webp = await cache.get_negotiated("abc", "256", "image/webp,*/*")
+    jpeg = await cache.get_negotiated("abc", "256", "image/jpeg")
+
+    assert (webp.data, webp.media_type) == (b"webp", "image/webp")
+    assert (jpeg.data, jpeg.media_type) == (b"jpeg", "image/jpeg")
+
+
+@pytest.mark.asyncio
+async def test_missing_variant_serves_full_image(art_dir):
+    (art_dir / "abc.jpg").write_bytes(b"full")
+    cache = ArtworkCache(max_bytes=1024)
+
+    with patch("app.services.artwork_cache.generate_artwork_variants") as generate:
+        image = await cache.get_negotiated("abc", "128", None)
+        await asyncio.sleep(0.05)
+
+    assert image.data == b"full"
+    generate.assert_called_once_with("abc")
@@ -0,0 +1,121 @@
+"""Tests for audio file streaming (ranges, validators and descriptor cache)."""
+
+import os
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.services.audio_stream import FileHandleCache, parse_ranges, stream_file
+
+CONTENT = bytes(range(256)) * 40  # 10240 bytes
+
+
+@pytest.fixture
+def audio_file(tmp_path):
+    path = tmp_path / "track.flac"
+    path.write_bytes(CONTENT)
+    return path
+
+
+@pytest.fixture
+def stream_client(audio_file):
+    app = FastAPI()
+
+    @app.get("/stream")
+    async def stream(request: Request):
+        return await stream_file(request, audio_file, "audio/flac")
+
+    return TestClient(app)
+
+
+class TestParseRanges:
+    """Tests for Range header parsing."""
+
+    def test_single_open_and_suffix(self):
+        assert parse_ranges("bytes=0-99", 1000) == [(0, 99)]
+        assert parse_ranges("bytes=900-", 1000) == [(900, 999)]
+        assert parse_ranges("bytes=-100", 1000) == [(900, 999)]
+        assert parse_ranges("bytes=500-5000", 1000) == [(500, 999)]
+
+    def test_multiple_ranges_are_sorted_and_merged(self):
+        assert parse_ranges("bytes=500-599, 0-99, 50-149", 1000) == [(0, 149), (500, 599)]
+
+    def test_unsatisfiable_and_malformed(self):
+        assert parse_ranges("bytes=1000-", 1000) == []
+        assert parse_ranges("bytes=5-2", 1000) is None
+        assert parse_ranges("items=0-1", 1000) is None
+        assert parse_ranges("bytes=abc", 1000) is None
+
+
+class TestStreamFile:
+    """Tests for the streaming response."""
+
+    def test_full_file(self, stream_client):
+        response = stream_client.get("/stream")
+
+        assert response.status_code == 200
+        assert response.content == CONTENT
+        assert response.headers["accept-ranges"] == "bytes"
+        assert response.headers["etag"]
+
+    def test_single_range(self, stream_client):
+        response = stream_client.get("/stream", headers={"Range": "bytes=100-199"})
+
+        assert response.status_code == 206
+        assert response.content == CONTENT[100:200]
+        assert response.headers["content-range"] == f"bytes 100-199/{len(CONTENT)}"
+
+    def test_multiple_ranges(self, stream_client):
+        response = stream_client.get("/stream", headers={"Range": "bytes=0-9,1000-1009"})
+
+        assert response.status_code == 206
+        assert response.headers["content-type"].startswith("multipart/byteranges")
+        assert int(response.headers["content-length"]) == len(response.content)
+        assert CONTENT[0:10] in response.content
+        assert CONTENT[1000:1010] in response.content
+
+    def test_unsatisfiable_range(self, stream_client):
+        response = stream_client.get("/stream", headers={"Range": "bytes=99999-"})
+
+        assert response.status_code == 416
+        assert response.headers["content-range"] == f"bytes */{len(CONTENT)}"
+
+    def test_conditional_requests(self, stream_client):
+        etag = stream_client.get("/stream").headers["etag"]
+
+        assert stream_client.get("/stream", headers={"If-None-Match": etag}).status_code == 304
+
+        # A stale If-Range validator gets the whole file
+        stale = stream_client.get("/stream", headers={"Range": "bytes=0-9", "If-Range": '"old"'})
+        assert stale.status_code == 200
+        fresh = stream_client.get("/stream", headers={"Range": "bytes=0-9", "If-Range": etag})
+        assert fresh.status_code == 206
+
+
+class TestFileHandleCache:
+    """Tests for the open descriptor cache."""
+
+    def test_reuses_descriptor_until_file_changes(self, audio_file):
+        handles = FileHandleCache(capacity=4)
+        first = handles.acquire(audio_file)
+        handles.release(first)
+
+        assert handles.acquire(audio_file) is first
+
+        os.utime(audio_file, ns=(0, 0))
+        assert handles.acquire(audio_file) is not first
+
+    def test_evicted_descriptor_stays_open_while_in_use(self, tmp_path):
+        paths = [tmp_path / f"{i}.mp3" for i in range(2)]
+        for path in paths:
+            path.write_bytes(b"x")
+        handles = FileHandleCache(capacity=1)
+
+        in_use = handles.acquire(paths[0])
+        handles.release(handles.acquire(paths[1]))  # Evicts paths[0]
+
+        assert os.pread(in_use.fd, 1, 0) == b"x"
+        handles.release(in_use)
+        with pytest.raises(OSError):
+            os.fstat(in_use.fd)
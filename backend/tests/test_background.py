@@ -13,6 +13,7 @@ import pytest
 
 from app.services.background import (
     EXECUTOR_MAX_CONSECUTIVE_FAILURES,
+    AnalysisAdmission,
     BackgroundManager,
     get_background_manager,
 )
@@ -25,7 +26,7 @@ class TestBackgroundManagerInit:
         """Manager should initialize with correct default state."""
         manager = BackgroundManager()
 
-        assert manager._executor is None
+        assert manager._executors == {}
         assert manager._redis is None
         assert manager._current_sync_task is None
         assert manager._analysis_tasks == {}
@@ -33,13 +34,15 @@ class TestBackgroundManagerInit:
         assert manager._consecutive_executor_failures == 0
 
     def test_executor_created_lazily(self):
-        """Executor should be created on first access."""
+        """Each pool's executor should be created on first access."""
         manager = BackgroundManager()
-        assert manager._executor is None
+        assert manager._executors == {}
 
         with patch.object(manager, "_create_executor") as mock_create:
-            _ = manager.executor
-            mock_create.assert_called_once()
+            mock_create.side_effect = lambda pool: manager._executors.update({pool: MagicMock()})
+            _ = manager.executor("features")
+            _ = manager.executor("features")
+            mock_create.assert_called_once_with("features")
 
 
 class TestExecutorCircuitBreaker:
@@ -59,41 +62,41 @@ class TestExecutorCircuitBreaker:
     def test_reset_executor_increments_failure_count(self):
         """Each reset should increment failure count."""
         manager = BackgroundManager()
-        manager._executor = MagicMock()  # Fake executor exists
+        manager._executors["features"] = MagicMock()  # Fake executor exists
 
         # First reset should succeed
-        result = manager._reset_executor()
+        result = manager._reset_executor("features")
         assert result is True
         assert manager._consecutive_executor_failures == 1
 
     def test_reset_executor_rate_limited(self):
         """Resets should be rate-limited."""
         manager = BackgroundManager()
-        manager._executor = MagicMock()
+        manager._executors["features"] = MagicMock()
 
         # First reset succeeds
-        manager._reset_executor()
+        manager._reset_executor("features")
         assert manager._consecutive_executor_failures == 1
 
         # Immediate second reset should be rate-limited
-        result = manager._reset_executor()
+        result = manager._reset_executor("features")
         assert result is False
         assert manager._consecutive_executor_failures == 1  # Not incremented
 
     def test_reset_executor_disables_after_max_failures(self):
         """Executor should be disabled after too many failures."""
         manager = BackgroundManager()
-        manager._executor = MagicMock()
+        manager._executors["features"] = MagicMock()
 
         # Simulate consecutive failures by bypassing rate limiting
         for i in range(EXECUTOR_MAX_CONSECUTIVE_FAILURES):
-            manager._last_executor_reset = 0  # Bypass cooldown
-            manager._reset_executor()
+            manager._last_executor_reset.clear()  # Bypass cooldown
+            manager._reset_executor("features")
 
         assert manager._executor_disabled is True
 
         # Next reset should fail because disabled
-        result = manager._reset_executor()
+        result = manager._reset_executor("features")
         assert result is False
 
     def test_reset_circuit_breaker_manual(self):
@@ -163,6 +166,52 @@ class TestSyncLocking:
         assert manager_with_redis.is_sync_running() is False
 
 
+class TestCentroidRebuild:
+    """Tests for the startup centroid rebuild."""
+
+    @pytest.fixture
+    def manager(self):
+        manager = BackgroundManager()
+        manager._redis = MagicMock()
+        manager._redis.set.return_value = True
+        return manager
+
+    @pytest.mark.asyncio
+    async def test_current_centroids_are_not_rebuilt(self, manager):
+        """With a current version marker and filled tables, the triggers are trusted."""
+        from app.services.centroids import CENTROIDS_VERSION
+
+        manager._redis.get.return_value = str(CENTROIDS_VERSION).encode()
+        with (
+            patch("app.db.session.async_session_maker", MagicMock()),
+            patch("app.services.centroids.centroids_missing", AsyncMock(return_value=False)),
+            patch("app.services.centroids.rebuild_centroids", AsyncMock()) as rebuild,
+        ):
+            await manager._rebuild_centroids_if_needed()
+
+        rebuild.assert_not_awaited()
+        manager._redis.delete.assert_called_with("familiar:centroids:rebuild")
+
+    @pytest.mark.asyncio
+    async def test_outdated_centroids_are_rebuilt_once(self, manager):
+        from app.services.centroids import CENTROIDS_VERSION
+
+        manager._redis.get.return_value = None
+        with patch("app.services.centroids.rebuild_centroids", AsyncMock()) as rebuild:
+            await manager._rebuild_centroids_if_needed()
+
+        rebuild.assert_awaited_once()
+        manager._redis.set.assert_called_with("familiar:centroids:version", CENTROIDS_VERSION)
+
+    @pytest.mark.asyncio
+    async def test_rebuild_skipped_while_another_worker_holds_lock(self, manager):
+        manager._redis.set.return_value = False
+        with patch("app.services.centroids.rebuild_centroids", AsyncMock()) as rebuild:
+            await manager._rebuild_centroids_if_needed()
+
+        rebuild.assert_not_awaited()
+
+
 class TestAnalysisTaskManagement:
     """Tests for analysis task tracking."""
 
@@ -258,6 +307,19 @@ class TestRunAnalysis:
             assert "track1:embedding" in manager._analysis_tasks
 
 
+    @pytest.mark.asyncio
+    async def test_start_analysis_task_reuses_running_task(self, manager):
+        """The queue consumer should join a task already started for the track."""
+        with patch.object(manager, "_do_features", new_callable=AsyncMock) as mock_do:
+            mock_do.return_value = {"status": "success"}
+            first = manager.start_analysis_task("track1", "features")
+            second = manager.start_analysis_task("track1", "features")
+
+            assert first is second
+            assert await first == {"status": "success"}
+            mock_do.assert_called_once_with("track1")
+
+
 class TestRunCpuBound:
     """Tests for run_cpu_bound method."""
 
@@ -265,7 +327,7 @@ class TestRunCpuBound:
     def manager(self):
         """Create a BackgroundManager instance."""
         manager = BackgroundManager()
-        manager._executor = MagicMock()
+        manager._executors["features"] = MagicMock()
         return manager
 
     @pytest.mark.asyncio
@@ -275,7 +337,8 @@ class TestRunCpuBound:
             return x * 2
 
         with patch("asyncio.get_event_loop") as mock_loop:
-            mock_loop.return_value.run_in_executor = AsyncMock(return_value=10)
+            # Workers return the result with their peak RSS
+            mock_loop.return_value.run_in_executor = AsyncMock(return_value=(10, 0.0))
 
             result = await manager.run_cpu_bound(test_func, 5)
 
@@ -287,7 +350,7 @@ class TestRunCpuBound:
         manager._consecutive_executor_failures = 3
 
         with patch("asyncio.get_event_loop") as mock_loop:
-            mock_loop.return_value.run_in_executor = AsyncMock(return_value=42)
+            mock_loop.return_value.run_in_executor = AsyncMock(return_value=(42, 0.0))
 
             await manager.run_cpu_bound(lambda x: x, 1)
 
@@ -311,7 +374,7 @@ class TestRunCpuBound:
             call_count += 1
             if call_count == 1:
                 raise BrokenProcessPool()
-            return 42
+            return 42, 0.0
 
         with patch("asyncio.get_event_loop") as mock_loop:
             mock_loop.return_value.run_in_executor = mock_run_in_executor
@@ -321,6 +384,126 @@ class TestRunCpuBound:
                 assert result == 42
                 assert call_count == 2
 
+    @pytest.mark.asyncio
+    async def test_run_cpu_bound_records_worker_peak(self, manager):
+        """The worker's sampled peak RSS should become the pool's job estimate."""
+        with patch("asyncio.get_event_loop") as mock_loop:
+            mock_loop.return_value.run_in_executor = AsyncMock(return_value=(1, 850.0))
+
+            await manager.run_cpu_bound(lambda x: x, 1, pool="features")
+
+        assert manager._admission.job_estimate_mb("features") == 850.0
+
+
+class TestAnalysisAdmission:
+    """Tests for memory-aware admission across analysis pools."""
+
+    @pytest.fixture
+    def admission(self):
+        return AnalysisAdmission(
+            budget_mb=4000,
+            workers={"features": 4, "embedding": 1},
+            default_job_mb={"features": 1000, "embedding": 3000},
+        )
+
+    @pytest.mark.asyncio
+    async def test_admits_up_to_budget(self, admission):
+        """Jobs beyond the memory budget wait even with free workers."""
+        started = 0
+        release = asyncio.Event()
+
+        async def job():
+            nonlocal started
+            async with admission.admit("features"):
+                started += 1
+                await release.wait()
+
+        tasks = [asyncio.create_task(job()) for _ in range(4)]
+        await asyncio.sleep(0.01)
+        assert started == 4  # 4 x 1000 MB fits
+
+        admission.budget_mb = 2500
+        extra = asyncio.create_task(job())
+        await asyncio.sleep(0.01)
+        assert started == 4  # Pool is full anyway
+
+        release.set()
+        await asyncio.gather(*tasks, extra)
+        assert started == 5
+
+    @pytest.mark.asyncio
+    async def test_single_job_admitted_over_budget(self, admission):
+        """A job larger than the budget still runs when nothing else is running."""
+        admission.budget_mb = 1000
+        async with admission.admit("embedding"):
+            assert admission.get_status()["pools"]["embedding"]["running"] == 1
+
+    @pytest.mark.asyncio
+    async def test_waiting_embedding_job_not_starved(self, admission):
+        """Once an embedding job waits for memory, new feature jobs queue behind it."""
+        admission.budget_mb = 3500
+        release_first = asyncio.Event()
+        order: list[str] = []
+
+        async def job(phase, wait=None):
+            async with admission.admit(phase):
+                order.append(phase)
+                if wait:
+                    await wait.wait()
+
+        first = asyncio.create_task(job("features", release_first))
+        await asyncio.sleep(0.01)
+        embedding = asyncio.create_task(job("embedding"))
+        await asyncio.sleep(0.01)
+        later_features = asyncio.create_task(job("features"))
+        await asyncio.sleep(0.01)
+        assert order == ["features"]
+
+        release_first.set()
+        await asyncio.gather(first, embedding, later_features)
+        assert order == ["features", "embedding", "features"]
+
+
+class TestEmbeddingBatcher:
+    """Tests for batching embedding jobs for the CLAP workers."""
+
+    @pytest.fixture
+    def manager(self):
+        manager = BackgroundManager()
+        manager._redis = MagicMock()
+        return manager
+
+    @pytest.mark.asyncio
+    async def test_submissions_share_one_batch_job(self, manager):
+        """Tracks submitted together should run as one batch and get their own results."""
+        manager._embedding_batcher.batch_size = 3
+
+        async def fake_run_cpu_bound(func, ids, **kwargs):
+            return {tid: {"status": "success", "embedding_generated": True, "id": tid} for tid in ids}
+
+        with patch.object(manager, "run_cpu_bound", side_effect=fake_run_cpu_bound) as mock_run:
+            results = await asyncio.gather(
+                *(manager._embedding_batcher.submit(f"track{i}") for i in range(3))
+            )
+
+        mock_run.assert_called_once()
+        assert [r["id"] for r in results] == ["track0", "track1", "track2"]
+
+    @pytest.mark.asyncio
+    async def test_partial_batch_flushes_after_wait(self, manager):
+        """A batch that doesn't fill should still run after the wait."""
+        manager._embedding_batcher.batch_size = 16
+        manager._embedding_batcher.max_wait_s = 0.01
+
+        with patch.object(
+            manager, "run_cpu_bound", new_callable=AsyncMock,
+            return_value={"track1": {"status": "success", "embedding_generated": False}},
+        ) as mock_run:
+            result = await manager._embedding_batcher.submit("track1")
+
+        mock_run.assert_called_once()
+        assert result["status"] == "success"
+
 
 class TestRunSync:
     """Tests for run_sync method."""
@@ -459,7 +642,7 @@ class TestStartupShutdown:
     async def test_shutdown_shuts_down_executor(self, manager):
         """Shutdown should shut down executor."""
         mock_executor = MagicMock()
-        manager._executor = mock_executor
+        manager._executors["features"] = mock_executor
 
         await manager.shutdown()
 
@@ -489,14 +672,16 @@ class TestCrashedTrackTracking:
     """Tests for crashed track ID tracking."""
 
     def test_reset_executor_tracks_crashed_track(self):
-        """Executor reset should track current track ID."""
+        """Executor reset should track the pool's in-flight track IDs."""
         manager = BackgroundManager()
-        manager._executor = MagicMock()
-        manager._current_track_id = "track-123"
+        manager._executors["features"] = MagicMock()
+        manager._running_track_ids["features"] = {"track-123"}
+        manager._running_track_ids["embedding"] = {"track-456"}
 
-        manager._reset_executor()
+        manager._reset_executor("features")
 
         assert "track-123" in manager._crashed_track_ids
+        assert "track-456" not in manager._crashed_track_ids
 
     def test_reset_circuit_breaker_clears_crashed_tracks(self):
         """Manual reset should clear crashed track list."""
@@ -0,0 +1,80 @@
+"""Tests for reading artist/album centroids.
+
+Uses a mocked database session and embedding store.
+"""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+import numpy as np
+import pytest
+
+from app.services.centroids import get_centroids
+
+
+def vec(*components: float) -> np.ndarray:
+    vector = np.zeros(512, dtype=np.float32)
+    vector[:len(components)] = components
+    return vector
+
+
+def centroid(artist, embedding_sum, track_count, first=None, representative=None):
+    row = MagicMock()
+    row.artist = artist
+    row.embedding_sum = embedding_sum
+    row.track_count = track_count
+    row.first_track_id = first
+    row.representative_track_id = representative
+    return row
+
+
+def result(scalars=None, rows=None):
+    res = MagicMock()
+    res.scalars.return_value.all.return_value = scalars or []
+    res.all.return_value = rows or []
+    return res
+
+
+@pytest.mark.asyncio
+async def test_mean_is_sum_over_count():
+    first, rep = uuid4(), uuid4()
+    db = AsyncMock()
+    db.execute.return_value = result(scalars=[centroid("Boards", vec(4, 2), 2, first, rep)])
+
+    centroids = await get_centroids(db, "artists")
+
+    assert centroids["Boards"]["mean_embedding"][:2].tolist() == [2.0, 1.0]
+    assert centroids["Boards"]["first_track_id"] == str(first)
+    assert centroids["Boards"]["representative_track_id"] == str(rep)
+    assert db.execute.await_count == 1  # Nothing to refill
+
+
+@pytest.mark.asyncio
+async def test_cleared_representative_is_refilled_from_store():
+    near, far = sorted([uuid4(), uuid4()])
+    db = AsyncMock()
+    db.execute.side_effect = [
+        result(scalars=[centroid("Boards", vec(2, 0.2), 2)]),
+        result(rows=[(near, "Boards"), (far, "Boards")]),
+        result(),  # Persist the ids
+    ]
+    store = MagicMock()
+    store.get_vectors = AsyncMock(return_value=([near, far], np.stack([vec(1, 0), vec(1, 1)])))
+
+    with patch("app.services.embedding_store.get_embedding_store", return_value=store):
+        centroids = await get_centroids(db, "artists")
+
+    assert centroids["Boards"]["representative_track_id"] == str(near)
+    assert centroids["Boards"]["first_track_id"] == str(near)
+    db.commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_group_without_stored_members_is_skipped():
+    db = AsyncMock()
+    db.execute.side_effect = [result(scalars=[centroid("Boards", vec(1), 1)]), result()]
+    store = MagicMock()
+    store.get_vectors = AsyncMock(return_value=([], np.empty((0, 512), dtype=np.float32)))
+
+    with patch("app.services.embedding_store.get_embedding_store", return_value=store):
+        assert await get_centroids(db, "artists") == {}
@@ -0,0 +1,157 @@
+"""Tests for the in-process embedding store.
+
+Exercises the matrix, updates and snapshots directly; no database or Redis.
+"""
+
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+import numpy as np
+import pytest
+
+from app.services.embedding_store import EMBEDDING_DIM, EmbeddingStore
+
+
+def unit(*components: float) -> np.ndarray:
+    """A 512-dim vector with the given leading components."""
+    vector = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+    vector[:len(components)] = components
+    return vector
+
+
+@pytest.fixture
+def store(tmp_path):
+    return EmbeddingStore(tmp_path)
+
+
+class TestQueries:
+    """Tests for gathering vectors and nearest-neighbor search."""
+
+    def test_nearest_orders_by_cosine_similarity(self, store):
+        a, b, c = uuid4(), uuid4(), uuid4()
+        store.apply({a: unit(1, 0), b: unit(1, 1), c: unit(0, 5)})
+
+        nearest = store.nearest_rows(unit(1, 0), k=3)
+
+        assert [track_id for track_id, _ in nearest] == [a, b, c]
+        assert nearest[0][1] == pytest.approx(1.0)
+
+    def test_nearest_skips_excluded_and_removed(self, store):
+        a, b, c = uuid4(), uuid4(), uuid4()
+        store.apply({a: unit(1, 0), b: unit(1, 1), c: unit(1, 2)})
+        store.apply({b: None})
+
+        nearest = store.nearest_rows(unit(1, 0), k=3, exclude={a})
+
+        assert [track_id for track_id, _ in nearest] == [c]
+        assert len(store) == 2
+
+    @pytest.mark.asyncio
+    async def test_get_vectors_keeps_order_and_skips_missing(self, store, monkeypatch):
+        async def no_sync():
+            pass
+
+        monkeypatch.setattr(store, "sync", no_sync)
+        a, b = uuid4(), uuid4()
+        store.apply({a: unit(1), b: unit(2)})
+
+        found, vectors = await store.get_vectors([b, uuid4(), a])
+
+        assert found == [b, a]
+        assert vectors[:, 0].tolist() == [2.0, 1.0]
+
+
+class TestSync:
+    """Tests for applying the Redis change log."""
+
+    @pytest.mark.asyncio
+    async def test_change_log_failure_keeps_current_vectors(self, store):
+        a = uuid4()
+        store.apply({a: unit(1)})
+        store._loaded = True
+        redis = MagicMock()
+        redis.mget.return_value = [b"5", b"0"]
+        redis.zrangebyscore.side_effect = ConnectionError("Redis went away")
+
+        with patch("app.services.tasks.get_redis", return_value=redis):
+            await store.sync()
+
+        assert len(store) == 1
+        assert store._watermark == 0  # Retried on the next sync
+
+
+class TestSnapshots:
+    """Tests for writing and mapping snapshots."""
+
+    def test_snapshot_round_trip(self, store, tmp_path):
+        a, b = uuid4(), uuid4()
+        store.apply({a: unit(1, 0), b: unit(0, 1)})
+        store._watermark = 7
+        store.write_snapshot()
+
+        loaded = EmbeddingStore(tmp_path)
+        assert loaded.load_snapshot()
+        assert loaded._watermark == 7
+        assert isinstance(loaded._base, np.memmap)
+        assert [track_id for track_id, _ in loaded.nearest_rows(unit(0, 1), k=1)] == [b]
+
+    def test_updates_after_load_leave_snapshot_untouched(self, store, tmp_path):
+        a = uuid4()
+        store.apply({a: unit(1, 0)})
+        store.write_snapshot()
+
+        store.apply({a: unit(0, 1), uuid4(): unit(1, 1)})  # In place, and appended to the tail
+
+        assert store._tail_len == 1
+        reloaded = EmbeddingStore(tmp_path)
+        reloaded.load_snapshot()
+        assert reloaded._base[0, 0] == 1.0
+
+    def test_compaction_drops_removed_rows(self, store, tmp_path):
+        a, b = uuid4(), uuid4()
+        store.apply({a: unit(1), b: unit(2)})
+        store.apply({a: None})
+        store.write_snapshot()
+
+        assert store._ids == [b]
+        assert store._tail_len == 0
+        assert len(list(tmp_path.glob("snapshot-*"))) == 1
+
+    def test_cleanup_keeps_newer_snapshots(self, store, tmp_path):
+        older = tmp_path / "snapshot-1-1"
+        newer = tmp_path / "snapshot-99999999999999-1"  # Another process's, published later
+        older.mkdir()
+        newer.mkdir()
+        store.apply({uuid4(): unit(1)})
+
+        store.write_snapshot()
+
+        assert not older.exists()
+        assert newer.exists()
+
+    @pytest.mark.asyncio
+    async def test_compaction_failure_keeps_applied_changes(self, store, monkeypatch):
+        a, b = uuid4(), uuid4()
+        store.apply({a: unit(1)})
+        store._loaded = True
+        redis = MagicMock()
+        redis.mget.return_value = [b"1", b"0"]
+        redis.zrangebyscore.return_value = [str(b).encode()]
+
+        async def fetch(track_ids):
+            return {b: unit(2)}
+
+        def lost_snapshot():
+            raise FileNotFoundError("snapshot removed by another process")
+
+        monkeypatch.setattr(store, "_fetch", fetch)
+        monkeypatch.setattr(store, "write_snapshot", lost_snapshot)
+        monkeypatch.setattr("app.services.embedding_store.COMPACT_MIN_ROWS", 1)
+        with patch("app.services.tasks.get_redis", return_value=redis):
+            await store.sync()
+
+        assert len(store) == 2
+        assert store._watermark == 1
+
+    def test_missing_snapshot_is_reported(self, store):
+        assert not store.load_snapshot()
@@ -0,0 +1,43 @@
+"""Tests for the blocked k-NN engine behind the music map edges."""
+
+import numpy as np
+
+from app.services.knn import knn_edges, top_k_cosine
+
+
+def dense_top_k(embeddings: np.ndarray, k: int) -> np.ndarray:
+    unit = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    sims = unit @ unit.T
+    np.fill_diagonal(sims, -np.inf)
+    return np.argsort(-sims, axis=1)[:, :k]
+
+
+def test_blocks_match_dense_search():
+    embeddings = np.random.default_rng(0).normal(size=(50, 16)).astype(np.float32)
+
+    # A tiny block size forces many row blocks
+    indices, similarities = top_k_cosine(embeddings, k=4, block_bytes=7 * 50 * 4)
+
+    assert (indices == dense_top_k(embeddings, 4)).all()
+    assert (np.diff(similarities, axis=1) <= 0).all()
+
+
+def test_k_is_capped_and_self_is_excluded():
+    embeddings = np.eye(3, dtype=np.float32)
+
+    indices, _ = top_k_cosine(embeddings, k=10)
+
+    assert indices.shape == (3, 2)
+    assert all(i not in row for i, row in enumerate(indices))
+
+
+def test_edges_are_deduplicated_and_positive():
+    embeddings = np.array([[1, 0], [1, 0.1], [0, 1], [-1, 0]], dtype=np.float32)
+
+    sources, targets, weights = knn_edges(embeddings, k=2)
+
+    pairs = [tuple(sorted(p)) for p in zip(sources.tolist(), targets.tolist(), strict=True)]
+    assert len(pairs) == len(set(pairs))
+    assert (weights > 0).all()
+    assert (0, 1) in pairs
+    assert sources[0] == 0  # First listed by the earliest row
@@ -0,0 +1,70 @@
+"""Tests for the library stats snapshots.
+
+Uses a mocked database session.
+"""
+
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+import pytest
+
+from app.services.library_stats import (
+    SNAPSHOT_MAX_AGE,
+    compute_mood_distribution,
+    get_library_stats,
+)
+
+
+def snapshot_row(data: dict, age: timedelta) -> MagicMock:
+    row = MagicMock()
+    row.data = data
+    row.computed_at = datetime.utcnow() - age
+    return row
+
+
+@pytest.mark.asyncio
+async def test_mood_cells_from_aggregate_rows():
+    samples = [uuid4(), uuid4()]
+    db = AsyncMock()
+    db.execute.return_value = [(0, 3, 2, samples), (4, 4, 7, samples[:1])]
+    db.scalar.return_value = 12
+
+    data = await compute_mood_distribution(db, grid_size=5)
+
+    first, last = data["cells"]
+    assert (first["energy_min"], first["energy_max"]) == (0.0, 0.2)
+    assert (first["valence_min"], first["valence_max"]) == pytest.approx((0.6, 0.8))
+    assert first["sample_track_ids"] == [str(track_id) for track_id in samples]
+    assert (last["energy_max"], last["valence_max"], last["track_count"]) == (1.0, 1.0, 7)
+    assert (data["grid_size"], data["total_with_mood"], data["total_without_mood"]) == (5, 9, 3)
+
+
+@pytest.mark.asyncio
+async def test_fresh_snapshot_is_served_without_aggregating():
+    stats = {"total_tracks": 3}
+    db = AsyncMock()
+    db.execute.return_value = MagicMock(one_or_none=MagicMock(return_value=snapshot_row(stats, timedelta())))
+
+    assert await get_library_stats(db) == stats
+    db.execute.assert_awaited_once()
+    db.commit.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_stale_snapshot_is_recomputed_and_stored():
+    stale = snapshot_row({"total_tracks": 3}, SNAPSHOT_MAX_AGE + timedelta(minutes=1))
+    counts = (10, 4, 2, 6, 3, 1, 7)
+    db = AsyncMock()
+    db.execute.side_effect = [
+        MagicMock(one_or_none=MagicMock(return_value=stale)),
+        MagicMock(one=MagicMock(return_value=counts)),
+        MagicMock(),  # Upsert
+    ]
+
+    stats = await get_library_stats(db)
+
+    assert stats["total_tracks"] == 10
+    assert (stats["analyzed_tracks"], stats["pending_analysis"]) == (7, 3)
+    assert db.execute.await_count == 3
+    db.commit.assert_awaited_once()
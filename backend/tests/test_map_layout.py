@@ -0,0 +1,93 @@
+"""Tests for incremental music map layouts.
+
+UMAP is replaced by a fake model so placements are predictable.
+"""
+
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from app.services.map_layout import MapLayoutStore
+
+
+class FakeUMAP:
+    """Fits to the leading components; transforms to those plus 100."""
+
+    def __init__(self, n_components, init):
+        self.n_components = n_components
+        self.init = init
+
+    def fit_transform(self, matrix):
+        return matrix[:, :self.n_components].copy()
+
+    def transform(self, matrix):
+        return matrix[:, :self.n_components] + 100
+
+
+def embeddings(count: int, offset: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(offset)
+    return rng.normal(size=(count, 8)).astype(np.float32)
+
+
+@pytest.fixture
+def layouts(tmp_path):
+    with patch("app.services.map_layout.create_umap", FakeUMAP):
+        yield MapLayoutStore(tmp_path)
+
+
+def test_first_layout_is_fit(layouts):
+    matrix = embeddings(10)
+
+    positions, refit_due = layouts.place("artists_2d", [str(i) for i in range(10)], matrix, 2)
+
+    assert np.allclose(positions, matrix[:, :2])
+    assert not refit_due
+
+
+def test_known_entities_keep_positions_and_new_ones_are_transformed(layouts, tmp_path):
+    names = [str(i) for i in range(10)]
+    matrix = embeddings(10)
+    layouts.place("artists_2d", names, matrix, 2)
+
+    new = embeddings(1, offset=1)
+    positions, refit_due = layouts.place("artists_2d", [*names, "new"], np.vstack([matrix, new]), 2)
+
+    assert np.allclose(positions[:10], matrix[:, :2])
+    assert np.allclose(positions[10], new[0, :2] + 100)
+    assert not refit_due  # 1 of 10 placed since the fit
+
+    # The placement is persisted for other workers
+    reloaded, _ = MapLayoutStore(tmp_path).place("artists_2d", ["new"], new, 2)
+    assert np.allclose(reloaded, positions[10:])
+
+
+def test_changed_embedding_is_replaced(layouts):
+    names = [str(i) for i in range(10)]
+    matrix = embeddings(10)
+    layouts.place("albums_3d", names, matrix, 3)
+
+    changed = matrix.copy()
+    changed[0] = -changed[0]
+    positions, _ = layouts.place("albums_3d", names, changed, 3)
+
+    assert np.allclose(positions[0], changed[0, :3] + 100)
+    assert np.allclose(positions[1:], matrix[1:, :3])
+
+
+def test_drift_triggers_seeded_refit(layouts):
+    names = [str(i) for i in range(10)]
+    matrix = embeddings(10)
+    layouts.place("artists_2d", names, matrix, 2)
+
+    grown_names = names + [f"new{i}" for i in range(3)]
+    grown = np.vstack([matrix, embeddings(3, offset=1)])
+    positions, refit_due = layouts.place("artists_2d", grown_names, grown, 2)
+    assert refit_due
+
+    layouts.refit("artists_2d", grown_names, grown, 2)
+
+    state = layouts._load("artists_2d")
+    assert np.allclose(state.model.init, positions)  # Seeded with the current layout
+    assert state.fitted_count == 13
+    assert not state.needs_refit()
@@ -0,0 +1,103 @@
+"""Tests for the in-memory library match index."""
+
+from uuid import uuid4
+
+from app.services.match_index import MatchQuery, TrackMatchIndex
+
+
+def make_index(*tracks: dict) -> tuple[TrackMatchIndex, list]:
+    index = TrackMatchIndex()
+    ids = []
+    for track in tracks:
+        track_id = uuid4()
+        index.add(
+            track_id,
+            track.get("isrc"),
+            track.get("mbid"),
+            track.get("title"),
+            track.get("artist"),
+            track.get("duration"),
+        )
+        ids.append(track_id)
+    return index, ids
+
+
+def test_identifier_and_exact_matches():
+    index, ids = make_index(
+        {"title": "Paranoid Android", "artist": "Radiohead", "isrc": "GBAYE9700150"},
+        {"title": "Karma Police", "artist": "Radiohead", "mbid": "abc"},
+    )
+
+    isrc, mbid, exact = index.find([
+        MatchQuery(title="Something else", artist="Someone", isrc="GBAYE9700150"),
+        MatchQuery(title=None, artist=None, musicbrainz_id="abc"),
+        MatchQuery(title="  KARMA police", artist="radiohead "),
+    ])
+
+    assert (isrc.track_id, isrc.method) == (ids[0], "isrc")
+    assert (mbid.track_id, mbid.method) == (ids[1], "musicbrainz")
+    assert (exact.track_id, exact.method) == (ids[1], "exact")
+
+
+def test_partial_match_is_optional():
+    index, ids = make_index({"title": "Karma Police (Live)", "artist": "Radiohead & Friends"})
+    query = MatchQuery(title="Karma Police", artist="Radiohead")
+
+    [partial] = index.find([query])
+    assert (partial.track_id, partial.method, partial.confidence) == (ids[0], "partial", 0.9)
+
+    [result] = index.find([query], partial=False)
+    assert result is None or result.method == "fuzzy"
+
+
+def test_fuzzy_match_ignores_annotations_and_picks_best():
+    index, ids = make_index(
+        {"title": "Heroes", "artist": "David Bowie"},
+        {"title": "Heroes", "artist": "Daniel Bowen"},
+        {"title": "Life on Mars?", "artist": "David Bowie"},
+    )
+
+    [result] = index.find([MatchQuery(title="Heroes (2017 Remaster)", artist="David Bowie.")])
+
+    assert result.track_id == ids[0]
+    assert result.method == "fuzzy"
+    assert 0.85 <= result.confidence <= 1.0
+
+
+def test_fuzzy_threshold_and_missing_fields():
+    index, _ = make_index({"title": "Heroes", "artist": "David Bowie"})
+
+    results = index.find([
+        MatchQuery(title="Zeroes", artist="Bavid Dowie"),
+        MatchQuery(title="Heroes", artist=None),
+        MatchQuery(title="Heroes", artist="David Bowie", isrc="missing"),
+    ])
+
+    assert results[0] is None
+    assert results[1] is None
+    assert results[2].method == "exact"
+
+
+def test_duration_disambiguates():
+    index, ids = make_index(
+        {"title": "Hurt", "artist": "Johnny Cash", "duration": 218},
+        {"title": "Hurt", "artist": "Johnny Cash.", "duration": 373},
+    )
+
+    [result] = index.find([MatchQuery(title="Hurt!", artist="Johnny Cash!", duration=372)])
+
+    assert result.track_id == ids[1]
+
+
+def test_updates_and_removals():
+    index, ids = make_index({"title": "Heroes", "artist": "David Bowie", "isrc": "X"})
+    query = MatchQuery(title="Heroes", artist="David Bowie", isrc="X")
+
+    index.add(ids[0], None, None, "Changes", "David Bowie")
+    [result] = index.find([query])
+    assert result is None or result.method == "fuzzy"
+    assert len(index) == 1
+
+    index.discard(ids[0])
+    assert index.find([query]) == [None]
+    assert len(index) == 0
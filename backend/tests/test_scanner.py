@@ -35,7 +35,12 @@ import pytest_asyncio
 from sqlalchemy import delete, select
 
 from app.db.models import Track, TrackStatus
-from app.services.scanner import LibraryScanner, compute_file_hash
+from app.services.scanner import (
+    LibraryScanner,
+    compute_file_hash,
+    detect_scan_concurrency,
+    discover_files,
+)
 
 # Path to test audio fixtures
 FIXTURES_DIR = Path(__file__).parent / "fixtures" / "audio"
@@ -103,6 +108,94 @@ class TestComputeFileHash:
         assert compute_file_hash(file1) != compute_file_hash(file2)
 
 
+class TestScanConcurrency:
+    """Tests for picking scan pipeline worker counts."""
+
+    def test_network_mount_gets_high_concurrency(self, monkeypatch):
+        """Network filesystems should keep many hash jobs in flight."""
+        import app.services.scanner as scanner_module
+
+        monkeypatch.setattr(scanner_module, "_find_mount_fstype", lambda path: "cifs")
+        concurrency = detect_scan_concurrency(FIXTURES_DIR)
+        assert concurrency.storage == "network"
+        assert concurrency.io_workers > concurrency.metadata_workers > 4
+
+    def test_spinning_disk_gets_low_concurrency(self, monkeypatch):
+        """Rotational disks should not be hammered with parallel seeks."""
+        import app.services.scanner as scanner_module
+
+        monkeypatch.setattr(scanner_module, "_find_mount_fstype", lambda path: "ext4")
+        monkeypatch.setattr(scanner_module, "_is_rotational", lambda path: True)
+        concurrency = detect_scan_concurrency(FIXTURES_DIR)
+        assert concurrency.storage == "rotational"
+        assert concurrency.io_workers <= 2
+
+    def test_explicit_settings_override_detection(self, monkeypatch):
+        """Configured worker counts should win over auto-detection."""
+        from app.config import settings
+
+        monkeypatch.setattr(settings, "scan_io_workers", 7)
+        monkeypatch.setattr(settings, "scan_metadata_workers", 3)
+        concurrency = detect_scan_concurrency(FIXTURES_DIR)
+        assert concurrency.io_workers == 7
+        assert concurrency.metadata_workers == 3
+
+
+@pytest.mark.asyncio(loop_scope="function")
+class TestDiscoverFiles:
+    """Tests for streaming file discovery."""
+
+    async def test_streams_all_audio_files(self):
+        """Every audio file under the root should be yielded exactly once."""
+        expected = {str(p) for p in FIXTURES_DIR.rglob("*.mp3")}
+        found = [str(f.path) async for f in discover_files(FIXTURES_DIR, walkers=2)]
+        assert len(found) == len(expected)
+        assert set(found) == expected
+
+    async def test_files_carry_stat_signature(self):
+        """Discovered files should include the size and mtime from the walk."""
+        async for discovered in discover_files(FIXTURES_DIR):
+            assert discovered.size == discovered.path.stat().st_size
+            assert discovered.mtime is not None
+
+    async def test_early_close_stops_walkers(self):
+        """Closing the stream early should not hang on blocked walker threads."""
+        stream = discover_files(FIXTURES_DIR, walkers=2)
+        first = await stream.__anext__()
+        assert first.path.suffix == ".mp3"
+        await stream.aclose()
+
+    async def test_walker_failure_raises_instead_of_hanging(self, monkeypatch):
+        """An unexpected error in a walker thread should fail the stream, not block it."""
+        import asyncio
+
+        import app.services.scanner as scanner_module
+
+        def broken_walk(root, emit):
+            raise RuntimeError("walker crashed")
+
+        monkeypatch.setattr(scanner_module, "_walk_tree_sync", broken_walk)
+
+        async def consume():
+            return [f async for f in discover_files(FIXTURES_DIR, walkers=2)]
+
+        with pytest.raises(RuntimeError, match="walker crashed"):
+            await asyncio.wait_for(consume(), timeout=10)
+
+    async def test_bogus_mtime_is_skipped(self, monkeypatch):
+        """A file whose mtime can't be converted is skipped like an unreadable one."""
+        import app.services.scanner as scanner_module
+
+        class BogusDatetime:
+            @staticmethod
+            def fromtimestamp(ts):
+                raise OverflowError("timestamp out of range")
+
+        monkeypatch.setattr(scanner_module, "datetime", BogusDatetime)
+        found = [f async for f in discover_files(FIXTURES_DIR, walkers=2)]
+        assert found == []
+
+
 class TestMetadataExtraction:
     """Tests for metadata extraction from real audio files."""
 
@@ -133,6 +226,51 @@ class TestMetadataExtraction:
         assert meta["artist"] == "Kevin MacLeod"
         assert meta["duration_seconds"] is not None
 
+    def test_extract_metadata_ignores_itunes_comment_frames(self):
+        """iTunNORM/iTunSMPB COMM frames aren't user comments."""
+        from app.services.metadata import extract_metadata
+
+        only_itunes = extract_metadata(FIXTURES_DIR / "artist1" / "album1" / "orchestral_short.mp3")
+        assert only_itunes["comment"] is None
+
+        mixed = extract_metadata(FIXTURES_DIR / "electronic_short.mp3")
+        assert mixed["comment"].startswith("Seven seconds")
+
+    def test_read_metadata_opens_file_once(self, monkeypatch):
+        """Tags, stream info and the MP3 bitrate mode come from a single open."""
+        import builtins
+
+        from app.services.metadata import read_metadata
+
+        path = FIXTURES_DIR / "artist2" / "album1" / "comedy_intro.mp3"
+        real_open = builtins.open
+        opened = []
+
+        def counting_open(file, *args, **kwargs):
+            if str(file) == str(path):
+                opened.append(file)
+            return real_open(file, *args, **kwargs)
+
+        monkeypatch.setattr(builtins, "open", counting_open)
+        meta = read_metadata(path)
+
+        assert len(opened) == 1
+        assert meta.title == "Silly Intro"
+        assert meta.format == "mp3"
+        assert meta.bitrate_mode in ("CBR", "VBR", None)
+        assert meta.as_dict()["artist"] == "Alexander Nakarada"
+
+    def test_read_metadata_unreadable_file(self, tmp_path):
+        """Files mutagen can't parse give an empty record."""
+        from app.services.metadata import read_metadata
+
+        path = tmp_path / "noise.mp3"
+        path.write_bytes(b"not audio" * 10)
+
+        meta = read_metadata(path)
+        assert meta.title is None
+        assert meta.duration_seconds is None
+
 
 @pytest.mark.asyncio(loop_scope="function")
 class TestLibraryScanner:
@@ -202,6 +340,72 @@ class TestLibraryScanner:
             assert results2["new"] == 0
             assert results2["unchanged"] == 1
 
+    async def test_bulk_insert_spans_multiple_batches(self, clean_db, monkeypatch):
+        """New tracks should be bulk-inserted correctly when a scan spans several batches."""
+        from app.config import settings
+
+        monkeypatch.setattr(settings, "scan_batch_size", 2)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmp_path = Path(tmpdir)
+            shutil.copytree(FIXTURES_DIR, tmp_path / "music")
+
+            scanner = LibraryScanner(clean_db)
+            results = await scanner.scan(tmp_path / "music")
+
+            result = await clean_db.execute(select(Track))
+            tracks = result.scalars().all()
+            assert len(tracks) == results["new"]
+            # The duplicate is relocated by hash, never inserted twice
+            assert results["relocated"] == 1
+            assert len({t.file_hash for t in tracks}) == len(tracks)
+            assert all(t.file_size for t in tracks)
+
+    async def test_rescan_skips_hashing_when_stat_unchanged(self, clean_db, monkeypatch):
+        """Rescanning files with an unchanged size/mtime should not open them."""
+        import app.services.scanner as scanner_module
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmp_path = Path(tmpdir)
+            shutil.copy(FIXTURES_DIR / "electronic_short.mp3", tmp_path)
+
+            scanner = LibraryScanner(clean_db)
+            results1 = await scanner.scan(tmp_path)
+            assert results1["new"] == 1
+
+            def fail_hash(path):
+                raise AssertionError(f"Unchanged file was hashed: {path}")
+
+            monkeypatch.setattr(scanner_module, "_hash_file_sync", fail_hash)
+
+            results2 = await scanner.scan(tmp_path)
+            assert results2["unchanged"] == 1
+
+    async def test_rescan_rehashes_when_stat_changed(self, clean_db):
+        """A changed mtime should trigger a re-hash, and unchanged content stays unchanged."""
+        import os
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmp_path = Path(tmpdir)
+            test_file = tmp_path / "track.mp3"
+            shutil.copy(FIXTURES_DIR / "electronic_short.mp3", test_file)
+
+            scanner = LibraryScanner(clean_db)
+            await scanner.scan(tmp_path)
+
+            # Touch the file: new mtime, same content
+            stat = test_file.stat()
+            os.utime(test_file, (stat.st_atime, stat.st_mtime + 60))
+
+            results = await scanner.scan(tmp_path)
+            assert results["unchanged"] == 1
+            assert results["updated"] == 0
+
+            result = await clean_db.execute(select(Track))
+            track = result.scalar_one()
+            await clean_db.refresh(track)
+            assert track.file_size == stat.st_size
+
     async def test_hash_based_relocation_after_move(self, clean_db):
         """When files are moved to new directories, scanner should update paths by hash."""
         with tempfile.TemporaryDirectory() as tmpdir:
@@ -364,6 +568,57 @@ class TestLibraryScanner:
             assert track.status == TrackStatus.ACTIVE
             assert track.missing_since is None
 
+    async def test_sync_paths_applies_only_changed_paths(self, clean_db):
+        """Watcher batches create added files and mark removed directories missing."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmp_path = Path(tmpdir)
+            album_dir = tmp_path / "artist" / "album"
+            album_dir.mkdir(parents=True)
+            shutil.copy(FIXTURES_DIR / "artist2" / "album1" / "comedy_intro.mp3", tmp_path / "keep.mp3")
+            shutil.copy(FIXTURES_DIR / "electronic_short.mp3", album_dir / "track.mp3")
+
+            scanner = LibraryScanner(clean_db)
+            await scanner.scan(tmp_path)
+
+            # A new album appears and the old one is deleted
+            new_dir = tmp_path / "artist" / "new_album"
+            new_dir.mkdir()
+            shutil.copy(FIXTURES_DIR / "artist1" / "album1" / "ambient_loop.mp3", new_dir / "a.mp3")
+            shutil.rmtree(tmp_path / "artist" / "album")
+
+            results = await scanner.sync_paths(tmp_path, [new_dir, album_dir])
+            assert results["new"] == 1
+            assert results["marked_missing"] == 1
+            assert len(results["analysis_ids"]) == 1
+
+            result = await clean_db.execute(select(Track).where(Track.file_path == str(tmp_path / "keep.mp3")))
+            assert result.scalar_one().status == TrackStatus.ACTIVE
+
+    async def test_sync_paths_relocates_moved_file(self, clean_db):
+        """A move reported as delete + create keeps the same track."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmp_path = Path(tmpdir)
+            old_file = tmp_path / "old.mp3"
+            shutil.copy(FIXTURES_DIR / "electronic_short.mp3", old_file)
+
+            scanner = LibraryScanner(clean_db)
+            await scanner.scan(tmp_path)
+            result = await clean_db.execute(select(Track))
+            track_id = result.scalar_one().id
+
+            new_file = tmp_path / "renamed.mp3"
+            shutil.move(old_file, new_file)
+
+            results = await scanner.sync_paths(tmp_path, [old_file, new_file])
+            assert results["relocated"] == 1
+            assert results["new"] == 0
+            assert results["marked_missing"] == 0
+
+            result = await clean_db.execute(select(Track))
+            track = result.scalar_one()
+            assert track.id == track_id
+            assert track.file_path == str(new_file)
+
     async def test_multi_file_relocation_to_new_structure(self, clean_db):
         """Multiple files moved to completely new directory structure should all be matched by hash.
 
@@ -0,0 +1,95 @@
+"""Tests for embedding nearest-neighbor search.
+
+Uses a mocked database session; statements are answered in order.
+"""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+import pytest
+
+from app.services import similarity
+from app.services.similarity import get_similar_tracks, nearest_tracks
+
+
+def result(rows=None, scalars=None):
+    """Mocked query result with .all() rows and .scalars().all() values."""
+    res = MagicMock()
+    res.all.return_value = rows or []
+    res.scalars.return_value.all.return_value = scalars or []
+    res.scalar_one_or_none.return_value = scalars[0] if scalars else None
+    return res
+
+
+def make_track(track_id):
+    track = MagicMock()
+    track.id = track_id
+    return track
+
+
+class TestNearestTracks:
+    """Tests for filtering index candidates."""
+
+    @pytest.mark.asyncio
+    async def test_keeps_latest_analysis_of_active_tracks(self):
+        query_id, near, stale, inactive = uuid4(), uuid4(), uuid4(), uuid4()
+        candidates = [
+            (query_id, 5, 0.0),
+            (near, 5, 0.1),
+            (stale, 4, 0.2),  # Superseded analysis row
+            (inactive, 5, 0.3),  # Not returned by the ACTIVE track query
+        ]
+        tracks = [(make_track(near), 5), (make_track(stale), 5), (make_track(query_id), 5)]
+        db = AsyncMock()
+        db.execute.side_effect = [result(), result(rows=candidates), result(rows=tracks)]
+
+        nearest = await nearest_tracks(db, [0.0] * 512, limit=1, exclude_track_id=query_id)
+
+        assert [(track.id, dist) for track, dist in nearest] == [(near, 0.1)]
+
+    @pytest.mark.asyncio
+    async def test_widens_search_when_filtering_leaves_too_few(self):
+        track_ids = [uuid4() for _ in range(similarity.CANDIDATE_SLACK + 2)]
+        first = [(track_id, 5, 0.1) for track_id in track_ids]
+        db = AsyncMock()
+        db.execute.side_effect = [
+            result(), result(rows=first), result(rows=[]),  # All filtered out
+            result(), result(rows=first[:1]), result(rows=[(make_track(track_ids[0]), 5)]),
+        ]
+
+        nearest = await nearest_tracks(db, [0.0] * 512, limit=1)
+
+        assert len(nearest) == 1
+        assert db.execute.await_count == 6
+
+    @pytest.mark.asyncio
+    async def test_stops_when_index_is_exhausted(self):
+        db = AsyncMock()
+        db.execute.side_effect = [result(), result(rows=[(uuid4(), 5, 0.1)]), result(rows=[])]
+
+        assert await nearest_tracks(db, [0.0] * 512, limit=5) == []
+        assert db.execute.await_count == 3
+
+
+class TestGetSimilarTracks:
+    """Tests for the neighbor cache read path."""
+
+    @pytest.mark.asyncio
+    async def test_full_cached_list_skips_index(self):
+        cached = [make_track(uuid4()) for _ in range(3)]
+        db = AsyncMock()
+        db.execute.return_value = result(scalars=cached)
+
+        with patch.object(similarity.settings, "similar_tracks_cache_size", 10):
+            tracks = await get_similar_tracks(db, uuid4(), limit=3)
+
+        assert tracks == cached
+        assert db.execute.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_unembedded_track_returns_none(self):
+        db = AsyncMock()
+        db.execute.return_value = result()
+
+        with patch.object(similarity.settings, "similar_tracks_cache_size", 0):
+            assert await get_similar_tracks(db, uuid4(), limit=3) is None
@@ -0,0 +1,26 @@
+"""Tests for smart playlist membership syncing.
+
+Uses a mocked database session.
+"""
+
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.services.smart_playlists import MEMBERSHIP_OVERLAP, SmartPlaylistService
+
+
+@pytest.mark.asyncio
+async def test_change_check_uses_overlap_window():
+    """A change that committed late (timestamped before the last sync) still triggers a sync."""
+    synced_at = datetime(2026, 1, 1, 12, 0)
+    playlist = MagicMock()
+    playlist.members_synced_at = synced_at
+    service = SmartPlaylistService(AsyncMock())
+
+    with patch.object(service, "_changed_since", AsyncMock(return_value=False)) as changed_since:
+        await service.sync_members(playlist)
+
+    changed_since.assert_awaited_once_with(synced_at - MEMBERSHIP_OVERLAP)
+    service.db.commit.assert_not_awaited()
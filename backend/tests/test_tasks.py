@@ -0,0 +1,53 @@
+"""Tests for the analysis task functions that run in the process pools.
+
+Uses a mocked database session and CLAP extractor.
+"""
+
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+from sqlalchemy.orm.exc import StaleDataError
+
+from app.services.tasks import run_embedding_batch
+
+
+def scalars(items: list) -> MagicMock:
+    result = MagicMock()
+    result.scalars.return_value = items
+    return result
+
+
+def test_embedding_batch_saves_survivors_when_a_track_is_deleted(tmp_path):
+    """A track deleted mid-batch doesn't throw away the other tracks' embeddings."""
+    audio = tmp_path / "a.mp3"
+    audio.write_bytes(b"x")
+    kept_id, deleted_id = uuid4(), uuid4()
+    tracks = [
+        MagicMock(id=track_id, file_path=str(audio), duration_seconds=30.0)
+        for track_id in (kept_id, deleted_id)
+    ]
+    first_analyses = [MagicMock(track_id=track_id, acoustid=None) for track_id in (kept_id, deleted_id)]
+    reloaded = MagicMock(track_id=kept_id, acoustid=None)
+
+    db = MagicMock()
+    db.execute.side_effect = [scalars(tracks), scalars(first_analyses), scalars([reloaded])]
+    db.scalars.return_value = [kept_id]
+    db.commit.side_effect = [StaleDataError(), None]
+    session_maker = MagicMock()
+    session_maker.return_value.__enter__.return_value = db
+    app_settings = MagicMock(community_cache_enabled=False, community_cache_contribute=False)
+
+    with (
+        patch("app.db.session.sync_session_maker", session_maker),
+        patch("app.services.analysis.extract_embeddings", return_value=[[0.1], [0.2]]),
+        patch("app.services.app_settings.get_app_settings_service") as settings_service,
+        patch("app.services.embedding_store.publish_embedding_updates") as publish,
+    ):
+        settings_service.return_value.get.return_value = app_settings
+        results = run_embedding_batch([str(kept_id), str(deleted_id)])
+
+    assert results[str(kept_id)]["status"] == "success"
+    assert results[str(deleted_id)] == {"status": "skipped", "reason": "track_deleted"}
+    assert reloaded.embedding == [0.1]
+    assert db.commit.call_count == 2
+    publish.assert_called_once_with([str(kept_id)])
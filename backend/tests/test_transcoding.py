@@ -0,0 +1,120 @@
+"""Tests for the transcode cache and ffmpeg invocation."""
+
+import os
+import sys
+from uuid import uuid4
+
+import pytest
+
+from app.services import transcoding
+from app.services.transcoding import TRANSCODE_FORMATS, TranscodeCache, ffmpeg_command
+
+
+def test_ffmpeg_command_seeks_and_encodes(tmp_path):
+    cmd = ffmpeg_command(tmp_path / "a.flac", TRANSCODE_FORMATS["opus"], 96, start=12.5)
+
+    assert cmd[cmd.index("-ss") + 1] == "12.500"
+    assert cmd.index("-ss") < cmd.index("-i")  # Input seek
+    assert cmd[cmd.index("-c:a") + 1] == "libopus"
+    assert cmd[cmd.index("-b:a") + 1] == "96k"
+    assert cmd[-1] == "pipe:1"
+
+
+def test_entry_changes_with_source_and_settings(tmp_path):
+    source = tmp_path / "a.flac"
+    source.write_bytes(b"x" * 10)
+    cache = TranscodeCache(tmp_path / "cache", max_bytes=100)
+    track_id = uuid4()
+
+    entry = cache.entry(track_id, source, "mp3", 192)
+
+    assert entry.suffix == ".mp3"
+    assert cache.entry(track_id, source, "mp3", 128) != entry
+    source.write_bytes(b"y" * 11)
+    assert cache.entry(track_id, source, "mp3", 192) != entry
+
+
+def test_trim_removes_least_recently_used(tmp_path):
+    cache = TranscodeCache(tmp_path, max_bytes=25)
+    files = []
+    for i in range(3):
+        file = tmp_path / "ab" / f"{i}.mp3"
+        file.parent.mkdir(exist_ok=True)
+        file.write_bytes(b"x" * 10)
+        os.utime(file, (1000 + i, 1000 + i))
+        files.append(file)
+
+    assert cache.lookup(files[0])  # Used most recently now
+    cache.trim()
+
+    assert files[0].exists()
+    assert not files[1].exists()
+    assert files[2].exists()
+
+
+@pytest.fixture
+def fake_ffmpeg(monkeypatch):
+    """Replace ffmpeg with a process that writes fixed bytes (or fails)."""
+    def use(output: bytes = b"encoded", returncode: int = 0):
+        script = f"import sys; sys.stdout.buffer.write({output!r}); sys.exit({returncode})"
+        monkeypatch.setattr(transcoding, "ffmpeg_command", lambda *args: [sys.executable, "-c", script])
+
+    return use
+
+
+async def test_pipe_transcode_streams_and_caches(tmp_path, fake_ffmpeg):
+    fake_ffmpeg(b"encoded")
+    source = tmp_path / "a.flac"
+    source.write_bytes(b"x")
+    cache = TranscodeCache(tmp_path / "cache", max_bytes=1000)
+    entry = cache.entry(uuid4(), source, "opus", 128)
+
+    chunks = [c async for c in transcoding._pipe_transcode(cache, source, "opus", 128, 0.0, entry)]
+
+    assert b"".join(chunks) == b"encoded"
+    assert entry.read_bytes() == b"encoded"
+    assert [f.name for f in entry.parent.iterdir()] == [entry.name]  # No temp left
+
+
+async def test_pipe_transcode_failure_is_not_cached(tmp_path, fake_ffmpeg):
+    fake_ffmpeg(b"partial", returncode=1)
+    source = tmp_path / "a.flac"
+    source.write_bytes(b"x")
+    cache = TranscodeCache(tmp_path / "cache", max_bytes=1000)
+    entry = cache.entry(uuid4(), source, "opus", 128)
+
+    chunks = [c async for c in transcoding._pipe_transcode(cache, source, "opus", 128, 0.0, entry)]
+
+    assert b"".join(chunks) == b"partial"
+    assert list(entry.parent.iterdir()) == []
+
+
+async def test_pretranscode_fills_cache(tmp_path, fake_ffmpeg):
+    fake_ffmpeg(b"encoded")
+    source = tmp_path / "a.flac"
+    source.write_bytes(b"x")
+    cache = TranscodeCache(tmp_path / "cache", max_bytes=1000)
+    track_id = uuid4()
+
+    await cache.pretranscode(track_id, source, "mp3", 192)
+
+    entry = cache.entry(track_id, source, "mp3", 192)
+    assert entry.read_bytes() == b"encoded"
+    assert cache._pending == set()
+
+
+async def test_pretranscode_failure_can_be_retried(tmp_path, fake_ffmpeg):
+    source = tmp_path / "a.flac"
+    source.write_bytes(b"x")
+    cache = TranscodeCache(tmp_path / "cache", max_bytes=1000)
+    track_id = uuid4()
+    entry = cache.entry(track_id, source, "mp3", 192)
+
+    fake_ffmpeg(b"", returncode=1)
+    await cache.pretranscode(track_id, source, "mp3", 192)
+    assert not entry.exists()
+    assert cache._pending == set()
+
+    fake_ffmpeg(b"encoded")
+    await cache.pretranscode(track_id, source, "mp3", 192)
+    assert entry.read_bytes() == b"encoded"
@@ -1250,6 +1250,7 @@ export interface PlaylistDetail {
   is_wishlist: boolean;
   generation_prompt: string | null;
   tracks: PlaylistTrack[];
+  next_cursor?: string | null;
   created_at: string;
   updated_at: string;
 }
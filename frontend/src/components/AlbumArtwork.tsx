@@ -6,13 +6,13 @@
  */
 import { useEffect, useRef, useState } from 'react';
 import { Disc } from 'lucide-react';
-import { useArtworkStore } from '../stores/artworkStore';
+import { useArtworkStore, type ArtworkSize } from '../stores/artworkStore';
 
 interface AlbumArtworkProps {
   artist: string | null | undefined;
   album: string | null | undefined;
   trackId?: string;
-  size?: 'thumb' | 'full';
+  size?: ArtworkSize;
   className?: string;
   // For backwards compatibility - if provided, use this as fallback
   fallbackTrackId?: string;
@@ -112,7 +112,7 @@ export function AlbumArtwork({
 export function useAlbumArtworkUrl(
   artist: string | null | undefined,
   album: string | null | undefined,
-  size: 'thumb' | 'full' = 'thumb'
+  size: ArtworkSize = 'thumb'
 ): string | null {
   const { requestArtwork, getArtworkUrl } = useArtworkStore();
 
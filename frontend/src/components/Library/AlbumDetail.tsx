@@ -408,7 +408,7 @@ export function AlbumDetail({
               artist={album.artist}
               album={album.name}
               trackId={album.first_track_id}
-              size="full"
+              size="256"
               className="w-full h-full"
             />
           </div>
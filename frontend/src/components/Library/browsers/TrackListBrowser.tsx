@@ -727,7 +727,7 @@ export function TrackListBrowser({
               artist={albumStats.artist}
               album={albumStats.album}
               trackId={albumStats.firstTrackId}
-              size="full"
+              size="256"
               className="w-full h-full"
             />
           </div>
@@ -25,6 +25,9 @@ interface StatusBatchResponse {
 // Artwork status for each album
 type ArtworkStatus = 'unknown' | 'checking' | 'pending' | 'ready' | 'missing';
 
+// Sizes served by /artwork/{hash}/{size}; pick the smallest that covers the tile
+export type ArtworkSize = 'thumb' | 'full' | '64' | '128' | '256' | '512';
+
 interface ArtworkAlbum {
   artist: string;
   album: string;
@@ -50,7 +53,7 @@ interface ArtworkState {
   requestArtwork: (albums: ArtworkAlbum[]) => Promise<void>;
   getStatus: (artist: string, album: string) => ArtworkStatus;
   getHash: (artist: string, album: string) => string | undefined;
-  getArtworkUrl: (artist: string, album: string, size: 'thumb' | 'full') => string | null;
+  getArtworkUrl: (artist: string, album: string, size: ArtworkSize) => string | null;
 
   // Internal polling methods
   startPolling: () => void;
@@ -177,7 +180,7 @@ export const useArtworkStore = create<ArtworkState>((set, get) => ({
     return get().hashes.get(key);
   },
 
-  getArtworkUrl: (artist: string, album: string, size: 'thumb' | 'full'): string | null => {
+  getArtworkUrl: (artist: string, album: string, size: ArtworkSize): string | null => {
     const hash = get().getHash(artist, album);
     if (!hash) return null;
     const status = get().getStatus(artist, album);